@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import Base
 from app.config import settings
-from app.models import StockPrice, OptionsChain, MarketEvent  # Import all models
+from app.models import Symbol, StockPrice, OptionsChain, OptionsSnapshot, OptionsSnapshotQuote, MarketEvent, PriceCoverage  # Import all models
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,109 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+Databases created earlier with Base.metadata.create_all can be adopted with
+`alembic stamp 0001` before upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _id_column() -> sa.Column:
+    return sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_prices',
+        _id_column(),
+        sa.Column('symbol', sa.String(length=10), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('open', sa.Numeric(10, 2), nullable=False),
+        sa.Column('high', sa.Numeric(10, 2), nullable=False),
+        sa.Column('low', sa.Numeric(10, 2), nullable=False),
+        sa.Column('close', sa.Numeric(10, 2), nullable=False),
+        sa.Column('volume', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('symbol', 'timestamp', name='uq_stock_prices_symbol_timestamp'),
+    )
+    op.create_index('ix_stock_prices_id', 'stock_prices', ['id'])
+    op.create_index('ix_stock_prices_symbol', 'stock_prices', ['symbol'])
+    op.create_index('ix_stock_prices_timestamp', 'stock_prices', ['timestamp'])
+    op.create_index('idx_stock_prices_symbol_timestamp', 'stock_prices', ['symbol', 'timestamp'])
+    
+    op.create_table(
+        'options_chains',
+        _id_column(),
+        sa.Column('underlying_symbol', sa.String(length=10), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expiration_date', sa.Date(), nullable=False),
+        sa.Column('strike', sa.Numeric(10, 2), nullable=False),
+        sa.Column('option_type', sa.String(length=1), nullable=False),
+        sa.Column('bid', sa.Numeric(10, 2), nullable=True),
+        sa.Column('ask', sa.Numeric(10, 2), nullable=True),
+        sa.Column('last', sa.Numeric(10, 2), nullable=True),
+        sa.Column('volume', sa.BigInteger(), nullable=True),
+        sa.Column('open_interest', sa.BigInteger(), nullable=True),
+        sa.Column('implied_volatility', sa.Numeric(6, 4), nullable=True),
+        sa.Column('delta', sa.Numeric(8, 6), nullable=True),
+        sa.Column('gamma', sa.Numeric(10, 8), nullable=True),
+        sa.Column('theta', sa.Numeric(10, 6), nullable=True),
+        sa.Column('vega', sa.Numeric(10, 6), nullable=True),
+        sa.Column('underlying_price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.CheckConstraint("option_type IN ('C', 'P')", name='chk_option_type'),
+        sa.UniqueConstraint(
+            'underlying_symbol', 'timestamp', 'expiration_date', 'strike', 'option_type',
+            name='uq_options_chains_unique',
+        ),
+    )
+    op.create_index('ix_options_chains_id', 'options_chains', ['id'])
+    op.create_index('ix_options_chains_underlying_symbol', 'options_chains', ['underlying_symbol'])
+    op.create_index('ix_options_chains_timestamp', 'options_chains', ['timestamp'])
+    op.create_index('ix_options_chains_expiration_date', 'options_chains', ['expiration_date'])
+    op.create_index('idx_options_chains_underlying_timestamp', 'options_chains', ['underlying_symbol', 'timestamp'])
+    op.create_index('idx_options_chains_expiration_strike', 'options_chains', ['expiration_date', 'strike'])
+    
+    op.create_table(
+        'market_events',
+        _id_column(),
+        sa.Column('symbol', sa.String(length=10), nullable=False),
+        sa.Column('event_date', sa.Date(), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_market_events_id', 'market_events', ['id'])
+    op.create_index('ix_market_events_symbol', 'market_events', ['symbol'])
+    op.create_index('ix_market_events_event_date', 'market_events', ['event_date'])
+    op.create_index('idx_market_events_symbol_date', 'market_events', ['symbol', 'event_date'])
+    
+    op.create_table(
+        'price_coverage',
+        _id_column(),
+        sa.Column('symbol', sa.String(length=10), nullable=False),
+        sa.Column('interval', sa.String(length=10), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('symbol', 'interval', 'start_date', name='uq_price_coverage_symbol_interval_start'),
+    )
+    op.create_index('ix_price_coverage_id', 'price_coverage', ['id'])
+    op.create_index('idx_price_coverage_symbol_interval', 'price_coverage', ['symbol', 'interval'])
+
+
+def downgrade() -> None:
+    op.drop_table('price_coverage')
+    op.drop_table('market_events')
+    op.drop_table('options_chains')
+    op.drop_table('stock_prices')
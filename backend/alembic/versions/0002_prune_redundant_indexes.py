@@ -0,0 +1,53 @@
+"""Prune indexes covered by primary keys and composite keys
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:10:00.000000
+
+Every dropped index is either a duplicate of the primary key index or a
+leading prefix of a unique constraint / composite index that stays, so the
+planner can answer the same lookups from the remaining index:
+
+- ix_*_id                                  -> primary key
+- ix_stock_prices_symbol                   -> uq_stock_prices_symbol_timestamp
+- idx_stock_prices_symbol_timestamp        -> uq_stock_prices_symbol_timestamp
+- ix_options_chains_underlying_symbol      -> uq_options_chains_unique
+- idx_options_chains_underlying_timestamp  -> uq_options_chains_unique
+- ix_options_chains_expiration_date        -> idx_options_chains_expiration_strike
+- ix_market_events_symbol                  -> idx_market_events_symbol_date
+- idx_price_coverage_symbol_interval       -> uq_price_coverage_symbol_interval_start
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+REDUNDANT_INDEXES = [
+    ('ix_stock_prices_id', 'stock_prices', ['id']),
+    ('ix_stock_prices_symbol', 'stock_prices', ['symbol']),
+    ('idx_stock_prices_symbol_timestamp', 'stock_prices', ['symbol', 'timestamp']),
+    ('ix_options_chains_id', 'options_chains', ['id']),
+    ('ix_options_chains_underlying_symbol', 'options_chains', ['underlying_symbol']),
+    ('idx_options_chains_underlying_timestamp', 'options_chains', ['underlying_symbol', 'timestamp']),
+    ('ix_options_chains_expiration_date', 'options_chains', ['expiration_date']),
+    ('ix_market_events_id', 'market_events', ['id']),
+    ('ix_market_events_symbol', 'market_events', ['symbol']),
+    ('ix_price_coverage_id', 'price_coverage', ['id']),
+    ('idx_price_coverage_symbol_interval', 'price_coverage', ['symbol', 'interval']),
+]
+
+
+def upgrade() -> None:
+    for name, table, _ in REDUNDANT_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in REDUNDANT_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
@@ -0,0 +1,126 @@
+"""TimescaleDB hypertables, compression and continuous aggregates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:20:00.000000
+
+Runs only on PostgreSQL with the timescaledb extension installed in the
+database (CREATE EXTENSION timescaledb); everywhere else it is a no-op, so
+plain PostgreSQL and SQLite keep working unchanged.
+
+- stock_prices and options_chains become hypertables on timestamp. Unique
+  indexes on a hypertable must include the partitioning column, so the
+  surrogate id primary key is dropped; id keeps its sequence default and the
+  natural unique keys identify rows.
+- Chunks older than the table's compress-after interval are compressed,
+  segmented by symbol. Upserts into compressed chunks need TimescaleDB 2.11+.
+- stock_prices_daily and stock_prices_weekly are real-time continuous
+  aggregates (first/max/min/last/sum per symbol). Their refresh policy has
+  no start offset so backfilled history is picked up through the
+  invalidation log on the next run.
+
+Downgrade removes the aggregates and compression; the tables stay
+hypertables because TimescaleDB cannot convert them back in place.
+"""
+from alembic import op
+import sqlalchemy as sa
+import logging
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.migration.timescaledb")
+
+# table -> (chunk interval, compress after, segmentby, orderby)
+HYPERTABLES = {
+    'stock_prices': ('30 days', '90 days', 'symbol', 'timestamp DESC'),
+    'options_chains': (
+        '7 days',
+        '30 days',
+        'underlying_symbol',
+        'timestamp DESC, expiration_date, strike, option_type',
+    ),
+}
+
+# view -> time_bucket width
+CONTINUOUS_AGGREGATES = {
+    'stock_prices_daily': '1 day',
+    'stock_prices_weekly': '1 week',
+}
+
+
+def _timescale_installed() -> bool:
+    context = op.get_context()
+    if context.dialect.name != 'postgresql':
+        return False
+    if context.as_sql:
+        # Offline (--sql) scripts cannot probe the database; emit the Timescale DDL
+        logger.info("offline mode: assuming timescaledb is installed")
+        return True
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    ).scalar() is not None
+
+
+def upgrade() -> None:
+    if not _timescale_installed():
+        logger.info("timescaledb extension not installed; skipping hypertable migration")
+        return
+    
+    for table, (chunk_interval, compress_after, segmentby, orderby) in HYPERTABLES.items():
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey")
+        op.execute(
+            f"SELECT create_hypertable('{table}', 'timestamp', "
+            f"chunk_time_interval => INTERVAL '{chunk_interval}', "
+            f"create_default_indexes => FALSE, migrate_data => TRUE, if_not_exists => TRUE)"
+        )
+        op.execute(
+            f"ALTER TABLE {table} SET (timescaledb.compress, "
+            f"timescaledb.compress_segmentby = '{segmentby}', "
+            f"timescaledb.compress_orderby = '{orderby}')"
+        )
+        op.execute(f"SELECT add_compression_policy('{table}', INTERVAL '{compress_after}', if_not_exists => TRUE)")
+    
+    for view, width in CONTINUOUS_AGGREGATES.items():
+        op.execute(
+            f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT symbol,
+                   time_bucket(INTERVAL '{width}', timestamp) AS bucket,
+                   first(open, timestamp) AS open,
+                   max(high) AS high,
+                   min(low) AS low,
+                   last(close, timestamp) AS close,
+                   sum(volume) AS volume
+            FROM stock_prices
+            GROUP BY symbol, bucket
+            WITH NO DATA
+            """
+        )
+        op.execute(
+            f"SELECT add_continuous_aggregate_policy('{view}', start_offset => NULL, "
+            f"end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE)"
+        )
+    
+    # refresh_continuous_aggregate cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for view in CONTINUOUS_AGGREGATES:
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def downgrade() -> None:
+    if not _timescale_installed():
+        return
+    
+    for view in CONTINUOUS_AGGREGATES:
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+    
+    for table in HYPERTABLES:
+        op.execute(f"SELECT remove_compression_policy('{table}', if_exists => TRUE)")
+        op.execute(f"SELECT decompress_chunk(c, if_compressed => TRUE) FROM show_chunks('{table}') c")
+        op.execute(f"ALTER TABLE {table} SET (timescaledb.compress = false)")
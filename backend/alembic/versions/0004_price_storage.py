@@ -0,0 +1,220 @@
+"""Convert price and Greek columns to the PRICE_STORAGE mode
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 10:00:00.000000
+
+PRICE_STORAGE selects how prices are stored:
+
+- numeric: NUMERIC(10,2) prices and NUMERIC Greeks (the original schema)
+- double:  DOUBLE PRECISION prices and Greeks
+- scaled:  BIGINT prices in 1/10000 units, DOUBLE PRECISION Greeks
+
+Each column is converted from whatever type it currently has, so switching
+modes later is `alembic downgrade 0003` (back to numeric) followed by
+`alembic upgrade head` with the new setting. On PostgreSQL each table is
+rewritten once. TimescaleDB compression and the continuous aggregates from
+0003 depend on the column types, so they are taken down around the rewrite
+and restored afterwards.
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.config import settings
+import logging
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.migration.price_storage")
+
+PRICE_SCALE = 10_000
+
+# table -> [(column, numeric precision, numeric scale)]
+PRICE_COLUMNS = {
+    'stock_prices': [('open', 10, 2), ('high', 10, 2), ('low', 10, 2), ('close', 10, 2)],
+    'options_chains': [('strike', 10, 2), ('bid', 10, 2), ('ask', 10, 2), ('last', 10, 2), ('underlying_price', 10, 2)],
+}
+GREEK_COLUMNS = {
+    'options_chains': [
+        ('implied_volatility', 6, 4), ('delta', 8, 6), ('gamma', 10, 8), ('theta', 10, 6), ('vega', 10, 6),
+    ],
+}
+
+# Frozen copy of the 0003 TimescaleDB settings restored after the rewrite
+COMPRESSION = {
+    'stock_prices': ('90 days', 'symbol', 'timestamp DESC'),
+    'options_chains': ('30 days', 'underlying_symbol', 'timestamp DESC, expiration_date, strike, option_type'),
+}
+CONTINUOUS_AGGREGATES = {
+    'stock_prices_daily': '1 day',
+    'stock_prices_weekly': '1 week',
+}
+
+
+def _column_modes(table: str) -> dict:
+    """Current storage mode of each column of a table."""
+    modes = {}
+    for column in sa.inspect(op.get_bind()).get_columns(table):
+        column_type = column['type']
+        if isinstance(column_type, sa.Float):
+            modes[column['name']] = 'double'
+        elif isinstance(column_type, sa.Integer):
+            modes[column['name']] = 'scaled'
+        elif isinstance(column_type, sa.Numeric):
+            modes[column['name']] = 'numeric'
+    return modes
+
+
+def _conversions(target: str):
+    """Yield (table, [(column, precision, scale, current mode, target mode)]) needing a change."""
+    for table in PRICE_COLUMNS:
+        modes = _column_modes(table)
+        changes = []
+        for column, precision, scale in PRICE_COLUMNS.get(table, []):
+            if modes.get(column) != target:
+                changes.append((column, precision, scale, modes.get(column), target))
+        greek_target = 'numeric' if target == 'numeric' else 'double'
+        for column, precision, scale in GREEK_COLUMNS.get(table, []):
+            if modes.get(column) != greek_target:
+                changes.append((column, precision, scale, modes.get(column), greek_target))
+        if changes:
+            yield table, changes
+
+
+def _sql_type(mode: str, precision: int, scale: int) -> str:
+    if mode == 'scaled':
+        return 'BIGINT'
+    if mode == 'double':
+        return 'DOUBLE PRECISION'
+    return f'NUMERIC({precision}, {scale})'
+
+
+def _sa_type(mode: str, precision: int, scale: int):
+    if mode == 'scaled':
+        return sa.BigInteger()
+    if mode == 'double':
+        return sa.Double()
+    return sa.Numeric(precision, scale)
+
+
+def _timescale_installed() -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    ).scalar() is not None
+
+
+def _compressed_tables(tables) -> list:
+    rows = op.get_bind().execute(sa.text(
+        "SELECT hypertable_name FROM timescaledb_information.hypertables WHERE compression_enabled"
+    )).scalars().all()
+    return [table for table in tables if table in rows]
+
+
+def _existing_aggregates() -> list:
+    bind = op.get_bind()
+    return [
+        view for view in CONTINUOUS_AGGREGATES
+        if bind.execute(sa.text("SELECT to_regclass(:name)"), {"name": view}).scalar() is not None
+    ]
+
+
+def _convert_postgresql(conversions) -> None:
+    tables = [table for table, _ in conversions]
+    timescale = _timescale_installed()
+    compressed = _compressed_tables(tables) if timescale else []
+    aggregates = _existing_aggregates() if timescale and 'stock_prices' in tables else []
+
+    for view in aggregates:
+        op.execute(f"DROP MATERIALIZED VIEW {view}")
+    for table in compressed:
+        op.execute(f"SELECT remove_compression_policy('{table}', if_exists => TRUE)")
+        op.execute(f"SELECT decompress_chunk(c, if_compressed => TRUE) FROM show_chunks('{table}') c")
+        op.execute(f"ALTER TABLE {table} SET (timescaledb.compress = false)")
+
+    for table, changes in conversions:
+        clauses = []
+        for column, precision, scale, current, target in changes:
+            value = f'({column} / {PRICE_SCALE}.0)' if current == 'scaled' else column
+            if target == 'scaled':
+                using = f'round({value} * {PRICE_SCALE})::BIGINT'
+            else:
+                using = f'({value})::{_sql_type(target, precision, scale)}'
+            clauses.append(f'ALTER COLUMN {column} TYPE {_sql_type(target, precision, scale)} USING {using}')
+        op.execute(f"ALTER TABLE {table} " + ", ".join(clauses))
+
+    for table in compressed:
+        compress_after, segmentby, orderby = COMPRESSION[table]
+        op.execute(
+            f"ALTER TABLE {table} SET (timescaledb.compress, "
+            f"timescaledb.compress_segmentby = '{segmentby}', "
+            f"timescaledb.compress_orderby = '{orderby}')"
+        )
+        op.execute(f"SELECT add_compression_policy('{table}', INTERVAL '{compress_after}', if_not_exists => TRUE)")
+
+    for view in aggregates:
+        op.execute(
+            f"""
+            CREATE MATERIALIZED VIEW {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT symbol,
+                   time_bucket(INTERVAL '{CONTINUOUS_AGGREGATES[view]}', timestamp) AS bucket,
+                   first(open, timestamp) AS open,
+                   max(high) AS high,
+                   min(low) AS low,
+                   last(close, timestamp) AS close,
+                   sum(volume) AS volume
+            FROM stock_prices
+            GROUP BY symbol, bucket
+            WITH NO DATA
+            """
+        )
+        op.execute(
+            f"SELECT add_continuous_aggregate_policy('{view}', start_offset => NULL, "
+            f"end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE)"
+        )
+    if aggregates:
+        with op.get_context().autocommit_block():
+            for view in aggregates:
+                op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def _convert_batch(conversions) -> None:
+    """SQLite and others: rebuild each table; scale values while they are still REAL."""
+    for table, changes in conversions:
+        for column, _, _, current, target in changes:
+            if target == 'scaled' and current != 'scaled':
+                op.execute(f"UPDATE {table} SET {column} = CAST(round({column} * {PRICE_SCALE}) AS INTEGER)")
+        with op.batch_alter_table(table) as batch:
+            for column, precision, scale, _, target in changes:
+                batch.alter_column(column, type_=_sa_type(target, precision, scale))
+        for column, _, _, current, target in changes:
+            if current == 'scaled' and target != 'scaled':
+                op.execute(f"UPDATE {table} SET {column} = {column} / {PRICE_SCALE}.0")
+
+
+def _convert(target: str) -> None:
+    if op.get_context().as_sql:
+        raise RuntimeError("Revision 0004 inspects column types and cannot run in offline (--sql) mode")
+
+    conversions = list(_conversions(target))
+    if not conversions:
+        logger.info(f"price columns already stored as {target}")
+        return
+
+    logger.info(f"converting price columns to {target}: {', '.join(table for table, _ in conversions)}")
+    if op.get_bind().dialect.name == 'postgresql':
+        _convert_postgresql(conversions)
+    else:
+        _convert_batch(conversions)
+
+
+def upgrade() -> None:
+    _convert(settings.PRICE_STORAGE)
+
+
+def downgrade() -> None:
+    _convert('numeric')
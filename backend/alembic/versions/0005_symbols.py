@@ -0,0 +1,192 @@
+"""Symbols dimension table and integer symbol_id keys
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 10:40:00.000000
+
+Ticker strings move into a symbols table; stock_prices, options_chains and
+market_events reference it through an integer symbol_id. The composite keys
+shrink from a VARCHAR(10) prefix to a 4-byte one, and the hot range scans
+compare integers. price_coverage keeps its string symbol: it is tiny and
+keyed by (symbol, interval) for the fetch planner.
+
+Existing rows are backfilled from the distinct symbols already stored.
+With TimescaleDB the continuous aggregates and compression settings from
+0003 reference the old column, so they are rebuilt on symbol_id.
+"""
+from alembic import op
+import sqlalchemy as sa
+import logging
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.migration.symbols")
+
+# table -> (string column, foreign key, key kind, key name, key columns after the symbol)
+SYMBOL_TABLES = {
+    'stock_prices': (
+        'symbol', 'fk_stock_prices_symbol_id', 'unique', 'uq_stock_prices_symbol_timestamp', ['timestamp'],
+    ),
+    'options_chains': (
+        'underlying_symbol', 'fk_options_chains_symbol_id', 'unique', 'uq_options_chains_unique',
+        ['timestamp', 'expiration_date', 'strike', 'option_type'],
+    ),
+    'market_events': (
+        'symbol', 'fk_market_events_symbol_id', 'index', 'idx_market_events_symbol_date', ['event_date'],
+    ),
+}
+
+# Frozen copy of the 0003 TimescaleDB settings: table -> (compress after, orderby)
+COMPRESSION = {
+    'stock_prices': ('90 days', 'timestamp DESC'),
+    'options_chains': ('30 days', 'timestamp DESC, expiration_date, strike, option_type'),
+}
+CONTINUOUS_AGGREGATES = {
+    'stock_prices_daily': '1 day',
+    'stock_prices_weekly': '1 week',
+}
+
+
+def _timescale_installed() -> bool:
+    context = op.get_context()
+    if context.dialect.name != 'postgresql':
+        return False
+    if context.as_sql:
+        logger.info("offline mode: assuming timescaledb is installed")
+        return True
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    ).scalar() is not None
+
+
+def _drop_timescale_objects() -> None:
+    """Remove the aggregates and compression that reference the symbol column."""
+    for view in CONTINUOUS_AGGREGATES:
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+    for table in COMPRESSION:
+        op.execute(f"SELECT remove_compression_policy('{table}', if_exists => TRUE)")
+        op.execute(f"SELECT decompress_chunk(c, if_compressed => TRUE) FROM show_chunks('{table}') c")
+        op.execute(f"ALTER TABLE {table} SET (timescaledb.compress = false)")
+
+
+def _create_timescale_objects(columns: dict) -> None:
+    """
+    Restore the 0003 compression and aggregates.
+
+    Args:
+        columns: table -> symbol column to segment and group by
+    """
+    for table, (compress_after, orderby) in COMPRESSION.items():
+        op.execute(
+            f"ALTER TABLE {table} SET (timescaledb.compress, "
+            f"timescaledb.compress_segmentby = '{columns[table]}', "
+            f"timescaledb.compress_orderby = '{orderby}')"
+        )
+        op.execute(f"SELECT add_compression_policy('{table}', INTERVAL '{compress_after}', if_not_exists => TRUE)")
+
+    symbol = columns['stock_prices']
+    for view, width in CONTINUOUS_AGGREGATES.items():
+        op.execute(
+            f"""
+            CREATE MATERIALIZED VIEW {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT {symbol},
+                   time_bucket(INTERVAL '{width}', timestamp) AS bucket,
+                   first(open, timestamp) AS open,
+                   max(high) AS high,
+                   min(low) AS low,
+                   last(close, timestamp) AS close,
+                   sum(volume) AS volume
+            FROM stock_prices
+            GROUP BY {symbol}, bucket
+            WITH NO DATA
+            """
+        )
+        op.execute(
+            f"SELECT add_continuous_aggregate_policy('{view}', start_offset => NULL, "
+            f"end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE)"
+        )
+
+    with op.get_context().autocommit_block():
+        for view in CONTINUOUS_AGGREGATES:
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def _swap_key(batch, kind: str, name: str, columns: list) -> None:
+    if kind == 'unique':
+        batch.drop_constraint(name, type_='unique')
+        batch.create_unique_constraint(name, columns)
+    else:
+        batch.drop_index(name)
+        batch.create_index(name, columns)
+
+
+def upgrade() -> None:
+    timescale = _timescale_installed()
+    postgresql = op.get_context().dialect.name == 'postgresql'
+
+    op.create_table(
+        'symbols',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('symbol', sa.String(length=10), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('symbol', name='uq_symbols_symbol'),
+    )
+    op.execute(
+        "INSERT INTO symbols (symbol) "
+        + " UNION ".join(f"SELECT {column} FROM {table}" for table, (column, *_) in SYMBOL_TABLES.items())
+    )
+
+    if timescale:
+        _drop_timescale_objects()
+
+    for table, (column, fk_name, kind, key_name, key_columns) in SYMBOL_TABLES.items():
+        op.add_column(table, sa.Column('symbol_id', sa.Integer(), nullable=True))
+        if postgresql:
+            op.execute(f"UPDATE {table} t SET symbol_id = s.id FROM symbols s WHERE s.symbol = t.{column}")
+        else:
+            op.execute(
+                f"UPDATE {table} SET symbol_id = "
+                f"(SELECT s.id FROM symbols s WHERE s.symbol = {table}.{column})"
+            )
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column('symbol_id', existing_type=sa.Integer(), nullable=False)
+            batch.create_foreign_key(fk_name, 'symbols', ['symbol_id'], ['id'])
+            _swap_key(batch, kind, key_name, ['symbol_id'] + key_columns)
+            batch.drop_column(column)
+
+    if timescale:
+        _create_timescale_objects({'stock_prices': 'symbol_id', 'options_chains': 'symbol_id'})
+
+
+def downgrade() -> None:
+    timescale = _timescale_installed()
+    postgresql = op.get_context().dialect.name == 'postgresql'
+
+    if timescale:
+        _drop_timescale_objects()
+
+    for table, (column, fk_name, kind, key_name, key_columns) in SYMBOL_TABLES.items():
+        op.add_column(table, sa.Column(column, sa.String(length=10), nullable=True))
+        if postgresql:
+            op.execute(f"UPDATE {table} t SET {column} = s.symbol FROM symbols s WHERE s.id = t.symbol_id")
+        else:
+            op.execute(
+                f"UPDATE {table} SET {column} = "
+                f"(SELECT s.symbol FROM symbols s WHERE s.id = {table}.symbol_id)"
+            )
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(column, existing_type=sa.String(length=10), nullable=False)
+            _swap_key(batch, kind, key_name, [column] + key_columns)
+            batch.drop_constraint(fk_name, type_='foreignkey')
+            batch.drop_column('symbol_id')
+
+    op.drop_table('symbols')
+
+    if timescale:
+        _create_timescale_objects({'stock_prices': 'symbol', 'options_chains': 'underlying_symbol'})
@@ -0,0 +1,84 @@
+"""Delta-encoded options snapshot store
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 11:20:00.000000
+
+Tables behind OPTIONS_SNAPSHOT_STORE=delta. options_snapshots holds one
+header row per captured chain; options_snapshot_quotes holds every contract
+of a keyframe and only the changed, added or removed contracts of the
+snapshots between keyframes. options_chains is left as it is.
+
+Price and Greek columns use the PRICE_STORAGE mode in effect when the
+revision runs, as 0004 leaves the other tables.
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def _price_column(name: str, nullable: bool) -> sa.Column:
+    if settings.PRICE_STORAGE == 'scaled':
+        column_type = sa.BigInteger()
+    elif settings.PRICE_STORAGE == 'double':
+        column_type = sa.Double()
+    else:
+        column_type = sa.Numeric(10, 2)
+    return sa.Column(name, column_type, nullable=nullable)
+
+
+def _greek_column(name: str, precision: int, scale: int) -> sa.Column:
+    column_type = sa.Numeric(precision, scale) if settings.PRICE_STORAGE == 'numeric' else sa.Double()
+    return sa.Column(name, column_type, nullable=True)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'options_snapshots',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True),
+        sa.Column('symbol_id', sa.Integer(), sa.ForeignKey('symbols.id', name='fk_options_snapshots_symbol_id'), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            'keyframe_id', sa.BigInteger(),
+            sa.ForeignKey('options_snapshots.id', name='fk_options_snapshots_keyframe_id'), nullable=True,
+        ),
+        _price_column('underlying_price', nullable=False),
+        sa.Column('contracts', sa.Integer(), nullable=False),
+        sa.Column('changed', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('symbol_id', 'timestamp', name='uq_options_snapshots_symbol_timestamp'),
+    )
+    op.create_index('idx_options_snapshots_keyframe_id', 'options_snapshots', ['keyframe_id'])
+    op.create_table(
+        'options_snapshot_quotes',
+        sa.Column(
+            'snapshot_id', sa.BigInteger(),
+            sa.ForeignKey('options_snapshots.id', name='fk_options_snapshot_quotes_snapshot_id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('expiration_date', sa.Date(), nullable=False),
+        _price_column('strike', nullable=False),
+        sa.Column('option_type', sa.String(length=1), nullable=False),
+        _price_column('bid', nullable=True),
+        _price_column('ask', nullable=True),
+        _price_column('last', nullable=True),
+        sa.Column('volume', sa.BigInteger(), nullable=True),
+        sa.Column('open_interest', sa.BigInteger(), nullable=True),
+        _greek_column('implied_volatility', 6, 4),
+        sa.Column('removed', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.CheckConstraint("option_type IN ('C', 'P')", name='chk_options_snapshot_quotes_option_type'),
+        sa.PrimaryKeyConstraint('snapshot_id', 'expiration_date', 'strike', 'option_type', name='pk_options_snapshot_quotes'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('options_snapshot_quotes')
+    op.drop_index('idx_options_snapshots_keyframe_id', table_name='options_snapshots')
+    op.drop_table('options_snapshots')
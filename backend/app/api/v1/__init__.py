@@ -1,8 +1,9 @@
 """API v1 routes."""
 from fastapi import APIRouter
-from app.api.v1 import market_data
+from app.api.v1 import backtests, market_data
 
 api_router = APIRouter()
 
 api_router.include_router(market_data.router, prefix="/market-data", tags=["market-data"])
+api_router.include_router(backtests.router, prefix="/backtest", tags=["backtest"])
 
@@ -0,0 +1,150 @@
+"""Backtest job API endpoints."""
+import asyncio
+from typing import AsyncIterator, Dict
+import orjson
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.schemas.backtest import BacktestJobRequest, BacktestJobResponse, SweepJobRequest
+from app.services.backtest_jobs import BacktestJobService
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Job statuses after which a job no longer changes
+FINISHED_STATUSES = ("completed", "failed")
+
+
+@router.post("/run", response_model=BacktestJobResponse, status_code=202)
+async def run_backtest(request: BacktestJobRequest):
+    """
+    Queue a backtest of a strategy definition.
+    
+    Poll `/jobs/{job_id}` or stream `/jobs/{job_id}/events` (SSE) or
+    `/jobs/{job_id}/ws` (WebSocket) for progress; the result is served by
+    `/results/{job_id}`. An identical request over unchanged data is answered
+    from the result cache.
+    
+    - **strategy**: Strategy definition (see OPTIONS_BACKTESTING_PLAN.md)
+    - **start_date** / **end_date**: Date range of the bars
+    - **initial_capital**: Starting equity
+    - **source**: 'database' or 'lake' (Parquet data lake)
+    """
+    try:
+        return await run_in_threadpool(BacktestJobService.submit, "backtest", request)
+    except Exception as e:
+        logger.error(f"Error queueing backtest: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error queueing backtest: {str(e)}")
+
+
+@router.post("/sweep", response_model=BacktestJobResponse, status_code=202)
+async def run_sweep(request: SweepJobRequest):
+    """
+    Queue a parameter sweep of a strategy definition.
+    
+    Progress counts finished runs; the result lists every run's parameters
+    and metrics.
+    
+    - **sweep**: Parameters to vary, as dotted paths into the strategy
+    - **workers**: Sweep worker processes (default: CPU count)
+    """
+    try:
+        return await run_in_threadpool(BacktestJobService.submit, "sweep", request)
+    except Exception as e:
+        logger.error(f"Error queueing sweep: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error queueing sweep: {str(e)}")
+
+
+@router.get("/jobs/{job_id}", response_model=BacktestJobResponse)
+async def get_backtest_job(job_id: str):
+    """
+    Get status and progress of a backtest or sweep job.
+    
+    - **job_id**: Id returned by `/run` or `/sweep`
+    """
+    job = await run_in_threadpool(BacktestJobService.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Backtest job {job_id} not found")
+    return job
+
+
+@router.get("/results/{job_id}")
+async def get_backtest_result(job_id: str):
+    """
+    Get the result of a finished backtest or sweep job.
+    
+    Returns 409 while the job is still pending or running.
+    
+    - **job_id**: Id returned by `/run` or `/sweep`
+    """
+    job, result = await run_in_threadpool(BacktestJobService.get_result, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Backtest job {job_id} not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Backtest job {job_id} failed: {job.get('error')}")
+    if result is None:
+        raise HTTPException(status_code=409, detail=f"Backtest job {job_id} is {job['status']}")
+    return {"job": BacktestJobResponse.model_validate(job).model_dump(), "result": result}
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_backtest_job(job_id: str):
+    """
+    Stream job progress as server-sent events.
+    
+    Sends a `progress` event with the job status whenever it changes and,
+    once the job has finished, one `result` event with the result (null for
+    failed jobs) before closing.
+    
+    - **job_id**: Id returned by `/run` or `/sweep`
+    """
+    if await run_in_threadpool(BacktestJobService.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Backtest job {job_id} not found")
+    
+    async def events() -> AsyncIterator[bytes]:
+        async for event, payload in _job_updates(job_id):
+            yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.websocket("/jobs/{job_id}/ws")
+async def watch_backtest_job(websocket: WebSocket, job_id: str):
+    """
+    Stream job progress over a WebSocket.
+    
+    Sends {"event": "progress", "data": job} messages whenever the status
+    changes, then {"event": "result", "data": result} and closes.
+    """
+    await websocket.accept()
+    if await run_in_threadpool(BacktestJobService.get_job, job_id) is None:
+        await websocket.close(code=4404, reason=f"Backtest job {job_id} not found")
+        return
+    try:
+        async for event, payload in _job_updates(job_id):
+            await websocket.send_text(orjson.dumps({"event": event, "data": payload}).decode())
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"Client stopped watching backtest job {job_id}")
+
+
+async def _job_updates(job_id: str) -> AsyncIterator[tuple]:
+    """Job snapshots each time they change, then the result once finished."""
+    last = None
+    while True:
+        job, result = await run_in_threadpool(BacktestJobService.get_result, job_id)
+        if job is None:
+            # Dropped from the in-process registry while being watched
+            return
+        snapshot: Dict = jsonable_encoder(BacktestJobResponse.model_validate(job))
+        if snapshot != last:
+            last = snapshot
+            yield "progress", snapshot
+        if snapshot["status"] in FINISHED_STATUSES:
+            yield "result", result
+            return
+        await asyncio.sleep(settings.BACKTEST_JOB_POLL_INTERVAL)
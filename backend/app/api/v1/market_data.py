@@ -1,113 +1,460 @@
 """Market data API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from datetime import date, datetime
-from typing import Optional, List
-from app.database import get_db
-from app.services.market_data_service import MarketDataService
+from datetime import date, datetime, timezone
+from typing import Optional, List, Tuple
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.services.market_data_service import DEFAULT_PAGE_SIZE, MarketDataService
+from app.services.coverage_service import CoverageService
+from app.services.greeks_service import GreeksService
+from app.services.ingestion_service import IngestionService
+from app.services.iv_surface import IVSurfaceService
+from app.services.options_delta_store import OptionsDeltaStore
+from app.services.pagination import InvalidCursor
+from app.services.price_cache import PriceSeriesCache
+from app.services.price_export import MEDIA_TYPES, PriceExportService
+from app.services.provider_cache import provider_cache
+from app.services.resample_service import ResampleService
 from app.schemas.market_data import (
     StockPriceListResponse,
     StockPriceResponse,
     OptionsChainResponse,
     OptionsChainItem,
+    IVSurfacePoint,
+    IVSurfaceResponse,
+    IVSurfaceSlice,
     AvailableDatesResponse,
+    BatchIngestRequest,
+    IngestJobResponse,
 )
-import yfinance as yf
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Database queries and provider calls are synchronous; handlers run them on
+# the threadpool so a slow query or yfinance call never stalls the event loop.
+
+
+def _load_stock_prices(
+    db: Session,
+    symbol: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+) -> Tuple[List[StockPriceResponse], Optional[str], Optional[str]]:
+    """Query stored prices and build response rows plus page cursors (runs on the threadpool)."""
+    next_cursor = prev_cursor = None
+    if limit or cursor:
+        prices, next_cursor, prev_cursor = MarketDataService.get_stock_price_page(
+            db=db,
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit or DEFAULT_PAGE_SIZE,
+            cursor=cursor,
+        )
+    else:
+        prices = MarketDataService.get_stock_prices(
+            db=db,
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+        )
+    rows = [
+        StockPriceResponse(
+            timestamp=price.timestamp,
+            open=price.open,
+            high=price.high,
+            low=price.low,
+            close=price.close,
+            volume=int(price.volume),
+        )
+        for price in prices
+    ]
+    return rows, next_cursor, prev_cursor
+
+
+def _negotiate_price_format(format: Optional[str], accept: Optional[str]) -> str:
+    """Pick the /stocks output format from the format parameter or the Accept header."""
+    if format:
+        return format
+    accept = (accept or "").lower()
+    for name in ("arrow", "csv", "columnar"):
+        if MEDIA_TYPES[name] in accept:
+            return name
+    return "json"
+
+
+def _iter_price_export(encoder, symbol: str, start_date: Optional[date], end_date: Optional[date], limit: Optional[int]):
+    """
+    Stream encoded price chunks from a dedicated session.
+    
+    The request's session is closed once the handler returns, before a
+    streaming body is sent, so the generator owns its own.
+    """
+    db = SessionLocal()
+    try:
+        yield from encoder(PriceExportService.iter_chunks(db, symbol, start_date, end_date, limit))
+    finally:
+        db.close()
+
 
 @router.get("/stocks/{symbol}", response_model=StockPriceListResponse)
 async def get_stock_prices(
     symbol: str,
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
-    limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of records"),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of records (page size)"),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor from a previous page"),
+    format: Optional[str] = Query(None, pattern="^(json|columnar|arrow|csv)$", description="Output format (overrides Accept)"),
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
     Get historical stock price data.
     
+    The format is chosen by `format` or the Accept header:
+    `application/json` (default, row objects),
+    `application/vnd.hawkiz.columnar+json` (parallel arrays, epoch-ms timestamps),
+    `application/vnd.apache.arrow.stream` (Arrow IPC stream) or `text/csv`.
+    Arrow and CSV bodies are streamed chunk by chunk from a server-side cursor.
+    
+    JSON responses are paginated newest first when `limit` or `cursor` is
+    given: pass `next_cursor` to get older rows and `prev_cursor` to get newer
+    ones, with the same filters.
+    
     - **symbol**: Stock symbol (e.g., SPY, AAPL)
     - **start_date**: Start date for data retrieval
     - **end_date**: End date for data retrieval
-    - **limit**: Maximum number of records to return
+    - **limit**: Maximum number of records to return (page size)
+    - **cursor**: Page token from a previous response
+    - **format**: `json`, `columnar`, `arrow` or `csv`
     """
+    output = _negotiate_price_format(format, accept)
+    symbol = symbol.upper()
+    
+    if cursor and output != "json":
+        raise HTTPException(status_code=400, detail="Cursor pagination is only available for JSON output")
+    
+    if output == "arrow" and not PriceExportService.arrow_available():
+        raise HTTPException(status_code=406, detail="Arrow IPC output requires pyarrow on the server")
+    
+    if output in ("arrow", "csv"):
+        encoder = PriceExportService.iter_arrow if output == "arrow" else PriceExportService.iter_csv
+        return StreamingResponse(
+            _iter_price_export(encoder, symbol, start_date, end_date, limit),
+            media_type=MEDIA_TYPES[output],
+        )
+    
     try:
-        prices = MarketDataService.get_stock_prices(
+        if output == "columnar":
+            content = await run_in_threadpool(
+                lambda: PriceExportService.encode_columnar_json(
+                    symbol,
+                    PriceExportService.iter_chunks(db, symbol, start_date, end_date, limit),
+                )
+            )
+            return Response(content=content, media_type=MEDIA_TYPES["columnar"])
+        
+        price_responses, next_cursor, prev_cursor = await run_in_threadpool(
+            _load_stock_prices,
             db=db,
-            symbol=symbol.upper(),
+            symbol=symbol,
             start_date=start_date,
             end_date=end_date,
             limit=limit,
+            cursor=cursor,
         )
         
-        price_responses = [
-            StockPriceResponse(
-                timestamp=price.timestamp,
-                open=price.open,
-                high=price.high,
-                low=price.low,
-                close=price.close,
-                volume=int(price.volume),
-            )
-            for price in prices
-        ]
-        
         return StockPriceListResponse(
-            symbol=symbol.upper(),
+            symbol=symbol,
             data=price_responses,
             count=len(price_responses),
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving stock prices: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving stock prices: {str(e)}")
 
 
+def _load_resampled_prices(
+    db: Session,
+    symbol: str,
+    bucket: Optional[str],
+    max_points: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> bytes:
+    """Aggregate and/or downsample stored prices into columnar JSON (runs on the threadpool)."""
+    if bucket:
+        columns = ResampleService.resample(db, symbol, bucket, start_date, end_date)
+    else:
+        columns = PriceSeriesCache.get_range(db, symbol, start_date, end_date)
+    if max_points:
+        columns = ResampleService.downsample(columns, max_points)
+    return PriceExportService.encode_columnar_json(
+        symbol,
+        [columns],
+        meta={"bucket": bucket, "max_points": max_points},
+    )
+
+
+@router.get("/stocks/{symbol}/resample")
+async def get_resampled_stock_prices(
+    symbol: str,
+    bucket: Optional[str] = Query(None, description="Bucket size (15m, 1h, 1d, 1wk, 1mo, ...)"),
+    max_points: Optional[int] = Query(None, ge=3, le=100000, description="Downsample to at most this many points (LTTB)"),
+    start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get stock prices aggregated into coarser bars and/or downsampled for charts.
+    
+    `bucket` aggregates in the database: open is the first bar's open, high
+    the max, low the min, close the last bar's close and volume the sum.
+    Minute, hour and day buckets are UTC epoch-aligned, weeks start on Monday
+    and months on the 1st; timestamps are bucket starts.
+    
+    `max_points` keeps at most that many bars using Largest-Triangle-Three-
+    Buckets on the close, preserving the visual shape of the series. With
+    both, the aggregated bars are downsampled.
+    
+    The response is columnar JSON (`application/vnd.hawkiz.columnar+json`),
+    oldest first.
+    
+    - **symbol**: Stock symbol
+    - **bucket**: Bucket size
+    - **max_points**: Maximum number of points
+    - **start_date**: Start date for data retrieval
+    - **end_date**: End date for data retrieval
+    """
+    if not bucket and not max_points:
+        raise HTTPException(status_code=400, detail="Specify bucket, max_points or both")
+    
+    symbol = symbol.upper()
+    try:
+        content = await run_in_threadpool(
+            _load_resampled_prices,
+            db=db,
+            symbol=symbol,
+            bucket=bucket,
+            max_points=max_points,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return Response(content=content, media_type=MEDIA_TYPES["columnar"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error resampling stock prices: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error resampling stock prices: {str(e)}")
+
+
 @router.post("/stocks/{symbol}/fetch")
 async def fetch_and_store_stock_data(
     symbol: str,
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
     interval: str = Query("1d", description="Data interval (1d, 1h, etc.)"),
+    loader: str = Query("upsert", pattern="^(upsert|copy)$", description="Storage path (upsert, copy)"),
+    refresh: bool = Query(False, description="Re-fetch the whole window instead of only uncovered ranges"),
     db: Session = Depends(get_db),
 ):
     """
     Fetch stock data from external provider and store in database.
     
+    Only trading-day ranges not already recorded in price coverage are
+    requested from the provider, unless `refresh` is set.
+    
     - **symbol**: Stock symbol
     - **start_date**: Start date for data fetch
     - **end_date**: End date for data fetch (defaults to today)
     - **interval**: Data interval
+    - **loader**: `upsert` for chunked upserts, `copy` for the COPY staging-table loader
+    - **refresh**: Ignore coverage and re-fetch the whole window
     """
     try:
-        prices = MarketDataService.fetch_stock_data(
+        result = await run_in_threadpool(
+            IngestionService.ingest_symbol,
+            db=db,
             symbol=symbol.upper(),
             start_date=start_date,
             end_date=end_date,
             interval=interval,
-        )
-        
-        stored_count = MarketDataService.store_stock_prices(
-            db=db,
-            symbol=symbol.upper(),
-            prices=prices,
+            refresh=refresh,
+            loader=loader,
         )
         
         return {
-            "message": f"Fetched and stored {stored_count} records for {symbol.upper()}",
+            "message": f"Fetched and stored {result['inserted']} records for {symbol.upper()}",
             "symbol": symbol.upper(),
-            "records_stored": stored_count,
-            "total_fetched": len(prices),
+            "records_stored": result["inserted"],
+            "records_updated": result["updated"],
+            "total_fetched": result["total_fetched"],
+            "ranges_fetched": result["ranges"],
         }
     except Exception as e:
         logger.error(f"Error fetching stock data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching stock data: {str(e)}")
 
 
+@router.get("/stocks/{symbol}/coverage")
+async def get_stock_coverage(
+    symbol: str,
+    interval: str = Query("1d", description="Data interval (1d, 1h, etc.)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the date ranges of stored price history for a symbol.
+    
+    - **symbol**: Stock symbol
+    - **interval**: Data interval
+    """
+    try:
+        ranges = await run_in_threadpool(CoverageService.get_ranges, db, symbol.upper(), interval)
+        return {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "ranges": [{"start_date": first, "end_date": last} for first, last in ranges],
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving coverage: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving coverage: {str(e)}")
+
+
+@router.post("/stocks/batch-fetch", response_model=IngestJobResponse, status_code=202)
+async def batch_fetch_stock_data(request: BatchIngestRequest):
+    """
+    Start a background job that fetches and stores data for many symbols.
+    
+    Provider calls run on a bounded worker pool with per-provider concurrency
+    and rate limits. Poll `/ingest-jobs/{job_id}` for per-symbol progress.
+    
+    - **symbols**: Stock symbols to ingest
+    - **start_date**: Start date for data fetch
+    - **end_date**: End date for data fetch (defaults to today)
+    - **interval**: Data interval
+    """
+    try:
+        job = IngestionService.submit(
+            symbols=request.symbols,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            interval=request.interval,
+            refresh=request.refresh,
+        )
+        return job.to_dict()
+    except Exception as e:
+        logger.error(f"Error starting batch ingestion: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error starting batch ingestion: {str(e)}")
+
+
+@router.get("/ingest-jobs/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(job_id: str):
+    """
+    Get status and per-symbol progress of a batch ingestion job.
+    
+    - **job_id**: Id returned by `/stocks/batch-fetch`
+    """
+    job = IngestionService.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+    return job.to_dict()
+
+
+def _load_live_options_chain(
+    db: Session,
+    symbol: str,
+    expiration_date: Optional[date],
+) -> OptionsChainResponse:
+    """Fetch the live chain, persisting it as a snapshot when enabled (runs on the threadpool)."""
+    if settings.STORE_OPTIONS_SNAPSHOTS:
+        timestamp, underlying_price, frame, _ = MarketDataService.capture_options_snapshot(
+            db=db,
+            symbol=symbol,
+            expiration_date=expiration_date,
+        )
+    else:
+        frame = MarketDataService.fetch_options_frame(symbol=symbol, expiration_date=expiration_date)
+        underlying_price = MarketDataService.fetch_underlying_price(symbol)
+        timestamp = datetime.now(timezone.utc)
+        frame = GreeksService.apply_to_chain(frame, underlying_price=underlying_price, timestamp=timestamp)
+    
+    chains = [OptionsChainItem(**record) for record in MarketDataService.frame_to_records(frame)]
+    
+    # Extract unique expiration dates
+    expirations = sorted(list(set(chain.expiration_date for chain in chains)))
+    
+    return OptionsChainResponse(
+        underlying_symbol=symbol,
+        underlying_price=underlying_price,
+        timestamp=timestamp,
+        expirations=expirations,
+        chains=chains,
+        count=len(chains),
+    )
+
+
+def _load_stored_options_chain(
+    db: Session,
+    symbol: str,
+    timestamp: datetime,
+    expiration_date: Optional[date],
+) -> Optional[OptionsChainResponse]:
+    """Build a response from the nearest stored snapshot (runs on the threadpool)."""
+    if settings.OPTIONS_SNAPSHOT_STORE == "delta":
+        snapshot = OptionsDeltaStore.reconstruct(
+            db=db,
+            symbol=symbol,
+            timestamp=timestamp,
+            expiration_date=expiration_date,
+        )
+        if snapshot is None:
+            return None
+        snapshot_time, underlying_price, frame = snapshot
+        chains = [OptionsChainItem(**record) for record in MarketDataService.frame_to_records(frame)]
+        return OptionsChainResponse(
+            underlying_symbol=symbol,
+            underlying_price=underlying_price,
+            timestamp=snapshot_time,
+            expirations=sorted(set(chain.expiration_date for chain in chains)),
+            chains=chains,
+            count=len(chains),
+        )
+    
+    rows = MarketDataService.get_options_snapshot(
+        db=db,
+        symbol=symbol,
+        timestamp=timestamp,
+        expiration_date=expiration_date,
+    )
+    if not rows:
+        return None
+    
+    chains = [OptionsChainItem.model_validate(row) for row in rows]
+    expirations = sorted(list(set(chain.expiration_date for chain in chains)))
+    
+    return OptionsChainResponse(
+        underlying_symbol=symbol,
+        underlying_price=rows[0].underlying_price,
+        timestamp=rows[0].timestamp,
+        expirations=expirations,
+        chains=chains,
+        count=len(chains),
+    )
+
+
 @router.get("/options/{underlying_symbol}", response_model=OptionsChainResponse)
 async def get_options_chain(
     underlying_symbol: str,
@@ -118,42 +465,163 @@ async def get_options_chain(
     """
     Get options chain data.
     
-    Note: For MVP, this fetches live data from yfinance. Historical options data
-    requires a paid provider like Polygon.io.
+    Without a timestamp this fetches the live chain from yfinance and stores it
+    as a snapshot. With a timestamp it serves the nearest stored snapshot at or
+    before that time from the database.
     
     - **underlying_symbol**: Underlying stock symbol
-    - **timestamp**: Specific timestamp (for historical data, if available)
+    - **timestamp**: Specific timestamp (served from stored snapshots)
     - **expiration_date**: Filter by expiration date
     """
     try:
-        # For MVP, fetch live options data
-        # TODO: Add database lookup for historical options data
-        chains = MarketDataService.fetch_options_chain(
+        if timestamp is not None:
+            response = await run_in_threadpool(
+                _load_stored_options_chain,
+                db=db,
+                symbol=underlying_symbol.upper(),
+                timestamp=timestamp,
+                expiration_date=expiration_date,
+            )
+            if response is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No options snapshot for {underlying_symbol.upper()} at or before {timestamp}",
+                )
+            return response
+        
+        return await run_in_threadpool(
+            _load_live_options_chain,
+            db=db,
             symbol=underlying_symbol.upper(),
             expiration_date=expiration_date,
         )
-        
-        # Get current underlying price
-        ticker = yf.Ticker(underlying_symbol.upper())
-        info = ticker.info
-        underlying_price = info.get('regularMarketPrice') or info.get('currentPrice', 0)
-        
-        # Extract unique expiration dates
-        expirations = sorted(list(set(chain.expiration_date for chain in chains)))
-        
-        return OptionsChainResponse(
-            underlying_symbol=underlying_symbol.upper(),
-            underlying_price=underlying_price,
-            timestamp=datetime.now(),
-            expirations=expirations,
-            chains=chains,
-            count=len(chains),
-        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving options chain: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving options chain: {str(e)}")
 
 
+def _load_iv_surface(
+    db: Session,
+    symbol: str,
+    timestamp: datetime,
+    strikes: Optional[List[float]],
+    expiration_date: Optional[date],
+) -> Optional[IVSurfaceResponse]:
+    """Build a surface response from the nearest stored snapshot (runs on the threadpool)."""
+    surface = IVSurfaceService.get_surface(db, symbol, timestamp)
+    if surface is None:
+        return None
+    
+    points = []
+    if strikes:
+        values = surface.iv_at(strikes, [expiration_date] * len(strikes))
+        points = [
+            IVSurfacePoint(
+                strike=strike,
+                expiration_date=expiration_date,
+                implied_volatility=float(value) if math.isfinite(value) else None,
+            )
+            for strike, value in zip(strikes, values)
+        ]
+    
+    return IVSurfaceResponse(
+        underlying_symbol=symbol,
+        underlying_price=surface.underlying_price,
+        timestamp=surface.timestamp,
+        slices=[
+            IVSurfaceSlice(
+                expiration_date=expiry_date,
+                years_to_expiry=float(t),
+                strikes=slice_strikes.tolist(),
+                implied_volatility=slice_iv.tolist(),
+            )
+            for expiry_date, t, (slice_strikes, slice_iv) in zip(surface.expiration_dates, surface.expiries, surface.slices)
+        ],
+        points=points,
+    )
+
+
+@router.get("/options/{underlying_symbol}/iv-surface", response_model=IVSurfaceResponse)
+async def get_iv_surface(
+    underlying_symbol: str,
+    timestamp: datetime = Query(..., description="Use the nearest stored snapshot at or before this time"),
+    strike: Optional[List[float]] = Query(None, description="Strikes to interpolate (repeatable)"),
+    expiration_date: Optional[date] = Query(None, description="Expiration to interpolate the strikes at"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the implied volatility surface of a stored options snapshot.
+    
+    Each slice lists the out-of-the-money IVs of one expiration. With
+    `strike` and `expiration_date` the response also carries interpolated
+    IVs at those points (linear in strike, linear in total variance between
+    expirations).
+    
+    - **underlying_symbol**: Underlying stock symbol
+    - **timestamp**: Point in time to look up
+    - **strike**: Strike(s) to interpolate
+    - **expiration_date**: Expiration to interpolate at (required with strike)
+    """
+    if strike and expiration_date is None:
+        raise HTTPException(status_code=400, detail="expiration_date is required with strike")
+    
+    try:
+        response = await run_in_threadpool(
+            _load_iv_surface,
+            db=db,
+            symbol=underlying_symbol.upper(),
+            timestamp=timestamp,
+            strikes=strike,
+            expiration_date=expiration_date,
+        )
+        if response is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No options snapshot for {underlying_symbol.upper()} at or before {timestamp}",
+            )
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building IV surface: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error building IV surface: {str(e)}")
+
+
+@router.post("/options/{underlying_symbol}/snapshot")
+async def capture_options_snapshot(
+    underlying_symbol: str,
+    expiration_date: Optional[date] = Query(None, description="Filter by expiration date"),
+    db: Session = Depends(get_db),
+):
+    """
+    Fetch the live options chain and store it as a snapshot.
+    
+    - **underlying_symbol**: Underlying stock symbol
+    - **expiration_date**: Only fetch this expiration (returned, not stored)
+    """
+    try:
+        timestamp, underlying_price, frame, stored = await run_in_threadpool(
+            MarketDataService.capture_options_snapshot,
+            db=db,
+            symbol=underlying_symbol.upper(),
+            expiration_date=expiration_date,
+        )
+        
+        return {
+            "message": f"Stored {stored} contracts for {underlying_symbol.upper()}",
+            "underlying_symbol": underlying_symbol.upper(),
+            "timestamp": timestamp,
+            "underlying_price": underlying_price,
+            "contracts_fetched": len(frame),
+            "contracts_stored": stored,
+        }
+    except Exception as e:
+        logger.error(f"Error capturing options snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error capturing options snapshot: {str(e)}")
+
+
 @router.get("/available-dates", response_model=AvailableDatesResponse)
 async def get_available_dates(
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
@@ -165,7 +633,11 @@ async def get_available_dates(
     - **symbol**: Optional symbol filter
     """
     try:
-        dates = MarketDataService.get_available_dates(db=db, symbol=symbol.upper() if symbol else None)
+        dates = await run_in_threadpool(
+            MarketDataService.get_available_dates,
+            db=db,
+            symbol=symbol.upper() if symbol else None,
+        )
         
         return AvailableDatesResponse(
             symbol=symbol.upper() if symbol else None,
@@ -176,3 +648,10 @@ async def get_available_dates(
         logger.error(f"Error retrieving available dates: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving available dates: {str(e)}")
 
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit/miss metrics of the provider response cache.
+    """
+    return provider_cache.stats()
@@ -0,0 +1,253 @@
+"""
+Command line tools for data maintenance.
+
+Usage:
+    python -m app.cli load-prices prices.parquet --symbol SPY
+    python -m app.cli fetch-prices SPY --start-date 2015-01-01 --interval 1h
+    python -m app.cli rebuild-coverage SPY --interval 1d
+    python -m app.cli lake-export SPY QQQ
+    python -m app.cli lake-import --dataset prices
+    python -m app.cli backtest strategy.json --start-date 2015-01-01
+    python -m app.cli backtest-sweep strategy.json sweep.json --workers 8 --output runs.jsonl
+"""
+import argparse
+import logging
+import math
+import sys
+from datetime import date
+from pathlib import Path
+import orjson
+from app.database import SessionLocal
+from app.schemas.backtest import StrategyDefinition, SweepDefinition
+from app.services.backtest_engine import DEFAULT_INITIAL_CAPITAL, BacktestData, BacktestEngine
+from app.services.backtest_sweep import BacktestSweep
+from app.services.bulk_loader import BulkLoader
+from app.services.coverage_service import CoverageService
+from app.services.data_lake import DataLakeService
+from app.services.ingestion_service import IngestionService
+
+logger = logging.getLogger(__name__)
+
+
+def load_prices(args: argparse.Namespace) -> int:
+    """Load a CSV or Parquet price file into stock_prices."""
+    frame = BulkLoader.read_price_file(args.path, symbol=args.symbol.upper() if args.symbol else None)
+    db = SessionLocal()
+    try:
+        counts = BulkLoader.load_prices(db=db, frame=frame)
+    finally:
+        db.close()
+    print(f"Loaded {len(frame)} rows from {args.path}: {counts['inserted']} inserted, {counts['updated']} updated")
+    return 0
+
+
+def fetch_prices(args: argparse.Namespace) -> int:
+    """Fetch uncovered price history from the provider and load it with the bulk loader."""
+    symbol = args.symbol.upper()
+    db = SessionLocal()
+    try:
+        result = IngestionService.ingest_symbol(
+            db=db,
+            symbol=symbol,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            interval=args.interval,
+            refresh=args.refresh,
+            loader="copy",
+        )
+    finally:
+        db.close()
+    print(
+        f"Fetched {result['total_fetched']} rows for {symbol} in {len(result['ranges'])} ranges: "
+        f"{result['inserted']} inserted, {result['updated']} updated"
+    )
+    return 0
+
+
+def rebuild_coverage(args: argparse.Namespace) -> int:
+    """Rebuild price_coverage for a symbol from the rows already in stock_prices."""
+    symbol = args.symbol.upper()
+    db = SessionLocal()
+    try:
+        ranges = CoverageService.rebuild_from_prices(db=db, symbol=symbol, interval=args.interval)
+    finally:
+        db.close()
+    for first, last in ranges:
+        print(f"{symbol} {args.interval}: {first} .. {last}")
+    return 0
+
+
+def lake_export(args: argparse.Namespace) -> int:
+    """Export stored prices and/or options snapshots to the Parquet data lake."""
+    db = SessionLocal()
+    try:
+        if args.dataset in ("prices", "all"):
+            counts = DataLakeService.export_prices(db=db, symbols=args.symbols, root=args.root, full=args.full)
+            for symbol, rows in counts.items():
+                print(f"{symbol} prices: {rows} rows written")
+        if args.dataset in ("options", "all"):
+            counts = DataLakeService.export_options(db=db, symbols=args.symbols, root=args.root, full=args.full)
+            for symbol, rows in counts.items():
+                print(f"{symbol} options: {rows} rows written")
+    finally:
+        db.close()
+    return 0
+
+
+def lake_import(args: argparse.Namespace) -> int:
+    """Seed the database from the Parquet data lake."""
+    symbols = [symbol.upper() for symbol in args.symbols] or None
+    db = SessionLocal()
+    try:
+        if args.dataset in ("prices", "all"):
+            results = DataLakeService.import_prices(
+                db=db, symbols=symbols, start_date=args.start_date, end_date=args.end_date, root=args.root
+            )
+            for symbol, counts in results.items():
+                print(f"{symbol} prices: {counts['inserted']} inserted, {counts['updated']} updated")
+        if args.dataset in ("options", "all"):
+            results = DataLakeService.import_options(
+                db=db, symbols=symbols, start_date=args.start_date, end_date=args.end_date, root=args.root
+            )
+            for symbol, stored in results.items():
+                print(f"{symbol} options: {stored} contracts stored")
+    finally:
+        db.close()
+    return 0
+
+
+def backtest(args: argparse.Namespace) -> int:
+    """Run a strategy JSON file against stored data or the data lake and print its metrics."""
+    strategy = StrategyDefinition.model_validate_json(Path(args.strategy).read_text())
+    symbol = strategy.underlying_symbol.upper()
+    data = _load_backtest_data(args, symbol)
+    
+    result = BacktestEngine.run(strategy, data, initial_capital=args.capital)
+    if args.output:
+        Path(args.output).write_bytes(orjson.dumps(result.to_dict(), option=orjson.OPT_INDENT_2))
+    print(f"{strategy.name} on {symbol}: {len(data.timestamps)} bars, {result.pricing} pricing")
+    for name, value in result.metrics.items():
+        print(f"  {name}: {value:.4f}" if isinstance(value, float) else f"  {name}: {value}")
+    return 0
+
+
+def backtest_sweep(args: argparse.Namespace) -> int:
+    """Sweep a strategy's parameters over a process pool, streaming one JSON line per run."""
+    strategy = StrategyDefinition.model_validate_json(Path(args.strategy).read_text())
+    sweep = SweepDefinition.model_validate_json(Path(args.sweep).read_text())
+    symbol = strategy.underlying_symbol.upper()
+    data = _load_backtest_data(args, symbol)
+    
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    finished = []
+    try:
+        for run in BacktestSweep.run(
+            strategy, data, sweep, workers=args.workers, chunk_size=args.chunk_size, initial_capital=args.capital
+        ):
+            output.write(orjson.dumps(run, option=orjson.OPT_APPEND_NEWLINE))
+            output.flush()
+            finished.append(run)
+    finally:
+        if args.output:
+            output.close()
+    
+    ranked = sorted(
+        (run for run in finished if "metrics" in run),
+        key=lambda run: -math.inf if math.isnan(run["metrics"][args.rank_by]) else run["metrics"][args.rank_by],
+        reverse=True,
+    )
+    print(f"{len(finished)} runs, {len(finished) - len(ranked)} invalid; best by {args.rank_by}:", file=sys.stderr)
+    for run in ranked[:args.top]:
+        print(f"  {run['metrics'][args.rank_by]:.4f}  {run['parameters']}", file=sys.stderr)
+    return 0
+
+
+def _load_backtest_data(args: argparse.Namespace, symbol: str) -> BacktestData:
+    """Load backtest data from the database or, with --lake, the data lake."""
+    if args.lake:
+        return BacktestEngine.load_lake_data(symbol, args.start_date, args.end_date, root=args.root)
+    db = SessionLocal()
+    try:
+        return BacktestEngine.load_data(db, symbol, args.start_date, args.end_date)
+    finally:
+        db.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all commands."""
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Hawkiz data maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    load_parser = subparsers.add_parser("load-prices", help="Bulk load a CSV/Parquet price file")
+    load_parser.add_argument("path", help="Path to a .csv or .parquet file")
+    load_parser.add_argument("--symbol", help="Symbol for files without a symbol column")
+    load_parser.set_defaults(handler=load_prices)
+    
+    fetch_parser = subparsers.add_parser("fetch-prices", help="Fetch prices from the provider and bulk load them")
+    fetch_parser.add_argument("symbol", help="Stock symbol (e.g., SPY)")
+    fetch_parser.add_argument("--start-date", type=date.fromisoformat, required=True, help="Start date (YYYY-MM-DD)")
+    fetch_parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="End date (YYYY-MM-DD)")
+    fetch_parser.add_argument("--interval", default="1d", help="Data interval (1d, 1h, etc.)")
+    fetch_parser.add_argument("--refresh", action="store_true", help="Re-fetch the whole window, ignoring coverage")
+    fetch_parser.set_defaults(handler=fetch_prices)
+    
+    coverage_parser = subparsers.add_parser("rebuild-coverage", help="Rebuild price coverage from stored prices")
+    coverage_parser.add_argument("symbol", help="Stock symbol (e.g., SPY)")
+    coverage_parser.add_argument("--interval", default="1d", help="Interval the stored rows were loaded with")
+    coverage_parser.set_defaults(handler=rebuild_coverage)
+    
+    export_parser = subparsers.add_parser("lake-export", help="Export changed stored data to the Parquet data lake")
+    export_parser.add_argument("symbols", nargs="*", help="Symbols to export (default: all)")
+    export_parser.add_argument("--dataset", choices=["prices", "options", "all"], default="all")
+    export_parser.add_argument("--root", default=None, help="Lake directory (default: DATA_LAKE_DIR)")
+    export_parser.add_argument("--full", action="store_true", help="Rewrite every month of each symbol, not only changed ones")
+    export_parser.set_defaults(handler=lake_export)
+    
+    import_parser = subparsers.add_parser("lake-import", help="Seed the database from the Parquet data lake")
+    import_parser.add_argument("symbols", nargs="*", help="Symbols to import (default: all in the lake)")
+    import_parser.add_argument("--dataset", choices=["prices", "options", "all"], default="all")
+    import_parser.add_argument("--root", default=None, help="Lake directory (default: DATA_LAKE_DIR)")
+    import_parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="Start date (YYYY-MM-DD)")
+    import_parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="End date (YYYY-MM-DD)")
+    import_parser.set_defaults(handler=lake_import)
+    
+    backtest_parser = subparsers.add_parser("backtest", help="Backtest a strategy JSON file")
+    backtest_parser.add_argument("strategy", help="Path to a strategy definition (.json)")
+    backtest_parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="Start date (YYYY-MM-DD)")
+    backtest_parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="End date (YYYY-MM-DD)")
+    backtest_parser.add_argument("--capital", type=float, default=DEFAULT_INITIAL_CAPITAL, help="Initial capital")
+    backtest_parser.add_argument("--lake", action="store_true", help="Read data from the Parquet data lake")
+    backtest_parser.add_argument("--root", default=None, help="Lake directory (default: DATA_LAKE_DIR)")
+    backtest_parser.add_argument("--output", default=None, help="Write the full result as JSON to this path")
+    backtest_parser.set_defaults(handler=backtest)
+    
+    sweep_parser = subparsers.add_parser("backtest-sweep", help="Sweep a strategy's parameters in parallel")
+    sweep_parser.add_argument("strategy", help="Path to a strategy definition (.json)")
+    sweep_parser.add_argument("sweep", help="Path to a sweep definition (.json)")
+    sweep_parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="Start date (YYYY-MM-DD)")
+    sweep_parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="End date (YYYY-MM-DD)")
+    sweep_parser.add_argument("--capital", type=float, default=DEFAULT_INITIAL_CAPITAL, help="Initial capital")
+    sweep_parser.add_argument("--lake", action="store_true", help="Read data from the Parquet data lake")
+    sweep_parser.add_argument("--root", default=None, help="Lake directory (default: DATA_LAKE_DIR)")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    sweep_parser.add_argument("--chunk-size", type=int, default=None, help="Runs per task sent to a worker")
+    sweep_parser.add_argument("--output", default=None, help="Write JSON lines here instead of stdout")
+    sweep_parser.add_argument("--rank-by", default="sharpe_ratio", help="Metric to rank runs by")
+    sweep_parser.add_argument("--top", type=int, default=5, help="Best runs to print")
+    sweep_parser.set_defaults(handler=backtest_sweep)
+    
+    return parser
+
+
+def main(argv=None) -> int:
+    """Run the CLI."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
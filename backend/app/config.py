@@ -19,8 +19,82 @@ class Settings(BaseSettings):
         "http://127.0.0.1:5173",
     ]
     
+    # Price column storage: numeric (NUMERIC(10,2)), double (DOUBLE PRECISION)
+    # or scaled (BIGINT in 1/10000 units). Applied by alembic revision 0004.
+    PRICE_STORAGE: str = "double"
+    
     # Market Data Provider
-    DATA_PROVIDER: str = "yfinance"  # Options: yfinance, alpha_vantage, polygon
+    DATA_PROVIDER: str = "yfinance"  # Options: yfinance, alpha_vantage, polygon, local
+    
+    # Root of the local file provider's Parquet/CSV fixtures
+    LOCAL_DATA_DIR: str = "data/local"
+    
+    # Pooled HTTP clients used by providers
+    PROVIDER_HTTP_POOL_SIZE: int = 10
+    PROVIDER_HTTP_RETRIES: int = 3
+    PROVIDER_HTTP_BACKOFF: float = 0.5
+    PROVIDER_HTTP_TIMEOUT: float = 10.0
+    
+    # Provider throttling: max concurrent calls and requests/second per provider
+    PROVIDER_CONCURRENCY: dict[str, int] = {
+        "yfinance": 4,
+        "alpha_vantage": 1,
+        "polygon": 8,
+        "local": 16,
+    }
+    PROVIDER_RATE_LIMITS: dict[str, float] = {
+        "yfinance": 2.0,
+        "alpha_vantage": 0.08,
+        "polygon": 5.0,
+        "local": 1000.0,
+    }
+    
+    # Threadpool size for blocking DB/provider work offloaded by async handlers
+    THREADPOOL_SIZE: int = 40
+    
+    # Batch ingestion worker threads
+    INGEST_MAX_WORKERS: int = 8
+    
+    # Most symbols per batched history request (providers with batch_history)
+    INGEST_BATCH_SIZE: int = 50
+    
+    # Persist every live options chain fetch as a snapshot
+    STORE_OPTIONS_SNAPSHOTS: bool = True
+    # Snapshot storage: 'rows' (one options_chains row per contract) or 'delta'
+    # (options_snapshots keyframes plus only the contracts that changed)
+    OPTIONS_SNAPSHOT_STORE: str = "rows"
+    # Snapshots per keyframe in the delta store; a new UTC day also starts one
+    OPTIONS_KEYFRAME_INTERVAL: int = 50
+    
+    # Black-Scholes inputs for Greeks and implied volatility
+    RISK_FREE_RATE: float = 0.045
+    DIVIDEND_YIELD: float = 0.0
+    
+    # Root of the Parquet data lake written by `python -m app.cli lake-export`
+    DATA_LAKE_DIR: str = "data/lake"
+    
+    # Per-process columnar cache of stored price series (0 disables); entries
+    # are reloaded after PRICE_CACHE_TTL seconds to pick up other processes' writes
+    PRICE_CACHE_MAX_MB: int = 256
+    PRICE_CACHE_TTL: int = 300
+    
+    # Per-process as-of index of stored option chains per underlying (0 disables);
+    # entries are reloaded after CHAIN_INDEX_TTL seconds like the price cache
+    CHAIN_INDEX_CACHE_MAX_MB: int = 512
+    CHAIN_INDEX_TTL: int = 300
+    
+    # IV surfaces kept in memory, keyed by (underlying, snapshot time)
+    IV_SURFACE_CACHE_SIZE: int = 256
+    
+    # Backtest jobs run on BACKTEST_JOB_WORKERS threads of the web process
+    # ('inprocess') or on `celery -A app.worker worker` processes ('celery')
+    BACKTEST_JOB_BACKEND: str = "inprocess"
+    BACKTEST_JOB_WORKERS: int = 2
+    # Seconds between status checks of job progress streams
+    BACKTEST_JOB_POLL_INTERVAL: float = 0.5
+    # Job results cached by strategy hash and data version (TTL 0 disables)
+    BACKTEST_RESULT_CACHE_TTL: int = 86400
+    BACKTEST_RESULT_CACHE_ENTRIES: int = 64
     
     # Alpha Vantage (if using)
     ALPHA_VANTAGE_API_KEY: Optional[str] = None
@@ -31,6 +105,27 @@ class Settings(BaseSettings):
     # Redis (optional)
     REDIS_URL: Optional[str] = None
     
+    # Celery broker and result backend for BACKTEST_JOB_BACKEND=celery (default: REDIS_URL)
+    CELERY_BROKER_URL: Optional[str] = None
+    
+    # Provider response cache (in-process LRU, plus Redis when REDIS_URL is set)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 512
+    CACHE_DEFAULT_TTL: int = 300
+    # TTLs in seconds per data kind while the market is open / closed
+    CACHE_TTL_MARKET_HOURS: dict[str, int] = {
+        "quote": 15,
+        "chain": 60,
+        "expirations": 900,
+        "history": 60,
+    }
+    CACHE_TTL_OFF_HOURS: dict[str, int] = {
+        "quote": 900,
+        "chain": 3600,
+        "expirations": 21600,
+        "history": 3600,
+    }
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
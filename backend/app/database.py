@@ -18,6 +18,23 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def dialect_insert(db):
+    """
+    Return the dialect-specific INSERT construct for the session's engine.
+
+    Both PostgreSQL and SQLite inserts support ``on_conflict_do_update``,
+    which the bulk upsert paths rely on.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+    return insert
+
+
 def get_db():
     """Dependency for getting database session."""
     db = SessionLocal()
@@ -1,7 +1,10 @@
 """Main FastAPI application."""
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.database import engine
+from app.models.types import verify_price_storage
 from app.api.v1 import api_router
 import logging
 
@@ -30,6 +33,18 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 
+@app.on_event("startup")
+async def configure_threadpool():
+    """Size the threadpool used for blocking DB and provider calls."""
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+
+@app.on_event("startup")
+async def check_price_storage():
+    """Refuse to start when the price columns were migrated for another PRICE_STORAGE."""
+    verify_price_storage(engine)
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
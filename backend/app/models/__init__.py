@@ -1,7 +1,10 @@
 """Database models."""
+from app.models.symbols import Symbol
 from app.models.stock_prices import StockPrice
 from app.models.options_chains import OptionsChain
+from app.models.options_snapshots import OptionsSnapshot, OptionsSnapshotQuote
 from app.models.market_events import MarketEvent
+from app.models.price_coverage import PriceCoverage
 
-__all__ = ["StockPrice", "OptionsChain", "MarketEvent"]
+__all__ = ["Symbol", "StockPrice", "OptionsChain", "OptionsSnapshot", "OptionsSnapshotQuote", "MarketEvent", "PriceCoverage"]
 
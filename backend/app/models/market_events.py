@@ -1,5 +1,5 @@
 """Market events model."""
-from sqlalchemy import Column, BigInteger, String, Date, Text, DateTime, Index
+from sqlalchemy import Column, BigInteger, Integer, String, Date, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -9,17 +9,17 @@ class MarketEvent(Base):
     
     __tablename__ = "market_events"
     
-    id = Column(BigInteger, primary_key=True, index=True)
-    symbol = Column(String(10), nullable=False, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    symbol_id = Column(Integer, ForeignKey("symbols.id", name="fk_market_events_symbol_id"), nullable=False)
     event_date = Column(Date, nullable=False, index=True)
     event_type = Column(String(50), nullable=False)  # 'EARNINGS', 'DIVIDEND', 'SPLIT', etc.
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     __table_args__ = (
-        Index('idx_market_events_symbol_date', 'symbol', 'event_date'),
+        Index('idx_market_events_symbol_date', 'symbol_id', 'event_date'),
     )
     
     def __repr__(self):
-        return f"<MarketEvent(symbol={self.symbol}, type={self.event_type}, date={self.event_date})>"
+        return f"<MarketEvent(symbol_id={self.symbol_id}, type={self.event_type}, date={self.event_date})>"
 
@@ -1,7 +1,8 @@
 """Options chain model."""
-from sqlalchemy import Column, BigInteger, String, Numeric, Date, DateTime, CheckConstraint, UniqueConstraint, Index
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.types import greek_type, price_type
 
 
 class OptionsChain(Base):
@@ -9,33 +10,33 @@ class OptionsChain(Base):
     
     __tablename__ = "options_chains"
     
-    id = Column(BigInteger, primary_key=True, index=True)
-    underlying_symbol = Column(String(10), nullable=False, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    symbol_id = Column(Integer, ForeignKey("symbols.id", name="fk_options_chains_symbol_id"), nullable=False)  # Underlying
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
-    expiration_date = Column(Date, nullable=False, index=True)
-    strike = Column(Numeric(10, 2), nullable=False)
+    expiration_date = Column(Date, nullable=False)
+    strike = Column(price_type(), nullable=False)
     option_type = Column(String(1), nullable=False)  # 'C' for Call, 'P' for Put
-    bid = Column(Numeric(10, 2), nullable=True)
-    ask = Column(Numeric(10, 2), nullable=True)
-    last = Column(Numeric(10, 2), nullable=True)
+    bid = Column(price_type(), nullable=True)
+    ask = Column(price_type(), nullable=True)
+    last = Column(price_type(), nullable=True)
     volume = Column(BigInteger, nullable=True)
     open_interest = Column(BigInteger, nullable=True)
-    implied_volatility = Column(Numeric(6, 4), nullable=True)
-    delta = Column(Numeric(8, 6), nullable=True)
-    gamma = Column(Numeric(10, 8), nullable=True)
-    theta = Column(Numeric(10, 6), nullable=True)
-    vega = Column(Numeric(10, 6), nullable=True)
-    underlying_price = Column(Numeric(10, 2), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    implied_volatility = Column(greek_type(6, 4), nullable=True)
+    delta = Column(greek_type(8, 6), nullable=True)
+    gamma = Column(greek_type(10, 8), nullable=True)
+    theta = Column(greek_type(10, 6), nullable=True)
+    vega = Column(greek_type(10, 6), nullable=True)
+    underlying_price = Column(price_type(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())  # Also set by upserts; drives lake exports
     
     __table_args__ = (
         CheckConstraint("option_type IN ('C', 'P')", name='chk_option_type'),
-        UniqueConstraint('underlying_symbol', 'timestamp', 'expiration_date', 'strike', 'option_type', 
+        # Also serves underlying-only and (underlying, timestamp) lookups
+        UniqueConstraint('symbol_id', 'timestamp', 'expiration_date', 'strike', 'option_type', 
                         name='uq_options_chains_unique'),
-        Index('idx_options_chains_underlying_timestamp', 'underlying_symbol', 'timestamp'),
         Index('idx_options_chains_expiration_strike', 'expiration_date', 'strike'),
     )
     
     def __repr__(self):
-        return f"<OptionsChain(underlying={self.underlying_symbol}, strike={self.strike}, type={self.option_type})>"
+        return f"<OptionsChain(symbol_id={self.symbol_id}, strike={self.strike}, type={self.option_type})>"
 
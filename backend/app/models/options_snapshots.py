@@ -0,0 +1,61 @@
+"""Delta-encoded options chain snapshot models."""
+from sqlalchemy import Column, BigInteger, Boolean, Integer, String, Date, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, PrimaryKeyConstraint, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.types import greek_type, price_type
+
+
+class OptionsSnapshot(Base):
+    """
+    One captured chain in the delta store (OPTIONS_SNAPSHOT_STORE=delta).
+    
+    Keyframes (keyframe_id NULL) hold every contract; the snapshots that
+    follow a keyframe point at it and hold only contracts that changed,
+    appeared or disappeared since the previous snapshot.
+    """
+    
+    __tablename__ = "options_snapshots"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    symbol_id = Column(Integer, ForeignKey("symbols.id", name="fk_options_snapshots_symbol_id"), nullable=False)  # Underlying
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    keyframe_id = Column(BigInteger, ForeignKey("options_snapshots.id", name="fk_options_snapshots_keyframe_id"), nullable=True)
+    underlying_price = Column(price_type(), nullable=False)
+    contracts = Column(Integer, nullable=False)  # Contracts in the full chain
+    changed = Column(Integer, nullable=False)  # Quote rows stored for this snapshot
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('symbol_id', 'timestamp', name='uq_options_snapshots_symbol_timestamp'),
+        # Snapshots of one keyframe group, read back when reconstructing a chain
+        Index('idx_options_snapshots_keyframe_id', 'keyframe_id'),
+    )
+    
+    def __repr__(self):
+        return f"<OptionsSnapshot(symbol_id={self.symbol_id}, timestamp={self.timestamp}, keyframe={self.keyframe_id is None})>"
+
+
+class OptionsSnapshotQuote(Base):
+    """A contract's quote in a keyframe, or its change in a delta snapshot."""
+    
+    __tablename__ = "options_snapshot_quotes"
+    
+    snapshot_id = Column(BigInteger, ForeignKey("options_snapshots.id", name="fk_options_snapshot_quotes_snapshot_id", ondelete="CASCADE"), nullable=False)
+    expiration_date = Column(Date, nullable=False)
+    strike = Column(price_type(), nullable=False)
+    option_type = Column(String(1), nullable=False)  # 'C' for Call, 'P' for Put
+    bid = Column(price_type(), nullable=True)
+    ask = Column(price_type(), nullable=True)
+    last = Column(price_type(), nullable=True)
+    volume = Column(BigInteger, nullable=True)
+    open_interest = Column(BigInteger, nullable=True)
+    implied_volatility = Column(greek_type(6, 4), nullable=True)  # As quoted by the provider
+    removed = Column(Boolean, nullable=False, default=False)  # Contract left the chain
+    
+    __table_args__ = (
+        CheckConstraint("option_type IN ('C', 'P')", name='chk_options_snapshot_quotes_option_type'),
+        PrimaryKeyConstraint('snapshot_id', 'expiration_date', 'strike', 'option_type', name='pk_options_snapshot_quotes'),
+    )
+    
+    def __repr__(self):
+        return f"<OptionsSnapshotQuote(snapshot_id={self.snapshot_id}, strike={self.strike}, type={self.option_type})>"
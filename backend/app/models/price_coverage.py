@@ -0,0 +1,24 @@
+"""Price coverage model."""
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class PriceCoverage(Base):
+    """Date range of stock_prices already fetched for a symbol and interval."""
+    
+    __tablename__ = "price_coverage"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    symbol = Column(String(10), nullable=False)
+    interval = Column(String(10), nullable=False)
+    start_date = Column(Date, nullable=False)  # Inclusive
+    end_date = Column(Date, nullable=False)  # Inclusive
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('symbol', 'interval', 'start_date', name='uq_price_coverage_symbol_interval_start'),
+    )
+    
+    def __repr__(self):
+        return f"<PriceCoverage(symbol={self.symbol}, interval={self.interval}, {self.start_date}..{self.end_date})>"
@@ -1,7 +1,8 @@
 """Stock prices model."""
-from sqlalchemy import Column, BigInteger, String, Numeric, DateTime, UniqueConstraint, Index
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.types import price_type
 
 
 class StockPrice(Base):
@@ -9,21 +10,21 @@ class StockPrice(Base):
     
     __tablename__ = "stock_prices"
     
-    id = Column(BigInteger, primary_key=True, index=True)
-    symbol = Column(String(10), nullable=False, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    symbol_id = Column(Integer, ForeignKey("symbols.id", name="fk_stock_prices_symbol_id"), nullable=False)
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
-    open = Column(Numeric(10, 2), nullable=False)
-    high = Column(Numeric(10, 2), nullable=False)
-    low = Column(Numeric(10, 2), nullable=False)
-    close = Column(Numeric(10, 2), nullable=False)
+    open = Column(price_type(), nullable=False)
+    high = Column(price_type(), nullable=False)
+    low = Column(price_type(), nullable=False)
+    close = Column(price_type(), nullable=False)
     volume = Column(BigInteger, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())  # Also set by upserts; drives lake exports
     
     __table_args__ = (
-        UniqueConstraint('symbol', 'timestamp', name='uq_stock_prices_symbol_timestamp'),
-        Index('idx_stock_prices_symbol_timestamp', 'symbol', 'timestamp'),
+        # Also serves symbol-only and (symbol, timestamp) range lookups
+        UniqueConstraint('symbol_id', 'timestamp', name='uq_stock_prices_symbol_timestamp'),
     )
     
     def __repr__(self):
-        return f"<StockPrice(symbol={self.symbol}, timestamp={self.timestamp}, close={self.close})>"
+        return f"<StockPrice(symbol_id={self.symbol_id}, timestamp={self.timestamp}, close={self.close})>"
 
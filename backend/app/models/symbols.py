@@ -0,0 +1,21 @@
+"""Symbol dictionary model."""
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Symbol(Base):
+    """Ticker symbols referenced by integer symbol_id from the market data tables."""
+    
+    __tablename__ = "symbols"
+    
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(10), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('symbol', name='uq_symbols_symbol'),
+    )
+    
+    def __repr__(self):
+        return f"<Symbol(id={self.id}, symbol={self.symbol})>"
@@ -0,0 +1,161 @@
+"""Column types for price and Greek columns, selected by PRICE_STORAGE."""
+from typing import Optional
+import numpy as np
+from sqlalchemy import BigInteger, Double, Float, Integer, Numeric, cast, inspect
+from sqlalchemy.types import TypeDecorator, TypeEngine
+from app.config import settings
+
+# Storage modes accepted by PRICE_STORAGE
+PRICE_STORAGE_MODES = ("numeric", "double", "scaled")
+
+# Units per 1.0 in scaled mode: prices are stored to 1/100 of a cent
+PRICE_SCALE = 10_000
+
+# Decimal places a stored price keeps
+PRICE_DECIMALS = 2 if settings.PRICE_STORAGE == "numeric" else 4
+
+if settings.PRICE_STORAGE not in PRICE_STORAGE_MODES:
+    raise ValueError(f"PRICE_STORAGE must be one of {PRICE_STORAGE_MODES}, got {settings.PRICE_STORAGE!r}")
+
+
+class ScaledPrice(TypeDecorator):
+    """
+    Price stored as a BIGINT count of 1/PRICE_SCALE units.
+    
+    Values bind from and load as floats; NaN binds as NULL.
+    """
+    
+    impl = BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or value != value:
+            return None
+        return int(round(float(value) * PRICE_SCALE))
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value / PRICE_SCALE
+
+
+def price_type(precision: int = 10, scale: int = 2):
+    """
+    Column type for a price (OHLC, strike, bid/ask/last, underlying).
+    
+    Args:
+        precision: NUMERIC precision in numeric mode
+        scale: NUMERIC scale in numeric mode
+    
+    Returns:
+        SQLAlchemy type; every mode loads values as float
+    """
+    if settings.PRICE_STORAGE == "scaled":
+        return ScaledPrice()
+    if settings.PRICE_STORAGE == "double":
+        return Double()
+    return Numeric(precision, scale, asdecimal=False)
+
+
+def greek_type(precision: int, scale: int):
+    """
+    Column type for implied volatility and Greeks.
+    
+    Scaled integers fit these poorly, so scaled mode stores them as
+    DOUBLE PRECISION as well.
+    
+    Args:
+        precision: NUMERIC precision in numeric mode
+        scale: NUMERIC scale in numeric mode
+    
+    Returns:
+        SQLAlchemy type; every mode loads values as float
+    """
+    if settings.PRICE_STORAGE == "numeric":
+        return Numeric(precision, scale, asdecimal=False)
+    return Double()
+
+
+def price_sql(expression):
+    """
+    Float SQL expression for a price column, or an aggregate over one.
+    
+    Core selects that bypass the column type (casts, MAX/MIN, continuous
+    aggregates) use this so scaled integers come back as prices.
+    
+    Args:
+        expression: Price column or SQL expression over price columns
+    
+    Returns:
+        SQL expression of type Float
+    """
+    if settings.PRICE_STORAGE == "scaled":
+        return cast(expression, Float) / PRICE_SCALE
+    return cast(expression, Float)
+
+
+def price_storage_values(values: np.ndarray) -> np.ndarray:
+    """
+    Convert float prices to their stored representation for raw COPY loads.
+    
+    Args:
+        values: Float prices
+    
+    Returns:
+        int64 units in scaled mode, otherwise the values unchanged
+    """
+    if settings.PRICE_STORAGE == "scaled":
+        return np.rint(np.asarray(values, dtype=np.float64) * PRICE_SCALE).astype(np.int64)
+    return values
+
+
+def storage_mode(column_type: TypeEngine) -> Optional[str]:
+    """
+    PRICE_STORAGE mode a reflected column type corresponds to.
+    
+    Args:
+        column_type: Type from the SQLAlchemy inspector
+    
+    Returns:
+        'double', 'scaled' or 'numeric', or None for other types
+    """
+    # Float subclasses Numeric, so it is checked first
+    if isinstance(column_type, Float):
+        return "double"
+    if isinstance(column_type, Integer):
+        return "scaled"
+    if isinstance(column_type, Numeric):
+        return "numeric"
+    return None
+
+
+def verify_price_storage(bind) -> None:
+    """
+    Check that stored price columns match PRICE_STORAGE.
+    
+    The ORM binds and reads prices according to the setting, so running
+    against columns migrated for another mode would silently misread them
+    (scaled integers read as prices, or prices rounded to cents). The check
+    inspects stock_prices.close and is skipped before the table exists.
+    
+    Args:
+        bind: Engine or connection
+    
+    Raises:
+        RuntimeError: If the column type belongs to a different mode
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table("stock_prices"):
+        return
+    
+    columns = {column["name"]: column["type"] for column in inspector.get_columns("stock_prices")}
+    if "close" not in columns:
+        return
+    
+    mode = storage_mode(columns["close"])
+    if mode != settings.PRICE_STORAGE:
+        raise RuntimeError(
+            f"PRICE_STORAGE is {settings.PRICE_STORAGE!r} but stock_prices.close is {columns['close']} "
+            f"({mode or 'unknown'} storage). Set PRICE_STORAGE={mode} or convert the columns with "
+            f"`alembic downgrade 0003` and `alembic upgrade head` under the new setting."
+        )
@@ -0,0 +1,66 @@
+"""Market data providers."""
+import threading
+from typing import Dict, Optional
+from app.config import settings
+from app.providers.base import MarketDataProvider
+from app.providers.http import build_http_session
+from app.providers.yfinance_provider import YFinanceProvider
+from app.providers.polygon_provider import PolygonProvider
+from app.providers.alpha_vantage_provider import AlphaVantageProvider
+from app.providers.local_provider import LocalFileProvider
+
+# DATA_PROVIDER values mapped onto provider classes
+PROVIDERS = {
+    "yfinance": YFinanceProvider,
+    "polygon": PolygonProvider,
+    "alpha_vantage": AlphaVantageProvider,
+    "local": LocalFileProvider,
+}
+
+_instances: Dict[str, MarketDataProvider] = {}
+_instances_lock = threading.Lock()
+
+
+def get_provider(name: Optional[str] = None) -> MarketDataProvider:
+    """
+    Get the shared provider instance for a name.
+    
+    Instances are created once per process so their pooled HTTP sessions are
+    reused across requests.
+    
+    Args:
+        name: Provider name (defaults to DATA_PROVIDER)
+    
+    Returns:
+        MarketDataProvider
+    """
+    name = name or settings.DATA_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown data provider: {name}. Options: {', '.join(PROVIDERS)}")
+    
+    with _instances_lock:
+        provider = _instances.get(name)
+        if provider is None:
+            provider = _instances[name] = PROVIDERS[name]()
+        return provider
+
+
+def reset_providers() -> None:
+    """Close and drop shared provider instances (e.g. after settings change)."""
+    with _instances_lock:
+        for provider in _instances.values():
+            provider.close()
+        _instances.clear()
+
+
+__all__ = [
+    "MarketDataProvider",
+    "YFinanceProvider",
+    "PolygonProvider",
+    "AlphaVantageProvider",
+    "LocalFileProvider",
+    "PROVIDERS",
+    "get_provider",
+    "reset_providers",
+    "build_http_session",
+]
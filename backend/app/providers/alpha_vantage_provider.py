@@ -0,0 +1,152 @@
+"""Alpha Vantage provider."""
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+import pandas as pd
+from app.config import settings
+from app.providers.base import MarketDataProvider, HISTORY_COLUMNS, empty_history, parse_interval, split_chain
+from app.providers.http import build_http_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+
+# Intraday intervals supported by TIME_SERIES_INTRADAY, in minutes
+INTRADAY_MINUTES = (1, 5, 15, 30, 60)
+
+# Daily and longer series functions and their response keys
+PERIOD_SERIES = {
+    "day": ("TIME_SERIES_DAILY", "Time Series (Daily)"),
+    "week": ("TIME_SERIES_WEEKLY", "Weekly Time Series"),
+    "month": ("TIME_SERIES_MONTHLY", "Monthly Time Series"),
+}
+
+# Alpha Vantage chain fields mapped onto yfinance chain columns
+CHAIN_FIELDS = {
+    "last": "lastPrice",
+    "open_interest": "openInterest",
+    "implied_volatility": "impliedVolatility",
+}
+
+
+class AlphaVantageProvider(MarketDataProvider):
+    """
+    Alpha Vantage provider.
+    
+    HISTORICAL_OPTIONS returns the whole chain of an underlying in a single
+    call, so whole-chain pulls cost one request regardless of how many
+    expirations are requested.
+    """
+    
+    name = "alpha_vantage"
+    
+    def __init__(self, api_key: Optional[str] = None, session=None):
+        self.api_key = api_key or settings.ALPHA_VANTAGE_API_KEY
+        if not self.api_key:
+            raise ValueError("ALPHA_VANTAGE_API_KEY is required for the alpha_vantage provider")
+        self.session = session or build_http_session()
+    
+    def _query(self, function: str, **params) -> Dict:
+        """Call one Alpha Vantage function and return its JSON payload."""
+        response = self.session.get(
+            ALPHA_VANTAGE_URL,
+            params={"function": function, "apikey": self.api_key, **params},
+            timeout=settings.PROVIDER_HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        # Errors and throttling come back as 200s with a message instead of data
+        for key in ("Error Message", "Note", "Information"):
+            if key in payload:
+                raise ValueError(f"Alpha Vantage {function}: {payload[key]}")
+        return payload
+    
+    def fetch_stock_frame(
+        self,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Fetch a time series and trim it to [start_date, end_date)."""
+        if end_date is None:
+            end_date = date.today()
+        multiplier, unit = parse_interval(interval)
+        
+        if unit in ("minute", "hour"):
+            minutes = multiplier * 60 if unit == "hour" else multiplier
+            if minutes not in INTRADAY_MINUTES:
+                raise ValueError(f"Unsupported Alpha Vantage interval: {interval}")
+            series_key = f"Time Series ({minutes}min)"
+            payload = self._query(
+                "TIME_SERIES_INTRADAY", symbol=symbol, interval=f"{minutes}min", outputsize="full",
+            )
+        elif multiplier == 1 and unit in PERIOD_SERIES:
+            function, series_key = PERIOD_SERIES[unit]
+            payload = self._query(function, symbol=symbol, outputsize="full")
+        else:
+            raise ValueError(f"Unsupported Alpha Vantage interval: {interval}")
+        
+        series = payload.get(series_key) or {}
+        if not series:
+            return empty_history()
+        
+        frame = pd.DataFrame.from_dict(series, orient="index")
+        # Fields are named like "1. open"; drop the ordinal prefix
+        frame.columns = [column.split(". ", 1)[-1].capitalize() for column in frame.columns]
+        frame = frame.reindex(columns=HISTORY_COLUMNS).apply(pd.to_numeric, errors="coerce")
+        # Timestamps are US/Eastern; daily and longer bars are dated at midnight
+        # there, like yfinance and Polygon, so every provider stores a session
+        # under the same timestamp
+        index = pd.to_datetime(frame.index).tz_localize("America/New_York").tz_convert("UTC")
+        frame.index = pd.DatetimeIndex(index, name="Date")
+        frame = frame.sort_index()
+        
+        start = pd.Timestamp(start_date, tz="UTC")
+        end = pd.Timestamp(end_date, tz="UTC")
+        return frame[(frame.index >= start) & (frame.index < end)]
+    
+    def _fetch_chain(self, symbol: str) -> pd.DataFrame:
+        """Fetch the full chain as a flat frame."""
+        payload = self._query("HISTORICAL_OPTIONS", symbol=symbol)
+        chain = pd.DataFrame(payload.get("data") or [])
+        if chain.empty:
+            return pd.DataFrame(columns=["expiration", "type", "strike"])
+        chain = chain.rename(columns=CHAIN_FIELDS)
+        for column in ("strike", "bid", "ask", "lastPrice", "volume", "openInterest", "impliedVolatility"):
+            if column in chain.columns:
+                chain[column] = pd.to_numeric(chain[column], errors="coerce")
+        return chain
+    
+    def fetch_option_expirations(self, symbol: str) -> Tuple[str, ...]:
+        """Expirations present in the latest full chain."""
+        return tuple(sorted(self._fetch_chain(symbol)["expiration"].dropna().unique()))
+    
+    def fetch_option_chain(self, symbol: str, expiration: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Fetch the full chain and keep one expiration."""
+        chains = self.fetch_option_chains(symbol, [expiration])
+        if expiration not in chains:
+            raise ValueError(f"No {symbol} contracts expire on {expiration}")
+        return chains[expiration]
+    
+    def fetch_option_chains(
+        self,
+        symbol: str,
+        expirations: Sequence[str]
+    ) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Fetch every requested expiration from a single full-chain call."""
+        wanted = {str(expiration) for expiration in expirations}
+        chain = self._fetch_chain(symbol)
+        chains = {}
+        for expiration, group in chain.groupby("expiration", sort=True):
+            if expiration in wanted:
+                chains[expiration] = split_chain(group, "type", "call")
+        return chains
+    
+    def fetch_underlying_price(self, symbol: str) -> float:
+        """Latest price from GLOBAL_QUOTE."""
+        quote = self._query("GLOBAL_QUOTE", symbol=symbol).get("Global Quote") or {}
+        return float(quote.get("05. price") or 0)
+    
+    def close(self) -> None:
+        self.session.close()
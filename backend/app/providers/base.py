@@ -0,0 +1,190 @@
+"""Market data provider interface."""
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns of a stock history frame (indexed by timestamp)
+HISTORY_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Columns of one side of an option chain, in yfinance naming
+CHAIN_COLUMNS = ["strike", "bid", "ask", "lastPrice", "volume", "openInterest", "impliedVolatility"]
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of stock history, option chains and quotes.
+    
+    Frames follow the yfinance layout so the rest of the service treats every
+    provider the same: history frames are indexed by timestamp with
+    HISTORY_COLUMNS, and option chains are (calls, puts) frames with
+    CHAIN_COLUMNS. Batch methods have per-item defaults; providers whose API
+    can serve many symbols or a whole chain per request override them.
+    """
+    
+    name: str = "base"
+    
+    # True when fetch_stock_frames serves many symbols in one request
+    batch_history: bool = False
+    
+    @abstractmethod
+    def fetch_stock_frame(
+        self,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        """
+        Fetch price history for one symbol.
+        
+        Args:
+            symbol: Stock symbol
+            start_date: Start date (inclusive)
+            end_date: End date (exclusive, defaults to today)
+            interval: Data interval ('1d', '1h', '5m', etc.)
+        
+        Returns:
+            History frame (empty when no data)
+        """
+    
+    def fetch_stock_frames(
+        self,
+        symbols: Sequence[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch price history for many symbols.
+        
+        Args:
+            symbols: Stock symbols
+            start_date: Start date (inclusive)
+            end_date: End date (exclusive, defaults to today)
+            interval: Data interval
+        
+        Returns:
+            Dict of symbol to history frame; failed symbols are omitted
+        """
+        frames = {}
+        for symbol in symbols:
+            try:
+                frames[symbol] = self.fetch_stock_frame(symbol, start_date, end_date, interval)
+            except Exception as e:
+                logger.warning(f"{self.name}: error fetching history for {symbol}: {str(e)}")
+        return frames
+    
+    @abstractmethod
+    def fetch_option_expirations(self, symbol: str) -> Tuple[str, ...]:
+        """
+        List available option expirations.
+        
+        Args:
+            symbol: Underlying stock symbol
+        
+        Returns:
+            Expiration dates as 'YYYY-MM-DD' strings, ascending
+        """
+    
+    @abstractmethod
+    def fetch_option_chain(self, symbol: str, expiration: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Fetch one expiration of an option chain.
+        
+        Args:
+            symbol: Underlying stock symbol
+            expiration: Expiration date ('YYYY-MM-DD')
+        
+        Returns:
+            Tuple of (calls, puts) frames
+        """
+    
+    def fetch_option_chains(
+        self,
+        symbol: str,
+        expirations: Sequence[str]
+    ) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Fetch several expirations of an option chain.
+        
+        Args:
+            symbol: Underlying stock symbol
+            expirations: Expiration dates ('YYYY-MM-DD')
+        
+        Returns:
+            Dict of expiration to (calls, puts); failed expirations are omitted
+        """
+        chains = {}
+        for expiration in expirations:
+            try:
+                chains[expiration] = self.fetch_option_chain(symbol, expiration)
+            except Exception as e:
+                logger.warning(f"Error fetching options for {symbol} expiration {expiration}: {str(e)}")
+        return chains
+    
+    @abstractmethod
+    def fetch_underlying_price(self, symbol: str) -> float:
+        """
+        Fetch the latest price of an underlying.
+        
+        Args:
+            symbol: Stock symbol
+        
+        Returns:
+            Latest price, or 0 when unavailable
+        """
+    
+    def close(self) -> None:
+        """Release pooled connections."""
+
+
+def empty_history() -> pd.DataFrame:
+    """An empty history frame."""
+    return pd.DataFrame(columns=HISTORY_COLUMNS, index=pd.DatetimeIndex([], tz="UTC", name="Date"))
+
+
+def split_chain(frame: pd.DataFrame, type_column: str, call_value: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split a flat chain frame into (calls, puts) with CHAIN_COLUMNS.
+    
+    Args:
+        frame: Flat chain with a type column and CHAIN_COLUMNS
+        type_column: Column holding the contract type
+        call_value: Value of type_column marking calls
+    
+    Returns:
+        Tuple of (calls, puts)
+    """
+    is_call = frame[type_column].astype(str).str.lower() == call_value.lower()
+    calls = frame.loc[is_call].reindex(columns=CHAIN_COLUMNS).sort_values("strike").reset_index(drop=True)
+    puts = frame.loc[~is_call].reindex(columns=CHAIN_COLUMNS).sort_values("strike").reset_index(drop=True)
+    return calls, puts
+
+
+def parse_interval(interval: str) -> Tuple[int, str]:
+    """
+    Split an interval like '5m', '1h', '1d', '1wk' or '1mo' into (multiplier, unit).
+    
+    Args:
+        interval: yfinance-style interval
+    
+    Returns:
+        Tuple of (multiplier, unit) where unit is minute, hour, day, week or month
+    """
+    units = (("mo", "month"), ("wk", "week"), ("m", "minute"), ("h", "hour"), ("d", "day"))
+    for suffix, unit in units:
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            return int(interval[:-len(suffix)]), unit
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def chain_expirations(frames: List[pd.DataFrame]) -> Tuple[str, ...]:
+    """Sorted unique expiration strings across frames with an expiration column."""
+    values = set()
+    for frame in frames:
+        values.update(pd.to_datetime(frame["expiration"]).dt.strftime("%Y-%m-%d"))
+    return tuple(sorted(values))
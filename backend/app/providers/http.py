@@ -0,0 +1,38 @@
+"""Pooled HTTP sessions with retry/backoff for provider APIs."""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import settings
+
+# Statuses retried with backoff (rate limiting and transient server errors)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_http_session(pool_size: int = None, retries: int = None, backoff: float = None) -> requests.Session:
+    """
+    Build a keep-alive session with a connection pool and retry/backoff.
+    
+    Args:
+        pool_size: Connections kept per host (defaults to PROVIDER_HTTP_POOL_SIZE)
+        retries: Retry attempts (defaults to PROVIDER_HTTP_RETRIES)
+        backoff: Exponential backoff factor in seconds (defaults to PROVIDER_HTTP_BACKOFF)
+    
+    Returns:
+        Configured requests.Session
+    """
+    pool_size = pool_size or settings.PROVIDER_HTTP_POOL_SIZE
+    retry = Retry(
+        total=settings.PROVIDER_HTTP_RETRIES if retries is None else retries,
+        backoff_factor=settings.PROVIDER_HTTP_BACKOFF if backoff is None else backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive", "User-Agent": "hawkiz-backend/0.1"})
+    return session
@@ -0,0 +1,161 @@
+"""Local file provider backed by Parquet/CSV fixtures."""
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import pandas as pd
+from app.config import settings
+from app.providers.base import MarketDataProvider, CHAIN_COLUMNS, HISTORY_COLUMNS, empty_history, split_chain
+import logging
+
+logger = logging.getLogger(__name__)
+
+# File extensions tried in order
+FILE_SUFFIXES = (".parquet", ".csv")
+
+# Fixture column names (lower-cased) mapped onto provider frame columns
+HISTORY_FILE_COLUMNS = {
+    "date": "Date",
+    "datetime": "Date",
+    "timestamp": "Date",
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+}
+CHAIN_FILE_COLUMNS = {
+    "expiration_date": "expiration",
+    "expiration": "expiration",
+    "option_type": "type",
+    "type": "type",
+    "strike": "strike",
+    "bid": "bid",
+    "ask": "ask",
+    "last": "lastPrice",
+    "lastprice": "lastPrice",
+    "volume": "volume",
+    "open_interest": "openInterest",
+    "openinterest": "openInterest",
+    "implied_volatility": "impliedVolatility",
+    "impliedvolatility": "impliedVolatility",
+}
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Serves market data from files for offline runs and deterministic benchmarks.
+    
+    Layout under the root directory (LOCAL_DATA_DIR by default)::
+    
+        stocks/{SYMBOL}_{interval}.parquet|csv   (or stocks/{SYMBOL}.parquet|csv for 1d)
+        options/{SYMBOL}.parquet|csv
+    
+    Stock files need a date/timestamp column and OHLCV columns; option files
+    need expiration, option type ('C'/'P' or 'call'/'put'), strike and the
+    usual quote columns, in either yfinance or options_chains naming. The
+    underlying price is the last close in the daily stock file. Parsed files
+    are kept in memory until they change on disk.
+    """
+    
+    name = "local"
+    
+    def __init__(self, root: Optional[Union[str, Path]] = None):
+        self.root = Path(root or settings.LOCAL_DATA_DIR)
+        self._frames: Dict[Path, Tuple[float, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+    
+    def _find(self, folder: str, *stems: str) -> Optional[Path]:
+        """First existing file for the given stems and FILE_SUFFIXES."""
+        for stem in stems:
+            for suffix in FILE_SUFFIXES:
+                path = self.root / folder / f"{stem}{suffix}"
+                if path.exists():
+                    return path
+        return None
+    
+    def _read(self, path: Path, columns: Dict[str, str]) -> pd.DataFrame:
+        """Read and rename a fixture file, reusing the parsed frame while its mtime is unchanged."""
+        mtime = path.stat().st_mtime
+        with self._lock:
+            cached = self._frames.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        frame = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+        frame = frame.rename(columns=lambda column: columns.get(str(column).lower(), column))
+        
+        with self._lock:
+            self._frames[path] = (mtime, frame)
+        return frame
+    
+    def _history(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """Full history frame for a symbol and interval, or None when no file exists."""
+        stems = [f"{symbol}_{interval}"] + ([symbol] if interval == "1d" else [])
+        path = self._find("stocks", *stems)
+        if path is None:
+            return None
+        
+        frame = self._read(path, HISTORY_FILE_COLUMNS)
+        if "Date" in frame.columns:
+            frame = frame.set_index("Date")
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.index, utc=True), name="Date")
+        return frame.reindex(columns=HISTORY_COLUMNS).sort_index()
+    
+    def fetch_stock_frame(
+        self,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Slice [start_date, end_date) out of the symbol's fixture file."""
+        history = self._history(symbol, interval)
+        if history is None:
+            logger.warning(f"No local price file for {symbol} ({interval}) under {self.root}")
+            return empty_history()
+        
+        start = pd.Timestamp(start_date, tz="UTC")
+        frame = history[history.index >= start]
+        if end_date is not None:
+            frame = frame[frame.index < pd.Timestamp(end_date, tz="UTC")]
+        return frame.copy()
+    
+    def _chain(self, symbol: str) -> pd.DataFrame:
+        """Full chain fixture with string expirations."""
+        path = self._find("options", symbol)
+        if path is None:
+            logger.warning(f"No local options file for {symbol} under {self.root}")
+            return pd.DataFrame(columns=["expiration", "type", *CHAIN_COLUMNS])
+        
+        chain = self._read(path, CHAIN_FILE_COLUMNS).copy()
+        chain["expiration"] = pd.to_datetime(chain["expiration"]).dt.strftime("%Y-%m-%d")
+        # 'C'/'P' and 'call'/'put' both start with the letter we match on
+        chain["type"] = chain["type"].astype(str).str[0].str.upper()
+        return chain
+    
+    def fetch_option_expirations(self, symbol: str) -> Tuple[str, ...]:
+        """Expirations present in the chain fixture."""
+        return tuple(sorted(self._chain(symbol)["expiration"].unique()))
+    
+    def fetch_option_chain(self, symbol: str, expiration: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """One expiration of the chain fixture."""
+        chain = self._chain(symbol)
+        return split_chain(chain[chain["expiration"] == str(expiration)], "type", "C")
+    
+    def fetch_option_chains(self, symbol, expirations) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Several expirations from one read of the chain fixture."""
+        wanted = {str(expiration) for expiration in expirations}
+        chain = self._chain(symbol)
+        return {
+            expiration: split_chain(group, "type", "C")
+            for expiration, group in chain.groupby("expiration", sort=True)
+            if expiration in wanted
+        }
+    
+    def fetch_underlying_price(self, symbol: str) -> float:
+        """Last close of the daily fixture."""
+        history = self._history(symbol, "1d")
+        if history is None or history.empty:
+            return 0
+        return float(history["Close"].iloc[-1])
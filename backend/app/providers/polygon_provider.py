@@ -0,0 +1,159 @@
+"""Polygon.io provider."""
+from datetime import date
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+import pandas as pd
+from app.config import settings
+from app.providers.base import MarketDataProvider, HISTORY_COLUMNS, empty_history, parse_interval, split_chain
+from app.providers.http import build_http_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+POLYGON_BASE_URL = "https://api.polygon.io"
+
+# Page size for aggregates and snapshot endpoints (API maximums)
+AGGS_PAGE_LIMIT = 50000
+SNAPSHOT_PAGE_LIMIT = 250
+CONTRACTS_PAGE_LIMIT = 1000
+
+
+class PolygonProvider(MarketDataProvider):
+    """
+    Polygon.io REST provider.
+    
+    Whole-chain pulls use the options snapshot endpoint, which returns every
+    contract of an underlying (optionally filtered to an expiration range) in
+    pages of 250, instead of one request per expiration.
+    """
+    
+    name = "polygon"
+    
+    def __init__(self, api_key: Optional[str] = None, session=None):
+        self.api_key = api_key or settings.POLYGON_API_KEY
+        if not self.api_key:
+            raise ValueError("POLYGON_API_KEY is required for the polygon provider")
+        self.session = session or build_http_session()
+    
+    def _get(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """GET a Polygon URL (absolute or relative to the base URL) and return JSON."""
+        if not url.startswith("http"):
+            url = POLYGON_BASE_URL + url
+        params = dict(params or {})
+        params["apiKey"] = self.api_key
+        response = self.session.get(url, params=params, timeout=settings.PROVIDER_HTTP_TIMEOUT)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("status") == "ERROR":
+            raise ValueError(f"Polygon error: {payload.get('error') or payload.get('message')}")
+        return payload
+    
+    def _paginate(self, path: str, params: Dict) -> Iterator[Dict]:
+        """Yield result rows across next_url pages."""
+        payload = self._get(path, params)
+        while True:
+            yield from payload.get("results") or []
+            next_url = payload.get("next_url")
+            if not next_url:
+                return
+            # next_url carries the cursor and original filters; only the key is re-added
+            payload = self._get(next_url)
+    
+    def fetch_stock_frame(
+        self,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Fetch aggregates bars from /v2/aggs."""
+        if end_date is None:
+            end_date = date.today()
+        multiplier, timespan = parse_interval(interval)
+        
+        # Polygon's range is inclusive of the end date; the interface's is exclusive
+        end = pd.Timestamp(end_date) - pd.Timedelta(days=1)
+        rows = list(self._paginate(
+            f"/v2/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{start_date}/{end.date()}",
+            {"adjusted": "true", "sort": "asc", "limit": AGGS_PAGE_LIMIT},
+        ))
+        if not rows:
+            return empty_history()
+        
+        bars = pd.DataFrame(rows)
+        frame = pd.DataFrame(
+            {
+                "Open": bars["o"],
+                "High": bars["h"],
+                "Low": bars["l"],
+                "Close": bars["c"],
+                "Volume": bars["v"],
+            }
+        )
+        frame.index = pd.DatetimeIndex(pd.to_datetime(bars["t"], unit="ms", utc=True), name="Date")
+        return frame[HISTORY_COLUMNS]
+    
+    def fetch_option_expirations(self, symbol: str) -> Tuple[str, ...]:
+        """List unexpired expirations from the contracts reference endpoint."""
+        rows = self._paginate(
+            "/v3/reference/options/contracts",
+            {"underlying_ticker": symbol, "expired": "false", "limit": CONTRACTS_PAGE_LIMIT},
+        )
+        return tuple(sorted({row["expiration_date"] for row in rows}))
+    
+    def _snapshot_chain(self, symbol: str, params: Dict) -> pd.DataFrame:
+        """Pull the options snapshot as a flat frame with CHAIN_COLUMNS plus type/expiration."""
+        records = []
+        for row in self._paginate(f"/v3/snapshot/options/{symbol}", {"limit": SNAPSHOT_PAGE_LIMIT, **params}):
+            details = row.get("details") or {}
+            day = row.get("day") or {}
+            quote = row.get("last_quote") or {}
+            records.append({
+                "expiration": details.get("expiration_date"),
+                "contract_type": details.get("contract_type"),
+                "strike": details.get("strike_price"),
+                "bid": quote.get("bid"),
+                "ask": quote.get("ask"),
+                "lastPrice": (row.get("last_trade") or {}).get("price", day.get("close")),
+                "volume": day.get("volume"),
+                "openInterest": row.get("open_interest"),
+                "impliedVolatility": row.get("implied_volatility"),
+            })
+        return pd.DataFrame(records, columns=[
+            "expiration", "contract_type", "strike", "bid", "ask", "lastPrice",
+            "volume", "openInterest", "impliedVolatility",
+        ])
+    
+    def fetch_option_chain(self, symbol: str, expiration: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Fetch one expiration from the options snapshot."""
+        chain = self._snapshot_chain(symbol, {"expiration_date": expiration})
+        return split_chain(chain, "contract_type", "call")
+    
+    def fetch_option_chains(
+        self,
+        symbol: str,
+        expirations: Sequence[str]
+    ) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Fetch every requested expiration in one paginated snapshot pull."""
+        expirations = sorted(str(expiration) for expiration in expirations)
+        if not expirations:
+            return {}
+        
+        chain = self._snapshot_chain(symbol, {
+            "expiration_date.gte": expirations[0],
+            "expiration_date.lte": expirations[-1],
+        })
+        chains = {}
+        for expiration, group in chain.groupby("expiration", sort=True):
+            if expiration in expirations:
+                chains[expiration] = split_chain(group, "contract_type", "call")
+        return chains
+    
+    def fetch_underlying_price(self, symbol: str) -> float:
+        """Latest trade (or day close) from the stock ticker snapshot."""
+        payload = self._get(f"/v2/snapshot/locale/us/markets/stocks/tickers/{symbol}")
+        ticker = payload.get("ticker") or {}
+        price = (ticker.get("lastTrade") or {}).get("p") or (ticker.get("day") or {}).get("c")
+        return price or (ticker.get("prevDay") or {}).get("c", 0)
+    
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,110 @@
+"""Yahoo Finance provider."""
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+import pandas as pd
+import yfinance as yf
+from app.providers.base import MarketDataProvider, HISTORY_COLUMNS, empty_history
+from app.providers.http import build_http_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """yfinance-backed provider sharing one pooled HTTP session."""
+    
+    name = "yfinance"
+    batch_history = True
+    
+    def __init__(self, session=None):
+        self.session = session or build_http_session()
+    
+    def _ticker(self, symbol: str) -> yf.Ticker:
+        return yf.Ticker(symbol, session=self.session)
+    
+    def fetch_stock_frame(
+        self,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Fetch price history via Ticker.history."""
+        if end_date is None:
+            end_date = date.today()
+        return self._ticker(symbol).history(start=start_date, end=end_date, interval=interval)
+    
+    def fetch_stock_frames(
+        self,
+        symbols: Sequence[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d"
+    ) -> Dict[str, pd.DataFrame]:
+        """Fetch many symbols with one yf.download call."""
+        if end_date is None:
+            end_date = date.today()
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        
+        # ignore_tz=False keeps daily bars at midnight exchange time, as
+        # Ticker.history returns them; the default drops the zone and would
+        # store each session at a different UTC time than fetch_stock_frame
+        data = yf.download(
+            symbols,
+            start=start_date,
+            end=end_date,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,
+            ignore_tz=False,
+            progress=False,
+            threads=True,
+            session=self.session,
+        )
+        
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frame = frame.reindex(columns=HISTORY_COLUMNS).dropna(how="all")
+            frames[symbol] = frame if not frame.empty else empty_history()
+        return frames
+    
+    def fetch_option_expirations(self, symbol: str) -> Tuple[str, ...]:
+        """List expirations via Ticker.options."""
+        return tuple(self._ticker(symbol).options)
+    
+    def fetch_option_chain(self, symbol: str, expiration: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Fetch one expiration via Ticker.option_chain."""
+        opt_chain = self._ticker(symbol).option_chain(expiration)
+        return opt_chain.calls, opt_chain.puts
+    
+    def fetch_option_chains(
+        self,
+        symbol: str,
+        expirations: Sequence[str]
+    ) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Fetch several expirations reusing one Ticker (and its expiration map)."""
+        ticker = self._ticker(symbol)
+        chains = {}
+        for expiration in expirations:
+            try:
+                opt_chain = ticker.option_chain(expiration)
+                chains[expiration] = (opt_chain.calls, opt_chain.puts)
+            except Exception as e:
+                logger.warning(f"Error fetching options for {symbol} expiration {expiration}: {str(e)}")
+        return chains
+    
+    def fetch_underlying_price(self, symbol: str) -> float:
+        """Latest price from Ticker.info."""
+        info = self._ticker(symbol).info
+        return info.get('regularMarketPrice') or info.get('currentPrice', 0)
+    
+    def close(self) -> None:
+        self.session.close()
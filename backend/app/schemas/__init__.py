@@ -5,6 +5,16 @@ from app.schemas.market_data import (
     OptionsChainResponse,
     OptionsChainItem,
     AvailableDatesResponse,
+    BatchIngestRequest,
+    SymbolIngestProgress,
+    IngestJobResponse,
+)
+from app.schemas.backtest import (
+    StrategyDefinition,
+    SweepDefinition,
+    BacktestJobRequest,
+    SweepJobRequest,
+    BacktestJobResponse,
 )
 
 __all__ = [
@@ -13,5 +23,13 @@ __all__ = [
     "OptionsChainResponse",
     "OptionsChainItem",
     "AvailableDatesResponse",
+    "BatchIngestRequest",
+    "SymbolIngestProgress",
+    "IngestJobResponse",
+    "StrategyDefinition",
+    "SweepDefinition",
+    "BacktestJobRequest",
+    "SweepJobRequest",
+    "BacktestJobResponse",
 ]
 
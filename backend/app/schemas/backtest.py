@@ -0,0 +1,274 @@
+"""Pydantic schemas for strategy definitions (see OPTIONS_BACKTESTING_PLAN.md)."""
+from datetime import date, datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+
+# Comparison operators shared by indicator, volatility and Greeks conditions
+ComparisonOperator = Literal["<", "<=", ">", ">=", "crosses_above", "crosses_below"]
+
+
+class TechnicalIndicatorCondition(BaseModel):
+    """Compare a technical indicator of the underlying with a value."""
+    type: Literal["technical_indicator"]
+    indicator: Literal["RSI", "SMA", "EMA", "MACD", "BOLLINGER", "STOCHASTIC"]
+    period: int = Field(14, ge=1)
+    operator: ComparisonOperator
+    value: float  # MACD compares the histogram, BOLLINGER %B (0 = lower band, 1 = upper), STOCHASTIC %K
+    fast_period: int = Field(12, ge=1)  # MACD only
+    slow_period: int = Field(26, ge=1)  # MACD only
+    signal_period: int = Field(9, ge=1)  # MACD only
+    std_dev: float = Field(2.0, gt=0)  # BOLLINGER only
+
+
+class PriceActionCondition(BaseModel):
+    """Underlying price against a moving average, a level or its recent range."""
+    type: Literal["price_action"]
+    condition: Literal[
+        "price_above_ma", "price_below_ma", "price_crosses_above_ma", "price_crosses_below_ma",
+        "price_above", "price_below", "breakout_high", "breakout_low",
+    ]
+    ma_type: Literal["SMA", "EMA"] = "SMA"
+    ma_period: int = Field(200, ge=1)
+    value: Optional[float] = None  # Level for price_above / price_below
+    period: int = Field(20, ge=1)  # Lookback of breakout_high / breakout_low
+    
+    @model_validator(mode="after")
+    def _level_required(self):
+        if self.condition in ("price_above", "price_below") and self.value is None:
+            raise ValueError(f"{self.condition} needs a value")
+        return self
+
+
+class VolumeCondition(BaseModel):
+    """Underlying volume against a threshold or its own average."""
+    type: Literal["volume"]
+    condition: Literal["volume_above", "volume_below", "volume_spike"]
+    value: float  # Shares for above/below, multiple of the period average for volume_spike
+    period: int = Field(20, ge=1)
+
+
+class OptionsMetricCondition(BaseModel):
+    """Implied volatility level, IV rank or IV percentile of the underlying."""
+    type: Literal["options_metric"]
+    metric: Literal["implied_volatility", "iv_rank", "iv_percentile"]
+    operator: ComparisonOperator
+    value: float  # Rank and percentile are 0-100
+    period: int = Field(252, ge=2)  # Lookback of rank and percentile
+
+
+class ProfitTargetCondition(BaseModel):
+    """Exit once the position has gained a share of its entry premium or a dollar amount."""
+    type: Literal["profit_target"]
+    target_type: Literal["percentage", "dollar"] = "percentage"
+    value: float = Field(..., gt=0)
+
+
+class StopLossCondition(BaseModel):
+    """Exit once the position has lost a share of its entry premium or a dollar amount."""
+    type: Literal["stop_loss"]
+    stop_type: Literal["percentage", "dollar", "trailing"] = "percentage"
+    value: float  # Either sign; -0.3 and 0.3 both stop out at a 30% loss
+
+
+class TimeBasedCondition(BaseModel):
+    """Exit after a holding period or shortly before expiration."""
+    type: Literal["time_based"]
+    max_holding_days: Optional[int] = Field(None, ge=0)
+    days_before_expiration: Optional[int] = Field(None, ge=0)
+    
+    @model_validator(mode="after")
+    def _limit_required(self):
+        if self.max_holding_days is None and self.days_before_expiration is None:
+            raise ValueError("time_based needs max_holding_days or days_before_expiration")
+        return self
+
+
+class GreeksCondition(BaseModel):
+    """Exit on the net delta of one spread (long legs positive, short legs negative)."""
+    type: Literal["greeks"]
+    greek: Literal["delta"] = "delta"
+    operator: ComparisonOperator
+    value: float
+
+
+SignalCondition = Annotated[
+    Union[TechnicalIndicatorCondition, PriceActionCondition, VolumeCondition, OptionsMetricCondition],
+    Field(discriminator="type"),
+]
+
+ExitCondition = Annotated[
+    Union[
+        TechnicalIndicatorCondition, PriceActionCondition, VolumeCondition, OptionsMetricCondition,
+        ProfitTargetCondition, StopLossCondition, TimeBasedCondition, GreeksCondition,
+    ],
+    Field(discriminator="type"),
+]
+
+
+class EntryConditions(BaseModel):
+    """Entry rules combined with AND or OR, evaluated on each bar's close."""
+    logic: Literal["AND", "OR"] = "AND"
+    conditions: List[SignalCondition] = Field(..., min_length=1)
+
+
+class ExitConditions(BaseModel):
+    """Exit rules combined with AND or OR; expiration always closes a position."""
+    logic: Literal["AND", "OR"] = "OR"
+    conditions: List[ExitCondition] = Field(default_factory=list)
+
+
+class PositionSizing(BaseModel):
+    """How many spreads each entry opens."""
+    method: Literal["fixed_dollar", "fixed_contracts", "percent_of_capital", "risk_based"] = "fixed_dollar"
+    value: float = Field(1000, gt=0)  # Dollars, contracts, or a fraction of capital (0.1 = 10%)
+    max_positions: int = Field(1, ge=1)
+    risk_per_trade: float = Field(0.02, gt=0, le=1)  # risk_based only
+
+
+class OptionLeg(BaseModel):
+    """One leg of a multi-leg strategy; every leg shares the selected expiration."""
+    option_type: Literal["CALL", "PUT"]
+    action: Literal["buy", "sell"] = "buy"
+    quantity: int = Field(1, ge=1)
+    strike_selection: Literal["at_the_money", "in_the_money", "out_of_the_money", "delta"] = "at_the_money"
+    strike_offset: float = Field(0.0, ge=0)  # Fraction of spot away from the money (0.05 = 5%)
+    target_delta: Optional[float] = None  # strike_selection 'delta'; compared by absolute value
+    
+    @model_validator(mode="after")
+    def _delta_required(self):
+        if self.strike_selection == "delta" and self.target_delta is None:
+            raise ValueError("strike_selection 'delta' needs target_delta")
+        return self
+
+
+class OptionsSelection(BaseModel):
+    """Contract selection; top-level strike fields describe a single long leg when legs is empty."""
+    expiration: Literal["nearest", "nearest_weekly", "nearest_monthly", "target_dte"] = "nearest_weekly"
+    strike_selection: Literal["at_the_money", "in_the_money", "out_of_the_money", "delta"] = "at_the_money"
+    option_type: Literal["CALL", "PUT"] = "CALL"
+    strike_offset: float = Field(0.0, ge=0)
+    target_delta: Optional[float] = None
+    min_dte: int = Field(7, ge=0)
+    max_dte: int = Field(45, ge=0)
+    target_dte: Optional[int] = Field(None, ge=0)  # expiration 'target_dte'
+    legs: List[OptionLeg] = Field(default_factory=list)
+    strike_increment: float = Field(1.0, gt=0)  # Strike grid when contracts are priced from the model
+    
+    @model_validator(mode="after")
+    def _check_window(self):
+        if self.min_dte > self.max_dte:
+            raise ValueError("min_dte must not exceed max_dte")
+        if self.expiration == "target_dte" and self.target_dte is None:
+            raise ValueError("expiration 'target_dte' needs target_dte")
+        if not self.legs and self.strike_selection == "delta" and self.target_delta is None:
+            raise ValueError("strike_selection 'delta' needs target_delta")
+        return self
+    
+    def resolved_legs(self) -> List[OptionLeg]:
+        """Legs to open, with the single-leg shorthand expanded."""
+        if self.legs:
+            return list(self.legs)
+        return [OptionLeg(
+            option_type=self.option_type,
+            strike_selection=self.strike_selection,
+            strike_offset=self.strike_offset,
+            target_delta=self.target_delta,
+        )]
+
+
+class ContractFilters(BaseModel):
+    """Liquidity filters applied to stored chain quotes."""
+    min_volume: int = Field(0, ge=0)
+    min_open_interest: int = Field(0, ge=0)
+    max_bid_ask_spread: Optional[float] = Field(None, gt=0)  # Fraction of the mid price
+
+
+class ExecutionSettings(BaseModel):
+    """Pricing source, fills and costs."""
+    pricing: Literal["auto", "chain", "model"] = "auto"  # auto: stored chains when there are any
+    fill: Literal["mid", "natural"] = "mid"  # natural buys at the ask and sells at the bid
+    commission_per_contract: float = Field(0.0, ge=0)
+    volatility_lookback: int = Field(20, ge=2)  # Realized-volatility window for model pricing
+
+
+class StrategyDefinition(BaseModel):
+    """A JSON options strategy."""
+    name: str
+    description: Optional[str] = None
+    version: str = "1.0"
+    underlying_symbol: str
+    entry_conditions: EntryConditions
+    exit_conditions: ExitConditions = Field(default_factory=ExitConditions)
+    position_sizing: PositionSizing = Field(default_factory=PositionSizing)
+    options_selection: OptionsSelection = Field(default_factory=OptionsSelection)
+    filters: ContractFilters = Field(default_factory=ContractFilters)
+    execution: ExecutionSettings = Field(default_factory=ExecutionSettings)
+
+
+class ParameterRange(BaseModel):
+    """Uniform range sampled by random sweeps; integers when both bounds are integers."""
+    low: Union[int, float]
+    high: Union[int, float]
+    
+    @model_validator(mode="after")
+    def _check_bounds(self):
+        if self.low > self.high:
+            raise ValueError("low must not exceed high")
+        return self
+
+
+class SweepDefinition(BaseModel):
+    """
+    Parameter sweep over one strategy.
+    
+    Keys of parameters are dotted paths into the strategy JSON, with list
+    positions as numbers (e.g. "options_selection.legs.0.strike_offset" or
+    "exit_conditions.conditions.1.value").
+    """
+    mode: Literal["grid", "random"] = "grid"
+    parameters: Dict[str, Union[List[Any], ParameterRange]] = Field(..., min_length=1)
+    samples: Optional[int] = Field(None, ge=1)  # random only
+    seed: Optional[int] = None  # random only
+    
+    @model_validator(mode="after")
+    def _check_mode(self):
+        for path, values in self.parameters.items():
+            if isinstance(values, list) and not values:
+                raise ValueError(f"{path} needs at least one value")
+            if self.mode == "grid" and isinstance(values, ParameterRange):
+                raise ValueError(f"grid sweeps need a list of values for {path}")
+        if self.mode == "random" and self.samples is None:
+            raise ValueError("random sweeps need samples")
+        return self
+
+
+class BacktestJobRequest(BaseModel):
+    """Backtest to run as a background job."""
+    strategy: StrategyDefinition
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    initial_capital: float = Field(100_000.0, gt=0)
+    source: Literal["database", "lake"] = "database"
+    use_cache: bool = True  # False recomputes even when a cached result matches
+
+
+class SweepJobRequest(BacktestJobRequest):
+    """Parameter sweep to run as a background job."""
+    sweep: SweepDefinition
+    workers: Optional[int] = Field(None, ge=1)  # Sweep worker processes (default: CPU count)
+
+
+class BacktestJobResponse(BaseModel):
+    """Backtest or sweep job status."""
+    job_id: str
+    kind: Optional[str] = None  # 'backtest' or 'sweep'; unknown until a queued job starts
+    status: str  # 'pending', 'running', 'completed', 'failed'
+    strategy: Optional[str] = None
+    symbol: Optional[str] = None
+    phase: Optional[str] = None  # 'loading', 'running', 'done'
+    completed: int = 0  # Finished runs
+    total: int = 0
+    cached: bool = False  # Result came from the result cache
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
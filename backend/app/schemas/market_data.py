@@ -2,16 +2,15 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 from typing import Optional, List
-from decimal import Decimal
 
 
 class StockPriceResponse(BaseModel):
     """Stock price data response."""
     timestamp: datetime
-    open: Decimal
-    high: Decimal
-    low: Decimal
-    close: Decimal
+    open: float
+    high: float
+    low: float
+    close: float
     volume: int
     
     class Config:
@@ -23,23 +22,25 @@ class StockPriceListResponse(BaseModel):
     symbol: str
     data: List[StockPriceResponse]
     count: int
+    next_cursor: Optional[str] = None  # Older rows
+    prev_cursor: Optional[str] = None  # Newer rows
 
 
 class OptionsChainItem(BaseModel):
     """Single options chain item."""
     expiration_date: date
-    strike: Decimal
+    strike: float
     option_type: str  # 'C' or 'P'
-    bid: Optional[Decimal] = None
-    ask: Optional[Decimal] = None
-    last: Optional[Decimal] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    last: Optional[float] = None
     volume: Optional[int] = None
     open_interest: Optional[int] = None
-    implied_volatility: Optional[Decimal] = None
-    delta: Optional[Decimal] = None
-    gamma: Optional[Decimal] = None
-    theta: Optional[Decimal] = None
-    vega: Optional[Decimal] = None
+    implied_volatility: Optional[float] = None
+    delta: Optional[float] = None
+    gamma: Optional[float] = None
+    theta: Optional[float] = None
+    vega: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -48,16 +49,76 @@ class OptionsChainItem(BaseModel):
 class OptionsChainResponse(BaseModel):
     """Options chain response."""
     underlying_symbol: str
-    underlying_price: Decimal
+    underlying_price: float
     timestamp: datetime
     expirations: List[date]
     chains: List[OptionsChainItem]
     count: int
 
 
+class IVSurfaceSlice(BaseModel):
+    """Out-of-the-money implied volatilities of one expiration."""
+    expiration_date: date
+    years_to_expiry: float
+    strikes: List[float]
+    implied_volatility: List[float]
+
+
+class IVSurfacePoint(BaseModel):
+    """Interpolated implied volatility at one strike."""
+    strike: float
+    expiration_date: date
+    implied_volatility: Optional[float] = None
+
+
+class IVSurfaceResponse(BaseModel):
+    """Implied volatility surface of one stored snapshot."""
+    underlying_symbol: str
+    underlying_price: float
+    timestamp: datetime  # Snapshot the surface was built from
+    slices: List[IVSurfaceSlice]
+    points: List[IVSurfacePoint] = []
+
+
 class AvailableDatesResponse(BaseModel):
     """Available dates for market data."""
     symbol: Optional[str] = None
     dates: List[date]
     count: int
 
+
+
+class BatchIngestRequest(BaseModel):
+    """Batch ingestion request for several symbols."""
+    symbols: List[str] = Field(..., min_length=1, max_length=500)
+    start_date: date
+    end_date: Optional[date] = None
+    interval: str = "1d"
+    refresh: bool = False  # Re-fetch whole windows instead of only uncovered ranges
+
+
+class SymbolIngestProgress(BaseModel):
+    """Ingestion progress for one symbol."""
+    symbol: str
+    status: str  # 'pending', 'running', 'completed', 'failed'
+    records_stored: int
+    records_updated: int
+    total_fetched: int
+    ranges_fetched: int = 0
+    error: Optional[str] = None
+
+
+class IngestJobResponse(BaseModel):
+    """Batch ingestion job status."""
+    job_id: str
+    status: str  # 'pending', 'running', 'completed', 'failed'
+    provider: str
+    interval: str
+    refresh: bool = False
+    start_date: date
+    end_date: Optional[date] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    total_symbols: int
+    completed_symbols: int
+    progress: List[SymbolIngestProgress]
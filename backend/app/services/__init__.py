@@ -1,5 +1,18 @@
 """Business logic services."""
 from app.services.market_data_service import MarketDataService
+from app.services.bulk_loader import BulkLoader
+from app.services.coverage_service import CoverageService
+from app.services.ingestion_service import IngestionService
+from app.services.greeks_service import GreeksService
+from app.services.iv_surface import IVSurface, IVSurfaceService
+from app.services.options_delta_store import OptionsDeltaStore
+from app.services.chain_index import ChainIndexCache, OptionsChainIndex
+from app.services.contract_selector import ContractSelector
+from app.services.resample_service import ResampleService
+from app.services.data_lake import DataLakeService
+from app.services.indicators import Indicators
+from app.services.backtest_engine import BacktestData, BacktestEngine, BacktestResult
+from app.services.backtest_sweep import BacktestSweep
+from app.services.backtest_jobs import BacktestJobService
 
-__all__ = ["MarketDataService"]
-
+__all__ = ["MarketDataService", "BulkLoader", "CoverageService", "IngestionService", "GreeksService", "IVSurface", "IVSurfaceService", "OptionsDeltaStore", "OptionsChainIndex", "ChainIndexCache", "ContractSelector", "ResampleService", "DataLakeService", "Indicators", "BacktestData", "BacktestEngine", "BacktestResult", "BacktestSweep", "BacktestJobService"]
@@ -0,0 +1,1030 @@
+"""Backtest engine: JSON options strategies over NumPy price and chain columns."""
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+import orjson
+import pandas as pd
+from scipy.special import ndtri
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.schemas.backtest import ContractFilters, OptionLeg, OptionsSelection, StrategyDefinition
+from app.services.chain_index import ChainIndexCache, OptionsChainIndex
+from app.services.contract_selector import ContractSelector
+from app.services.data_lake import DataLakeService
+from app.services.greeks_service import EXPIRY_HOUR_UTC, MIN_TIME_TO_EXPIRY, SECONDS_PER_YEAR, GreeksService
+from app.services.indicators import Indicators
+from app.services.price_cache import PriceSeriesCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shares per option contract
+CONTRACT_MULTIPLIER = 100
+
+# Starting equity when a run does not set one
+DEFAULT_INITIAL_CAPITAL = 100_000.0
+
+MS_PER_DAY = 86_400_000
+EXPIRY_OFFSET_MS = EXPIRY_HOUR_UTC * 3_600_000
+
+# Signal condition types, evaluated once per run over every bar
+SIGNAL_TYPES = ("technical_indicator", "price_action", "volume", "options_metric")
+
+# Chain indexes built by BacktestData; saved alongside the columns so opening skips the sort
+DERIVED_CHAIN_ARRAYS = (
+    "chain_key", "chain_mark", "snapshot_times", "snapshot_starts", "bar_snapshot",
+    "by_contract", "contract_keys", "contract_times",
+)
+
+
+class BacktestData:
+    """
+    Bars and stored option quotes of one underlying as NumPy columns.
+    
+    Chain rows are kept in snapshot order (timestamp, expiration, strike,
+    type) behind an OptionsChainIndex for contract selection, together with
+    a permutation into contract order (contract, timestamp), so one
+    contract's quotes over a holding period are a single binary search.
+    Indicator arrays computed by a run are cached on the instance; runs
+    over the same data share them.
+    """
+    
+    def __init__(
+        self,
+        symbol: str,
+        bars: Dict[str, np.ndarray],
+        chain: Optional[Union[Dict[str, np.ndarray], OptionsChainIndex]] = None
+    ):
+        self._set_bars(symbol, bars)
+        if chain is not None and not isinstance(chain, OptionsChainIndex):
+            chain = OptionsChainIndex(symbol, chain)
+        self.chain_index = chain
+        self.chain = chain.chain if chain is not None else None
+        if not self.has_chain:
+            return
+        
+        chain = self.chain
+        is_call = chain["is_call"]
+        self.chain_key = (
+            (chain["expiration"] << 32)
+            | (np.rint(chain["strike"] * 1000).astype(np.int64) << 1)
+            | is_call.astype(np.int64)
+        )
+        bid, ask, last = chain["bid"], chain["ask"], chain["last"]
+        with np.errstate(invalid="ignore"):
+            quoted = (bid > 0) & (ask > 0)
+            self.chain_mark = np.where(quoted, 0.5 * (bid + ask), np.where(last > 0, last, np.nan))
+        
+        self.snapshot_times = self.chain_index.snapshot_times
+        self.snapshot_starts = self.chain_index.snapshot_starts
+        self.bar_snapshot = self.chain_index.snapshots_at(self.bar_end)
+        
+        self.by_contract = np.argsort(self.chain_key, kind="stable")
+        self.contract_keys = self.chain_key[self.by_contract]
+        self.contract_times = chain["timestamp"][self.by_contract]
+    
+    def _set_bars(self, symbol: str, bars: Dict[str, np.ndarray]) -> None:
+        self.symbol = symbol
+        self.bars = bars
+        self.cache: Dict[tuple, np.ndarray] = {}
+        
+        timestamps = bars["timestamp"].astype("datetime64[ms]").astype(np.int64)
+        self.timestamps = timestamps
+        self.days = bars["timestamp"].astype("datetime64[D]").astype(np.int64)
+        spacing = int(np.median(np.diff(timestamps))) if len(timestamps) > 1 else MS_PER_DAY
+        # Quotes and expiries are compared against the end of each bar
+        self.bar_end = timestamps + spacing - 1
+        span_years = (timestamps[-1] - timestamps[0]) / 1000 / (365.25 * 24 * 3600) if len(timestamps) > 1 else 0
+        self.periods_per_year = float((len(timestamps) - 1) / span_years) if span_years > 0 else 252.0
+    
+    @property
+    def has_chain(self) -> bool:
+        """Whether any stored option quotes were loaded."""
+        return self.chain is not None and len(self.chain["timestamp"]) > 0
+    
+    def cached(self, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return a cached per-bar array, computing it on first use."""
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+    
+    @staticmethod
+    def chain_from_frame(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Convert a chain frame to sorted NumPy columns.
+        
+        Args:
+            frame: Frame with CHAIN_FRAME_COLUMNS (see OptionsChainIndex.columns_from_frame)
+        
+        Returns:
+            Dict of columns; timestamp is epoch ms, expiration epoch days,
+            is_call bool, the rest float64 (missing values NaN)
+        """
+        return OptionsChainIndex.columns_from_frame(frame)
+    
+    def save(self, directory: Union[str, Path]) -> Path:
+        """
+        Write every array, including the derived chain indexes, as .npy files.
+        
+        Args:
+            directory: Target directory (created if missing)
+        
+        Returns:
+            The directory, for BacktestData.open
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {f"bars.{column}": values for column, values in self.bars.items()}
+        if self.has_chain:
+            arrays.update({f"chain.{column}": values for column, values in self.chain.items()})
+            arrays.update({name: getattr(self, name) for name in DERIVED_CHAIN_ARRAYS})
+        for name, values in arrays.items():
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(values), allow_pickle=False)
+        (directory / "meta.json").write_bytes(orjson.dumps({"symbol": self.symbol, "arrays": list(arrays)}))
+        return directory
+    
+    @staticmethod
+    def open(directory: Union[str, Path]) -> "BacktestData":
+        """
+        Map data written by save without reading or re-indexing it.
+        
+        Arrays are read-only memory maps, so processes opening the same
+        directory share one copy through the page cache.
+        
+        Args:
+            directory: Directory written by BacktestData.save
+        
+        Returns:
+            BacktestData
+        """
+        directory = Path(directory)
+        meta = orjson.loads((directory / "meta.json").read_bytes())
+        # Plain ndarray views of the maps; np.memmap adds overhead to every slice
+        arrays = {name: np.asarray(np.load(directory / f"{name}.npy", mmap_mode="r")) for name in meta["arrays"]}
+        bars = {name.split(".", 1)[1]: values for name, values in arrays.items() if name.startswith("bars.")}
+        chain = {name.split(".", 1)[1]: values for name, values in arrays.items() if name.startswith("chain.")}
+        
+        data = BacktestData.__new__(BacktestData)
+        data._set_bars(meta["symbol"], bars)
+        data.chain = chain or None
+        for name in DERIVED_CHAIN_ARRAYS:
+            if name in arrays:
+                setattr(data, name, arrays[name])
+        data.chain_index = (
+            OptionsChainIndex(data.symbol, chain, data.snapshot_times, data.snapshot_starts) if chain else None
+        )
+        return data
+
+
+class _Spread:
+    """Legs of one position: strikes, shared expiry and signed quantities per spread."""
+    
+    def __init__(self, legs: List[OptionLeg], strikes: np.ndarray, expiration: int):
+        self.legs = legs
+        self.strikes = strikes
+        self.expiration = expiration
+        self.is_call = np.array([leg.option_type == "CALL" for leg in legs])
+        self.weights = np.array([leg.quantity * (1 if leg.action == "buy" else -1) for leg in legs], dtype=np.float64)
+        self.keys = (
+            (np.int64(expiration) << 32)
+            | (np.rint(strikes * 1000).astype(np.int64) << 1)
+            | self.is_call.astype(np.int64)
+        )
+    
+    def intrinsic(self, spot: np.ndarray) -> np.ndarray:
+        """Per-leg expiry value at each spot, shape (legs, len(spot))."""
+        spot = np.asarray(spot, dtype=np.float64)[None, :]
+        strikes = self.strikes[:, None]
+        return np.where(self.is_call[:, None], np.maximum(spot - strikes, 0.0), np.maximum(strikes - spot, 0.0))
+
+
+class BacktestResult:
+    """Outcome of one run: equity curve, closed trades and performance metrics."""
+    
+    def __init__(
+        self,
+        strategy_name: str,
+        symbol: str,
+        pricing: str,
+        timestamps: np.ndarray,
+        equity: np.ndarray,
+        trades: List[dict],
+        metrics: Dict[str, float],
+    ):
+        self.strategy_name = strategy_name
+        self.symbol = symbol
+        self.pricing = pricing
+        self.timestamps = timestamps
+        self.equity = equity
+        self.trades = trades
+        self.metrics = metrics
+    
+    def to_dict(self) -> dict:
+        """JSON-ready form; equity timestamps are epoch ms, non-finite metrics None."""
+        return {
+            "strategy": self.strategy_name,
+            "symbol": self.symbol,
+            "pricing": self.pricing,
+            "metrics": {
+                name: (value if not isinstance(value, float) or np.isfinite(value) else None)
+                for name, value in self.metrics.items()
+            },
+            "trades": [
+                {
+                    **trade,
+                    "entry_time": trade["entry_time"].isoformat(),
+                    "exit_time": trade["exit_time"].isoformat(),
+                    "legs": [{**leg, "expiration_date": leg["expiration_date"].isoformat()} for leg in trade["legs"]],
+                }
+                for trade in self.trades
+            ],
+            "equity_curve": {
+                "timestamp": self.timestamps.tolist(),
+                "equity": np.round(self.equity, 2).tolist(),
+            },
+        }
+
+
+class BacktestEngine:
+    """
+    Runs JSON strategy definitions against BacktestData.
+    
+    Entry rules and bar-level exit rules (indicators, price action, volume,
+    IV) are evaluated for every bar at once as boolean arrays. The only
+    Python loop walks the entry signals in time order, because open-position
+    limits and capital depend on earlier trades. Each accepted entry prices
+    its legs over the whole remaining holding window in one vectorized call
+    (stored chain quotes, or Black-Scholes on realized volatility), and the
+    first bar where the exit rules hold is found with one argmax, so the cost
+    per trade does not grow with the number of bars it is held.
+    
+    Orders fill at the close of the signal bar. Stored chains are used only
+    for entries on bars that have a snapshot taken during the bar; later
+    bars mark each leg at its latest quote, and legs settle at intrinsic
+    value on expiration.
+    """
+    
+    @staticmethod
+    def load_data(
+        db: Session,
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_options: bool = True
+    ) -> BacktestData:
+        """
+        Load an underlying's bars and stored option chains from the database.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            start_date: First bar date
+            end_date: Last bar date (inclusive)
+            include_options: Also load stored options chain snapshots
+        
+        Returns:
+            BacktestData
+        
+        Raises:
+            ValueError: If no bars are stored in the range
+        """
+        bars = PriceSeriesCache.get_range(db, symbol, start_date, end_date)
+        if not len(bars["timestamp"]):
+            raise ValueError(f"No price bars for {symbol} in range")
+        chain = None
+        if include_options:
+            chain = ChainIndexCache.get(db, symbol, *BacktestEngine._snapshot_range(start_date, end_date))
+        
+        logger.info(
+            f"Loaded {len(bars['timestamp'])} bars and "
+            f"{len(chain.chain['timestamp']) if chain else 0} option quotes for {symbol}"
+        )
+        return BacktestData(symbol, bars, chain)
+    
+    @staticmethod
+    def load_lake_data(
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        root: Optional[Union[str, Path]] = None,
+        include_options: bool = True
+    ) -> BacktestData:
+        """
+        Load an underlying's bars and option chains from the Parquet data lake.
+        
+        Args:
+            symbol: Underlying stock symbol
+            start_date: First bar date
+            end_date: Last bar date (inclusive)
+            root: Lake directory (default: DATA_LAKE_DIR)
+            include_options: Also load options snapshots
+        
+        Returns:
+            BacktestData
+        
+        Raises:
+            ValueError: If the lake has no bars in the range
+        """
+        bars = DataLakeService.read_prices(symbol, start_date, end_date, root=root)
+        if not len(bars["timestamp"]):
+            raise ValueError(f"No price bars for {symbol} in range")
+        chain = None
+        if include_options:
+            chain = ChainIndexCache.get_lake(symbol, *BacktestEngine._snapshot_range(start_date, end_date), root=root)
+        return BacktestData(symbol, bars, chain)
+    
+    @staticmethod
+    def _snapshot_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """First and last snapshot times of a bar date range."""
+        return (
+            datetime.combine(start_date, datetime.min.time()) if start_date else None,
+            datetime.combine(end_date, datetime.max.time()) if end_date else None,
+        )
+    
+    @staticmethod
+    def run(
+        strategy: StrategyDefinition,
+        data: BacktestData,
+        initial_capital: float = DEFAULT_INITIAL_CAPITAL
+    ) -> BacktestResult:
+        """
+        Backtest a strategy.
+        
+        Args:
+            strategy: Strategy definition
+            data: Bars (and optionally chains) of the strategy's underlying
+            initial_capital: Starting equity
+        
+        Returns:
+            BacktestResult
+        
+        Raises:
+            ValueError: If there are fewer than two bars, or the strategy
+                requires stored chains and none were loaded
+        """
+        n = len(data.timestamps)
+        if n < 2:
+            raise ValueError(f"Need at least 2 price bars for {data.symbol}, got {n}")
+        
+        pricing = strategy.execution.pricing
+        if pricing == "auto":
+            pricing = "chain" if data.has_chain else "model"
+        if pricing == "chain" and not data.has_chain:
+            raise ValueError(f"No stored options chains loaded for {data.symbol}")
+        
+        steps = np.zeros(n)
+        marks = np.zeros(n)
+        trades = []
+        entries = BacktestEngine._combine(
+            [BacktestEngine._signal(condition, data, strategy, pricing) for condition in strategy.entry_conditions.conditions],
+            strategy.entry_conditions.logic,
+        )
+        exit_signals = {
+            index: BacktestEngine._signal(condition, data, strategy, pricing)
+            for index, condition in enumerate(strategy.exit_conditions.conditions)
+            if condition.type in SIGNAL_TYPES
+        }
+        volatility = BacktestEngine._realized_volatility(data, strategy.execution.volatility_lookback)
+        legs = strategy.options_selection.resolved_legs()
+        sizing = strategy.position_sizing
+        commission = strategy.execution.commission_per_contract * sum(leg.quantity for leg in legs)
+        entry_bars = np.flatnonzero(entries[:-1])
+        if pricing == "chain":
+            expirations, leg_rows = BacktestEngine._select_chain_rows(
+                data, entry_bars, legs, strategy.options_selection, BacktestEngine._contract_selector(data, strategy.filters)
+            )
+        
+        realized = float(initial_capital)
+        open_positions = []  # (exit index, pnl, committed capital)
+        for entry, i in enumerate(entry_bars):
+            if open_positions:
+                realized += sum(pnl for exit_index, pnl, _ in open_positions if exit_index <= i)
+                open_positions = [position for position in open_positions if position[0] > i]
+            if len(open_positions) >= sizing.max_positions:
+                continue
+            
+            if pricing == "chain":
+                spread = BacktestEngine._chain_spread(data, legs, expirations[entry], leg_rows[:, entry])
+            else:
+                spread = BacktestEngine._select_model_spread(data, i, legs, strategy.options_selection, volatility[i])
+            if spread is None:
+                continue
+            
+            stop = BacktestEngine._window_stop(data, i, spread, strategy)
+            window = np.arange(i, stop)
+            leg_marks, leg_deltas, rows = BacktestEngine._price_window(
+                data, spread, window, pricing, volatility, strategy.exit_conditions
+            )
+            value = spread.weights @ leg_marks
+            natural = strategy.execution.fill == "natural"
+            entry_value = BacktestEngine._fill_value(data, spread, leg_marks[:, 0], rows, 0, opening=True, natural=natural)
+            if not np.isfinite(entry_value):
+                continue
+            
+            requirement = BacktestEngine._capital_per_spread(spread, entry_value, data.bars["close"][i])
+            available = realized - sum(committed for _, _, committed in open_positions)
+            quantity = min(
+                BacktestEngine._quantity(sizing, strategy, realized, entry_value, requirement),
+                int(available // requirement),
+            )
+            if quantity < 1:
+                continue
+            
+            exit_offset, reason = BacktestEngine._find_exit(
+                data, i, window, spread, value, entry_value, leg_deltas, quantity, strategy, exit_signals
+            )
+            exit_index = i + exit_offset
+            exit_value = BacktestEngine._fill_value(
+                data, spread, leg_marks[:, exit_offset], rows, exit_offset, opening=False, natural=natural
+            )
+            if data.bar_end[exit_index] >= spread.expiration * MS_PER_DAY + EXPIRY_OFFSET_MS:
+                exit_value = float(spread.weights @ spread.intrinsic(data.bars["close"][exit_index:exit_index + 1])[:, 0])
+            
+            scale = CONTRACT_MULTIPLIER * quantity
+            costs = 2 * commission * quantity
+            pnl = (exit_value - entry_value) * scale - costs
+            marks[i:exit_index] += (value[:exit_offset] - entry_value) * scale - commission * quantity
+            steps[exit_index] += pnl
+            open_positions.append((exit_index, pnl, requirement * quantity))
+            
+            trades.append({
+                "entry_time": datetime.fromtimestamp(data.timestamps[i] / 1000, timezone.utc),
+                "exit_time": datetime.fromtimestamp(data.timestamps[exit_index] / 1000, timezone.utc),
+                "bars_held": int(exit_offset),
+                "quantity": quantity,
+                "entry_value": round(float(entry_value), 4),
+                "exit_value": round(float(exit_value), 4),
+                "pnl": round(float(pnl), 2),
+                "return_pct": float(pnl / (max(abs(entry_value), 0.01) * scale)),
+                "exit_reason": reason,
+                "legs": [
+                    {
+                        "option_type": leg.option_type,
+                        "action": leg.action,
+                        "quantity": leg.quantity,
+                        "strike": float(strike),
+                        "expiration_date": date.fromordinal(date(1970, 1, 1).toordinal() + int(spread.expiration)),
+                    }
+                    for leg, strike in zip(spread.legs, spread.strikes)
+                ],
+            })
+        
+        equity = initial_capital + np.cumsum(steps) + marks
+        pnls = np.array([trade["pnl"] for trade in trades], dtype=np.float64)
+        return BacktestResult(
+            strategy.name, data.symbol, pricing, data.timestamps, equity, trades,
+            BacktestEngine.compute_metrics(data.timestamps, equity, pnls, data.periods_per_year),
+        )
+    
+    @staticmethod
+    def compute_metrics(
+        timestamps: np.ndarray,
+        equity: np.ndarray,
+        pnls: np.ndarray,
+        periods_per_year: float
+    ) -> Dict[str, float]:
+        """
+        Return, risk and trade statistics of an equity curve.
+        
+        Sharpe and Sortino use a zero risk-free rate. VaR is the one-bar
+        historical 95% value at risk as a fraction of equity.
+        
+        Args:
+            timestamps: Epoch ms per bar
+            equity: Equity per bar
+            pnls: Realized P&L per closed trade
+            periods_per_year: Bars per year
+        
+        Returns:
+            Dict of metric name to value
+        """
+        metrics = {
+            "total_pnl": 0.0, "total_return": 0.0, "annualized_return": 0.0, "cagr": 0.0,
+            "volatility": 0.0, "sharpe_ratio": 0.0, "sortino_ratio": 0.0, "calmar_ratio": 0.0,
+            "max_drawdown": 0.0, "max_drawdown_pct": 0.0, "max_drawdown_days": 0.0, "var_95": 0.0,
+        }
+        if len(equity) >= 2:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = equity[1:] / equity[:-1] - 1.0
+                peaks = np.maximum.accumulate(equity)
+                drawdown = equity - peaks
+                drawdown_pct = drawdown / peaks
+                years = (timestamps[-1] - timestamps[0]) / 1000 / (365.25 * 24 * 3600)
+                growth = equity[-1] / equity[0]
+                mean = float(np.mean(returns))
+                deviation = float(np.std(returns))
+                downside = float(np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)))
+                
+                peak_index = np.maximum.accumulate(np.where(equity >= peaks, np.arange(len(equity)), 0))
+                cagr = float(growth ** (1.0 / years) - 1.0) if years > 0 and growth > 0 else float("nan")
+                max_drawdown_pct = float(-drawdown_pct.min())
+                metrics.update({
+                    "total_pnl": float(equity[-1] - equity[0]),
+                    "total_return": float(growth - 1.0),
+                    "annualized_return": mean * periods_per_year,
+                    "cagr": cagr,
+                    "volatility": deviation * float(np.sqrt(periods_per_year)),
+                    "sharpe_ratio": mean / deviation * float(np.sqrt(periods_per_year)) if deviation > 0 else 0.0,
+                    "sortino_ratio": mean / downside * float(np.sqrt(periods_per_year)) if downside > 0 else 0.0,
+                    "calmar_ratio": cagr / max_drawdown_pct if max_drawdown_pct > 0 else 0.0,
+                    "max_drawdown": float(-drawdown.min()),
+                    "max_drawdown_pct": max_drawdown_pct,
+                    "max_drawdown_days": float((timestamps - timestamps[peak_index]).max() / MS_PER_DAY),
+                    "var_95": float(-np.percentile(returns, 5)),
+                })
+        
+        wins = pnls[pnls > 0]
+        losses = pnls[pnls <= 0]
+        gross_loss = float(-losses.sum())
+        metrics.update({
+            "total_trades": int(len(pnls)),
+            "winning_trades": int(len(wins)),
+            "losing_trades": int(len(losses)),
+            "win_rate": float(len(wins) / len(pnls)) if len(pnls) else 0.0,
+            "average_win": float(wins.mean()) if len(wins) else 0.0,
+            "average_loss": float(losses.mean()) if len(losses) else 0.0,
+            "largest_win": float(wins.max()) if len(wins) else 0.0,
+            "largest_loss": float(losses.min()) if len(losses) else 0.0,
+            "profit_factor": float(wins.sum() / gross_loss) if gross_loss > 0 else (float("inf") if len(wins) else 0.0),
+        })
+        return metrics
+    
+    @staticmethod
+    def _signal(condition, data: BacktestData, strategy: StrategyDefinition, pricing: str) -> np.ndarray:
+        """Evaluate a bar-level condition for every bar."""
+        bars = data.bars
+        close = bars["close"]
+        
+        if condition.type == "technical_indicator":
+            name = condition.indicator
+            if name == "RSI":
+                series = data.cached(("rsi", condition.period), lambda: Indicators.rsi(close, condition.period))
+            elif name in ("SMA", "EMA"):
+                series = BacktestEngine._moving_average(data, name, condition.period)
+            elif name == "MACD":
+                periods = (condition.fast_period, condition.slow_period, condition.signal_period)
+                series = data.cached(("macd",) + periods, lambda: Indicators.macd(close, *periods)[2])
+            elif name == "BOLLINGER":
+                series = data.cached(
+                    ("bollinger", condition.period, condition.std_dev),
+                    lambda: Indicators.bollinger_percent_b(close, condition.period, condition.std_dev),
+                )
+            else:
+                series = data.cached(
+                    ("stochastic", condition.period),
+                    lambda: Indicators.stochastic_k(bars["high"], bars["low"], close, condition.period),
+                )
+            return BacktestEngine._compare(series, condition.operator, condition.value)
+        
+        if condition.type == "price_action":
+            kind = condition.condition
+            if kind in ("price_above", "price_below"):
+                return BacktestEngine._compare(close, ">" if kind == "price_above" else "<", condition.value)
+            if kind == "breakout_high":
+                prior = BacktestEngine._shift(data.cached(
+                    ("max_high", condition.period), lambda: Indicators.rolling_max(bars["high"], condition.period)
+                ))
+                return BacktestEngine._compare(close - prior, ">", 0.0)
+            if kind == "breakout_low":
+                prior = BacktestEngine._shift(data.cached(
+                    ("min_low", condition.period), lambda: Indicators.rolling_min(bars["low"], condition.period)
+                ))
+                return BacktestEngine._compare(close - prior, "<", 0.0)
+            
+            distance = close - BacktestEngine._moving_average(data, condition.ma_type, condition.ma_period)
+            operator = {
+                "price_above_ma": ">",
+                "price_below_ma": "<",
+                "price_crosses_above_ma": "crosses_above",
+                "price_crosses_below_ma": "crosses_below",
+            }[kind]
+            return BacktestEngine._compare(distance, operator, 0.0)
+        
+        if condition.type == "volume":
+            volume = bars["volume"].astype(np.float64)
+            if condition.condition == "volume_spike":
+                average = BacktestEngine._shift(data.cached(
+                    ("volume_sma", condition.period), lambda: Indicators.sma(volume, condition.period)
+                ))
+                return BacktestEngine._compare(volume - condition.value * average, ">", 0.0)
+            operator = ">" if condition.condition == "volume_above" else "<"
+            return BacktestEngine._compare(volume, operator, condition.value)
+        
+        iv = BacktestEngine._implied_volatility(data, strategy, pricing)
+        if condition.metric == "iv_rank":
+            iv = Indicators.rank(iv, condition.period)
+        elif condition.metric == "iv_percentile":
+            iv = Indicators.percentile(iv, condition.period)
+        return BacktestEngine._compare(iv, condition.operator, condition.value)
+    
+    @staticmethod
+    def _moving_average(data: BacktestData, kind: str, period: int) -> np.ndarray:
+        close = data.bars["close"]
+        if kind == "EMA":
+            return data.cached(("ema", period), lambda: Indicators.ema(close, period))
+        return data.cached(("sma", period), lambda: Indicators.sma(close, period))
+    
+    @staticmethod
+    def _realized_volatility(data: BacktestData, lookback: int) -> np.ndarray:
+        return data.cached(
+            ("realized_volatility", lookback),
+            lambda: Indicators.realized_volatility(data.bars["close"], lookback, data.periods_per_year),
+        )
+    
+    @staticmethod
+    def _implied_volatility(data: BacktestData, strategy: StrategyDefinition, pricing: str) -> np.ndarray:
+        """
+        At-the-money IV per bar from stored chains, or realized volatility under model pricing.
+        
+        The ATM contract of a snapshot is the strike closest to the
+        underlying in the nearest expiry at least min_dte days out.
+        """
+        if pricing == "model":
+            return BacktestEngine._realized_volatility(data, strategy.execution.volatility_lookback)
+        
+        min_dte = max(strategy.options_selection.min_dte, 1)
+        
+        def compute():
+            chain = data.chain
+            snapshot = np.repeat(np.arange(len(data.snapshot_times)), np.diff(data.snapshot_starts))
+            dte = chain["expiration"] - chain["timestamp"] // MS_PER_DAY
+            with np.errstate(invalid="ignore", divide="ignore"):
+                usable = (chain["implied_volatility"] > 0) & (dte >= min_dte)
+                moneyness = np.abs(chain["strike"] / chain["underlying_price"] - 1.0)
+            rows = np.flatnonzero(usable)
+            order = rows[np.lexsort((moneyness[rows], dte[rows], snapshot[rows]))]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = snapshot[order][1:] != snapshot[order][:-1]
+            atm = np.full(len(data.snapshot_times), np.nan)
+            atm[snapshot[order][first]] = chain["implied_volatility"][order][first]
+            return np.where(data.bar_snapshot >= 0, atm[np.maximum(data.bar_snapshot, 0)], np.nan)
+        
+        return data.cached(("atm_iv", min_dte), compute)
+    
+    @staticmethod
+    def _liquid_rows(data: BacktestData, filters: ContractFilters) -> np.ndarray:
+        """Chain rows with a usable price that pass the liquidity filters."""
+        def compute():
+            chain = data.chain
+            mark = data.chain_mark
+            with np.errstate(invalid="ignore"):
+                liquid = mark > 0
+                if filters.min_volume:
+                    liquid &= chain["volume"] >= filters.min_volume
+                if filters.min_open_interest:
+                    liquid &= chain["open_interest"] >= filters.min_open_interest
+                if filters.max_bid_ask_spread is not None:
+                    liquid &= chain["ask"] - chain["bid"] <= filters.max_bid_ask_spread * mark
+            return liquid
+        
+        return data.cached(("liquid", filters.min_volume, filters.min_open_interest, filters.max_bid_ask_spread), compute)
+    
+    @staticmethod
+    def _contract_selector(data: BacktestData, filters: ContractFilters) -> ContractSelector:
+        """Selector over the chain rows that pass the liquidity filters, shared by runs with the same filters."""
+        return data.cached(
+            ("selector", filters.min_volume, filters.min_open_interest, filters.max_bid_ask_spread),
+            lambda: ContractSelector(data.chain_index, mask=BacktestEngine._liquid_rows(data, filters)),
+        )
+    
+    @staticmethod
+    def _select_chain_rows(
+        data: BacktestData,
+        bars: np.ndarray,
+        legs: List[OptionLeg],
+        selection: OptionsSelection,
+        selector: ContractSelector
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pick an expiration and each leg's contract from the snapshot taken during each bar.
+        
+        Args:
+            data: Bars and chains
+            bars: Bar positions to select at (entry signals)
+            legs: Strategy legs
+            selection: Expiration and DTE rules
+            selector: Selector over the usable chain rows
+        
+        Returns:
+            Epoch-day expiration per bar and chain row per (leg, bar), -1
+            where nothing qualifies
+        """
+        snapshots = data.bar_snapshot[bars]
+        fresh = (snapshots >= 0) & (data.snapshot_times[np.maximum(snapshots, 0)] >= data.timestamps[bars])
+        snapshots = np.where(fresh, snapshots, -1)
+        days = data.days[bars]
+        min_dte = max(selection.min_dte, 1)
+        target_dte = selection.target_dte if selection.expiration == "target_dte" else min_dte
+        expirations = selector.nearest_expiration(snapshots, target_dte, min_dte, selection.max_dte, days=days)
+        if selection.expiration == "nearest_monthly":
+            for k in np.flatnonzero(expirations >= 0):
+                if not BacktestEngine._is_monthly(expirations[k:k + 1])[0]:
+                    candidates = selector.expirations(snapshots[k], days[k] + min_dte, days[k] + selection.max_dte)
+                    expirations[k] = days[k] + BacktestEngine._choose_expiry(candidates - days[k], int(days[k]), selection)
+        
+        chain = data.chain
+        spot = np.full(len(bars), np.nan)
+        spot[fresh] = chain["underlying_price"][data.snapshot_starts[snapshots[fresh]]]
+        spot = np.where(spot > 0, spot, data.bars["close"][bars])
+        leg_rows = np.empty((len(legs), len(bars)), dtype=np.int64)
+        for position, leg in enumerate(legs):
+            is_call = leg.option_type == "CALL"
+            if leg.strike_selection == "delta":
+                leg_rows[position] = selector.nearest_delta(snapshots, expirations, is_call, leg.target_delta)
+            else:
+                leg_rows[position] = selector.nearest_strike(
+                    snapshots, expirations, is_call, BacktestEngine._target_strike(leg, spot)
+                )
+        return expirations, leg_rows
+    
+    @staticmethod
+    def _chain_spread(data: BacktestData, legs: List[OptionLeg], expiration: int, rows: np.ndarray) -> Optional[_Spread]:
+        """Spread of the contracts _select_chain_rows picked for one bar."""
+        if expiration < 0 or (rows < 0).any():
+            return None
+        return BacktestEngine._spread(legs, data.chain["strike"][rows], int(expiration))
+    
+    @staticmethod
+    def _select_model_spread(
+        data: BacktestData,
+        i: int,
+        legs: List[OptionLeg],
+        selection: OptionsSelection,
+        sigma: float
+    ) -> Optional[_Spread]:
+        """Pick strikes on the strike_increment grid and a Friday expiry for model pricing."""
+        if not np.isfinite(sigma) or sigma <= 0:
+            return None
+        
+        today = int(data.days[i])
+        earliest = today + max(selection.min_dte, 1)
+        # Epoch day 0 was a Thursday; Friday is weekday 4 counting from Monday
+        first_friday = earliest + (4 - (earliest + 3) % 7) % 7
+        fridays = np.arange(first_friday, today + selection.max_dte + 1, 7)
+        chosen = BacktestEngine._choose_expiry(fridays - today, today, selection)
+        if chosen is None:
+            return None
+        
+        spot = float(data.bars["close"][i])
+        increment = selection.strike_increment
+        expiry_ms = (today + chosen) * MS_PER_DAY + EXPIRY_OFFSET_MS
+        t = max((expiry_ms - data.bar_end[i]) / 1000 / SECONDS_PER_YEAR, MIN_TIME_TO_EXPIRY)
+        rate, dividend_yield = settings.RISK_FREE_RATE, settings.DIVIDEND_YIELD
+        strikes = []
+        for leg in legs:
+            if leg.strike_selection == "delta":
+                # Invert the Black-Scholes delta: |delta| = exp(-q t) N(+/-d1)
+                d1 = ndtri(min(abs(leg.target_delta) * np.exp(dividend_yield * t), 1 - 1e-9))
+                if leg.option_type == "PUT":
+                    d1 = -d1
+                target = spot * np.exp((rate - dividend_yield + 0.5 * sigma * sigma) * t - d1 * sigma * np.sqrt(t))
+            else:
+                target = BacktestEngine._target_strike(leg, spot)
+            strike = max(np.round(target / increment), 1) * increment
+            strikes.append(strike)
+        
+        return BacktestEngine._spread(legs, np.array(strikes, dtype=np.float64), today + int(chosen))
+    
+    @staticmethod
+    def _spread(legs: List[OptionLeg], strikes: np.ndarray, expiration: int) -> Optional[_Spread]:
+        spread = _Spread(legs, strikes, expiration)
+        # Offsets that collapse two legs onto one contract leave nothing to trade
+        if len(np.unique(spread.keys)) < len(legs) and len(legs) > 1:
+            return None
+        return spread
+    
+    @staticmethod
+    def _choose_expiry(dtes: np.ndarray, today: int, selection: OptionsSelection) -> Optional[int]:
+        """Pick one days-to-expiry value from ascending candidates."""
+        if not len(dtes):
+            return None
+        if selection.expiration == "target_dte":
+            return int(dtes[np.argmin(np.abs(dtes - selection.target_dte))])
+        if selection.expiration == "nearest_monthly":
+            monthly = BacktestEngine._is_monthly(dtes + today)
+            if monthly.any():
+                return int(dtes[monthly][0])
+        return int(dtes[0])
+    
+    @staticmethod
+    def _is_monthly(expirations: np.ndarray) -> np.ndarray:
+        """Whether epoch-day expirations fall on a third Friday (or the Thursday before a Friday holiday)."""
+        dates = expirations.astype("datetime64[D]")
+        day = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+        # 1970-01-01 was a Thursday; weekdays count from Monday = 0
+        weekday = (expirations + 3) % 7
+        return ((weekday == 4) & (day >= 15) & (day <= 21)) | ((weekday == 3) & (day >= 14) & (day <= 20))
+    
+    @staticmethod
+    def _target_strike(leg: OptionLeg, spot: float) -> float:
+        """Strike price a leg aims for before snapping to the nearest available strike."""
+        if leg.strike_selection == "at_the_money":
+            return spot
+        # Calls are out of the money above spot, puts below
+        direction = 1.0 if leg.option_type == "CALL" else -1.0
+        if leg.strike_selection == "in_the_money":
+            direction = -direction
+        return spot * (1.0 + direction * leg.strike_offset)
+    
+    @staticmethod
+    def _window_stop(data: BacktestData, i: int, spread: _Spread, strategy: StrategyDefinition) -> int:
+        """One past the last bar a position opened on bar i can still be open."""
+        stop = int(np.searchsorted(data.days, spread.expiration, side="right"))
+        if strategy.exit_conditions.logic == "OR":
+            for condition in strategy.exit_conditions.conditions:
+                if condition.type == "time_based" and condition.max_holding_days is not None:
+                    limit = np.searchsorted(data.days, data.days[i] + condition.max_holding_days, side="left") + 1
+                    stop = min(stop, int(limit))
+        return max(min(stop, len(data.timestamps)), i + 1)
+    
+    @staticmethod
+    def _price_window(
+        data: BacktestData,
+        spread: _Spread,
+        window: np.ndarray,
+        pricing: str,
+        volatility: np.ndarray,
+        exit_conditions
+    ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Mark each leg on every bar of the holding window.
+        
+        Returns:
+            Tuple of (marks, deltas or None, chain rows or None), each shaped
+            (legs, len(window))
+        """
+        spot = data.bars["close"][window]
+        expiry_ms = spread.expiration * MS_PER_DAY + EXPIRY_OFFSET_MS
+        t = (expiry_ms - data.bar_end[window]) / 1000 / SECONDS_PER_YEAR
+        expired = t <= 0
+        want_delta = any(condition.type == "greeks" for condition in exit_conditions.conditions)
+        deltas = None
+        rows = None
+        
+        if pricing == "chain":
+            rows = np.empty((len(spread.legs), len(window)), dtype=np.int64)
+            for leg, key in enumerate(spread.keys):
+                first = np.searchsorted(data.contract_keys, key, side="left")
+                last = np.searchsorted(data.contract_keys, key, side="right")
+                position = np.searchsorted(data.contract_times[first:last], data.bar_end[window], side="right") - 1
+                rows[leg] = data.by_contract[first + np.maximum(position, 0)]
+            marks = data.chain_mark[rows]
+            # Carry the last good quote over bars where the contract is unquoted
+            carried = np.where(np.isnan(marks), 0, np.arange(len(window))[None, :])
+            marks = np.take_along_axis(marks, np.maximum.accumulate(carried, axis=1), axis=1)
+            if want_delta:
+                deltas = data.chain["delta"][rows]
+        else:
+            sigma = volatility[window]
+            args = (
+                spot[None, :], spread.strikes[:, None], np.maximum(t, MIN_TIME_TO_EXPIRY)[None, :],
+                sigma[None, :], spread.is_call[:, None], settings.RISK_FREE_RATE, settings.DIVIDEND_YIELD,
+            )
+            marks = GreeksService.price(*args)
+            if want_delta:
+                deltas = GreeksService.greeks(*args)["delta"]
+        
+        if expired.any():
+            marks = np.where(expired[None, :], spread.intrinsic(spot), marks)
+            if deltas is not None:
+                itm = spread.intrinsic(spot) > 0
+                deltas = np.where(expired[None, :], np.where(itm, np.where(spread.is_call[:, None], 1.0, -1.0), 0.0), deltas)
+        return marks, deltas, rows
+    
+    @staticmethod
+    def _fill_value(
+        data: BacktestData,
+        spread: _Spread,
+        marks: np.ndarray,
+        rows: Optional[np.ndarray],
+        offset: int,
+        opening: bool,
+        natural: bool
+    ) -> float:
+        """Per-share value of one spread at a fill; natural fills cross the quoted spread."""
+        if not natural or rows is None:
+            return float(spread.weights @ marks)
+        buying = (spread.weights > 0) == opening
+        leg_rows = rows[:, offset]
+        quoted = np.where(buying, data.chain["ask"][leg_rows], data.chain["bid"][leg_rows])
+        prices = np.where(quoted > 0, quoted, marks)
+        return float(spread.weights @ prices)
+    
+    @staticmethod
+    def _capital_per_spread(spread: _Spread, entry_value: float, spot: float) -> float:
+        """
+        Capital one spread ties up: its worst expiry loss.
+        
+        The payoff is piecewise linear, so it is checked at zero, every
+        strike and twice the larger of spot and the top strike; short calls
+        are otherwise unbounded.
+        """
+        grid = np.concatenate([[0.0], spread.strikes, [2.0 * max(spot, spread.strikes.max())]])
+        payoff = spread.weights @ spread.intrinsic(grid) - entry_value
+        return max(-payoff.min() * CONTRACT_MULTIPLIER, abs(entry_value) * CONTRACT_MULTIPLIER, 1.0)
+    
+    @staticmethod
+    def _quantity(sizing, strategy: StrategyDefinition, capital: float, entry_value: float, requirement: float) -> int:
+        """Spreads to open under the sizing method, before the available-capital cap."""
+        if sizing.method == "fixed_contracts":
+            return int(sizing.value)
+        if sizing.method == "fixed_dollar":
+            return int(sizing.value // requirement)
+        if sizing.method == "percent_of_capital":
+            return int(capital * sizing.value // requirement)
+        
+        risk = requirement
+        for condition in strategy.exit_conditions.conditions:
+            if condition.type == "stop_loss" and condition.stop_type == "percentage":
+                risk = min(risk, abs(entry_value) * CONTRACT_MULTIPLIER * abs(condition.value))
+        return int(capital * sizing.risk_per_trade // max(risk, 0.01))
+    
+    @staticmethod
+    def _find_exit(
+        data: BacktestData,
+        i: int,
+        window: np.ndarray,
+        spread: _Spread,
+        value: np.ndarray,
+        entry_value: float,
+        deltas: Optional[np.ndarray],
+        quantity: int,
+        strategy: StrategyDefinition,
+        exit_signals: Dict[int, np.ndarray]
+    ) -> Tuple[int, str]:
+        """
+        First bar after entry where the exit rules hold.
+        
+        Returns:
+            Tuple of (offset into the window, exit reason)
+        """
+        rules = strategy.exit_conditions
+        change = value - entry_value
+        pnl_pct = change / max(abs(entry_value), 0.01)
+        pnl_dollar = change * CONTRACT_MULTIPLIER * quantity
+        days = data.days[window]
+        
+        hits = []
+        for index, condition in enumerate(rules.conditions):
+            kind = condition.type
+            if kind in SIGNAL_TYPES:
+                hit = exit_signals[index][window]
+            elif kind == "profit_target":
+                hit = (pnl_pct if condition.target_type == "percentage" else pnl_dollar) >= condition.value
+            elif kind == "stop_loss":
+                limit = -abs(condition.value)
+                if condition.stop_type == "trailing":
+                    hit = pnl_pct - np.maximum.accumulate(np.maximum(pnl_pct, 0.0)) <= limit
+                else:
+                    hit = (pnl_pct if condition.stop_type == "percentage" else pnl_dollar) <= limit
+            elif kind == "time_based":
+                hit = np.zeros(len(window), dtype=bool)
+                if condition.max_holding_days is not None:
+                    hit |= days - data.days[i] >= condition.max_holding_days
+                if condition.days_before_expiration is not None:
+                    hit |= spread.expiration - days <= condition.days_before_expiration
+            else:
+                hit = BacktestEngine._compare(spread.weights @ deltas, condition.operator, condition.value)
+            hits.append((kind, hit[1:]))
+        
+        if hits:
+            combined = BacktestEngine._combine([hit for _, hit in hits], rules.logic)
+            if combined.any():
+                offset = int(np.argmax(combined))
+                if rules.logic == "AND":
+                    return offset + 1, "+".join(kind for kind, _ in hits)
+                return offset + 1, next(kind for kind, hit in hits if hit[offset])
+        
+        last = len(window) - 1
+        if data.bar_end[window[last]] >= spread.expiration * MS_PER_DAY + EXPIRY_OFFSET_MS:
+            return last, "expiration"
+        return last, "end_of_data"
+    
+    @staticmethod
+    def _combine(signals: List[np.ndarray], logic: str) -> np.ndarray:
+        if logic == "AND":
+            return np.logical_and.reduce(signals)
+        return np.logical_or.reduce(signals)
+    
+    @staticmethod
+    def _compare(series: np.ndarray, operator: str, value: float) -> np.ndarray:
+        """Compare a series with a value; NaN never matches."""
+        with np.errstate(invalid="ignore"):
+            if operator == "<":
+                return series < value
+            if operator == "<=":
+                return series <= value
+            if operator == ">":
+                return series > value
+            if operator == ">=":
+                return series >= value
+            previous = BacktestEngine._shift(series)
+            if operator == "crosses_above":
+                return (series > value) & (previous <= value)
+            return (series < value) & (previous >= value)
+    
+    @staticmethod
+    def _shift(series: np.ndarray) -> np.ndarray:
+        """Series delayed by one bar."""
+        return np.concatenate([[np.nan], series[:-1].astype(np.float64)])
@@ -0,0 +1,364 @@
+"""Background backtest and sweep jobs with cached results."""
+import hashlib
+import math
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.options_chains import OptionsChain
+from app.models.options_snapshots import OptionsSnapshot
+from app.models.stock_prices import StockPrice
+from app.schemas.backtest import BacktestJobRequest, SweepJobRequest
+from app.services.backtest_engine import BacktestEngine
+from app.services.backtest_sweep import BacktestSweep
+from app.services.data_lake import OPTIONS_DATASET, PRICES_DATASET
+from app.services.provider_cache import ProviderCache
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Finished in-process jobs kept in memory for status and result lookups
+MAX_TRACKED_JOBS = 100
+
+# Request models by job kind
+JOB_REQUESTS = {"backtest": BacktestJobRequest, "sweep": SweepJobRequest}
+
+# Celery task states mapped to job statuses
+CELERY_STATUSES = {
+    "PENDING": "pending",
+    "RECEIVED": "pending",
+    "STARTED": "running",
+    "PROGRESS": "running",
+    "RETRY": "running",
+    "SUCCESS": "completed",
+    "FAILURE": "failed",
+    "REVOKED": "failed",
+}
+
+
+def _result_cache() -> ProviderCache:
+    """Result cache: in-process LRU, plus Redis (shared with Celery workers) when REDIS_URL is set."""
+    redis_client = None
+    if settings.REDIS_URL:
+        try:
+            import redis
+            redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        except Exception as e:
+            logger.warning(f"Redis backtest result cache disabled: {str(e)}")
+    return ProviderCache(
+        max_entries=settings.BACKTEST_RESULT_CACHE_ENTRIES,
+        redis_client=redis_client,
+        enabled=settings.BACKTEST_RESULT_CACHE_TTL > 0,
+    )
+
+
+result_cache = _result_cache()
+
+
+class BacktestJob:
+    """State and progress of one in-process backtest or sweep job."""
+    
+    def __init__(self, kind: str, request: BacktestJobRequest):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.request = request
+        self.status = "pending"
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.progress = {"phase": None, "completed": 0, "total": 0, "cached": False}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+    
+    def update(self, **fields) -> None:
+        """Update progress fields."""
+        with self._lock:
+            self.progress.update(fields)
+    
+    def to_dict(self) -> Dict:
+        """Snapshot of the job for API responses."""
+        with self._lock:
+            progress = dict(self.progress)
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "strategy": self.request.strategy.name,
+            "symbol": self.request.strategy.underlying_symbol.upper(),
+            **progress,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class BacktestJobService:
+    """
+    Runs backtests and sweeps outside the request handler.
+    
+    With BACKTEST_JOB_BACKEND 'inprocess' jobs run on a thread pool of the
+    web process and are tracked in memory; no broker is needed. With
+    'celery' they are queued to `celery -A app.worker worker` processes and
+    their state is read back from the Celery result backend. Both backends
+    run BacktestJobService.execute, so results and progress look the same.
+    
+    Results are cached under a hash of the request and the version of the
+    data it reads, so resubmitting an unchanged strategy over unchanged
+    data returns the stored result without loading or running anything.
+    """
+    
+    _jobs: "OrderedDict[str, BacktestJob]" = OrderedDict()
+    _registry_lock = threading.Lock()
+    _executor: Optional[ThreadPoolExecutor] = None
+    
+    @staticmethod
+    def submit(kind: str, request: BacktestJobRequest) -> Dict:
+        """
+        Queue a backtest or sweep.
+        
+        Args:
+            kind: 'backtest' or 'sweep'
+            request: BacktestJobRequest, or SweepJobRequest for sweeps
+        
+        Returns:
+            Job snapshot (see BacktestJobResponse)
+        """
+        if settings.BACKTEST_JOB_BACKEND == "celery":
+            from app.worker import run_backtest_job
+            created_at = datetime.now(timezone.utc)
+            task = run_backtest_job.apply_async(args=[kind, request.model_dump(mode="json"), created_at.isoformat()])
+            return {
+                "job_id": task.id,
+                "kind": kind,
+                "status": "pending",
+                "strategy": request.strategy.name,
+                "symbol": request.strategy.underlying_symbol.upper(),
+                "created_at": created_at,
+            }
+        
+        job = BacktestJob(kind, request)
+        with BacktestJobService._registry_lock:
+            BacktestJobService._jobs[job.id] = job
+            while len(BacktestJobService._jobs) > MAX_TRACKED_JOBS:
+                oldest_id, oldest = next(iter(BacktestJobService._jobs.items()))
+                if oldest.status in ("pending", "running"):
+                    break
+                del BacktestJobService._jobs[oldest_id]
+            if BacktestJobService._executor is None:
+                BacktestJobService._executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKTEST_JOB_WORKERS, thread_name_prefix="backtest-job"
+                )
+            BacktestJobService._executor.submit(BacktestJobService._run_local, job)
+        return job.to_dict()
+    
+    @staticmethod
+    def get_job(job_id: str) -> Optional[Dict]:
+        """
+        Status of a job.
+        
+        Args:
+            job_id: Id returned by submit
+        
+        Returns:
+            Job snapshot, or None if the job is unknown (Celery reports
+            unknown ids as pending)
+        """
+        if settings.BACKTEST_JOB_BACKEND == "celery":
+            return BacktestJobService._celery_state(job_id)[0]
+        with BacktestJobService._registry_lock:
+            job = BacktestJobService._jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+    
+    @staticmethod
+    def get_result(job_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Status and result of a job.
+        
+        Args:
+            job_id: Id returned by submit
+        
+        Returns:
+            Tuple of (job snapshot, result); the result is None until the job
+            has completed, and both are None for unknown jobs
+        """
+        if settings.BACKTEST_JOB_BACKEND == "celery":
+            return BacktestJobService._celery_state(job_id)
+        with BacktestJobService._registry_lock:
+            job = BacktestJobService._jobs.get(job_id)
+        if job is None:
+            return None, None
+        return job.to_dict(), job.result
+    
+    @staticmethod
+    def execute(kind: str, payload: Dict, report: Callable[..., None] = lambda **fields: None) -> Dict:
+        """
+        Run one job, serving it from the result cache when possible.
+        
+        Args:
+            kind: 'backtest' or 'sweep'
+            payload: Request as JSON (BacktestJobRequest or SweepJobRequest)
+            report: Called with progress fields (phase, completed, total, cached)
+        
+        Returns:
+            JSON-ready result: BacktestResult.to_dict() for backtests, or
+            {"runs": [...]} in run order for sweeps
+        """
+        request = JOB_REQUESTS[kind].model_validate(payload)
+        total = len(BacktestSweep.combinations(request.sweep)) if kind == "sweep" else 1
+        report(phase="loading", completed=0, total=total, cached=False)
+        
+        key = None
+        if request.use_cache:
+            key = BacktestJobService.cache_key(kind, request)
+            hit, result = result_cache.peek(key, kind="backtest")
+            if hit:
+                report(phase="done", completed=total, cached=True)
+                return result
+        
+        result = BacktestJobService._compute(kind, request, report)
+        if key is not None:
+            result_cache.put(key, result, kind="backtest", ttl=settings.BACKTEST_RESULT_CACHE_TTL)
+        report(phase="done", completed=total)
+        return result
+    
+    @staticmethod
+    def cache_key(kind: str, request: BacktestJobRequest) -> str:
+        """
+        Result cache key: hash of the request with its data version.
+        
+        Args:
+            kind: 'backtest' or 'sweep'
+            request: Job request
+        
+        Returns:
+            Hex digest
+        """
+        document = request.model_dump(mode="json", exclude={"use_cache", "workers"})
+        document["kind"] = kind
+        document["data_version"] = BacktestJobService.data_version(request)
+        return "backtest:" + hashlib.sha256(orjson.dumps(document, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    @staticmethod
+    def data_version(request: BacktestJobRequest) -> str:
+        """
+        Fingerprint of the data a request reads.
+        
+        For the database this is the row count, latest timestamp and column
+        sums of the symbol's prices and option quotes in the date range, so
+        appended bars, new snapshots and corrected values all change it. For
+        the data lake it is the name, size and modification time of every
+        Parquet file of the symbol.
+        
+        Args:
+            request: Job request
+        
+        Returns:
+            Hex digest
+        """
+        symbol = request.strategy.underlying_symbol.upper()
+        if request.source == "lake":
+            root = Path(settings.DATA_LAKE_DIR)
+            parts = [
+                (str(path.relative_to(root)), path.stat().st_size, path.stat().st_mtime_ns)
+                for dataset in (PRICES_DATASET, OPTIONS_DATASET)
+                for path in sorted((root / dataset / f"symbol={symbol}").rglob("*.parquet"))
+            ]
+        else:
+            db = SessionLocal()
+            try:
+                parts = BacktestJobService._table_fingerprint(db, symbol, request)
+            finally:
+                db.close()
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+    
+    @staticmethod
+    def _table_fingerprint(db: Session, symbol: str, request: BacktestJobRequest) -> list:
+        symbol_id = SymbolService.get_id(db, symbol)
+        if symbol_id is None:
+            return []
+        if settings.OPTIONS_SNAPSHOT_STORE == "delta":
+            # Delta snapshots are append-only, so their headers cover the quotes
+            options = (OptionsSnapshot, (OptionsSnapshot.underlying_price, OptionsSnapshot.changed))
+        else:
+            options = (OptionsChain, (OptionsChain.bid, OptionsChain.ask, OptionsChain.underlying_price))
+        parts = []
+        for model, columns in ((StockPrice, (StockPrice.close, StockPrice.volume)), options):
+            stmt = select(
+                func.count(), func.max(model.timestamp), *(func.sum(column) for column in columns)
+            ).where(model.symbol_id == symbol_id)
+            if request.start_date:
+                stmt = stmt.where(model.timestamp >= datetime.combine(request.start_date, datetime.min.time()))
+            if request.end_date:
+                stmt = stmt.where(model.timestamp <= datetime.combine(request.end_date, datetime.max.time()))
+            parts.append(tuple(str(value) for value in db.execute(stmt).one()))
+        return parts
+    
+    @staticmethod
+    def _compute(kind: str, request: BacktestJobRequest, report: Callable[..., None]) -> Dict:
+        strategy = request.strategy
+        symbol = strategy.underlying_symbol.upper()
+        if request.source == "lake":
+            data = BacktestEngine.load_lake_data(symbol, request.start_date, request.end_date)
+        else:
+            db = SessionLocal()
+            try:
+                data = BacktestEngine.load_data(db, symbol, request.start_date, request.end_date)
+            finally:
+                db.close()
+        report(phase="running")
+        
+        if kind == "backtest":
+            return BacktestEngine.run(strategy, data, request.initial_capital).to_dict()
+        
+        # Daemonic processes (e.g. Celery prefork children) cannot start a pool
+        workers = 1 if multiprocessing.current_process().daemon else request.workers
+        runs = []
+        for run in BacktestSweep.run(strategy, data, request.sweep, workers=workers, initial_capital=request.initial_capital):
+            if "metrics" in run:
+                run["metrics"] = {
+                    name: (None if isinstance(value, float) and not math.isfinite(value) else value)
+                    for name, value in run["metrics"].items()
+                }
+            runs.append(run)
+            report(completed=len(runs))
+        return {"runs": sorted(runs, key=lambda run: run["index"])}
+    
+    @staticmethod
+    def _run_local(job: BacktestJob) -> None:
+        job.status = "running"
+        try:
+            job.result = BacktestJobService.execute(job.kind, job.request.model_dump(mode="json"), job.update)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Backtest job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+    
+    @staticmethod
+    def _celery_state(job_id: str) -> Tuple[Dict, Optional[Dict]]:
+        from app.worker import celery_app
+        task = celery_app.AsyncResult(job_id)
+        state = task.state
+        info = task.info if isinstance(task.info, dict) else {}
+        snapshot = {"job_id": job_id, "status": CELERY_STATUSES.get(state, "pending")}
+        result = None
+        if state == "SUCCESS":
+            snapshot.update(info.get("job", {}))
+            result = info.get("result")
+        elif state == "FAILURE":
+            snapshot["error"] = str(task.info)
+        else:
+            snapshot.update(info)
+        return snapshot, result
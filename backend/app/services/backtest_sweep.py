@@ -0,0 +1,192 @@
+"""Parameter sweeps of one strategy over a process pool."""
+import copy
+import itertools
+import math
+import multiprocessing
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from app.schemas.backtest import ParameterRange, StrategyDefinition, SweepDefinition
+from app.services.backtest_engine import DEFAULT_INITIAL_CAPITAL, BacktestData, BacktestEngine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Chunks handed to each worker over a sweep; more evens out slow runs, fewer cuts IPC
+CHUNKS_PER_WORKER = 4
+
+# Set once per worker process by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+class BacktestSweep:
+    """
+    Grid and random sweeps of a strategy's parameters.
+    
+    The underlying's data is written once as .npy files (BacktestData.save)
+    and every worker memory-maps it in its initializer, so the data is
+    neither pickled per task nor copied per process; workers share the
+    page cache. Tasks carry only a run index and its parameter values, and
+    are handed out in chunks. Results are yielded as chunks finish, in
+    completion order, with metrics but not trades or equity curves.
+    
+    Indicator arrays are cached per worker, so runs that differ only in
+    contract selection or exit thresholds reuse them within a worker.
+    """
+    
+    @staticmethod
+    def combinations(sweep: SweepDefinition) -> List[Dict[str, Any]]:
+        """
+        Parameter values of every run in a sweep.
+        
+        Args:
+            sweep: Sweep definition
+        
+        Returns:
+            List of {path: value} dicts
+        """
+        paths = list(sweep.parameters)
+        if sweep.mode == "grid":
+            return [dict(zip(paths, values)) for values in itertools.product(*sweep.parameters.values())]
+        
+        rng = np.random.default_rng(sweep.seed)
+        runs = []
+        for _ in range(sweep.samples):
+            run = {}
+            for path, values in sweep.parameters.items():
+                if isinstance(values, ParameterRange):
+                    if isinstance(values.low, int) and isinstance(values.high, int):
+                        run[path] = int(rng.integers(values.low, values.high + 1))
+                    else:
+                        run[path] = float(rng.uniform(values.low, values.high))
+                else:
+                    run[path] = values[int(rng.integers(len(values)))]
+            runs.append(run)
+        return runs
+    
+    @staticmethod
+    def apply(base: Dict[str, Any], parameters: Dict[str, Any]) -> StrategyDefinition:
+        """
+        Strategy with sweep parameters set.
+        
+        Args:
+            base: Strategy JSON (StrategyDefinition.model_dump(mode="json"))
+            parameters: {dotted path: value}
+        
+        Returns:
+            Validated StrategyDefinition
+        
+        Raises:
+            ValueError: If a path does not exist or the result is invalid
+        """
+        document = copy.deepcopy(base)
+        for path, value in parameters.items():
+            target, key = BacktestSweep._resolve(document, path)
+            target[key] = value
+        return StrategyDefinition.model_validate(document)
+    
+    @staticmethod
+    def run(
+        strategy: StrategyDefinition,
+        data: BacktestData,
+        sweep: SweepDefinition,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        initial_capital: float = DEFAULT_INITIAL_CAPITAL
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run a sweep, yielding each run's result as it finishes.
+        
+        Args:
+            strategy: Base strategy
+            data: Bars and chains of the strategy's underlying
+            sweep: Parameters to vary
+            workers: Worker processes (default: CPU count; 1 runs in this process)
+            chunk_size: Runs per task (default: spread over CHUNKS_PER_WORKER
+                chunks per worker)
+            initial_capital: Starting equity of every run
+        
+        Yields:
+            Dicts with index, parameters and metrics, or error when the
+            parameters made an invalid strategy or the run failed
+        
+        Raises:
+            ValueError: If a parameter path does not exist in the strategy
+        """
+        base = strategy.model_dump(mode="json")
+        for path in sweep.parameters:
+            BacktestSweep._resolve(base, path)
+        tasks = list(enumerate(BacktestSweep.combinations(sweep)))
+        workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+        chunk_size = chunk_size or max(1, math.ceil(len(tasks) / (workers * CHUNKS_PER_WORKER)))
+        logger.info(f"Sweeping {len(tasks)} runs of {strategy.name} over {workers} workers")
+        
+        if workers == 1:
+            for task in tasks:
+                yield BacktestSweep._run_one(base, data, initial_capital, task)
+            return
+        
+        with tempfile.TemporaryDirectory(prefix="backtest-sweep-") as directory:
+            data.save(directory)
+            with _pool_context().Pool(
+                workers, initializer=_init_worker, initargs=(directory, base, initial_capital)
+            ) as pool:
+                yield from pool.imap_unordered(_run_task, tasks, chunksize=chunk_size)
+    
+    @staticmethod
+    def _run_one(
+        base: Dict[str, Any],
+        data: BacktestData,
+        initial_capital: float,
+        task: Tuple[int, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        index, parameters = task
+        try:
+            strategy = BacktestSweep.apply(base, parameters)
+            metrics = BacktestEngine.run(strategy, data, initial_capital).metrics
+        except ValueError as e:
+            return {"index": index, "parameters": parameters, "error": str(e)}
+        except Exception as e:
+            # One failing run must not end the sweep (or, in a pool, lose the rest of its chunk)
+            logger.error(f"Sweep run {index} with {parameters} failed: {type(e).__name__}: {str(e)}")
+            return {"index": index, "parameters": parameters, "error": f"{type(e).__name__}: {str(e)}"}
+        return {"index": index, "parameters": parameters, "metrics": metrics}
+    
+    @staticmethod
+    def _resolve(document: Dict[str, Any], path: str) -> Tuple[Any, Any]:
+        """Container and key a dotted path points at."""
+        *parents, last = path.split(".")
+        target = document
+        try:
+            for key in parents:
+                target = target[int(key)] if isinstance(target, list) else target[key]
+            key = int(last) if isinstance(target, list) else last
+            target[key]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Sweep parameter {path} does not exist in the strategy")
+        return target, key
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for sweep workers.
+    
+    Sweeps run on API and job threads, and a forked child inherits locks
+    other threads held (logging, the database pool) and can hang on them.
+    Workers start from a forkserver that has imported this module once, or
+    are spawned where forkserver is unavailable.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def _init_worker(directory: str, base: Dict[str, Any], initial_capital: float) -> None:
+    _worker.update(data=BacktestData.open(directory), base=base, initial_capital=initial_capital)
+
+
+def _run_task(task: Tuple[int, Dict[str, Any]]) -> Dict[str, Any]:
+    return BacktestSweep._run_one(_worker["base"], _worker["data"], _worker["initial_capital"], task)
@@ -0,0 +1,215 @@
+"""Bulk loader for large stock price backfills."""
+import io
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Union
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models.stock_prices import StockPrice
+from app.models.types import PRICE_DECIMALS, price_storage_values
+from app.services.price_cache import PriceSeriesCache
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Price columns of stock_prices
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+# Columns of a normalized price frame
+LOAD_COLUMNS = ["symbol", "timestamp", "open", "high", "low", "close", "volume"]
+
+# Columns written to stock_prices, in COPY order
+STORE_COLUMNS = ["symbol_id", "timestamp", "open", "high", "low", "close", "volume"]
+
+# Rows per COPY / executemany batch
+LOAD_CHUNK_SIZE = 100_000
+
+# Provider column names mapped onto stock_prices columns
+PROVIDER_COLUMNS = {
+    "Date": "timestamp",
+    "Datetime": "timestamp",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "Symbol": "symbol",
+}
+
+
+class BulkLoader:
+    """Loads price frames into stock_prices without per-row ORM objects."""
+    
+    @staticmethod
+    def normalize_price_frame(data: pd.DataFrame, symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Normalize a provider or file DataFrame into stock_prices columns.
+        
+        Accepts the yfinance history frame (timestamp index, capitalized
+        OHLCV columns) as well as flat frames with a timestamp column.
+        
+        Args:
+            data: Source DataFrame
+            symbol: Symbol to assign when the frame has no symbol column
+        
+        Returns:
+            DataFrame with LOAD_COLUMNS, deduplicated on (symbol, timestamp)
+        """
+        if data.empty:
+            return pd.DataFrame(columns=LOAD_COLUMNS)
+        
+        frame = data.rename(columns=PROVIDER_COLUMNS)
+        if "timestamp" not in frame.columns:
+            frame = frame.rename_axis("timestamp").reset_index()
+        
+        if symbol is not None:
+            frame["symbol"] = symbol
+        elif "symbol" not in frame.columns:
+            raise ValueError("A symbol is required when the data has no symbol column")
+        
+        missing = [column for column in LOAD_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Price data is missing columns: {', '.join(missing)}")
+        
+        frame = frame[LOAD_COLUMNS].copy()
+        frame["symbol"] = frame["symbol"].astype(str).str.upper()
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+        frame["volume"] = frame["volume"].fillna(0).astype("int64")
+        frame = frame.dropna(subset=PRICE_COLUMNS)
+        frame[PRICE_COLUMNS] = frame[PRICE_COLUMNS].round(PRICE_DECIMALS)
+        
+        return frame.drop_duplicates(subset=["symbol", "timestamp"], keep="last")
+    
+    @staticmethod
+    def read_price_file(path: Union[str, Path], symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Read a CSV or Parquet price file into a normalized frame.
+        
+        Args:
+            path: Path to a .csv or .parquet file
+            symbol: Symbol to assign when the file has no symbol column
+        
+        Returns:
+            Normalized price DataFrame
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix == ".csv":
+            data = pd.read_csv(path)
+        elif suffix in (".parquet", ".pq"):
+            data = pd.read_parquet(path)
+        else:
+            raise ValueError(f"Unsupported price file format: {path.suffix}")
+        
+        return BulkLoader.normalize_price_frame(data, symbol=symbol)
+    
+    @staticmethod
+    def load_prices(db: Session, frame: pd.DataFrame, chunk_size: int = LOAD_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Load a normalized price frame into stock_prices.
+        
+        On PostgreSQL rows are streamed through COPY FROM STDIN into an
+        unlogged staging table and merged with one INSERT ... SELECT ...
+        ON CONFLICT. Other engines fall back to an executemany upsert.
+        
+        Args:
+            db: Database session
+            frame: Frame produced by normalize_price_frame
+            chunk_size: Rows per COPY or executemany batch
+        
+        Returns:
+            Dict with 'inserted' and 'updated' counts
+        """
+        if frame.empty:
+            return {"inserted": 0, "updated": 0}
+        
+        try:
+            symbol_ids = SymbolService.get_ids(db, frame["symbol"].unique().tolist(), create=True)
+            first_timestamps = frame.groupby("symbol")["timestamp"].min()
+            frame = frame.assign(symbol_id=frame["symbol"].map(symbol_ids))[STORE_COLUMNS]
+            if db.get_bind().dialect.name == "postgresql":
+                counts = BulkLoader._copy_merge(db, frame, chunk_size)
+            else:
+                counts = BulkLoader._executemany_upsert(db, frame, chunk_size)
+            db.commit()
+            for symbol, first_timestamp in first_timestamps.items():
+                PriceSeriesCache.record_write(db, symbol, first_timestamp)
+            logger.info(f"Loaded {len(frame)} price rows: {counts['inserted']} inserted, {counts['updated']} updated")
+            return counts
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk loading stock prices: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _copy_merge(db: Session, frame: pd.DataFrame, chunk_size: int) -> Dict[str, int]:
+        """COPY the frame into a staging table and merge it into stock_prices."""
+        staging = f"stock_prices_staging_{uuid.uuid4().hex[:12]}"
+        columns = ", ".join(STORE_COLUMNS)
+        # COPY bypasses the column types, so stage prices in their stored form
+        price_sql_type = StockPrice.__table__.c.open.type.compile(dialect=db.get_bind().dialect)
+        frame = frame.copy()
+        for column in PRICE_COLUMNS:
+            frame[column] = price_storage_values(frame[column].to_numpy())
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE {staging} ("
+                "symbol_id INTEGER NOT NULL, "
+                "timestamp TIMESTAMPTZ NOT NULL, "
+                f"open {price_sql_type} NOT NULL, "
+                f"high {price_sql_type} NOT NULL, "
+                f"low {price_sql_type} NOT NULL, "
+                f"close {price_sql_type} NOT NULL, "
+                "volume BIGINT NOT NULL)"
+            )
+            
+            for start in range(0, len(frame), chunk_size):
+                buffer = io.StringIO()
+                # Keep microseconds: sub-second bars would otherwise collide on (symbol, timestamp)
+                frame.iloc[start:start + chunk_size].to_csv(
+                    buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S.%f%z"
+                )
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            
+            cursor.execute(
+                f"WITH merged AS ("
+                f"INSERT INTO stock_prices ({columns}) "
+                f"SELECT {columns} FROM {staging} "
+                "ON CONFLICT ON CONSTRAINT uq_stock_prices_symbol_timestamp DO UPDATE SET "
+                "open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low, "
+                "close = EXCLUDED.close, volume = EXCLUDED.volume, created_at = now() "
+                "RETURNING (xmax = 0) AS inserted) "
+                "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+            )
+            inserted, updated = cursor.fetchone()
+            
+            # On failure the rollback discards the staging table as well
+            cursor.execute(f"DROP TABLE {staging}")
+            return {"inserted": inserted, "updated": updated}
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _executemany_upsert(db: Session, frame: pd.DataFrame, chunk_size: int) -> Dict[str, int]:
+        """Upsert the frame with executemany batches for non-Postgres engines."""
+        symbol_ids = frame["symbol_id"].unique().tolist()
+        count_query = db.query(func.count(StockPrice.id)).filter(StockPrice.symbol_id.in_(symbol_ids))
+        before = count_query.scalar()
+        
+        insert = dialect_insert(db)
+        stmt = insert(StockPrice)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol_id", "timestamp"],
+            set_={**{column: stmt.excluded[column] for column in STORE_COLUMNS[2:]}, "created_at": func.now()},
+        )
+        
+        for start in range(0, len(frame), chunk_size):
+            db.execute(stmt, frame.iloc[start:start + chunk_size].to_dict("records"))
+        
+        inserted = count_query.scalar() - before
+        return {"inserted": inserted, "updated": len(frame) - inserted}
@@ -0,0 +1,458 @@
+"""Point-in-time index over stored options chain snapshots."""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, cast, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.options_chains import OptionsChain
+from app.models.types import price_sql
+from app.services.options_delta_store import OptionsDeltaStore
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Chain frame columns accepted by OptionsChainIndex.columns_from_frame
+CHAIN_FRAME_COLUMNS = [
+    "timestamp", "expiration_date", "strike", "option_type", "bid", "ask", "last",
+    "volume", "open_interest", "implied_volatility", "delta", "underlying_price",
+]
+
+# Float columns of an index besides strike
+CHAIN_VALUE_COLUMNS = ("bid", "ask", "last", "volume", "open_interest", "implied_volatility", "delta", "underlying_price")
+
+
+def epoch_ms(timestamps) -> np.ndarray:
+    """
+    Epoch milliseconds of one or many times.
+    
+    Args:
+        timestamps: Datetime, array of datetimes or datetime64 (naive values
+            are UTC), or epoch-ms integer(s)
+    
+    Returns:
+        1-D int64 array (one element for a single time)
+    """
+    if isinstance(timestamps, (int, np.integer)):
+        return np.array([timestamps], dtype=np.int64)
+    if isinstance(timestamps, (str, date, np.datetime64)):
+        timestamp = pd.Timestamp(timestamps)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize("UTC")
+        return np.array([timestamp.value // 1_000_000], dtype=np.int64)
+    values = np.atleast_1d(np.asarray(timestamps))
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64)
+    return pd.to_datetime(values.tolist(), utc=True).as_unit("ms").asi8
+
+
+def _epoch_day(expiration) -> int:
+    """Epoch day of a date or an epoch-day integer."""
+    if isinstance(expiration, (int, np.integer)):
+        return int(expiration)
+    return int(np.datetime64(expiration, "D").astype(np.int64))
+
+
+class OptionsChainIndex:
+    """
+    As-of index over one underlying's chain snapshots.
+    
+    Rows are contiguous NumPy columns sorted by (timestamp, expiration,
+    strike, type). snapshot_times holds each distinct snapshot time in
+    order and snapshot_starts the row offset where it begins (plus a final
+    end offset), so finding the snapshot in effect at a time is one binary
+    search, a snapshot is a slice, an expiration within it is a binary
+    search on the expiration column and a strike range within an
+    expiration one more on the strike column. Nothing is copied: lookups
+    return offsets or views into the columns.
+    """
+    
+    def __init__(
+        self,
+        symbol: str,
+        chain: Dict[str, np.ndarray],
+        snapshot_times: Optional[np.ndarray] = None,
+        snapshot_starts: Optional[np.ndarray] = None
+    ):
+        self.symbol = symbol
+        self.chain = chain
+        if snapshot_times is None or snapshot_starts is None:
+            snapshot_times, starts = np.unique(chain["timestamp"], return_index=True)
+            snapshot_starts = np.append(starts, len(chain["timestamp"]))
+        self.snapshot_times = snapshot_times
+        self.snapshot_starts = snapshot_starts
+        self.nbytes = sum(values.nbytes for values in chain.values()) + snapshot_times.nbytes + snapshot_starts.nbytes
+    
+    def __len__(self) -> int:
+        return len(self.snapshot_times)
+    
+    @staticmethod
+    def columns_from_frame(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Convert a chain frame to sorted NumPy columns.
+        
+        Args:
+            frame: Frame with CHAIN_FRAME_COLUMNS (options_chains rows,
+                OptionsDeltaStore.read_range or DataLakeService.read_options output)
+        
+        Returns:
+            Dict of columns; timestamp is epoch ms, expiration epoch days,
+            is_call bool, the rest float64 (missing values NaN)
+        """
+        if frame.empty:
+            frame = pd.DataFrame(columns=CHAIN_FRAME_COLUMNS)
+        timestamps = pd.to_datetime(frame["timestamp"], utc=True).dt.tz_localize(None)
+        columns = {
+            "timestamp": timestamps.to_numpy(dtype="datetime64[ms]").astype(np.int64),
+            "expiration": pd.to_datetime(frame["expiration_date"]).to_numpy(dtype="datetime64[D]").astype(np.int64),
+            "strike": pd.to_numeric(frame["strike"], errors="coerce").to_numpy(dtype=np.float64),
+            "is_call": (frame["option_type"] == "C").to_numpy(dtype=bool),
+        }
+        for column in CHAIN_VALUE_COLUMNS:
+            columns[column] = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64)
+        
+        order = np.lexsort((columns["is_call"], columns["strike"], columns["expiration"], columns["timestamp"]))
+        return {column: values[order] for column, values in columns.items()}
+    
+    @staticmethod
+    def from_frame(symbol: str, frame: pd.DataFrame) -> "OptionsChainIndex":
+        """
+        Build an index from a chain frame.
+        
+        Args:
+            symbol: Underlying stock symbol
+            frame: Frame with CHAIN_FRAME_COLUMNS
+        
+        Returns:
+            OptionsChainIndex
+        """
+        return OptionsChainIndex(symbol, OptionsChainIndex.columns_from_frame(frame))
+    
+    def snapshot_at(self, timestamp) -> int:
+        """
+        Position of the latest snapshot at or before a time.
+        
+        Args:
+            timestamp: Datetime (naive values are UTC) or epoch ms
+        
+        Returns:
+            Snapshot position, or -1 when every snapshot is later
+        """
+        return int(np.searchsorted(self.snapshot_times, epoch_ms(timestamp)[0], side="right")) - 1
+    
+    def snapshots_at(self, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Batched snapshot_at over epoch-ms times.
+        
+        Args:
+            timestamps: Epoch ms
+        
+        Returns:
+            Snapshot positions (-1 where every snapshot is later)
+        """
+        return np.searchsorted(self.snapshot_times, timestamps, side="right") - 1
+    
+    def snapshot_time(self, snapshot: int) -> datetime:
+        """UTC time of a snapshot position."""
+        return datetime.fromtimestamp(self.snapshot_times[snapshot] / 1000, tz=timezone.utc)
+    
+    def span(self, snapshot: int, min_expiration=None, max_expiration=None) -> Tuple[int, int]:
+        """
+        Row range of a snapshot, optionally limited to an expiration window.
+        
+        Args:
+            snapshot: Snapshot position
+            min_expiration: First expiration (date or epoch day, inclusive)
+            max_expiration: Last expiration (date or epoch day, inclusive)
+        
+        Returns:
+            (first row, end row); empty when nothing matches
+        """
+        first, last = int(self.snapshot_starts[snapshot]), int(self.snapshot_starts[snapshot + 1])
+        expirations = self.chain["expiration"]
+        if min_expiration is not None:
+            first = int(np.searchsorted(expirations[first:last], _epoch_day(min_expiration), side="left")) + first
+        if max_expiration is not None:
+            last = int(np.searchsorted(expirations[first:last], _epoch_day(max_expiration), side="right")) + first
+        return first, max(first, last)
+    
+    def expirations(self, snapshot: int) -> np.ndarray:
+        """Distinct expirations (epoch days, ascending) of a snapshot."""
+        first, last = self.snapshot_starts[snapshot], self.snapshot_starts[snapshot + 1]
+        expirations = self.chain["expiration"][first:last]
+        if not len(expirations):
+            return expirations
+        return expirations[np.append(True, expirations[1:] != expirations[:-1])]
+    
+    def rows(
+        self,
+        snapshot: int,
+        expiration=None,
+        min_strike: Optional[float] = None,
+        max_strike: Optional[float] = None,
+        option_type: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Rows of a snapshot matching an expiration, strike range and type.
+        
+        Each expiration block is cut to the strike range with two binary
+        searches; only the type filter looks at individual rows.
+        
+        Args:
+            snapshot: Snapshot position
+            expiration: Only this expiration (date or epoch day)
+            min_strike: Lowest strike (inclusive)
+            max_strike: Highest strike (inclusive)
+            option_type: 'C' or 'P'
+        
+        Returns:
+            Row positions in index order
+        """
+        first, last = self.span(snapshot, expiration, expiration)
+        expirations, strikes = self.chain["expiration"], self.chain["strike"]
+        ranges = []
+        while first < last:
+            block_end = int(np.searchsorted(expirations[first:last], expirations[first], side="right")) + first
+            low, high = first, block_end
+            if min_strike is not None:
+                low = int(np.searchsorted(strikes[first:block_end], min_strike, side="left")) + first
+            if max_strike is not None:
+                high = int(np.searchsorted(strikes[first:block_end], max_strike, side="right")) + first
+            if low < high:
+                ranges.append(np.arange(low, high))
+            first = block_end
+        
+        selected = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+        if option_type is not None:
+            selected = selected[self.chain["is_call"][selected] == (option_type == "C")]
+        return selected
+    
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> "OptionsChainIndex":
+        """
+        Index over the snapshots in a time range, sharing this index's columns.
+        
+        Args:
+            start: First snapshot time (inclusive)
+            end: Last snapshot time (inclusive)
+        
+        Returns:
+            OptionsChainIndex whose columns are views
+        """
+        first = int(np.searchsorted(self.snapshot_times, epoch_ms(start)[0], side="left")) if start is not None else 0
+        last = (
+            int(np.searchsorted(self.snapshot_times, epoch_ms(end)[0], side="right"))
+            if end is not None else len(self.snapshot_times)
+        )
+        last = max(first, last)
+        row_first, row_last = self.snapshot_starts[first], self.snapshot_starts[last]
+        return OptionsChainIndex(
+            self.symbol,
+            {column: values[row_first:row_last] for column, values in self.chain.items()},
+            self.snapshot_times[first:last],
+            self.snapshot_starts[first:last + 1] - row_first,
+        )
+    
+    def chain_at(
+        self,
+        timestamp,
+        expiration_date: Optional[date] = None,
+        min_strike: Optional[float] = None,
+        max_strike: Optional[float] = None,
+        option_type: Optional[str] = None
+    ) -> Optional[Tuple[datetime, float, pd.DataFrame]]:
+        """
+        The chain in effect at a time, as a frame.
+        
+        Args:
+            timestamp: Point in time to look up
+            expiration_date: Filter by expiration date
+            min_strike: Lowest strike (inclusive)
+            max_strike: Highest strike (inclusive)
+            option_type: 'C' or 'P'
+        
+        Returns:
+            Tuple of (snapshot time, underlying price, frame with
+            expiration_date, strike, option_type and the value columns), or
+            None when no snapshot is at or before the time
+        """
+        snapshot = self.snapshot_at(timestamp)
+        if snapshot < 0:
+            return None
+        selected = self.rows(snapshot, expiration_date, min_strike, max_strike, option_type)
+        frame = pd.DataFrame({
+            "expiration_date": self.chain["expiration"][selected].astype("datetime64[D]").astype(object),
+            "strike": self.chain["strike"][selected],
+            "option_type": np.where(self.chain["is_call"][selected], "C", "P"),
+            **{column: self.chain[column][selected] for column in CHAIN_VALUE_COLUMNS if column != "underlying_price"},
+        })
+        underlying_price = float(self.chain["underlying_price"][self.snapshot_starts[snapshot]])
+        return self.snapshot_time(snapshot), underlying_price, frame
+
+
+class ChainIndexCache:
+    """
+    Whole stored chain histories per underlying as OptionsChainIndex objects.
+    
+    A miss loads every snapshot of the underlying once, from options_chains
+    or the delta store (OPTIONS_SNAPSHOT_STORE) or from the Parquet data
+    lake. Backtests then take time ranges of it with OptionsChainIndex.between,
+    which are views, so repeated runs and jobs over one underlying build the
+    index once. Columns are read-only. Entries are evicted least recently
+    used once CHAIN_INDEX_CACHE_MAX_MB is exceeded and reloaded after
+    CHAIN_INDEX_TTL seconds; snapshot writes in this process drop the
+    underlying's entries right away.
+    """
+    
+    _cache: "OrderedDict[Tuple[str, str], Tuple[float, OptionsChainIndex]]" = OrderedDict()
+    _lock = threading.Lock()
+    _stats = {"hits": 0, "misses": 0, "invalidations": 0}
+    
+    @staticmethod
+    def enabled() -> bool:
+        """Whether the cache has a memory budget."""
+        return settings.CHAIN_INDEX_CACHE_MAX_MB > 0
+    
+    @staticmethod
+    def get(
+        db: Session,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> OptionsChainIndex:
+        """
+        Index of an underlying's stored snapshots in a time range.
+        
+        Args:
+            db: Database session (used only on a miss)
+            symbol: Underlying stock symbol
+            start: First snapshot time (inclusive)
+            end: Last snapshot time (inclusive)
+        
+        Returns:
+            OptionsChainIndex (views into the cached index on a hit)
+        """
+        source = str(db.get_bind().url)
+        if not ChainIndexCache.enabled():
+            return ChainIndexCache._load_database(db, symbol, start, end)
+        return ChainIndexCache._get((source, symbol), lambda: ChainIndexCache._load_database(db, symbol)).between(start, end)
+    
+    @staticmethod
+    def get_lake(
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        root: Optional[Union[str, Path]] = None
+    ) -> OptionsChainIndex:
+        """
+        Index of an underlying's snapshots in the Parquet data lake.
+        
+        Args:
+            symbol: Underlying stock symbol
+            start: First snapshot time (inclusive)
+            end: Last snapshot time (inclusive)
+            root: Lake directory (default: DATA_LAKE_DIR)
+        
+        Returns:
+            OptionsChainIndex (views into the cached index on a hit)
+        """
+        # Imported here: data_lake imports market_data_service, which invalidates this cache
+        from app.services.data_lake import DataLakeService
+        
+        def load(start_date: Optional[date] = None, end_date: Optional[date] = None) -> OptionsChainIndex:
+            frame = DataLakeService.read_options(symbol, start_date, end_date, root=root)
+            return OptionsChainIndex.from_frame(symbol, frame)
+        
+        if not ChainIndexCache.enabled():
+            return load(start and start.date(), end and end.date()).between(start, end)
+        source = f"lake:{Path(root or settings.DATA_LAKE_DIR).resolve()}"
+        return ChainIndexCache._get((source, symbol), load).between(start, end)
+    
+    @staticmethod
+    def invalidate(symbol: Optional[str] = None) -> None:
+        """
+        Drop cached indexes, e.g. after snapshots were written.
+        
+        Args:
+            symbol: Only drop this underlying (all when None)
+        """
+        with ChainIndexCache._lock:
+            for key in list(ChainIndexCache._cache):
+                if symbol is None or key[1] == symbol:
+                    del ChainIndexCache._cache[key]
+                    ChainIndexCache._stats["invalidations"] += 1
+    
+    @staticmethod
+    def cache_info() -> Dict[str, int]:
+        """Current occupancy and hit/miss counters."""
+        with ChainIndexCache._lock:
+            return {
+                "size": len(ChainIndexCache._cache),
+                "bytes": sum(index.nbytes for _, index in ChainIndexCache._cache.values()),
+                "max_bytes": settings.CHAIN_INDEX_CACHE_MAX_MB * 1024 * 1024,
+                **ChainIndexCache._stats,
+            }
+    
+    @staticmethod
+    def _get(key: Tuple[str, str], load) -> OptionsChainIndex:
+        with ChainIndexCache._lock:
+            entry = ChainIndexCache._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= settings.CHAIN_INDEX_TTL:
+                ChainIndexCache._cache.move_to_end(key)
+                ChainIndexCache._stats["hits"] += 1
+                return entry[1]
+            ChainIndexCache._stats["misses"] += 1
+        
+        index = load()
+        for values in index.chain.values():
+            values.flags.writeable = False
+        budget = settings.CHAIN_INDEX_CACHE_MAX_MB * 1024 * 1024
+        if index.nbytes > budget:
+            logger.info(f"Chain index for {key[1]} ({index.nbytes} bytes) exceeds the cache budget")
+            return index
+        
+        with ChainIndexCache._lock:
+            ChainIndexCache._cache[key] = (time.monotonic(), index)
+            ChainIndexCache._cache.move_to_end(key)
+            total = sum(cached.nbytes for _, cached in ChainIndexCache._cache.values())
+            while total > budget and ChainIndexCache._cache:
+                _, (_, evicted) = ChainIndexCache._cache.popitem(last=False)
+                total -= evicted.nbytes
+        return index
+    
+    @staticmethod
+    def _load_database(
+        db: Session,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> OptionsChainIndex:
+        """Read stored snapshots from whichever store OPTIONS_SNAPSHOT_STORE selects."""
+        if settings.OPTIONS_SNAPSHOT_STORE == "delta":
+            frame = OptionsDeltaStore.read_range(db, symbol, start, end)[CHAIN_FRAME_COLUMNS]
+            return OptionsChainIndex.from_frame(symbol, frame)
+        
+        stmt = select(
+            OptionsChain.timestamp,
+            OptionsChain.expiration_date,
+            price_sql(OptionsChain.strike),
+            OptionsChain.option_type,
+            price_sql(OptionsChain.bid),
+            price_sql(OptionsChain.ask),
+            price_sql(OptionsChain.last),
+            OptionsChain.volume,
+            OptionsChain.open_interest,
+            cast(OptionsChain.implied_volatility, Float),
+            cast(OptionsChain.delta, Float),
+            price_sql(OptionsChain.underlying_price),
+        ).where(OptionsChain.symbol_id == SymbolService.get_id(db, symbol))
+        if start is not None:
+            stmt = stmt.where(OptionsChain.timestamp >= start)
+        if end is not None:
+            stmt = stmt.where(OptionsChain.timestamp <= end)
+        return OptionsChainIndex.from_frame(symbol, pd.DataFrame(db.execute(stmt).all(), columns=CHAIN_FRAME_COLUMNS))
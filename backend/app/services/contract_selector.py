@@ -0,0 +1,440 @@
+"""Log-time option contract selection by expiry, strike and delta."""
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from app.schemas.market_data import OptionsChainItem
+from app.services.chain_index import (
+    CHAIN_FRAME_COLUMNS, CHAIN_VALUE_COLUMNS, ChainIndexCache, OptionsChainIndex, epoch_ms
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+MS_PER_DAY = 86_400_000
+
+
+class _SortedGroups:
+    """
+    Values sorted within contiguous groups, searched for many groups at once.
+    
+    Each value is keyed by group * width + (value - low), with width one
+    more than the value range, so a single sorted key array answers a
+    binary search inside any group and a batch of (group, target) pairs is
+    one np.searchsorted call.
+    """
+    
+    def __init__(self, groups: np.ndarray, values: np.ndarray, count: int):
+        self.values = values
+        self.low = float(values.min()) if len(values) else 0.0
+        self.high = float(values.max()) if len(values) else 0.0
+        self.width = self.high - self.low + 1.0
+        self.keys = groups * self.width + (values - self.low)
+        self.starts = np.searchsorted(groups, np.arange(count + 1))
+    
+    def _key(self, groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+        # Clipping half a unit outside the range keeps each key inside its own group
+        return groups * self.width + (np.minimum(np.maximum(values, self.low - 0.5), self.high + 0.5) - self.low)
+    
+    def bounds(
+        self,
+        groups: np.ndarray,
+        lower: Optional[np.ndarray] = None,
+        upper: Optional[np.ndarray] = None
+    ) -> tuple:
+        """Positions (first, end) of each group's values within [lower, upper]."""
+        first, end = self.starts[groups], self.starts[groups + 1]
+        if lower is not None:
+            first = np.maximum(first, np.searchsorted(self.keys, self._key(groups, lower), side="left"))
+        if upper is not None:
+            end = np.minimum(end, np.searchsorted(self.keys, self._key(groups, upper), side="right"))
+        return first, np.maximum(first, end)
+    
+    def nearest(
+        self,
+        groups: np.ndarray,
+        targets: np.ndarray,
+        lower: Optional[np.ndarray] = None,
+        upper: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Position of the value nearest each target within its group and [lower, upper] (-1 if none); ties go to the first."""
+        if not len(self.values):
+            return np.full(groups.shape, -1, dtype=np.int64)
+        valid = (groups >= 0) & ~np.isnan(targets)
+        groups = np.where(valid, groups, 0)
+        first, end = self.bounds(groups, lower, upper)
+        right = np.minimum(np.maximum(np.searchsorted(self.keys, self._key(groups, targets), side="left"), first), end)
+        left = right - 1
+        has_left, has_right = left >= first, right < end
+        left_distance = np.where(has_left, np.abs(targets - self.values[np.maximum(left, 0)]), np.inf)
+        right_distance = np.where(has_right, np.abs(self.values[np.minimum(right, len(self.values) - 1)] - targets), np.inf)
+        chosen = np.where(left_distance <= right_distance, left, right)
+        found = valid & (has_left | has_right)
+        # Equal values resolve to their first position, like argmin over the group
+        chosen[found] = np.searchsorted(self.keys, self.keys[chosen[found]], side="left")
+        return np.where(found, chosen, -1)
+
+
+class ContractSelector:
+    """
+    Nearest-expiry, strike and delta lookups over an OptionsChainIndex.
+    
+    Contracts of each snapshot are grouped by (expiration, type) and kept
+    sorted by strike and by absolute delta, and each snapshot's distinct
+    expirations are kept in order. "30 DTE, 0.30 delta put" or "nearest
+    ATM call" is then a binary search for the snapshot, one for the
+    expiration and one for the contract instead of a scan of the chain.
+    Every query takes arrays, so selecting for many timestamps is a few
+    vectorized searches. Works on stored histories (stored) and on a live
+    chain (from_frame, from_items).
+    
+    Each call has a fixed NumPy overhead: select for a single time costs
+    about 0.2-0.3 ms, several times a plain scan of a small chain (191 us
+    against 39 us at 20 expirations x 200 strikes). Hot loops must collect
+    their times and make one batched select or select_rows call.
+    """
+    
+    def __init__(self, index: OptionsChainIndex, mask: Optional[np.ndarray] = None):
+        """
+        Build the selection arrays.
+        
+        Args:
+            index: Chain snapshots to select from
+            mask: Only consider these rows of the index (e.g. liquid contracts)
+        """
+        self.index = index
+        chain = index.chain
+        snapshot = np.repeat(np.arange(len(index), dtype=np.int64), np.diff(index.snapshot_starts))
+        rows = np.arange(len(snapshot)) if mask is None else np.flatnonzero(mask)
+        expiration, is_call, strike = chain["expiration"], chain["is_call"], chain["strike"]
+        
+        # Contracts grouped by (snapshot, expiration, type), each group in strike order. Index
+        # rows are already in (snapshot, expiration, strike) order, so a stable sort on the
+        # group key alone keeps strikes sorted
+        low = int(expiration.min()) if len(rows) else 0
+        width = 2 * (int(expiration.max()) - low + 1) if len(rows) else 2
+        group_key = snapshot[rows] * width + (expiration[rows] - low) * 2 + is_call[rows]
+        self.by_strike = rows[np.argsort(group_key, kind="stable")]
+        snapshots, expirations, calls = snapshot[self.by_strike], expiration[self.by_strike], is_call[self.by_strike]
+        new_expiry = np.ones(len(self.by_strike), dtype=bool)
+        new_expiry[1:] = (snapshots[1:] != snapshots[:-1]) | (expirations[1:] != expirations[:-1])
+        new_group = new_expiry.copy()
+        new_group[1:] |= calls[1:] != calls[:-1]
+        group = np.cumsum(new_group) - 1
+        group_first = np.flatnonzero(new_group)
+        self.group_snapshot = snapshots[group_first]
+        self.group_expiration = expirations[group_first]
+        self.group_is_call = calls[group_first]
+        self._strikes = _SortedGroups(group, strike[self.by_strike], len(group_first))
+        
+        # Exact (snapshot, expiration, type) lookup keys
+        self._expiration_low = int(self.group_expiration.min()) if len(group_first) else 0
+        self._group_width = 2 * (int(self.group_expiration.max()) - self._expiration_low + 1) if len(group_first) else 2
+        self._group_keys = self._group_key(self.group_snapshot, self.group_expiration, self.group_is_call)
+        
+        # Same groups in absolute-delta order, contracts without a delta left out
+        with_delta = np.flatnonzero(~np.isnan(chain["delta"][self.by_strike]))
+        self.by_delta = self.by_strike[with_delta]
+        delta_group = group[with_delta]
+        deltas = np.abs(chain["delta"][self.by_delta])
+        order = np.argsort(delta_group * (deltas.max(initial=0.0) + 1.0) + deltas, kind="stable")
+        self.by_delta = self.by_delta[order]
+        self._deltas = _SortedGroups(delta_group[order], deltas[order], len(group_first))
+        
+        # Distinct expirations of each snapshot in order
+        expiry_first = np.flatnonzero(new_expiry)
+        self._expirations = _SortedGroups(snapshots[expiry_first], expirations[expiry_first].astype(np.float64), len(index))
+    
+    @staticmethod
+    def stored(
+        db: Session,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> "ContractSelector":
+        """
+        Selector over an underlying's stored snapshots, read through ChainIndexCache.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            start: First snapshot time (inclusive)
+            end: Last snapshot time (inclusive)
+        
+        Returns:
+            ContractSelector
+        """
+        return ContractSelector(ChainIndexCache.get(db, symbol, start, end))
+    
+    @staticmethod
+    def from_frame(
+        symbol: str,
+        frame: pd.DataFrame,
+        timestamp: Optional[datetime] = None,
+        underlying_price: Optional[float] = None
+    ) -> "ContractSelector":
+        """
+        Selector over a chain frame, e.g. MarketDataService.fetch_options_frame output.
+        
+        Args:
+            symbol: Underlying stock symbol
+            frame: Chain frame; timestamp and underlying_price columns may be
+                left out when given as arguments, missing quote or Greek
+                columns are treated as unknown
+            timestamp: Snapshot time of every row (live chains)
+            underlying_price: Underlying price of every row (live chains)
+        
+        Returns:
+            ContractSelector
+        """
+        if timestamp is not None:
+            frame = frame.assign(timestamp=timestamp)
+        if underlying_price is not None:
+            frame = frame.assign(underlying_price=underlying_price)
+        missing = [column for column in ("timestamp", "underlying_price") if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Chain frame needs {', '.join(missing)} (pass them for a live chain)")
+        return ContractSelector(OptionsChainIndex.from_frame(symbol, frame.reindex(columns=CHAIN_FRAME_COLUMNS)))
+    
+    @staticmethod
+    def from_items(
+        symbol: str,
+        items: List[OptionsChainItem],
+        timestamp: datetime,
+        underlying_price: float
+    ) -> "ContractSelector":
+        """
+        Selector over a live chain from MarketDataService.fetch_options_chain.
+        
+        Args:
+            symbol: Underlying stock symbol
+            items: Chain contracts
+            timestamp: Time the chain was fetched
+            underlying_price: Underlying price at that time
+        
+        Returns:
+            ContractSelector
+        """
+        frame = pd.DataFrame([item.model_dump() for item in items], columns=list(OptionsChainItem.model_fields))
+        return ContractSelector.from_frame(symbol, frame, timestamp, underlying_price)
+    
+    def snapshots_at(self, timestamps) -> np.ndarray:
+        """
+        Snapshot in effect at each time.
+        
+        Args:
+            timestamps: Datetime(s) (naive values are UTC) or epoch ms
+        
+        Returns:
+            Snapshot positions (-1 where every snapshot is later)
+        """
+        return self.index.snapshots_at(epoch_ms(timestamps))
+    
+    def expirations(self, snapshot: int, min_expiration: Optional[int] = None, max_expiration: Optional[int] = None) -> np.ndarray:
+        """
+        Distinct expirations (epoch days, ascending) of a snapshot, optionally within a window.
+        
+        Args:
+            snapshot: Snapshot position
+            min_expiration: First epoch day (inclusive)
+            max_expiration: Last epoch day (inclusive)
+        
+        Returns:
+            Epoch days
+        """
+        first, end = self._expirations.bounds(
+            np.array([snapshot]),
+            None if min_expiration is None else np.array([min_expiration], dtype=np.float64),
+            None if max_expiration is None else np.array([max_expiration], dtype=np.float64),
+        )
+        return self._expirations.values[first[0]:end[0]].astype(np.int64)
+    
+    def nearest_expiration(
+        self,
+        snapshots,
+        target_dte,
+        min_dte=None,
+        max_dte=None,
+        days=None
+    ) -> np.ndarray:
+        """
+        Expiration whose days to expiry are closest to a target.
+        
+        Args:
+            snapshots: Snapshot position(s)
+            target_dte: Target days to expiry (ties go to the earlier expiration)
+            min_dte: Fewest days to expiry allowed
+            max_dte: Most days to expiry allowed
+            days: Epoch day DTE counts from (default: each snapshot's UTC day)
+        
+        Returns:
+            Epoch-day expirations (-1 where no expiration qualifies)
+        """
+        snapshots = np.atleast_1d(np.asarray(snapshots, dtype=np.int64))
+        if not len(self.index):
+            return np.full(snapshots.shape, -1, dtype=np.int64)
+        if days is None:
+            days = self.index.snapshot_times[np.clip(snapshots, 0, len(self.index) - 1)] // MS_PER_DAY
+        days = np.broadcast_to(np.asarray(days, dtype=np.float64), snapshots.shape)
+        
+        def window(dte):
+            return None if dte is None else days + np.broadcast_to(np.asarray(dte, dtype=np.float64), snapshots.shape)
+        
+        chosen = self._expirations.nearest(
+            np.where(snapshots < len(self.index), snapshots, -1), window(target_dte), window(min_dte), window(max_dte)
+        )
+        return np.where(chosen >= 0, self._expirations.values[np.maximum(chosen, 0)], -1).astype(np.int64)
+    
+    def nearest_strike(
+        self,
+        snapshots,
+        expirations,
+        is_call,
+        strikes,
+        min_strike=None,
+        max_strike=None
+    ) -> np.ndarray:
+        """
+        Contract of an expiration and type whose strike is closest to a target.
+        
+        Args:
+            snapshots: Snapshot position(s)
+            expirations: Epoch-day expiration(s), e.g. from nearest_expiration
+            is_call: True for calls, False for puts
+            strikes: Target strike(s) (ties go to the lower strike)
+            min_strike: Lowest strike allowed
+            max_strike: Highest strike allowed
+        
+        Returns:
+            Index rows (-1 where the group is empty or nothing qualifies)
+        """
+        groups, strikes = self._groups(snapshots, expirations, is_call, strikes)
+        bounds = [None if limit is None else np.broadcast_to(np.asarray(limit, dtype=np.float64), groups.shape) for limit in (min_strike, max_strike)]
+        return self._rows(self.by_strike, self._strikes.nearest(groups, strikes, *bounds))
+    
+    def nearest_delta(self, snapshots, expirations, is_call, deltas) -> np.ndarray:
+        """
+        Contract of an expiration and type whose delta is closest to a target.
+        
+        Args:
+            snapshots: Snapshot position(s)
+            expirations: Epoch-day expiration(s), e.g. from nearest_expiration
+            is_call: True for calls, False for puts
+            deltas: Target delta(s), compared by absolute value (0.30 and
+                -0.30 both pick the 30-delta put)
+        
+        Returns:
+            Index rows (-1 where no contract of the group has a delta)
+        """
+        groups, deltas = self._groups(snapshots, expirations, is_call, deltas)
+        return self._rows(self.by_delta, self._deltas.nearest(groups, np.abs(deltas)))
+    
+    def select_rows(
+        self,
+        timestamps,
+        option_type: str,
+        target_dte: Optional[int] = None,
+        min_dte: int = 0,
+        max_dte: Optional[int] = None,
+        strike: Optional[float] = None,
+        delta: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Pick one contract per time by expiry and strike or delta.
+        
+        Pass every time in one call; per-call overhead dominates single-time
+        lookups (see the class docstring).
+        
+        The expiration is the one nearest target_dte within [min_dte,
+        max_dte] (the first at or after min_dte when target_dte is None).
+        The contract is the one nearest delta when given, else nearest
+        strike, else at the money.
+        
+        Args:
+            timestamps: Datetime(s) or epoch ms to select at
+            option_type: 'C' or 'P'
+            target_dte: Target days to expiry
+            min_dte: Fewest days to expiry allowed
+            max_dte: Most days to expiry allowed
+            strike: Target strike
+            delta: Target delta (absolute value)
+        
+        Returns:
+            Index rows, one per time (-1 where nothing qualifies)
+        
+        Raises:
+            ValueError: If option_type is not 'C' or 'P'
+        """
+        if option_type not in ("C", "P"):
+            raise ValueError(f"option_type must be 'C' or 'P', got {option_type!r}")
+        snapshots = self.index.snapshots_at(epoch_ms(timestamps))
+        expirations = self.nearest_expiration(
+            snapshots, min_dte if target_dte is None else target_dte, min_dte=min_dte, max_dte=max_dte
+        )
+        is_call = option_type == "C"
+        if delta is not None:
+            return self.nearest_delta(snapshots, expirations, is_call, delta)
+        if strike is None:
+            # At the money: each snapshot's underlying price
+            strike = np.full(len(snapshots), np.nan)
+            live = snapshots >= 0
+            strike[live] = self.index.chain["underlying_price"][self.index.snapshot_starts[snapshots[live]]]
+        return self.nearest_strike(snapshots, expirations, is_call, strike)
+    
+    def select(self, timestamps, option_type: str, **targets) -> pd.DataFrame:
+        """
+        select_rows as a frame.
+        
+        Args:
+            timestamps: Datetime(s) or epoch ms to select at
+            option_type: 'C' or 'P'
+            **targets: target_dte, min_dte, max_dte, strike, delta (see select_rows)
+        
+        Returns:
+            DataFrame indexed by query position (times with no match are
+            left out) with timestamp, snapshot_time, dte and the contract's
+            chain columns
+        """
+        times = epoch_ms(timestamps)
+        rows = self.select_rows(times, option_type, **targets)
+        found = np.flatnonzero(rows >= 0)
+        rows = rows[found]
+        chain = self.index.chain
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(times[found], unit="ms", utc=True),
+            "snapshot_time": pd.to_datetime(chain["timestamp"][rows], unit="ms", utc=True),
+            "expiration_date": chain["expiration"][rows].astype("datetime64[D]").astype(object),
+            "dte": chain["expiration"][rows] - chain["timestamp"][rows] // MS_PER_DAY,
+            "strike": chain["strike"][rows],
+            "option_type": option_type,
+            **{column: chain[column][rows] for column in CHAIN_VALUE_COLUMNS},
+        }, index=found)
+    
+    @staticmethod
+    def _rows(order: np.ndarray, chosen: np.ndarray) -> np.ndarray:
+        """Index rows of positions into a sort order (-1 stays -1)."""
+        if not len(order):
+            return np.full(chosen.shape, -1, dtype=np.int64)
+        return np.where(chosen >= 0, order[np.maximum(chosen, 0)], -1)
+    
+    def _group_key(self, snapshots: np.ndarray, expirations: np.ndarray, is_call: np.ndarray) -> np.ndarray:
+        return snapshots * self._group_width + (expirations - self._expiration_low) * 2 + is_call
+    
+    def _groups(self, snapshots, expirations, is_call, targets) -> tuple:
+        """Group of each (snapshot, expiration, type) query (-1 if absent) and the broadcast targets."""
+        snapshots, expirations, is_call, targets = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(snapshots, dtype=np.int64)),
+            np.asarray(expirations, dtype=np.int64),
+            np.asarray(is_call, dtype=bool),
+            np.asarray(targets, dtype=np.float64),
+        )
+        valid = (snapshots >= 0) & (expirations >= self._expiration_low) & (
+            expirations < self._expiration_low + self._group_width // 2
+        )
+        keys = self._group_key(snapshots, expirations, is_call)
+        groups = np.minimum(np.searchsorted(self._group_keys, keys), max(len(self._group_keys) - 1, 0))
+        found = valid & (len(self._group_keys) > 0)
+        if len(self._group_keys):
+            found &= self._group_keys[groups] == keys
+        return np.where(found, groups, -1), targets
@@ -0,0 +1,205 @@
+"""Coverage tracking for stored price history."""
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from app.models.price_coverage import PriceCoverage
+from app.models.stock_prices import StockPrice
+from app.services.market_calendar import last_completed_session, next_trading_day, trading_days
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Gaps separated by fewer covered trading days than this are fetched as one
+# range; re-reading a few stored bars is cheaper than another provider call
+GAP_MERGE_TRADING_DAYS = 5
+
+DateRange = Tuple[date, date]
+
+
+class CoverageService:
+    """
+    Tracks which trading days of (symbol, interval) history are already stored.
+    
+    Coverage is kept as merged, inclusive date ranges in price_coverage, so a
+    lookup reads a handful of rows instead of scanning stock_prices.
+    """
+    
+    @staticmethod
+    def get_ranges(db: Session, symbol: str, interval: str) -> List[DateRange]:
+        """
+        Covered ranges for a symbol and interval.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            interval: Data interval
+        
+        Returns:
+            Sorted list of inclusive (start, end) date ranges
+        """
+        rows = db.query(PriceCoverage.start_date, PriceCoverage.end_date).filter(
+            and_(
+                PriceCoverage.symbol == symbol,
+                PriceCoverage.interval == interval
+            )
+        ).order_by(PriceCoverage.start_date).all()
+        return [(row.start_date, row.end_date) for row in rows]
+    
+    @staticmethod
+    def missing_ranges(
+        db: Session,
+        symbol: str,
+        interval: str,
+        start_date: date,
+        end_date: date
+    ) -> List[DateRange]:
+        """
+        Trading-day ranges in a window that are not covered yet.
+        
+        Weekends and exchange holidays never form a gap on their own, and gaps
+        closer than GAP_MERGE_TRADING_DAYS sessions are joined.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            interval: Data interval
+            start_date: Window start (inclusive)
+            end_date: Window end (exclusive, like provider end dates)
+        
+        Returns:
+            Sorted list of inclusive (start, end) date ranges to fetch
+        """
+        days = trading_days(start_date, end_date - timedelta(days=1))
+        if not days:
+            return []
+        
+        sessions = np.array(days, dtype="datetime64[D]")
+        covered = np.zeros(len(sessions), dtype=bool)
+        for first, last in CoverageService.get_ranges(db, symbol, interval):
+            lo = np.searchsorted(sessions, np.datetime64(first, "D"), side="left")
+            hi = np.searchsorted(sessions, np.datetime64(last, "D"), side="right")
+            covered[lo:hi] = True
+        
+        missing = np.flatnonzero(~covered)
+        if len(missing) == 0:
+            return []
+        
+        # Split where the next missing session is more than GAP_MERGE_TRADING_DAYS away
+        breaks = np.flatnonzero(np.diff(missing) > GAP_MERGE_TRADING_DAYS)
+        starts = np.concatenate(([missing[0]], missing[breaks + 1]))
+        ends = np.concatenate((missing[breaks], [missing[-1]]))
+        return [(days[first], days[last]) for first, last in zip(starts.tolist(), ends.tolist())]
+    
+    @staticmethod
+    def record_coverage(
+        db: Session,
+        symbol: str,
+        interval: str,
+        start_date: date,
+        end_date: date
+    ) -> Optional[DateRange]:
+        """
+        Mark an inclusive date range as stored, merging it with neighbours.
+        
+        Sessions after the last completed session are left uncovered, so the
+        current day is fetched again until its bars are final.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            interval: Data interval
+            start_date: First stored date
+            end_date: Last stored date
+        
+        Returns:
+            The merged range containing the new one, or None if nothing was recorded
+        """
+        end_date = min(end_date, last_completed_session())
+        if end_date < start_date:
+            return None
+        
+        try:
+            rows = db.query(PriceCoverage).filter(
+                and_(
+                    PriceCoverage.symbol == symbol,
+                    PriceCoverage.interval == interval
+                )
+            ).order_by(PriceCoverage.start_date).with_for_update().all()
+            
+            merged_start, merged_end = start_date, end_date
+            for row in rows:
+                # Ranges touch when no trading session falls between them
+                if row.start_date <= next_trading_day(merged_end) and merged_start <= next_trading_day(row.end_date):
+                    merged_start = min(merged_start, row.start_date)
+                    merged_end = max(merged_end, row.end_date)
+                    db.delete(row)
+            db.flush()
+            
+            db.add(PriceCoverage(symbol=symbol, interval=interval, start_date=merged_start, end_date=merged_end))
+            db.commit()
+            return merged_start, merged_end
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error recording coverage for {symbol} ({interval}): {str(e)}")
+            raise
+    
+    @staticmethod
+    def rebuild_from_prices(db: Session, symbol: str, interval: str = "1d") -> List[DateRange]:
+        """
+        Rebuild coverage for data loaded before coverage was tracked.
+        
+        Each run of consecutive trading sessions with at least one stored bar
+        becomes one range. stock_prices has no interval column, so only run
+        this for the interval the symbol's rows were loaded with.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            interval: Interval to record the coverage under
+        
+        Returns:
+            The rebuilt ranges
+        """
+        stored = sorted(
+            row[0] if isinstance(row[0], date) else date.fromisoformat(str(row[0]))
+            for row in db.query(func.date(StockPrice.timestamp)).filter(
+                StockPrice.symbol_id == SymbolService.get_id(db, symbol)
+            ).distinct().all()
+        )
+        
+        ranges: List[DateRange] = []
+        if stored:
+            stored_days = set(stored)
+            run_start = previous = None
+            for day in trading_days(stored[0], stored[-1]):
+                if day in stored_days:
+                    run_start = run_start or day
+                    previous = day
+                elif run_start is not None:
+                    ranges.append((run_start, previous))
+                    run_start = None
+            if run_start is not None:
+                ranges.append((run_start, previous))
+        
+        try:
+            db.query(PriceCoverage).filter(
+                and_(
+                    PriceCoverage.symbol == symbol,
+                    PriceCoverage.interval == interval
+                )
+            ).delete(synchronize_session=False)
+            db.add_all([
+                PriceCoverage(symbol=symbol, interval=interval, start_date=first, end_date=last)
+                for first, last in ranges
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rebuilding coverage for {symbol} ({interval}): {str(e)}")
+            raise
+        
+        logger.info(f"Rebuilt coverage for {symbol} ({interval}): {len(ranges)} ranges")
+        return ranges
@@ -0,0 +1,502 @@
+"""Parquet data lake of stored prices and options snapshots for offline backtests."""
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import numpy as np
+import orjson
+import pandas as pd
+from sqlalchemy import and_, cast, Float, func, or_, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.options_chains import OptionsChain
+from app.models.stock_prices import StockPrice
+from app.models.symbols import Symbol
+from app.models.types import price_sql
+from app.services.bulk_loader import BulkLoader
+from app.services.market_data_service import MarketDataService
+from app.services.price_export import EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, PriceExportService
+from app.services.symbol_service import SymbolService
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:  # the data lake is optional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Dataset directories under the lake root
+PRICES_DATASET = "stock_prices"
+OPTIONS_DATASET = "options_chains"
+
+# Per-dataset record of what each symbol's last export covered; the leading
+# underscore keeps dataset discovery from reading it as a data file
+EXPORT_STATE_FILE = "_exports.json"
+
+# Columns of the options dataset besides the partition keys
+OPTION_LAKE_COLUMNS = [
+    "timestamp", "expiration_date", "strike", "option_type", "bid", "ask", "last",
+    "volume", "open_interest", "implied_volatility", "delta", "gamma", "theta", "vega",
+    "underlying_price",
+]
+
+
+class DataLakeService:
+    """
+    Exports stock_prices and options_chains to a local Parquet dataset and reads it back.
+    
+    Each dataset is hive-partitioned as ``symbol=SPY/month=2024-01/part-*.parquet``.
+    Month partitions keep daily bars from turning into one-row files while
+    still letting a date range skip whole directories; within a file the
+    timestamp row-group statistics prune the rest. Exports rewrite only the
+    months holding rows written since the symbol's last export (by
+    created_at, which upserts bump), so re-running an export is cheap and
+    backfills and corrections reach the lake. Reads memory-map the files
+    and need no database.
+    """
+    
+    @staticmethod
+    def available() -> bool:
+        """Whether pyarrow is installed for the data lake."""
+        return pa is not None
+    
+    @staticmethod
+    def export_prices(
+        db: Session,
+        symbols: Optional[Iterable[str]] = None,
+        root: Optional[Union[str, Path]] = None,
+        full: bool = False,
+        chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Export stored prices to the lake.
+        
+        Args:
+            db: Database session
+            symbols: Symbols to export (default: every registered symbol)
+            root: Lake directory (default: DATA_LAKE_DIR)
+            full: Rewrite all of each symbol's partitions instead of the changed months
+            chunk_size: Rows per server-side cursor batch
+        
+        Returns:
+            Dict of symbol to rows written
+        """
+        path = DataLakeService._dataset_path(root, PRICES_DATASET)
+        columns = [
+            StockPrice.timestamp,
+            price_sql(StockPrice.open),
+            price_sql(StockPrice.high),
+            price_sql(StockPrice.low),
+            price_sql(StockPrice.close),
+            StockPrice.volume,
+        ]
+        counts = {}
+        for symbol in DataLakeService._export_symbols(db, symbols):
+            counts[symbol] = DataLakeService._export(
+                db, path, DataLakeService._price_schema(), symbol, StockPrice, columns,
+                [StockPrice.timestamp], full, chunk_size,
+            )
+            logger.info(f"Exported {counts[symbol]} price rows for {symbol} to {path}")
+        return counts
+    
+    @staticmethod
+    def export_options(
+        db: Session,
+        symbols: Optional[Iterable[str]] = None,
+        root: Optional[Union[str, Path]] = None,
+        full: bool = False,
+        chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Export stored options snapshots to the lake.
+        
+        Args:
+            db: Database session
+            symbols: Underlying symbols to export (default: every registered symbol)
+            root: Lake directory (default: DATA_LAKE_DIR)
+            full: Rewrite all of each symbol's partitions instead of the changed months
+            chunk_size: Rows per server-side cursor batch
+        
+        Returns:
+            Dict of symbol to contracts written
+        """
+        path = DataLakeService._dataset_path(root, OPTIONS_DATASET)
+        columns = [
+            OptionsChain.timestamp,
+            OptionsChain.expiration_date,
+            price_sql(OptionsChain.strike),
+            OptionsChain.option_type,
+            price_sql(OptionsChain.bid),
+            price_sql(OptionsChain.ask),
+            price_sql(OptionsChain.last),
+            OptionsChain.volume,
+            OptionsChain.open_interest,
+            cast(OptionsChain.implied_volatility, Float),
+            cast(OptionsChain.delta, Float),
+            cast(OptionsChain.gamma, Float),
+            cast(OptionsChain.theta, Float),
+            cast(OptionsChain.vega, Float),
+            price_sql(OptionsChain.underlying_price),
+        ]
+        order = [OptionsChain.timestamp, OptionsChain.expiration_date, OptionsChain.strike]
+        counts = {}
+        for symbol in DataLakeService._export_symbols(db, symbols):
+            counts[symbol] = DataLakeService._export(
+                db, path, DataLakeService._option_schema(), symbol, OptionsChain, columns, order, full, chunk_size,
+            )
+            logger.info(f"Exported {counts[symbol]} option rows for {symbol} to {path}")
+        return counts
+    
+    @staticmethod
+    def read_prices(
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        root: Optional[Union[str, Path]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read a symbol's prices from the lake as NumPy columns, oldest first.
+        
+        Same layout as PriceExportService.read_columns, so backtests can take
+        either source.
+        
+        Args:
+            symbol: Stock symbol
+            start_date: Start date filter
+            end_date: End date filter (inclusive)
+            root: Lake directory (default: DATA_LAKE_DIR)
+        
+        Returns:
+            Dict of EXPORT_COLUMNS arrays; timestamps are UTC datetime64[ms]
+        """
+        path = DataLakeService._dataset_path(root, PRICES_DATASET)
+        table = DataLakeService._scan(path, symbol, start_date, end_date, EXPORT_COLUMNS)
+        if table is None or table.num_rows == 0:
+            return PriceExportService.empty_columns()
+        
+        table = table.sort_by("timestamp")
+        columns = {column: table.column(column).to_numpy() for column in EXPORT_COLUMNS}
+        columns["timestamp"] = columns["timestamp"].astype("datetime64[ms]")
+        return columns
+    
+    @staticmethod
+    def read_options(
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        root: Optional[Union[str, Path]] = None
+    ) -> pd.DataFrame:
+        """
+        Read an underlying's options snapshots from the lake.
+        
+        Args:
+            symbol: Underlying stock symbol
+            start_date: First snapshot date
+            end_date: Last snapshot date (inclusive)
+            root: Lake directory (default: DATA_LAKE_DIR)
+        
+        Returns:
+            DataFrame of OPTION_LAKE_COLUMNS ordered by snapshot, expiration
+            and strike; timestamps are tz-aware UTC
+        """
+        path = DataLakeService._dataset_path(root, OPTIONS_DATASET)
+        table = DataLakeService._scan(path, symbol, start_date, end_date, OPTION_LAKE_COLUMNS)
+        if table is None:
+            return pd.DataFrame(columns=OPTION_LAKE_COLUMNS)
+        
+        table = table.sort_by([("timestamp", "ascending"), ("expiration_date", "ascending"), ("strike", "ascending")])
+        return table.to_pandas()
+    
+    @staticmethod
+    def import_prices(
+        db: Session,
+        symbols: Optional[Iterable[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        root: Optional[Union[str, Path]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Seed stock_prices from the lake through the bulk loader.
+        
+        Args:
+            db: Database session
+            symbols: Symbols to import (default: every symbol in the lake)
+            start_date: Start date filter
+            end_date: End date filter (inclusive)
+            root: Lake directory (default: DATA_LAKE_DIR)
+        
+        Returns:
+            Dict of symbol to the loader's 'inserted'/'updated' counts
+        """
+        path = DataLakeService._dataset_path(root, PRICES_DATASET)
+        results = {}
+        for symbol in symbols or DataLakeService.list_symbols(PRICES_DATASET, root):
+            columns = DataLakeService.read_prices(symbol, start_date, end_date, root)
+            frame = pd.DataFrame(columns).assign(symbol=symbol)
+            results[symbol] = BulkLoader.load_prices(db=db, frame=BulkLoader.normalize_price_frame(frame))
+            logger.info(f"Imported {len(frame)} price rows for {symbol} from {path}")
+        return results
+    
+    @staticmethod
+    def import_options(
+        db: Session,
+        symbols: Optional[Iterable[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        root: Optional[Union[str, Path]] = None
+    ) -> Dict[str, int]:
+        """
+        Seed options_chains from the lake, one upsert per snapshot.
+        
+        Args:
+            db: Database session
+            symbols: Underlying symbols to import (default: every symbol in the lake)
+            start_date: First snapshot date
+            end_date: Last snapshot date (inclusive)
+            root: Lake directory (default: DATA_LAKE_DIR)
+        
+        Returns:
+            Dict of symbol to contracts stored
+        """
+        results = {}
+        for symbol in symbols or DataLakeService.list_symbols(OPTIONS_DATASET, root):
+            frame = DataLakeService.read_options(symbol, start_date, end_date, root)
+            stored = 0
+            for timestamp, snapshot in frame.groupby("timestamp", sort=False):
+                counts = MarketDataService.store_options_snapshot(
+                    db=db,
+                    symbol=symbol,
+                    frame=snapshot,
+                    underlying_price=float(snapshot["underlying_price"].iloc[0]),
+                    timestamp=timestamp.to_pydatetime(),
+                )
+                stored += counts["inserted"] + counts["updated"]
+            results[symbol] = stored
+            logger.info(f"Imported {stored} option rows for {symbol}")
+        return results
+    
+    @staticmethod
+    def list_symbols(dataset: str, root: Optional[Union[str, Path]] = None) -> List[str]:
+        """
+        Symbols with at least one partition in a dataset.
+        
+        Args:
+            dataset: PRICES_DATASET or OPTIONS_DATASET
+            root: Lake directory (default: DATA_LAKE_DIR)
+        
+        Returns:
+            Sorted list of symbols
+        """
+        lake = DataLakeService._open(DataLakeService._dataset_path(root, dataset))
+        if lake is None:
+            return []
+        return sorted({
+            ds.get_partition_keys(fragment.partition_expression)["symbol"]
+            for fragment in lake.get_fragments()
+        })
+    
+    @staticmethod
+    def _dataset_path(root: Optional[Union[str, Path]], dataset: str) -> Path:
+        if pa is None:
+            raise RuntimeError("The Parquet data lake requires pyarrow")
+        return Path(root or settings.DATA_LAKE_DIR) / dataset
+    
+    @staticmethod
+    def _partitioning():
+        return ds.partitioning(pa.schema([("symbol", pa.string()), ("month", pa.string())]), flavor="hive")
+    
+    @staticmethod
+    def _price_schema():
+        return pa.schema([
+            ("symbol", pa.string()),
+            ("month", pa.string()),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("volume", pa.int64()),
+        ])
+    
+    @staticmethod
+    def _option_schema():
+        return pa.schema([
+            ("symbol", pa.string()),
+            ("month", pa.string()),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("expiration_date", pa.date32()),
+            ("strike", pa.float64()),
+            ("option_type", pa.string()),
+            ("bid", pa.float64()),
+            ("ask", pa.float64()),
+            ("last", pa.float64()),
+            ("volume", pa.int64()),
+            ("open_interest", pa.int64()),
+            ("implied_volatility", pa.float64()),
+            ("delta", pa.float64()),
+            ("gamma", pa.float64()),
+            ("theta", pa.float64()),
+            ("vega", pa.float64()),
+            ("underlying_price", pa.float64()),
+        ])
+    
+    @staticmethod
+    def _export(
+        db: Session,
+        path: Path,
+        schema,
+        symbol: str,
+        model,
+        columns: list,
+        order: list,
+        full: bool,
+        chunk_size: int
+    ) -> int:
+        """
+        Rewrite the months of a symbol that hold rows written since its last export.
+        
+        Every month is rewritten when full is set or the symbol has no
+        recorded export (including lakes written before exports were
+        recorded).
+        
+        Returns:
+            Rows written
+        """
+        symbol_id = SymbolService.get_id(db, symbol)
+        state = DataLakeService._export_state(path)
+        # Read before the rows, so anything written during the export is picked up next time
+        marker = db.execute(select(func.max(model.created_at)).where(model.symbol_id == symbol_id)).scalar()
+        since = None if full else state.get(symbol)
+        
+        stmt = select(*columns).where(model.symbol_id == symbol_id)
+        if since is None:
+            DataLakeService._drop_partitions(path, symbol)
+        else:
+            # A second of overlap covers rows written in the same second as the last
+            # export (SQLite keeps created_at to the second); rewriting a month is idempotent
+            changed = select(model.timestamp).distinct().where(
+                model.symbol_id == symbol_id,
+                model.created_at >= datetime.fromisoformat(since) - timedelta(seconds=1),
+            )
+            timestamps = pd.to_datetime(list(db.execute(changed).scalars()), utc=True)
+            months = sorted(set(timestamps.strftime("%Y-%m")))
+            if not months:
+                return 0
+            DataLakeService._drop_partitions(path, symbol, months)
+            bounds = []
+            for month in months:
+                first = pd.Timestamp(f"{month}-01", tz="UTC")
+                bounds.append(and_(
+                    model.timestamp >= first.to_pydatetime(),
+                    model.timestamp < (first + pd.offsets.MonthBegin(1)).to_pydatetime(),
+                ))
+            stmt = stmt.where(or_(*bounds))
+        
+        written = DataLakeService._write(
+            path, schema, symbol, DataLakeService._stream(db, stmt.order_by(*order), chunk_size)
+        )
+        if marker is not None:
+            if marker.tzinfo is None:
+                marker = marker.replace(tzinfo=timezone.utc)
+            state[symbol] = marker.isoformat()
+            path.mkdir(parents=True, exist_ok=True)
+            (path / EXPORT_STATE_FILE).write_bytes(orjson.dumps(state, option=orjson.OPT_SORT_KEYS))
+        return written
+    
+    @staticmethod
+    def _export_state(path: Path) -> Dict[str, str]:
+        """Symbol to the latest created_at its last export covered (ISO format)."""
+        state_file = path / EXPORT_STATE_FILE
+        if not state_file.exists():
+            return {}
+        return orjson.loads(state_file.read_bytes())
+    
+    @staticmethod
+    def _export_symbols(db: Session, symbols: Optional[Iterable[str]]) -> List[str]:
+        if symbols:
+            return [symbol.upper() for symbol in symbols]
+        return list(db.execute(select(Symbol.symbol).order_by(Symbol.symbol)).scalars())
+    
+    @staticmethod
+    def _stream(db: Session, stmt, chunk_size: int) -> Iterator[list]:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+        for rows in result.partitions(chunk_size):
+            yield list(zip(*rows))
+    
+    @staticmethod
+    def _write(path: Path, schema, symbol: str, chunks: Iterator[list]) -> int:
+        """Write column chunks (in schema order after symbol/month) as one append."""
+        written = 0
+        
+        def batches():
+            nonlocal written
+            for values in chunks:
+                timestamps = pd.to_datetime(values[0], utc=True).tz_localize(None).to_numpy(dtype="datetime64[us]")
+                months = np.datetime_as_string(timestamps.astype("datetime64[M]"))
+                arrays = [pa.array(np.full(len(timestamps), symbol)), pa.array(months), timestamps, *values[1:]]
+                written += len(timestamps)
+                yield pa.record_batch(
+                    [pa.array(array, type=field.type, from_pandas=True) for array, field in zip(arrays, schema)],
+                    schema=schema,
+                )
+        
+        ds.write_dataset(
+            batches(),
+            path,
+            schema=schema,
+            format="parquet",
+            partitioning=DataLakeService._partitioning(),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+        return written
+    
+    @staticmethod
+    def _open(path: Path):
+        if not path.exists():
+            return None
+        return ds.dataset(
+            path,
+            format="parquet",
+            partitioning=DataLakeService._partitioning(),
+            filesystem=pafs.LocalFileSystem(use_mmap=True),
+        )
+    
+    @staticmethod
+    def _scan(path: Path, symbol: str, start_date: Optional[date], end_date: Optional[date], columns: List[str]):
+        """Read columns with the symbol, month and timestamp predicates pushed into the scan."""
+        lake = DataLakeService._open(path)
+        if lake is None:
+            return None
+        
+        predicate = ds.field("symbol") == symbol
+        if start_date:
+            start = pd.Timestamp(start_date, tz="UTC")
+            predicate &= (ds.field("month") >= start.strftime("%Y-%m")) & (ds.field("timestamp") >= start)
+        if end_date:
+            end = pd.Timestamp(end_date, tz="UTC") + pd.Timedelta(days=1)
+            predicate &= (ds.field("month") <= end_date.strftime("%Y-%m")) & (ds.field("timestamp") < end)
+        return lake.to_table(columns=columns, filter=predicate)
+    
+    @staticmethod
+    def _drop_partitions(path: Path, symbol: str, months: Optional[List[str]] = None) -> None:
+        """Delete a symbol's files, or only those of the given months."""
+        lake = DataLakeService._open(path)
+        if lake is None:
+            return
+        predicate = ds.field("symbol") == symbol
+        if months is not None:
+            predicate &= ds.field("month").isin(months)
+        months = set()
+        for fragment in lake.get_fragments(filter=predicate):
+            Path(fragment.path).unlink()
+            months.add(Path(fragment.path).parent)
+        # Month directories first, then the symbol directories that held them
+        for directory in [*months, *{month.parent for month in months}]:
+            if directory.exists() and not any(directory.iterdir()):
+                directory.rmdir()
@@ -0,0 +1,279 @@
+"""Vectorized Black-Scholes-Merton Greeks for whole option chains."""
+from datetime import datetime, timezone
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds in a 365-day year, used for time to expiry
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+
+# Options stop trading at 16:00 New York time; 21:00 UTC is used year-round
+EXPIRY_HOUR_UTC = 21
+
+# Floor on time to expiry (one hour) so same-day contracts stay finite
+MIN_TIME_TO_EXPIRY = 1.0 / (365.0 * 24)
+
+# Provider IVs below this are treated as missing and re-solved
+MIN_VALID_IV = 1e-3
+
+# Bracket, iteration cap and price tolerance of the batched IV solver
+IV_LOWER_BOUND = 1e-4
+IV_UPPER_BOUND = 5.0
+IV_MAX_ITERATIONS = 100
+IV_PRICE_TOLERANCE = 1e-8
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def _norm_pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal density."""
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+class GreeksService:
+    """Computes prices, Greeks and implied volatility over NumPy arrays."""
+    
+    @staticmethod
+    def time_to_expiry(expiration_dates, timestamp: Union[datetime, pd.Series]) -> np.ndarray:
+        """
+        Year fractions from a snapshot time to each expiration.
+        
+        Args:
+            expiration_dates: Sequence of expiration dates
+            timestamp: Snapshot time, or one time per expiration (naive
+                values are treated as UTC)
+        
+        Returns:
+            Array of year fractions; expired contracts are negative
+        """
+        if isinstance(timestamp, datetime):
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            now = pd.Timestamp(timestamp)
+        else:
+            now = pd.DatetimeIndex(pd.to_datetime(pd.Series(timestamp).to_numpy(), utc=True))
+        expiries = pd.DatetimeIndex(pd.to_datetime(pd.Series(expiration_dates).to_numpy()).tz_localize("UTC"))
+        seconds = (expiries + pd.Timedelta(hours=EXPIRY_HOUR_UTC) - now).total_seconds().to_numpy(dtype=float)
+        return seconds / SECONDS_PER_YEAR
+    
+    @staticmethod
+    def price(
+        spot: np.ndarray,
+        strike: np.ndarray,
+        t: np.ndarray,
+        sigma: np.ndarray,
+        is_call: np.ndarray,
+        rate: float,
+        dividend_yield: float = 0.0,
+    ) -> np.ndarray:
+        """
+        Black-Scholes-Merton option prices.
+        
+        Args:
+            spot: Underlying prices
+            strike: Strike prices
+            t: Years to expiry
+            sigma: Volatilities
+            is_call: Boolean array, True for calls
+            rate: Continuously compounded risk-free rate
+            dividend_yield: Continuous dividend yield
+        
+        Returns:
+            Array of option prices
+        """
+        sqrt_t = np.sqrt(t)
+        d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        spot_disc = spot * np.exp(-dividend_yield * t)
+        strike_disc = strike * np.exp(-rate * t)
+        call = spot_disc * ndtr(d1) - strike_disc * ndtr(d2)
+        put = strike_disc * ndtr(-d2) - spot_disc * ndtr(-d1)
+        return np.where(is_call, call, put)
+    
+    @staticmethod
+    def greeks(
+        spot: np.ndarray,
+        strike: np.ndarray,
+        t: np.ndarray,
+        sigma: np.ndarray,
+        is_call: np.ndarray,
+        rate: float,
+        dividend_yield: float = 0.0,
+    ) -> dict:
+        """
+        Delta, gamma, theta and vega in one pass.
+        
+        Theta is per calendar day and vega per one volatility point, the
+        same conventions as py_vollib's analytical Greeks.
+        
+        Args:
+            spot: Underlying prices
+            strike: Strike prices
+            t: Years to expiry
+            sigma: Volatilities
+            is_call: Boolean array, True for calls
+            rate: Continuously compounded risk-free rate
+            dividend_yield: Continuous dividend yield
+        
+        Returns:
+            Dict of 'delta', 'gamma', 'theta', 'vega' arrays
+        """
+        sqrt_t = np.sqrt(t)
+        sigma_sqrt_t = sigma * sqrt_t
+        d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma * sigma) * t) / sigma_sqrt_t
+        d2 = d1 - sigma_sqrt_t
+        q_disc = np.exp(-dividend_yield * t)
+        r_disc = np.exp(-rate * t)
+        pdf_d1 = _norm_pdf(d1)
+        
+        delta = np.where(is_call, q_disc * ndtr(d1), -q_disc * ndtr(-d1))
+        gamma = q_disc * pdf_d1 / (spot * sigma_sqrt_t)
+        vega = spot * q_disc * pdf_d1 * sqrt_t / 100.0
+        
+        decay = -spot * q_disc * pdf_d1 * sigma / (2.0 * sqrt_t)
+        call_theta = decay - rate * strike * r_disc * ndtr(d2) + dividend_yield * spot * q_disc * ndtr(d1)
+        put_theta = decay + rate * strike * r_disc * ndtr(-d2) - dividend_yield * spot * q_disc * ndtr(-d1)
+        theta = np.where(is_call, call_theta, put_theta) / 365.0
+        
+        return {"delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+    
+    @staticmethod
+    def implied_volatility(
+        option_price: np.ndarray,
+        spot: np.ndarray,
+        strike: np.ndarray,
+        t: np.ndarray,
+        is_call: np.ndarray,
+        rate: Union[float, np.ndarray],
+        dividend_yield: Union[float, np.ndarray] = 0.0,
+    ) -> np.ndarray:
+        """
+        Solve implied volatility for a batch of contracts at once.
+        
+        Runs a vectorized Newton iteration on vega. Each contract keeps a
+        [low, high] bracket; whenever a Newton step would leave it (flat vega
+        deep in or out of the money) that contract takes a bisection step
+        instead, so every element converges. Rates and yields may be arrays,
+        e.g. one rate per expiry.
+        
+        Prices outside the no-arbitrage bounds give NaN.
+        
+        Args:
+            option_price: Observed option prices
+            spot: Underlying prices
+            strike: Strike prices
+            t: Years to expiry
+            is_call: Boolean array, True for calls
+            rate: Continuously compounded risk-free rate(s)
+            dividend_yield: Continuous dividend yield(s)
+        
+        Returns:
+            Array of implied volatilities
+        """
+        option_price = np.asarray(option_price, dtype=float)
+        spot, strike, t, is_call, rate, dividend_yield = np.broadcast_arrays(
+            np.asarray(spot, dtype=float), np.asarray(strike, dtype=float), np.asarray(t, dtype=float),
+            np.asarray(is_call, dtype=bool), np.asarray(rate, dtype=float), np.asarray(dividend_yield, dtype=float),
+        )
+        low = np.full(option_price.shape, IV_LOWER_BOUND)
+        high = np.full(option_price.shape, IV_UPPER_BOUND)
+        
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            price_low = GreeksService.price(spot, strike, t, low, is_call, rate, dividend_yield)
+            price_high = GreeksService.price(spot, strike, t, high, is_call, rate, dividend_yield)
+            solvable = (option_price >= price_low) & (option_price <= price_high)
+            
+            sigma = np.full(option_price.shape, 0.3)
+            sqrt_t = np.sqrt(t)
+            active = solvable.copy()
+            
+            for _ in range(IV_MAX_ITERATIONS):
+                if not active.any():
+                    break
+                
+                diff = GreeksService.price(spot, strike, t, sigma, is_call, rate, dividend_yield) - option_price
+                active &= np.abs(diff) > IV_PRICE_TOLERANCE
+                
+                # Tighten the bracket around the root
+                low = np.where(active & (diff < 0), sigma, low)
+                high = np.where(active & (diff > 0), sigma, high)
+                
+                d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+                vega = spot * np.exp(-dividend_yield * t) * _norm_pdf(d1) * sqrt_t
+                newton = sigma - diff / vega
+                in_bracket = np.isfinite(newton) & (newton > low) & (newton < high)
+                step = np.where(in_bracket, newton, 0.5 * (low + high))
+                sigma = np.where(active, step, sigma)
+        
+        return np.where(solvable, sigma, np.nan)
+    
+    @staticmethod
+    def apply_to_chain(
+        frame: pd.DataFrame,
+        underlying_price: Union[float, np.ndarray],
+        timestamp: Union[datetime, pd.Series],
+        rate: Optional[float] = None,
+        dividend_yield: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Fill implied_volatility where missing and compute Greeks for a chain frame.
+        
+        Frames spanning several snapshots pass the underlying price and
+        snapshot time of each row instead of scalars.
+        
+        Args:
+            frame: Chain frame with expiration_date, strike, option_type, bid, ask,
+                last and implied_volatility columns
+            underlying_price: Underlying price at snapshot time, or one per row
+            timestamp: Snapshot time, or one per row
+            rate: Risk-free rate (defaults to RISK_FREE_RATE)
+            dividend_yield: Dividend yield (defaults to DIVIDEND_YIELD)
+        
+        Returns:
+            Copy of the frame with implied_volatility, delta, gamma, theta and vega
+        """
+        frame = frame.copy()
+        spot = np.broadcast_to(np.asarray(underlying_price, dtype=float), (len(frame),))
+        if frame.empty or not (spot > 0).any():
+            for column in ("delta", "gamma", "theta", "vega"):
+                frame[column] = np.nan
+            return frame
+        
+        rate = settings.RISK_FREE_RATE if rate is None else rate
+        dividend_yield = settings.DIVIDEND_YIELD if dividend_yield is None else dividend_yield
+        
+        strike = frame["strike"].to_numpy(dtype=float)
+        is_call = (frame["option_type"] == "C").to_numpy()
+        raw_t = GreeksService.time_to_expiry(frame["expiration_date"], timestamp)
+        live = (raw_t > 0) & (spot > 0)
+        t = np.maximum(raw_t, MIN_TIME_TO_EXPIRY)
+        
+        bid = pd.to_numeric(frame["bid"], errors="coerce").to_numpy(dtype=float)
+        ask = pd.to_numeric(frame["ask"], errors="coerce").to_numpy(dtype=float)
+        last = pd.to_numeric(frame["last"], errors="coerce").to_numpy(dtype=float)
+        quoted = (bid > 0) & (ask > 0)
+        market_price = np.where(quoted, 0.5 * (bid + ask), last)
+        
+        iv = pd.to_numeric(frame["implied_volatility"], errors="coerce").to_numpy(dtype=float)
+        missing = live & ~(iv >= MIN_VALID_IV) & (market_price > 0)
+        if missing.any():
+            iv[missing] = GreeksService.implied_volatility(
+                market_price[missing], spot[missing], strike[missing], t[missing],
+                is_call[missing], rate, dividend_yield,
+            )
+        
+        valid = live & (iv >= MIN_VALID_IV)
+        sigma = np.where(valid, iv, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            greeks = GreeksService.greeks(spot, strike, t, sigma, is_call, rate, dividend_yield)
+        
+        frame["implied_volatility"] = np.where(np.isfinite(iv) & (iv >= MIN_VALID_IV), iv, np.nan)
+        for column, values in greeks.items():
+            frame[column] = values
+        
+        return frame
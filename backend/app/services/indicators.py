@@ -0,0 +1,204 @@
+"""Vectorized technical indicators over NumPy price columns."""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Indicators:
+    """
+    Indicators computed over whole columns at once.
+    
+    Every function takes and returns float64 arrays aligned with its input.
+    Bars before an indicator has enough history are NaN, and NaN compares
+    false, so warm-up bars never trigger a rule.
+    """
+    
+    @staticmethod
+    def sma(values: np.ndarray, period: int) -> np.ndarray:
+        """
+        Simple moving average.
+        
+        Args:
+            values: Input series
+            period: Window length in bars
+        
+        Returns:
+            Array of averages
+        """
+        values = np.asarray(values, dtype=np.float64)
+        result = np.full(values.shape, np.nan)
+        if period <= len(values):
+            sums = np.cumsum(np.concatenate([[0.0], values]))
+            result[period - 1:] = (sums[period:] - sums[:-period]) / period
+        return result
+    
+    @staticmethod
+    def ema(values: np.ndarray, period: int) -> np.ndarray:
+        """
+        Exponential moving average with smoothing 2 / (period + 1).
+        
+        Args:
+            values: Input series
+            period: Span in bars
+        
+        Returns:
+            Array of averages
+        """
+        result = pd.Series(values, dtype=np.float64).ewm(span=period, adjust=False).mean().to_numpy()
+        result[:period - 1] = np.nan
+        return result
+    
+    @staticmethod
+    def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+        """
+        Relative Strength Index with Wilder's smoothing.
+        
+        Args:
+            close: Closing prices
+            period: Smoothing period
+        
+        Returns:
+            Array of RSI values (0-100)
+        """
+        change = np.diff(np.asarray(close, dtype=np.float64), prepend=np.nan)
+        gains = pd.Series(np.clip(change, 0, None)).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+        losses = pd.Series(np.clip(-change, 0, None)).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = 100.0 - 100.0 / (1.0 + gains / losses)
+        result = np.where((losses == 0) & (gains > 0), 100.0, result)
+        result[:period] = np.nan
+        return result
+    
+    @staticmethod
+    def macd(
+        close: np.ndarray,
+        fast_period: int = 12,
+        slow_period: int = 26,
+        signal_period: int = 9
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        MACD line, signal line and histogram.
+        
+        Args:
+            close: Closing prices
+            fast_period: Fast EMA span
+            slow_period: Slow EMA span
+            signal_period: Signal EMA span over the MACD line
+        
+        Returns:
+            Tuple of (macd, signal, histogram) arrays
+        """
+        line = Indicators.ema(close, fast_period) - Indicators.ema(close, slow_period)
+        signal = np.full(line.shape, np.nan)
+        valid = np.flatnonzero(~np.isnan(line))
+        if len(valid):
+            signal[valid[0]:] = Indicators.ema(line[valid[0]:], signal_period)
+        return line, signal, line - signal
+    
+    @staticmethod
+    def bollinger_percent_b(close: np.ndarray, period: int = 20, std_dev: float = 2.0) -> np.ndarray:
+        """
+        Position of the close within its Bollinger Bands.
+        
+        Args:
+            close: Closing prices
+            period: Moving-average window
+            std_dev: Band width in standard deviations
+        
+        Returns:
+            Array of %B values (0 at the lower band, 1 at the upper band)
+        """
+        series = pd.Series(close, dtype=np.float64)
+        middle = series.rolling(period).mean().to_numpy()
+        width = std_dev * series.rolling(period).std(ddof=0).to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (np.asarray(close, dtype=np.float64) - (middle - width)) / (2.0 * width)
+    
+    @staticmethod
+    def stochastic_k(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+        """
+        Stochastic oscillator %K.
+        
+        Args:
+            high: High prices
+            low: Low prices
+            close: Closing prices
+            period: Lookback in bars
+        
+        Returns:
+            Array of %K values (0-100)
+        """
+        highest = Indicators.rolling_max(high, period)
+        lowest = Indicators.rolling_min(low, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 100.0 * (np.asarray(close, dtype=np.float64) - lowest) / (highest - lowest)
+    
+    @staticmethod
+    def rolling_max(values: np.ndarray, period: int) -> np.ndarray:
+        """Highest value over the last period bars, including the current one."""
+        return pd.Series(values, dtype=np.float64).rolling(period).max().to_numpy()
+    
+    @staticmethod
+    def rolling_min(values: np.ndarray, period: int) -> np.ndarray:
+        """Lowest value over the last period bars, including the current one."""
+        return pd.Series(values, dtype=np.float64).rolling(period).min().to_numpy()
+    
+    @staticmethod
+    def realized_volatility(close: np.ndarray, period: int, periods_per_year: float) -> np.ndarray:
+        """
+        Annualized close-to-close volatility.
+        
+        Args:
+            close: Closing prices
+            period: Window of log returns
+            periods_per_year: Bars per year, e.g. 252 for daily bars
+        
+        Returns:
+            Array of annualized volatilities
+        """
+        returns = np.diff(np.log(np.asarray(close, dtype=np.float64)), prepend=np.nan)
+        return pd.Series(returns).rolling(period).std().to_numpy() * np.sqrt(periods_per_year)
+    
+    @staticmethod
+    def rank(values: np.ndarray, period: int) -> np.ndarray:
+        """
+        Where each value sits between the low and high of its lookback (IV rank).
+        
+        Args:
+            values: Input series
+            period: Lookback in bars, including the current one
+        
+        Returns:
+            Array of ranks (0-100)
+        """
+        lowest = Indicators.rolling_min(values, period)
+        highest = Indicators.rolling_max(values, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 100.0 * (np.asarray(values, dtype=np.float64) - lowest) / (highest - lowest)
+    
+    @staticmethod
+    def percentile(values: np.ndarray, period: int) -> np.ndarray:
+        """
+        Share of the lookback below each value (IV percentile).
+        
+        Args:
+            values: Input series
+            period: Lookback in bars, including the current one
+        
+        Returns:
+            Array of percentiles (0-100)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        result = np.full(values.shape, np.nan)
+        if period > len(values):
+            return result
+        windows = sliding_window_view(values, period)
+        current = windows[:, -1:]
+        with np.errstate(invalid="ignore"):
+            below = (windows[:, :-1] < current).sum(axis=1)
+        result[period - 1:] = np.where(np.isnan(windows).any(axis=1), np.nan, 100.0 * below / (period - 1))
+        return result
@@ -0,0 +1,446 @@
+"""Concurrent multi-symbol ingestion jobs."""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.services.bulk_loader import BulkLoader
+from app.services.coverage_service import CoverageService
+from app.services.market_data_service import MarketDataService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept in memory for progress lookups
+MAX_TRACKED_JOBS = 100
+
+
+class ProviderLimiter:
+    """Caps concurrent calls and request rate for one data provider."""
+    
+    def __init__(self, max_concurrency: int, requests_per_second: float):
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def __enter__(self):
+        self._semaphore.acquire()
+        if self._interval:
+            # Reserve the next start slot, then sleep outside the lock
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + self._interval
+            if slot > now:
+                time.sleep(slot - now)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+class IngestionJob:
+    """State and per-symbol progress of one batch ingestion."""
+    
+    def __init__(
+        self,
+        symbols: List[str],
+        start_date: date,
+        end_date: Optional[date],
+        interval: str,
+        provider: str,
+        refresh: bool = False,
+    ):
+        self.id = uuid.uuid4().hex
+        self.symbols = symbols
+        self.start_date = start_date
+        self.end_date = end_date
+        self.interval = interval
+        self.provider = provider
+        self.refresh = refresh
+        self.status = "pending"
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.progress: Dict[str, Dict] = {
+            symbol: {"symbol": symbol, "status": "pending", "records_stored": 0, "records_updated": 0,
+                     "total_fetched": 0, "ranges_fetched": 0, "error": None}
+            for symbol in symbols
+        }
+        self._lock = threading.Lock()
+    
+    def update(self, symbol: str, **fields) -> None:
+        """Update the progress entry for one symbol."""
+        with self._lock:
+            self.progress[symbol].update(fields)
+    
+    def to_dict(self) -> Dict:
+        """Snapshot of the job for API responses."""
+        with self._lock:
+            progress = [dict(entry) for entry in self.progress.values()]
+        completed = sum(1 for entry in progress if entry["status"] in ("completed", "failed"))
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "provider": self.provider,
+            "interval": self.interval,
+            "refresh": self.refresh,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "total_symbols": len(progress),
+            "completed_symbols": completed,
+            "progress": progress,
+        }
+
+
+class IngestionService:
+    """Runs batch ingestion jobs across a bounded worker pool."""
+    
+    _jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+    _limiters: Dict[str, ProviderLimiter] = {}
+    _registry_lock = threading.Lock()
+    
+    @staticmethod
+    def get_limiter(provider_name: str) -> ProviderLimiter:
+        """
+        Get the process-wide limiter for a provider.
+        
+        Args:
+            provider_name: Provider key used in PROVIDER_CONCURRENCY / PROVIDER_RATE_LIMITS
+        
+        Returns:
+            Shared ProviderLimiter
+        """
+        with IngestionService._registry_lock:
+            limiter = IngestionService._limiters.get(provider_name)
+            if limiter is None:
+                limiter = ProviderLimiter(
+                    max_concurrency=settings.PROVIDER_CONCURRENCY.get(provider_name, 1),
+                    requests_per_second=settings.PROVIDER_RATE_LIMITS.get(provider_name, 1.0),
+                )
+                IngestionService._limiters[provider_name] = limiter
+            return limiter
+    
+    @staticmethod
+    def plan_ranges(
+        db: Session,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d",
+        refresh: bool = False,
+    ) -> List[Tuple[date, date]]:
+        """
+        Trading-day ranges of a window that need fetching.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            start_date: Start date for data fetch
+            end_date: End date for data fetch (exclusive, defaults to today)
+            interval: Data interval
+            refresh: Fetch the whole window regardless of coverage
+        
+        Returns:
+            List of (first, last) dates, both inclusive
+        """
+        if end_date is None:
+            end_date = date.today()
+        if refresh:
+            return [(start_date, end_date - timedelta(days=1))] if end_date > start_date else []
+        return CoverageService.missing_ranges(db, symbol, interval, start_date, end_date)
+    
+    @staticmethod
+    def ingest_symbol(
+        db: Session,
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d",
+        provider=None,
+        refresh: bool = False,
+        loader: str = "upsert",
+        limiter: Optional[ProviderLimiter] = None,
+        prefetched: Optional[Dict[Tuple[date, date], pd.DataFrame]] = None,
+    ) -> Dict:
+        """
+        Fetch and store only the parts of a window that are not stored yet.
+        
+        Missing trading-day ranges come from price_coverage; each is fetched
+        with one provider call, stored, and then recorded as covered from
+        its first to its last returned bar (UTC dates, like
+        CoverageService.rebuild_from_prices). Days outside the bars,
+        including a whole range after a transient empty response, are
+        retried on the next run.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            start_date: Start date for data fetch
+            end_date: End date for data fetch (exclusive, defaults to today)
+            interval: Data interval
+            provider: Object with ``name`` and ``fetch_stock_frame``; defaults to
+                MarketDataService
+            refresh: Re-fetch the whole window regardless of coverage
+            loader: 'upsert' for chunked upserts, 'copy' for the bulk loader
+            limiter: Limiter held around each provider call
+            prefetched: History frames already fetched for some of the
+                missing ranges, keyed by (first, last) trading day
+        
+        Returns:
+            Dict with inserted, updated, total_fetched and the fetched ranges
+        """
+        provider = provider or MarketDataService
+        if end_date is None:
+            end_date = date.today()
+        prefetched = prefetched or {}
+        
+        ranges = IngestionService.plan_ranges(db, symbol, start_date, end_date, interval, refresh)
+        
+        result = {"inserted": 0, "updated": 0, "total_fetched": 0, "ranges": []}
+        for first, last in ranges:
+            fetch = lambda: provider.fetch_stock_frame(
+                symbol=symbol,
+                start_date=first,
+                end_date=last + timedelta(days=1),
+                interval=interval,
+            )
+            if (first, last) in prefetched:
+                data = prefetched[(first, last)]
+            elif limiter is not None:
+                with limiter:
+                    data = fetch()
+            else:
+                data = fetch()
+            
+            frame = BulkLoader.normalize_price_frame(data, symbol=symbol)
+            if loader == "copy":
+                counts = BulkLoader.load_prices(db=db, frame=frame)
+            else:
+                counts = MarketDataService.upsert_price_records(
+                    db=db,
+                    symbol=symbol,
+                    records=MarketDataService.frame_to_records(frame),
+                )
+            if len(frame):
+                # Only the days the bars span: days before the first bar or after the last
+                # (a later listing, a provider still missing the latest session) stay missing
+                stored_days = frame["timestamp"].dt.date
+                CoverageService.record_coverage(
+                    db, symbol, interval, max(first, stored_days.min()), min(last, stored_days.max())
+                )
+            
+            result["inserted"] += counts["inserted"]
+            result["updated"] += counts["updated"]
+            result["total_fetched"] += len(data)
+            result["ranges"].append({"start_date": first, "end_date": last, "fetched": len(data)})
+        
+        if not ranges:
+            logger.info(f"{symbol} ({interval}) already covered from {start_date} to {end_date}")
+        return result
+    
+    @staticmethod
+    def submit(
+        symbols: List[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d",
+        provider=None,
+        max_workers: Optional[int] = None,
+        session_factory=None,
+        refresh: bool = False,
+    ) -> IngestionJob:
+        """
+        Start a batch ingestion job in the background.
+        
+        Args:
+            symbols: Symbols to ingest
+            start_date: Start date for data fetch
+            end_date: End date for data fetch (defaults to today)
+            interval: Data interval
+            provider: MarketDataProvider (or any object with ``name`` and
+                ``fetch_stock_frame``); defaults to the configured provider
+                behind the provider cache.
+            max_workers: Worker threads (defaults to INGEST_MAX_WORKERS)
+            session_factory: Session factory for workers (defaults to SessionLocal)
+            refresh: Re-fetch whole windows instead of only uncovered ranges
+        
+        Returns:
+            The started IngestionJob
+        """
+        job = IngestionService.create_job(symbols, start_date, end_date, interval, provider, refresh)
+        thread = threading.Thread(
+            target=IngestionService.run,
+            kwargs={"job": job, "provider": provider, "max_workers": max_workers, "session_factory": session_factory},
+            name=f"ingest-{job.id[:8]}",
+            daemon=True,
+        )
+        thread.start()
+        return job
+    
+    @staticmethod
+    def create_job(
+        symbols: List[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d",
+        provider=None,
+        refresh: bool = False,
+    ) -> IngestionJob:
+        """Register a new job without starting it."""
+        unique_symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        provider_name = getattr(provider, "name", settings.DATA_PROVIDER)
+        job = IngestionJob(unique_symbols, start_date, end_date, interval, provider_name, refresh)
+        
+        with IngestionService._registry_lock:
+            IngestionService._jobs[job.id] = job
+            while len(IngestionService._jobs) > MAX_TRACKED_JOBS:
+                oldest_id, oldest = next(iter(IngestionService._jobs.items()))
+                if oldest.status in ("pending", "running"):
+                    break
+                del IngestionService._jobs[oldest_id]
+        return job
+    
+    @staticmethod
+    def get_job(job_id: str) -> Optional[IngestionJob]:
+        """Look up a job by id."""
+        with IngestionService._registry_lock:
+            return IngestionService._jobs.get(job_id)
+    
+    @staticmethod
+    def run(job: IngestionJob, provider=None, max_workers: Optional[int] = None, session_factory=None) -> IngestionJob:
+        """
+        Run a job to completion on the calling thread.
+        
+        Provider calls are spread over a thread pool and throttled by the
+        provider's limiter. Each worker thread keeps one session from the
+        pool for all the symbols it processes. Unless the job refreshes,
+        only ranges missing from price_coverage are fetched.
+        
+        When the provider serves many symbols per request (``batch_history``),
+        symbols missing the same ranges are fetched together with
+        fetch_stock_frames, up to INGEST_BATCH_SIZE per call. Symbols a batch
+        call left out are fetched on their own, so failures stay per symbol.
+        
+        Args:
+            job: Job created by create_job
+            provider: Object with ``name`` and ``fetch_stock_frame`` (and
+                ``fetch_stock_frames`` when it sets ``batch_history``)
+            max_workers: Worker threads (defaults to INGEST_MAX_WORKERS)
+            session_factory: Session factory for workers (defaults to SessionLocal)
+        
+        Returns:
+            The finished job
+        """
+        if provider is None:
+            provider = MarketDataService
+            batched = MarketDataService.supports_batch_history()
+        else:
+            batched = getattr(provider, "batch_history", False)
+        session_factory = session_factory or SessionLocal
+        limiter = IngestionService.get_limiter(job.provider)
+        workers = max(1, min(max_workers or settings.INGEST_MAX_WORKERS, len(job.symbols) or 1))
+        
+        local = threading.local()
+        sessions = []
+        sessions_lock = threading.Lock()
+        
+        def worker_session():
+            db = getattr(local, "db", None)
+            if db is None:
+                db = local.db = session_factory()
+                with sessions_lock:
+                    sessions.append(db)
+            return db
+        
+        prefetched: Dict[str, Dict[Tuple[date, date], pd.DataFrame]] = {symbol: {} for symbol in job.symbols}
+        
+        def plan(symbol: str) -> Tuple[str, Tuple]:
+            try:
+                ranges = IngestionService.plan_ranges(
+                    worker_session(), symbol, job.start_date, job.end_date, job.interval, job.refresh
+                )
+                return symbol, tuple(ranges)
+            except Exception as e:
+                # Reported by the per-symbol pass
+                logger.warning(f"Error planning {symbol} for job {job.id}: {str(e)}")
+                return symbol, ()
+        
+        def fetch_batch(batch: Tuple[List[str], Tuple[date, date]]) -> None:
+            symbols, (first, last) = batch
+            try:
+                with limiter:
+                    frames = provider.fetch_stock_frames(
+                        symbols=symbols,
+                        start_date=first,
+                        end_date=last + timedelta(days=1),
+                        interval=job.interval,
+                    )
+            except Exception as e:
+                logger.warning(f"Batch fetch of {len(symbols)} symbols failed for job {job.id}: {str(e)}")
+                return
+            for symbol, data in frames.items():
+                if symbol in prefetched:
+                    prefetched[symbol][(first, last)] = data
+        
+        def ingest(symbol: str) -> None:
+            job.update(symbol, status="running")
+            try:
+                result = IngestionService.ingest_symbol(
+                    db=worker_session(),
+                    symbol=symbol,
+                    start_date=job.start_date,
+                    end_date=job.end_date,
+                    interval=job.interval,
+                    provider=provider,
+                    refresh=job.refresh,
+                    limiter=limiter,
+                    prefetched=prefetched.pop(symbol, None),
+                )
+                job.update(
+                    symbol,
+                    status="completed",
+                    records_stored=result["inserted"],
+                    records_updated=result["updated"],
+                    total_fetched=result["total_fetched"],
+                    ranges_fetched=len(result["ranges"]),
+                )
+            except Exception as e:
+                logger.error(f"Error ingesting {symbol} for job {job.id}: {str(e)}")
+                job.update(symbol, status="failed", error=str(e))
+        
+        job.status = "running"
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"ingest-{job.id[:8]}") as pool:
+                if batched and len(job.symbols) > 1:
+                    groups: Dict[Tuple, List[str]] = {}
+                    for symbol, ranges in pool.map(plan, job.symbols):
+                        if ranges:
+                            groups.setdefault(ranges, []).append(symbol)
+                    size = max(1, settings.INGEST_BATCH_SIZE)
+                    batches = [
+                        (symbols[i:i + size], span)
+                        for ranges, symbols in groups.items() if len(symbols) > 1
+                        for span in ranges
+                        for i in range(0, len(symbols), size)
+                    ]
+                    list(pool.map(fetch_batch, batches))
+                list(pool.map(ingest, job.symbols))
+        finally:
+            for db in sessions:
+                db.close()
+        
+        failed = sum(1 for entry in job.to_dict()["progress"] if entry["status"] == "failed")
+        job.status = "failed" if failed == len(job.symbols) and failed else "completed"
+        job.finished_at = datetime.now(timezone.utc)
+        logger.info(f"Ingestion job {job.id} finished: {len(job.symbols) - failed} succeeded, {failed} failed")
+        return job
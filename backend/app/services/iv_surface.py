@@ -0,0 +1,297 @@
+"""Implied-volatility surfaces built from stored options chain snapshots."""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.options_chains import OptionsChain
+from app.services.greeks_service import GreeksService, MIN_TIME_TO_EXPIRY, MIN_VALID_IV
+from app.services.options_delta_store import OptionsDeltaStore
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IVSurface:
+    """
+    Implied volatility of one underlying at one snapshot time.
+    
+    Each expiry keeps a slice of strikes sorted ascending with the IV of the
+    out-of-the-money contract at that strike (puts below spot, calls at or
+    above). Lookups interpolate linearly in strike within a slice and
+    linearly in total variance (sigma^2 * t) between expiries; outside the
+    quoted range values are held flat.
+    """
+    
+    def __init__(
+        self,
+        underlying_symbol: str,
+        timestamp: datetime,
+        underlying_price: float,
+        expiries: np.ndarray,
+        slices: List[Tuple[np.ndarray, np.ndarray]],
+        expiration_dates: Optional[List[date]] = None,
+    ):
+        self.underlying_symbol = underlying_symbol
+        self.timestamp = timestamp
+        self.underlying_price = underlying_price
+        self.expiries = expiries
+        self.slices = slices
+        self.expiration_dates = expiration_dates if expiration_dates is not None else [None] * len(slices)
+    
+    @classmethod
+    def from_frame(
+        cls,
+        underlying_symbol: str,
+        timestamp: datetime,
+        underlying_price: float,
+        frame: pd.DataFrame,
+        rate: Optional[float] = None,
+        dividend_yield: Optional[float] = None,
+    ) -> "IVSurface":
+        """
+        Build a surface from a chain frame, solving IV where it is missing.
+        
+        Args:
+            underlying_symbol: Underlying stock symbol
+            timestamp: Snapshot time
+            underlying_price: Underlying price at snapshot time
+            frame: Chain frame with expiration_date, strike, option_type,
+                bid, ask, last and implied_volatility columns
+            rate: Risk-free rate (defaults to RISK_FREE_RATE)
+            dividend_yield: Dividend yield (defaults to DIVIDEND_YIELD)
+        
+        Returns:
+            IVSurface
+        """
+        chain = GreeksService.apply_to_chain(
+            frame, underlying_price=underlying_price, timestamp=timestamp,
+            rate=rate, dividend_yield=dividend_yield,
+        )
+        chain["t"] = GreeksService.time_to_expiry(chain["expiration_date"], timestamp)
+        chain["strike"] = chain["strike"].astype(float)
+        chain["implied_volatility"] = pd.to_numeric(chain["implied_volatility"], errors="coerce")
+        
+        otm = np.where(chain["strike"] < underlying_price, "P", "C")
+        chain = chain[(chain["option_type"] == otm) & (chain["t"] > 0) & (chain["implied_volatility"] >= MIN_VALID_IV)]
+        chain = chain.sort_values(["t", "strike"])
+        
+        expiries = []
+        slices = []
+        expiration_dates = []
+        for t, group in chain.groupby("t", sort=True):
+            expiries.append(t)
+            slices.append((group["strike"].to_numpy(dtype=float), group["implied_volatility"].to_numpy(dtype=float)))
+            expiration_dates.append(pd.Timestamp(group["expiration_date"].iloc[0]).date())
+        
+        return cls(
+            underlying_symbol, timestamp, float(underlying_price), np.asarray(expiries, dtype=float), slices,
+            expiration_dates,
+        )
+    
+    @property
+    def empty(self) -> bool:
+        """True when no contract had a usable IV."""
+        return len(self.slices) == 0
+    
+    def _slice_iv(self, index: int, strikes: np.ndarray) -> np.ndarray:
+        """Interpolate one expiry slice at the given strikes."""
+        slice_strikes, slice_iv = self.slices[index]
+        return np.interp(strikes, slice_strikes, slice_iv)
+    
+    def iv(self, strikes, t) -> np.ndarray:
+        """
+        Interpolated implied volatility at arbitrary strikes and expiries.
+        
+        Args:
+            strikes: Strike price(s)
+            t: Years to expiry, broadcast against strikes
+        
+        Returns:
+            Array of implied volatilities (NaN if the surface is empty)
+        """
+        strikes, t = np.broadcast_arrays(np.asarray(strikes, dtype=float), np.asarray(t, dtype=float))
+        if self.empty:
+            return np.full(strikes.shape, np.nan)
+        
+        t = np.maximum(t, MIN_TIME_TO_EXPIRY)
+        upper = np.clip(np.searchsorted(self.expiries, t), 0, len(self.expiries) - 1)
+        lower = np.clip(upper - 1, 0, len(self.expiries) - 1)
+        result = np.empty(strikes.shape, dtype=float)
+        
+        for lo, hi in set(zip(lower.ravel().tolist(), upper.ravel().tolist())):
+            mask = (lower == lo) & (upper == hi)
+            k = strikes[mask]
+            iv_hi = self._slice_iv(hi, k)
+            if lo == hi:
+                result[mask] = iv_hi
+                continue
+            
+            t_hi = self.expiries[hi]
+            iv_lo = self._slice_iv(lo, k)
+            t_lo = self.expiries[lo]
+            tq = np.clip(t[mask], t_lo, t_hi)
+            weight = (tq - t_lo) / (t_hi - t_lo)
+            variance = (1 - weight) * iv_lo * iv_lo * t_lo + weight * iv_hi * iv_hi * t_hi
+            result[mask] = np.sqrt(variance / tq)
+        
+        return result
+    
+    def iv_at(self, strikes, expiration_dates) -> np.ndarray:
+        """
+        Interpolated implied volatility for strikes and calendar expirations.
+        
+        Args:
+            strikes: Strike price(s)
+            expiration_dates: Expiration date(s), same length as strikes
+        
+        Returns:
+            Array of implied volatilities
+        """
+        t = GreeksService.time_to_expiry(np.atleast_1d(expiration_dates), self.timestamp)
+        return self.iv(strikes, t)
+
+
+class IVSurfaceService:
+    """Builds IV surfaces from stored options chain snapshots and caches them."""
+    
+    _cache: "OrderedDict[Tuple[str, datetime], IVSurface]" = OrderedDict()
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def resolve_snapshot_time(db: Session, symbol: str, timestamp: datetime) -> Optional[datetime]:
+        """
+        Find the latest stored snapshot time at or before a timestamp.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            timestamp: Point in time to look up
+        
+        Returns:
+            Snapshot timestamp, or None when no snapshot exists
+        """
+        if settings.OPTIONS_SNAPSHOT_STORE == "delta":
+            snapshot = OptionsDeltaStore.snapshot_at(db, symbol, timestamp)
+            return snapshot.timestamp if snapshot is not None else None
+        
+        return db.query(func.max(OptionsChain.timestamp)).filter(
+            and_(
+                OptionsChain.symbol_id == SymbolService.get_id(db, symbol),
+                OptionsChain.timestamp <= timestamp
+            )
+        ).scalar()
+    
+    @staticmethod
+    def load_snapshot_frame(db: Session, symbol: str, snapshot_time: datetime) -> Tuple[float, pd.DataFrame]:
+        """
+        Load one snapshot's chain as a float frame.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            snapshot_time: Exact snapshot timestamp
+        
+        Returns:
+            Tuple of (underlying price, chain frame)
+        """
+        if settings.OPTIONS_SNAPSHOT_STORE == "delta":
+            snapshot = OptionsDeltaStore.raw_chain(db, symbol, snapshot_time)
+            if snapshot is None:
+                return 0.0, pd.DataFrame(columns=[
+                    "expiration_date", "strike", "option_type", "bid", "ask", "last", "implied_volatility",
+                ])
+            _, underlying_price, frame = snapshot
+            return float(underlying_price), frame.drop(columns=["volume", "open_interest"])
+        
+        rows = db.query(
+            OptionsChain.expiration_date,
+            OptionsChain.strike,
+            OptionsChain.option_type,
+            OptionsChain.bid,
+            OptionsChain.ask,
+            OptionsChain.last,
+            OptionsChain.implied_volatility,
+            OptionsChain.underlying_price,
+        ).filter(
+            and_(
+                OptionsChain.symbol_id == SymbolService.get_id(db, symbol),
+                OptionsChain.timestamp == snapshot_time
+            )
+        ).all()
+        
+        frame = pd.DataFrame(rows, columns=[
+            "expiration_date", "strike", "option_type", "bid", "ask", "last",
+            "implied_volatility", "underlying_price",
+        ])
+        for column in ("strike", "bid", "ask", "last", "implied_volatility", "underlying_price"):
+            frame[column] = pd.to_numeric(frame[column], errors="coerce")
+        
+        underlying_price = float(frame["underlying_price"].iloc[0]) if not frame.empty else 0.0
+        return underlying_price, frame.drop(columns=["underlying_price"])
+    
+    @staticmethod
+    def get_surface(db: Session, symbol: str, timestamp: datetime) -> Optional[IVSurface]:
+        """
+        Get the IV surface of the nearest snapshot at or before a timestamp.
+        
+        Surfaces are keyed by (symbol, snapshot time) and built once; repeated
+        calls for any time inside the same snapshot reuse the cached surface.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            timestamp: Point in time to look up
+        
+        Returns:
+            IVSurface, or None when no snapshot exists
+        """
+        snapshot_time = IVSurfaceService.resolve_snapshot_time(db, symbol, timestamp)
+        if snapshot_time is None:
+            return None
+        
+        key = (symbol, snapshot_time)
+        with IVSurfaceService._lock:
+            surface = IVSurfaceService._cache.get(key)
+            if surface is not None:
+                IVSurfaceService._cache.move_to_end(key)
+                return surface
+        
+        underlying_price, frame = IVSurfaceService.load_snapshot_frame(db, symbol, snapshot_time)
+        surface = IVSurface.from_frame(symbol, snapshot_time, underlying_price, frame)
+        
+        with IVSurfaceService._lock:
+            IVSurfaceService._cache[key] = surface
+            IVSurfaceService._cache.move_to_end(key)
+            while len(IVSurfaceService._cache) > settings.IV_SURFACE_CACHE_SIZE:
+                IVSurfaceService._cache.popitem(last=False)
+        
+        return surface
+    
+    @staticmethod
+    def invalidate(symbol: Optional[str] = None, snapshot_time: Optional[datetime] = None) -> None:
+        """
+        Drop cached surfaces, e.g. after a snapshot is rewritten.
+        
+        Args:
+            symbol: Only drop this underlying (all when None)
+            snapshot_time: Only drop this snapshot of the symbol
+        """
+        with IVSurfaceService._lock:
+            if symbol is None:
+                IVSurfaceService._cache.clear()
+                return
+            for key in [key for key in IVSurfaceService._cache if key[0] == symbol]:
+                if snapshot_time is None or key[1] == snapshot_time:
+                    del IVSurfaceService._cache[key]
+    
+    @staticmethod
+    def cache_info() -> Dict[str, int]:
+        """Current cache occupancy."""
+        with IVSurfaceService._lock:
+            return {"size": len(IVSurfaceService._cache), "max_size": settings.IV_SURFACE_CACHE_SIZE}
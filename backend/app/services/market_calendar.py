@@ -0,0 +1,95 @@
+"""US equity market trading calendar."""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+from pandas.tseries.offsets import CustomBusinessDay
+from zoneinfo import ZoneInfo
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Regular NYSE full-day holidays.
+    
+    New Year's Day falling on a Saturday is not observed on the prior Friday,
+    unlike the other fixed-date holidays. One-off closures (e.g. national days
+    of mourning) are not modelled; ranges that span them are still covered once
+    the provider has answered for the range.
+    """
+    
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-06-19", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+TRADING_DAY = CustomBusinessDay(calendar=NYSEHolidayCalendar())
+
+
+@lru_cache(maxsize=256)
+def _trading_days(start: date, end: date) -> Tuple[date, ...]:
+    return tuple(day.date() for day in pd.date_range(start, end, freq=TRADING_DAY))
+
+
+def trading_days(start: date, end: date) -> List[date]:
+    """
+    Trading sessions between two dates.
+    
+    Args:
+        start: First date (inclusive)
+        end: Last date (inclusive)
+    
+    Returns:
+        Sorted list of trading dates
+    """
+    if end < start:
+        return []
+    return list(_trading_days(start, end))
+
+
+def next_trading_day(day: date) -> date:
+    """First trading session strictly after a date."""
+    return (pd.Timestamp(day) + TRADING_DAY).date()
+
+
+def last_completed_session(now: Optional[datetime] = None) -> date:
+    """
+    Most recent trading session whose bars are final.
+    
+    Today's session only counts once New York time is past the close.
+    
+    Args:
+        now: Time to evaluate (defaults to the current time)
+    
+    Returns:
+        Trading date
+    """
+    now = now or datetime.now(MARKET_TIMEZONE)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=MARKET_TIMEZONE)
+    local = now.astimezone(MARKET_TIMEZONE)
+    day = local.date() if local.hour >= 16 else local.date() - timedelta(days=1)
+    sessions = trading_days(day - timedelta(days=10), day)
+    return sessions[-1]
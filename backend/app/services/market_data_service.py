@@ -1,10 +1,21 @@
 """Market data service for fetching and storing market data."""
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, date, timedelta
-from typing import List, Optional
+from datetime import datetime, date, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, literal_column
+from app.config import settings
+from app.database import dialect_insert
+from app.providers import MarketDataProvider, get_provider
+from app.services.bulk_loader import BulkLoader
+from app.services.chain_index import ChainIndexCache
+from app.services.greeks_service import GreeksService
+from app.services.iv_surface import IVSurfaceService
+from app.services.options_delta_store import OptionsDeltaStore
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.provider_cache import provider_cache
+from app.services.price_cache import PriceSeriesCache
+from app.services.symbol_service import SymbolService
 from app.models.stock_prices import StockPrice
 from app.models.options_chains import OptionsChain
 from app.schemas.market_data import StockPriceResponse, OptionsChainItem
@@ -12,10 +23,136 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT ... ON CONFLICT statement in bulk upserts
+BULK_CHUNK_SIZE = 1000
+
+# Default page size for keyset-paginated price queries
+DEFAULT_PAGE_SIZE = 1000
+
+# OHLCV columns overwritten when a bar already exists
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# yfinance option chain columns mapped onto OptionsChainItem fields
+OPTION_PROVIDER_COLUMNS = {
+    "lastPrice": "last",
+    "openInterest": "open_interest",
+    "impliedVolatility": "implied_volatility",
+}
+
+# OptionsChainItem fields produced by normalize_options_frame
+OPTION_FIELDS = [
+    "expiration_date", "strike", "option_type", "bid", "ask", "last",
+    "volume", "open_interest", "implied_volatility",
+]
+
+# Key columns of a contract within one snapshot
+OPTION_KEY_COLUMNS = ("expiration_date", "strike", "option_type")
+
+# options_chains columns overwritten when a snapshot row already exists
+OPTION_VALUE_COLUMNS = (
+    "bid", "ask", "last", "volume", "open_interest", "implied_volatility",
+    "delta", "gamma", "theta", "vega", "underlying_price",
+)
+
 
 class MarketDataService:
     """Service for fetching and managing market data."""
     
+    @staticmethod
+    def fetch_stock_frame(
+        symbol: str,
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d",
+        provider: Optional[MarketDataProvider] = None
+    ) -> pd.DataFrame:
+        """
+        Fetch raw stock price history from the data provider as a DataFrame.
+        
+        Args:
+            symbol: Stock symbol (e.g., 'SPY')
+            start_date: Start date for data
+            end_date: End date for data (defaults to today)
+            interval: Data interval ('1d', '1h', '1m', etc.)
+            provider: Provider to use (defaults to DATA_PROVIDER)
+        
+        Returns:
+            DataFrame indexed by timestamp with Open/High/Low/Close/Volume columns
+        """
+        if end_date is None:
+            end_date = date.today()
+        provider = provider or get_provider()
+        
+        data = provider_cache.get_or_load(
+            MarketDataService._history_key(provider, symbol, start_date, end_date, interval),
+            lambda: provider.fetch_stock_frame(symbol, start_date, end_date, interval),
+            kind="history",
+        )
+        
+        if data.empty:
+            logger.warning(f"No data found for {symbol} from {start_date} to {end_date}")
+        
+        return data
+    
+    @staticmethod
+    def fetch_stock_frames(
+        symbols: List[str],
+        start_date: date,
+        end_date: Optional[date] = None,
+        interval: str = "1d",
+        provider: Optional[MarketDataProvider] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch raw stock price history for many symbols with one provider call.
+        
+        Symbols already in the provider cache are served from it; the rest go
+        to the provider's fetch_stock_frames and are cached under the same
+        keys fetch_stock_frame uses.
+        
+        Args:
+            symbols: Stock symbols
+            start_date: Start date for data
+            end_date: End date for data (defaults to today)
+            interval: Data interval ('1d', '1h', '1m', etc.)
+            provider: Provider to use (defaults to DATA_PROVIDER)
+        
+        Returns:
+            Dict of symbol to history frame; symbols the provider failed on are omitted
+        """
+        if end_date is None:
+            end_date = date.today()
+        provider = provider or get_provider()
+        
+        frames = {}
+        missing = []
+        for symbol in symbols:
+            hit, data = provider_cache.peek(
+                MarketDataService._history_key(provider, symbol, start_date, end_date, interval), kind="history"
+            )
+            if hit:
+                frames[symbol] = data
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            for symbol, data in provider.fetch_stock_frames(missing, start_date, end_date, interval).items():
+                provider_cache.put(
+                    MarketDataService._history_key(provider, symbol, start_date, end_date, interval), data, kind="history"
+                )
+                frames[symbol] = data
+        
+        return frames
+    
+    @staticmethod
+    def supports_batch_history(provider: Optional[MarketDataProvider] = None) -> bool:
+        """Whether fetch_stock_frames saves requests over per-symbol fetches."""
+        return (provider or get_provider()).batch_history
+    
+    @staticmethod
+    def _history_key(provider: MarketDataProvider, symbol: str, start_date: date, end_date: date, interval: str) -> str:
+        """Provider cache key of one history request."""
+        return f"history:{provider.name}:{symbol}:{start_date}:{end_date}:{interval}"
+    
     @staticmethod
     def fetch_stock_data(
         symbol: str,
@@ -24,7 +161,7 @@ class MarketDataService:
         interval: str = "1d"
     ) -> List[StockPriceResponse]:
         """
-        Fetch stock price data from yfinance.
+        Fetch stock price data from the data provider.
         
         Args:
             symbol: Stock symbol (e.g., 'SPY')
@@ -36,33 +173,33 @@ class MarketDataService:
             List of StockPriceResponse objects
         """
         try:
-            if end_date is None:
-                end_date = date.today()
-            
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(start=start_date, end=end_date, interval=interval)
-            
-            if data.empty:
-                logger.warning(f"No data found for {symbol} from {start_date} to {end_date}")
-                return []
-            
-            prices = []
-            for timestamp, row in data.iterrows():
-                prices.append(StockPriceResponse(
-                    timestamp=timestamp.to_pydatetime(),
-                    open=row['Open'],
-                    high=row['High'],
-                    low=row['Low'],
-                    close=row['Close'],
-                    volume=int(row['Volume']) if not pd.isna(row['Volume']) else 0,
-                ))
-            
-            return prices
+            data = MarketDataService.fetch_stock_frame(
+                symbol=symbol,
+                start_date=start_date,
+                end_date=end_date,
+                interval=interval,
+            )
             
+            frame = BulkLoader.normalize_price_frame(data, symbol=symbol)
+            return [StockPriceResponse(**record) for record in MarketDataService.frame_to_records(frame)]
+        
         except Exception as e:
             logger.error(f"Error fetching stock data for {symbol}: {str(e)}")
             raise
     
+    @staticmethod
+    def frame_to_records(frame: pd.DataFrame) -> List[Dict]:
+        """
+        Convert a normalized frame into plain dicts with NaN/NA mapped to None.
+        
+        Args:
+            frame: Normalized price or options frame
+        
+        Returns:
+            List of row dicts
+        """
+        return frame.astype(object).where(frame.notna(), None).to_dict("records")
+    
     @staticmethod
     def store_stock_prices(db: Session, symbol: str, prices: List[StockPriceResponse]) -> int:
         """
@@ -74,42 +211,116 @@ class MarketDataService:
             prices: List of stock price data
         
         Returns:
-            Number of records stored
+            Number of new records stored
         """
-        stored_count = 0
-        for price_data in prices:
-            # Check if record already exists
-            existing = db.query(StockPrice).filter(
-                and_(
-                    StockPrice.symbol == symbol,
-                    StockPrice.timestamp == price_data.timestamp
-                )
-            ).first()
-            
-            if existing:
-                # Update existing record
-                existing.open = price_data.open
-                existing.high = price_data.high
-                existing.low = price_data.low
-                existing.close = price_data.close
-                existing.volume = price_data.volume
-            else:
-                # Create new record
-                stock_price = StockPrice(
-                    symbol=symbol,
-                    timestamp=price_data.timestamp,
-                    open=price_data.open,
-                    high=price_data.high,
-                    low=price_data.low,
-                    close=price_data.close,
-                    volume=price_data.volume,
-                )
-                db.add(stock_price)
-                stored_count += 1
+        counts = MarketDataService.upsert_stock_prices(db=db, symbol=symbol, prices=prices)
+        return counts["inserted"]
+    
+    @staticmethod
+    def upsert_stock_prices(
+        db: Session,
+        symbol: str,
+        prices: List[StockPriceResponse],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Bulk upsert stock prices in chunks using INSERT ... ON CONFLICT.
+        
+        Each chunk is written with a single statement against
+        uq_stock_prices_symbol_timestamp, so a backfill costs one round trip
+        per chunk instead of a SELECT and an INSERT per bar.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            prices: List of stock price data
+            chunk_size: Number of rows per statement
+        
+        Returns:
+            Dict with 'inserted' and 'updated' counts
+        """
+        records = [
+            {
+                "timestamp": price.timestamp,
+                "open": price.open,
+                "high": price.high,
+                "low": price.low,
+                "close": price.close,
+                "volume": price.volume,
+            }
+            for price in prices
+        ]
+        return MarketDataService.upsert_price_records(db=db, symbol=symbol, records=records, chunk_size=chunk_size)
+    
+    @staticmethod
+    def upsert_price_records(
+        db: Session,
+        symbol: str,
+        records: List[Dict],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Bulk upsert plain price records for one symbol.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            records: Dicts with timestamp and OHLCV keys, e.g. from frame_to_records
+            chunk_size: Number of rows per statement
+        
+        Returns:
+            Dict with 'inserted' and 'updated' counts
+        """
+        insert = dialect_insert(db)
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+        inserted = 0
+        updated = 0
         
         try:
+            symbol_id = SymbolService.get_id(db, symbol, create=True) if records else None
+            for start in range(0, len(records), chunk_size):
+                # Later bars win when a chunk repeats a timestamp; ON CONFLICT
+                # cannot touch the same row twice in one statement
+                rows = {
+                    record["timestamp"]: {
+                        "symbol_id": symbol_id,
+                        "timestamp": record["timestamp"],
+                        **{column: record[column] for column in PRICE_COLUMNS},
+                    }
+                    for record in records[start:start + chunk_size]
+                }
+                
+                stmt = insert(StockPrice).values(list(rows.values()))
+                # created_at marks the row as changed for incremental data lake exports
+                update_set = {**{column: stmt.excluded[column] for column in PRICE_COLUMNS}, "created_at": func.now()}
+                
+                if is_postgres:
+                    # xmax is 0 only for freshly inserted tuples
+                    stmt = stmt.on_conflict_do_update(
+                        constraint="uq_stock_prices_symbol_timestamp",
+                        set_=update_set,
+                    ).returning(literal_column("(xmax = 0)"))
+                    chunk_inserted = sum(1 for was_inserted in db.execute(stmt).scalars() if was_inserted)
+                else:
+                    existing = db.query(func.count(StockPrice.id)).filter(
+                        and_(
+                            StockPrice.symbol_id == symbol_id,
+                            StockPrice.timestamp.in_(list(rows.keys()))
+                        )
+                    ).scalar()
+                    db.execute(stmt.on_conflict_do_update(
+                        index_elements=["symbol_id", "timestamp"],
+                        set_=update_set,
+                    ))
+                    chunk_inserted = len(rows) - existing
+                
+                inserted += chunk_inserted
+                updated += len(rows) - chunk_inserted
+            
             db.commit()
-            return stored_count
+            if records:
+                PriceSeriesCache.record_write(db, symbol, min(record["timestamp"] for record in records))
+            return {"inserted": inserted, "updated": updated}
         except Exception as e:
             db.rollback()
             logger.error(f"Error storing stock prices: {str(e)}")
@@ -124,7 +335,11 @@ class MarketDataService:
         limit: Optional[int] = None
     ) -> List[StockPrice]:
         """
-        Retrieve stock prices from database.
+        Retrieve stock prices, newest first.
+        
+        With PRICE_CACHE_MAX_MB set, rows are sliced out of the in-process
+        PriceSeriesCache and returned as transient StockPrice objects, so a
+        cached symbol is served without a query.
         
         Args:
             db: Database session
@@ -136,7 +351,13 @@ class MarketDataService:
         Returns:
             List of StockPrice objects
         """
-        query = db.query(StockPrice).filter(StockPrice.symbol == symbol)
+        if PriceSeriesCache.enabled():
+            columns = PriceSeriesCache.get_range(db, symbol, start_date, end_date)
+            first = max(0, len(columns["timestamp"]) - limit) if limit else 0
+            newest_first = {column: columns[column][first:][::-1] for column in columns}
+            return MarketDataService._detached_prices(SymbolService.get_id(db, symbol), newest_first)
+        
+        query = db.query(StockPrice).filter(StockPrice.symbol_id == SymbolService.get_id(db, symbol))
         
         if start_date:
             query = query.filter(StockPrice.timestamp >= datetime.combine(start_date, datetime.min.time()))
@@ -151,6 +372,105 @@ class MarketDataService:
         
         return query.all()
     
+    @staticmethod
+    def _detached_prices(symbol_id: Optional[int], columns: Dict) -> List[StockPrice]:
+        """
+        Build detached StockPrice rows from cached columns.
+        
+        Instances are populated the way the ORM loader populates them (state
+        dict filled directly), which skips per-attribute change tracking and
+        is several times cheaper than calling the constructor per row.
+        
+        Args:
+            symbol_id: symbols.id of the rows
+            columns: Dict of price columns in output order
+        
+        Returns:
+            List of StockPrice objects not attached to any session
+        """
+        new_instance = StockPrice.__mapper__.class_manager.new_instance
+        timestamps = pd.to_datetime(columns["timestamp"], utc=True).to_pydatetime()
+        prices = []
+        for timestamp, open_, high, low, close, volume in zip(
+            timestamps, *(columns[column].tolist() for column in PRICE_COLUMNS)
+        ):
+            price = new_instance()
+            price.__dict__.update(
+                symbol_id=symbol_id,
+                timestamp=timestamp,
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                volume=volume,
+            )
+            prices.append(price)
+        return prices
+    
+    @staticmethod
+    def get_stock_price_page(
+        db: Session,
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[StockPrice], Optional[str], Optional[str]]:
+        """
+        Retrieve one newest-first page of stock prices by keyset pagination.
+        
+        Pages are bounded by the timestamp of the previous page's edge row
+        instead of an OFFSET, so every page is one range scan on
+        uq_stock_prices_symbol_timestamp no matter how deep it is.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            start_date: Start date filter
+            end_date: End date filter
+            limit: Page size
+            cursor: Token from a previous page's next_cursor or prev_cursor
+        
+        Returns:
+            Tuple of (rows newest first, next_cursor to older rows,
+            prev_cursor to newer rows); cursors are None at either end
+        
+        Raises:
+            InvalidCursor: If the cursor is malformed or for another symbol
+        """
+        boundary, direction = decode_cursor(cursor, symbol) if cursor else (None, "older")
+        
+        query = db.query(StockPrice).filter(StockPrice.symbol_id == SymbolService.get_id(db, symbol))
+        
+        if start_date:
+            query = query.filter(StockPrice.timestamp >= datetime.combine(start_date, datetime.min.time()))
+        
+        if end_date:
+            query = query.filter(StockPrice.timestamp <= datetime.combine(end_date, datetime.max.time()))
+        
+        if direction == "older":
+            if boundary is not None:
+                query = query.filter(StockPrice.timestamp < boundary)
+            query = query.order_by(StockPrice.timestamp.desc())
+        else:
+            query = query.filter(StockPrice.timestamp > boundary).order_by(StockPrice.timestamp.asc())
+        
+        # One extra row tells whether another page exists in this direction
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if direction == "newer":
+            rows.reverse()
+        
+        if not rows:
+            return rows, None, None
+        
+        older_exists = has_more if direction == "older" else True
+        newer_exists = boundary is not None if direction == "older" else has_more
+        next_cursor = encode_cursor(symbol, rows[-1].timestamp, "older") if older_exists else None
+        prev_cursor = encode_cursor(symbol, rows[0].timestamp, "newer") if newer_exists else None
+        return rows, next_cursor, prev_cursor
+    
     @staticmethod
     def get_available_dates(db: Session, symbol: Optional[str] = None) -> List[date]:
         """
@@ -166,18 +486,126 @@ class MarketDataService:
         query = db.query(func.date(StockPrice.timestamp).distinct())
         
         if symbol:
-            query = query.filter(StockPrice.symbol == symbol)
+            query = query.filter(StockPrice.symbol_id == SymbolService.get_id(db, symbol))
         
         dates = [row[0] for row in query.order_by(func.date(StockPrice.timestamp).desc()).all()]
         return dates
     
+    @staticmethod
+    def fetch_underlying_price(symbol: str) -> float:
+        """
+        Fetch the current price of an underlying from the data provider.
+        
+        Args:
+            symbol: Stock symbol
+        
+        Returns:
+            Latest market price, or 0 when unavailable
+        """
+        provider = get_provider()
+        return provider_cache.get_or_load(
+            f"quote:{provider.name}:{symbol}",
+            lambda: provider.fetch_underlying_price(symbol),
+            kind="quote",
+        )
+    
+    @staticmethod
+    def normalize_options_frame(data: pd.DataFrame, option_type: str, expiration_date: date) -> pd.DataFrame:
+        """
+        Convert one side of a provider option chain into OptionsChainItem columns.
+        
+        Args:
+            data: Calls or puts DataFrame in yfinance naming
+            option_type: 'C' or 'P'
+            expiration_date: Expiration date of the chain
+        
+        Returns:
+            DataFrame with OPTION_FIELDS columns; missing values stay NaN/NA
+        """
+        frame = data.rename(columns=OPTION_PROVIDER_COLUMNS).reindex(columns=OPTION_FIELDS)
+        frame["expiration_date"] = expiration_date
+        frame["option_type"] = option_type
+        for column in ("volume", "open_interest"):
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").round().astype("Int64")
+        return frame
+    
+    @staticmethod
+    def fetch_options_frame(
+        symbol: str,
+        expiration_date: Optional[date] = None
+    ) -> pd.DataFrame:
+        """
+        Fetch options chain data from the data provider as one columnar frame.
+        
+        Expirations not already cached are pulled with a single
+        fetch_option_chains call, so providers with whole-chain endpoints
+        serve them in one request.
+        
+        Args:
+            symbol: Stock symbol
+            expiration_date: Specific expiration date (optional)
+        
+        Returns:
+            DataFrame with OPTION_FIELDS columns for calls and puts
+        """
+        provider = get_provider()
+        options_dates = provider_cache.get_or_load(
+            f"expirations:{provider.name}:{symbol}",
+            lambda: provider.fetch_option_expirations(symbol),
+            kind="expirations",
+        )
+        
+        if not options_dates:
+            logger.warning(f"No options data available for {symbol}")
+            return pd.DataFrame(columns=OPTION_FIELDS)
+        
+        # If specific expiration requested, only fetch that one
+        expirations_to_fetch = [str(expiration_date)] if expiration_date else list(options_dates[:5])  # Limit to 5 for MVP
+        
+        def chain_key(expiration: str) -> str:
+            return f"chain:{provider.name}:{symbol}:{expiration}"
+        
+        chains = {}
+        missing = []
+        for exp_date in expirations_to_fetch:
+            hit, chain = provider_cache.peek(chain_key(exp_date), kind="chain")
+            if hit:
+                chains[exp_date] = chain
+            else:
+                missing.append(exp_date)
+        
+        if missing:
+            # One batch per missing set; each expiration is then cached on its own
+            batch = provider_cache.get_or_load(
+                f"chains:{provider.name}:{symbol}:{','.join(missing)}",
+                lambda: provider.fetch_option_chains(symbol, missing),
+                kind="chain",
+            )
+            for exp_date, chain in batch.items():
+                provider_cache.put(chain_key(exp_date), chain, kind="chain")
+                chains[exp_date] = chain
+        
+        frames = []
+        for exp_date in expirations_to_fetch:
+            if exp_date not in chains:
+                continue
+            calls, puts = chains[exp_date]
+            expiry = pd.Timestamp(exp_date).date()
+            frames.append(MarketDataService.normalize_options_frame(calls, "C", expiry))
+            frames.append(MarketDataService.normalize_options_frame(puts, "P", expiry))
+        
+        if not frames:
+            return pd.DataFrame(columns=OPTION_FIELDS)
+        
+        return pd.concat(frames, ignore_index=True)
+    
     @staticmethod
     def fetch_options_chain(
         symbol: str,
         expiration_date: Optional[date] = None
     ) -> List[OptionsChainItem]:
         """
-        Fetch options chain data from yfinance.
+        Fetch options chain data from the data provider.
         
         Note: yfinance has limited options data. For production, consider Polygon.io.
         
@@ -189,56 +617,210 @@ class MarketDataService:
             List of OptionsChainItem objects
         """
         try:
-            ticker = yf.Ticker(symbol)
-            options_dates = ticker.options
-            
-            if not options_dates:
-                logger.warning(f"No options data available for {symbol}")
-                return []
-            
-            all_chains = []
-            
-            # If specific expiration requested, only fetch that one
-            expirations_to_fetch = [expiration_date] if expiration_date else options_dates[:5]  # Limit to 5 for MVP
+            frame = MarketDataService.fetch_options_frame(symbol=symbol, expiration_date=expiration_date)
+            return [OptionsChainItem(**record) for record in MarketDataService.frame_to_records(frame)]
+        
+        except Exception as e:
+            logger.error(f"Error fetching options chain for {symbol}: {str(e)}")
+            raise
+    
+    @staticmethod
+    def store_options_snapshot(
+        db: Session,
+        symbol: str,
+        frame: pd.DataFrame,
+        underlying_price: float,
+        timestamp: datetime,
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Bulk upsert one options chain snapshot into options_chains.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            frame: Chain frame from fetch_options_frame
+            underlying_price: Underlying price at snapshot time
+            timestamp: Snapshot timestamp
+            chunk_size: Number of rows per statement
+        
+        Returns:
+            Dict with 'inserted' and 'updated' counts
+        """
+        if frame.empty:
+            return {"inserted": 0, "updated": 0}
+        
+        frame = frame.drop_duplicates(subset=list(OPTION_KEY_COLUMNS), keep="last")
+        records = MarketDataService.frame_to_records(frame)
+        symbol_id = SymbolService.get_id(db, symbol, create=True)
+        rows = [
+            {
+                "symbol_id": symbol_id,
+                "timestamp": timestamp,
+                **{column: record[column] for column in OPTION_KEY_COLUMNS},
+                **{column: record.get(column) for column in OPTION_VALUE_COLUMNS},
+                "underlying_price": underlying_price,
+            }
+            for record in records
+        ]
+        
+        insert = dialect_insert(db)
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+        
+        try:
+            if is_postgres:
+                inserted = 0
+            else:
+                # Every row shares the snapshot timestamp, so one count covers all chunks
+                existing = db.query(func.count(OptionsChain.id)).filter(
+                    and_(
+                        OptionsChain.symbol_id == symbol_id,
+                        OptionsChain.timestamp == timestamp
+                    )
+                ).scalar()
             
-            for exp_date in expirations_to_fetch:
-                try:
-                    opt_chain = ticker.option_chain(exp_date)
-                    
-                    # Process calls
-                    for _, row in opt_chain.calls.iterrows():
-                        all_chains.append(OptionsChainItem(
-                            expiration_date=exp_date,
-                            strike=row['strike'],
-                            option_type='C',
-                            bid=row.get('bid', None),
-                            ask=row.get('ask', None),
-                            last=row.get('lastPrice', None),
-                            volume=row.get('volume', None),
-                            open_interest=row.get('openInterest', None),
-                            implied_volatility=row.get('impliedVolatility', None),
-                        ))
-                    
-                    # Process puts
-                    for _, row in opt_chain.puts.iterrows():
-                        all_chains.append(OptionsChainItem(
-                            expiration_date=exp_date,
-                            strike=row['strike'],
-                            option_type='P',
-                            bid=row.get('bid', None),
-                            ask=row.get('ask', None),
-                            last=row.get('lastPrice', None),
-                            volume=row.get('volume', None),
-                            open_interest=row.get('openInterest', None),
-                            implied_volatility=row.get('impliedVolatility', None),
-                        ))
-                except Exception as e:
-                    logger.warning(f"Error fetching options for {symbol} expiration {exp_date}: {str(e)}")
-                    continue
+            for start in range(0, len(rows), chunk_size):
+                stmt = insert(OptionsChain).values(rows[start:start + chunk_size])
+                update_set = {**{column: stmt.excluded[column] for column in OPTION_VALUE_COLUMNS}, "created_at": func.now()}
+                
+                if is_postgres:
+                    stmt = stmt.on_conflict_do_update(
+                        constraint="uq_options_chains_unique",
+                        set_=update_set,
+                    ).returning(literal_column("(xmax = 0)"))
+                    inserted += sum(1 for was_inserted in db.execute(stmt).scalars() if was_inserted)
+                else:
+                    db.execute(stmt.on_conflict_do_update(
+                        index_elements=["symbol_id", "timestamp", *OPTION_KEY_COLUMNS],
+                        set_=update_set,
+                    ))
             
-            return all_chains
+            if not is_postgres:
+                inserted = len(rows) - existing
             
+            db.commit()
+            IVSurfaceService.invalidate(symbol, timestamp)
+            ChainIndexCache.invalidate(symbol)
+            return {"inserted": inserted, "updated": len(rows) - inserted}
         except Exception as e:
-            logger.error(f"Error fetching options chain for {symbol}: {str(e)}")
+            db.rollback()
+            logger.error(f"Error storing options snapshot for {symbol}: {str(e)}")
             raise
-
+    
+    @staticmethod
+    def capture_options_snapshot(
+        db: Session,
+        symbol: str,
+        expiration_date: Optional[date] = None
+    ) -> Tuple[datetime, float, pd.DataFrame, int]:
+        """
+        Fetch the live options chain and persist it as a snapshot.
+        
+        With OPTIONS_SNAPSHOT_STORE 'delta' the raw quotes go to the delta
+        store and Greeks are computed for the returned frame only. Captures
+        limited to one expiration are returned but not stored.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            expiration_date: Specific expiration date (optional, not stored)
+        
+        Returns:
+            Tuple of (snapshot timestamp, underlying price, chain frame, contracts stored)
+        """
+        frame = MarketDataService.fetch_options_frame(symbol=symbol, expiration_date=expiration_date)
+        underlying_price = MarketDataService.fetch_underlying_price(symbol)
+        timestamp = datetime.now(timezone.utc)
+        
+        if frame.empty or not underlying_price:
+            logger.warning(f"Skipping options snapshot for {symbol}: no chain or underlying price")
+            return timestamp, underlying_price, frame, 0
+        
+        if expiration_date is not None:
+            # A snapshot is the whole chain at its time. One expiration stored as a
+            # snapshot (or diffed as one) would hide the others until the next capture
+            logger.info(f"Not storing options snapshot for {symbol}: capture is limited to {expiration_date}")
+            frame = GreeksService.apply_to_chain(frame, underlying_price=underlying_price, timestamp=timestamp)
+            return timestamp, underlying_price, frame, 0
+        
+        if settings.OPTIONS_SNAPSHOT_STORE == "delta":
+            counts = OptionsDeltaStore.store(
+                db=db,
+                symbol=symbol,
+                frame=frame,
+                underlying_price=underlying_price,
+                timestamp=timestamp,
+            )
+            stored = counts["contracts"]
+            logger.info(
+                f"Stored options snapshot for {symbol} at {timestamp}: {stored} contracts, "
+                f"{counts['stored']} rows ({'keyframe' if counts['keyframe'] else 'delta'})"
+            )
+            IVSurfaceService.invalidate(symbol, timestamp)
+            ChainIndexCache.invalidate(symbol)
+            frame = GreeksService.apply_to_chain(frame, underlying_price=underlying_price, timestamp=timestamp)
+            return timestamp, underlying_price, frame, stored
+        
+        frame = GreeksService.apply_to_chain(frame, underlying_price=underlying_price, timestamp=timestamp)
+        
+        counts = MarketDataService.store_options_snapshot(
+            db=db,
+            symbol=symbol,
+            frame=frame,
+            underlying_price=underlying_price,
+            timestamp=timestamp,
+        )
+        stored = counts["inserted"] + counts["updated"]
+        logger.info(f"Stored options snapshot for {symbol} at {timestamp}: {stored} contracts")
+        
+        return timestamp, underlying_price, frame, stored
+    
+    @staticmethod
+    def get_options_snapshot(
+        db: Session,
+        symbol: str,
+        timestamp: datetime,
+        expiration_date: Optional[date] = None
+    ) -> List[OptionsChain]:
+        """
+        Retrieve the nearest stored snapshot at or before a timestamp.
+        
+        The snapshot time is resolved by a correlated max(timestamp) subquery,
+        so the lookup is one query on uq_options_chains_unique. With an
+        expiration date it is the latest snapshot holding that expiration.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            timestamp: Point in time to look up
+            expiration_date: Filter by expiration date
+        
+        Returns:
+            List of OptionsChain rows of that snapshot (empty if none)
+        """
+        symbol_id = SymbolService.get_id(db, symbol)
+        latest = db.query(func.max(OptionsChain.timestamp)).filter(
+            and_(
+                OptionsChain.symbol_id == symbol_id,
+                OptionsChain.timestamp <= timestamp
+            )
+        )
+        if expiration_date:
+            latest = latest.filter(OptionsChain.expiration_date == expiration_date)
+        snapshot_time = latest.scalar_subquery()
+        
+        query = db.query(OptionsChain).filter(
+            and_(
+                OptionsChain.symbol_id == symbol_id,
+                OptionsChain.timestamp == snapshot_time
+            )
+        )
+        
+        if expiration_date:
+            query = query.filter(OptionsChain.expiration_date == expiration_date)
+        
+        return query.order_by(
+            OptionsChain.expiration_date,
+            OptionsChain.option_type,
+            OptionsChain.strike,
+        ).all()
@@ -0,0 +1,442 @@
+"""Delta-encoded options chain snapshots: periodic keyframes plus changed contracts."""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.options_snapshots import OptionsSnapshot, OptionsSnapshotQuote
+from app.models.types import PRICE_DECIMALS
+from app.services.greeks_service import GreeksService
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Values accepted by OPTIONS_SNAPSHOT_STORE
+OPTIONS_SNAPSHOT_STORES = ("rows", "delta")
+
+if settings.OPTIONS_SNAPSHOT_STORE not in OPTIONS_SNAPSHOT_STORES:
+    raise ValueError(
+        f"OPTIONS_SNAPSHOT_STORE must be one of {OPTIONS_SNAPSHOT_STORES}, got {settings.OPTIONS_SNAPSHOT_STORE!r}"
+    )
+
+# Key columns of a contract within one snapshot
+KEY_COLUMNS = ["expiration_date", "strike", "option_type"]
+
+# Provider quote columns kept per contract; Greeks depend on the underlying and are derived on read
+QUOTE_COLUMNS = ["bid", "ask", "last", "volume", "open_interest", "implied_volatility"]
+
+# Columns of read_range frames
+RANGE_COLUMNS = [
+    "timestamp", *KEY_COLUMNS, *QUOTE_COLUMNS, "delta", "gamma", "theta", "vega", "underlying_price",
+]
+
+# Decimal places of a stored IV; quotes are compared at the precision they are stored with
+IV_DECIMALS = 4 if settings.PRICE_STORAGE == "numeric" else 6
+
+# A delta touching more than this share of the chain is written as a keyframe instead
+KEYFRAME_CHANGE_RATIO = 0.5
+
+# Underlyings whose latest chain is kept in memory to diff the next capture against
+STATE_CACHE_SIZE = 256
+
+
+def _utc(timestamp: datetime) -> datetime:
+    """Timestamp as an aware UTC datetime (naive values are treated as UTC)."""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+class OptionsDeltaStore:
+    """
+    Options chain snapshots stored as keyframes plus deltas.
+    
+    A keyframe holds every contract of a chain. Each later snapshot of the
+    group holds only the contracts whose provider quote (bid, ask, last,
+    volume, open interest, IV) changed since the previous snapshot, new
+    contracts, and a removed marker for contracts that left the chain. A
+    new keyframe starts every OPTIONS_KEYFRAME_INTERVAL snapshots, on a new
+    UTC day, and whenever a delta would cover most of the chain, so a
+    reconstruction reads at most one group.
+    
+    Greeks move with the underlying even when a quote does not, so they are
+    not stored; reads compute them from the snapshot's underlying price.
+    The latest chain of each underlying is kept in memory to diff the next
+    capture against, and rebuilt from the database when another process
+    has written since.
+    """
+    
+    _state: "OrderedDict[Tuple[str, int], Dict]" = OrderedDict()
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def store(
+        db: Session,
+        symbol: str,
+        frame: pd.DataFrame,
+        underlying_price: float,
+        timestamp: datetime
+    ) -> Dict:
+        """
+        Store one chain capture as a keyframe or a delta.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            frame: Chain frame from fetch_options_frame (raw provider quotes)
+            underlying_price: Underlying price at snapshot time
+            timestamp: Snapshot timestamp; must be after the latest stored one
+        
+        Returns:
+            Dict with 'contracts' in the chain, quote rows 'stored', contracts
+            'removed' and whether the snapshot is a 'keyframe'
+        
+        Raises:
+            ValueError: If the timestamp is not after the latest snapshot
+        """
+        if frame.empty:
+            return {"contracts": 0, "stored": 0, "removed": 0, "keyframe": False}
+        
+        chain = OptionsDeltaStore._normalize(frame)
+        symbol_id = SymbolService.get_id(db, symbol, create=True)
+        
+        try:
+            previous = OptionsDeltaStore._previous_state(db, symbol_id)
+            if previous is not None and _utc(timestamp) <= _utc(previous["timestamp"]):
+                raise ValueError(
+                    f"Options snapshot for {symbol} at {timestamp} is not after the latest one ({previous['timestamp']})"
+                )
+            
+            keyframe = (
+                previous is None
+                or previous["group_size"] >= settings.OPTIONS_KEYFRAME_INTERVAL
+                or _utc(timestamp).date() != _utc(previous["keyframe_time"]).date()
+            )
+            if not keyframe:
+                rows = OptionsDeltaStore._diff(previous["chain"], chain)
+                keyframe = len(rows) > KEYFRAME_CHANGE_RATIO * len(chain)
+            if keyframe:
+                rows = chain.assign(removed=False)
+            
+            snapshot = OptionsSnapshot(
+                symbol_id=symbol_id,
+                timestamp=timestamp,
+                keyframe_id=None if keyframe else previous["keyframe_id"],
+                underlying_price=float(underlying_price),
+                contracts=len(chain),
+                changed=len(rows),
+            )
+            db.add(snapshot)
+            db.flush()
+            snapshot_id = snapshot.id
+            
+            records = OptionsDeltaStore._records(rows, snapshot_id)
+            if records:
+                db.execute(insert(OptionsSnapshotQuote), records)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error storing options snapshot delta for {symbol}: {str(e)}")
+            raise
+        
+        key = (str(db.get_bind().url), symbol_id)
+        state = {
+            "snapshot_id": snapshot_id,
+            "timestamp": timestamp,
+            "keyframe_id": snapshot_id if keyframe else previous["keyframe_id"],
+            "keyframe_time": timestamp if keyframe else previous["keyframe_time"],
+            "group_size": 1 if keyframe else previous["group_size"] + 1,
+            "chain": chain,
+        }
+        with OptionsDeltaStore._lock:
+            OptionsDeltaStore._state[key] = state
+            OptionsDeltaStore._state.move_to_end(key)
+            while len(OptionsDeltaStore._state) > STATE_CACHE_SIZE:
+                OptionsDeltaStore._state.popitem(last=False)
+        
+        removed = int(rows["removed"].sum())
+        return {"contracts": len(chain), "stored": len(rows), "removed": removed, "keyframe": keyframe}
+    
+    @staticmethod
+    def snapshot_at(db: Session, symbol: str, timestamp: datetime) -> Optional[OptionsSnapshot]:
+        """
+        Find the latest snapshot at or before a timestamp.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            timestamp: Point in time to look up
+        
+        Returns:
+            OptionsSnapshot header, or None when no snapshot exists
+        """
+        return db.query(OptionsSnapshot).filter(
+            and_(
+                OptionsSnapshot.symbol_id == SymbolService.get_id(db, symbol),
+                OptionsSnapshot.timestamp <= timestamp
+            )
+        ).order_by(OptionsSnapshot.timestamp.desc()).first()
+    
+    @staticmethod
+    def raw_chain(
+        db: Session,
+        symbol: str,
+        timestamp: datetime,
+        expiration_date: Optional[date] = None
+    ) -> Optional[Tuple[datetime, float, pd.DataFrame]]:
+        """
+        Materialize the stored quotes of the nearest snapshot at or before a timestamp.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            timestamp: Point in time to look up
+            expiration_date: Filter by expiration date
+        
+        Returns:
+            Tuple of (snapshot time, underlying price, frame of KEY_COLUMNS and
+            QUOTE_COLUMNS sorted by expiration, type and strike), or None when
+            no snapshot exists
+        """
+        snapshot = OptionsDeltaStore.snapshot_at(db, symbol, timestamp)
+        if snapshot is None:
+            return None
+        frame = OptionsDeltaStore._materialize(db, snapshot, expiration_date)
+        return snapshot.timestamp, snapshot.underlying_price, frame
+    
+    @staticmethod
+    def reconstruct(
+        db: Session,
+        symbol: str,
+        timestamp: datetime,
+        expiration_date: Optional[date] = None
+    ) -> Optional[Tuple[datetime, float, pd.DataFrame]]:
+        """
+        Materialize the full chain of the nearest snapshot at or before a timestamp.
+        
+        Reads the snapshot's keyframe and the deltas up to it in one query,
+        keeps each contract's latest row and computes Greeks.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            timestamp: Point in time to look up
+            expiration_date: Filter by expiration date
+        
+        Returns:
+            Tuple of (snapshot time, underlying price, chain frame with
+            implied_volatility and Greeks), or None when no snapshot exists
+        """
+        snapshot = OptionsDeltaStore.raw_chain(db, symbol, timestamp, expiration_date)
+        if snapshot is None:
+            return None
+        snapshot_time, underlying_price, frame = snapshot
+        frame = GreeksService.apply_to_chain(frame, underlying_price=underlying_price, timestamp=snapshot_time)
+        return snapshot_time, underlying_price, frame
+    
+    @staticmethod
+    def read_range(
+        db: Session,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Materialize every snapshot in a time range as one frame.
+        
+        The quotes of all groups overlapping the range are read in one query.
+        Each row stands for its contract from its own snapshot up to the
+        contract's next row in the group (or the group's end), and is
+        repeated across those snapshots with NumPy rather than replayed one
+        snapshot at a time. Greeks are computed for all rows at once.
+        
+        Args:
+            db: Database session
+            symbol: Underlying stock symbol
+            start: First snapshot time (inclusive)
+            end: Last snapshot time (inclusive)
+        
+        Returns:
+            Frame with RANGE_COLUMNS, one row per contract per snapshot
+        """
+        symbol_id = SymbolService.get_id(db, symbol)
+        if symbol_id is None:
+            return pd.DataFrame(columns=RANGE_COLUMNS)
+        
+        in_range = OptionsSnapshot.symbol_id == symbol_id
+        if end is not None:
+            in_range = and_(in_range, OptionsSnapshot.timestamp <= end)
+        begin = None
+        if start is not None:
+            first = db.query(OptionsSnapshot).filter(
+                and_(in_range, OptionsSnapshot.timestamp >= start)
+            ).order_by(OptionsSnapshot.timestamp).first()
+            if first is None:
+                return pd.DataFrame(columns=RANGE_COLUMNS)
+            begin = first.timestamp if first.keyframe_id is None else db.get(OptionsSnapshot, first.keyframe_id).timestamp
+            in_range = and_(in_range, OptionsSnapshot.timestamp >= begin)
+        
+        headers = pd.DataFrame(
+            db.execute(
+                select(
+                    OptionsSnapshot.id, OptionsSnapshot.timestamp, OptionsSnapshot.keyframe_id,
+                    OptionsSnapshot.underlying_price,
+                ).where(in_range).order_by(OptionsSnapshot.timestamp)
+            ).all(),
+            columns=["id", "timestamp", "keyframe_id", "underlying_price"],
+        )
+        if headers.empty:
+            return pd.DataFrame(columns=RANGE_COLUMNS)
+        
+        quotes = pd.DataFrame(
+            db.execute(
+                select(
+                    OptionsSnapshotQuote.snapshot_id,
+                    *(getattr(OptionsSnapshotQuote, column) for column in KEY_COLUMNS + QUOTE_COLUMNS),
+                    OptionsSnapshotQuote.removed,
+                ).join(OptionsSnapshot, OptionsSnapshot.id == OptionsSnapshotQuote.snapshot_id).where(in_range)
+            ).all(),
+            columns=["snapshot_id", *KEY_COLUMNS, *QUOTE_COLUMNS, "removed"],
+        )
+        
+        # Snapshot positions in time order, and the position after each group's last snapshot
+        positions = pd.Series(np.arange(len(headers)), index=headers["id"].to_numpy())
+        group = headers["keyframe_id"].fillna(headers["id"]).to_numpy(dtype=np.int64)
+        group_end = pd.Series(np.arange(1, len(headers) + 1)).groupby(group).transform("max").to_numpy()
+        
+        position = positions.reindex(quotes["snapshot_id"].to_numpy()).to_numpy()
+        stop = group_end[position]
+        contract = quotes.groupby(KEY_COLUMNS, sort=False).ngroup().to_numpy()
+        order = np.lexsort((position, contract, stop))
+        position, stop, contract = position[order], stop[order], contract[order]
+        quotes = quotes.iloc[order].reset_index(drop=True)
+        
+        # A row lasts until the same contract's next row within the group
+        same_run = np.zeros(len(quotes), dtype=bool)
+        same_run[:-1] = (contract[1:] == contract[:-1]) & (stop[1:] == stop[:-1])
+        stop = np.where(same_run, np.roll(position, -1), stop)
+        
+        live = ~quotes["removed"].to_numpy(dtype=bool)
+        position, stop, quotes = position[live], stop[live], quotes[live].reset_index(drop=True)
+        counts = stop - position
+        rows = np.repeat(np.arange(len(quotes)), counts)
+        offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        snapshot_positions = np.repeat(position, counts) + offsets
+        
+        if start is not None:
+            # Groups are read from their keyframe; drop the snapshots before the range
+            keep = snapshot_positions >= positions[first.id]
+            rows, snapshot_positions = rows[keep], snapshot_positions[keep]
+        
+        frame = quotes.iloc[rows][KEY_COLUMNS + QUOTE_COLUMNS].reset_index(drop=True)
+        frame.insert(0, "timestamp", headers["timestamp"].to_numpy()[snapshot_positions])
+        spot = headers["underlying_price"].to_numpy(dtype=float)[snapshot_positions]
+        frame = GreeksService.apply_to_chain(frame, underlying_price=spot, timestamp=frame["timestamp"])
+        frame["underlying_price"] = spot
+        
+        logger.info(f"Materialized {len(frame)} option quotes of {symbol} from {len(quotes)} stored rows")
+        return frame.sort_values(["timestamp", "expiration_date", "strike", "option_type"], ignore_index=True)[RANGE_COLUMNS]
+    
+    @staticmethod
+    def _previous_state(db: Session, symbol_id: int) -> Optional[Dict]:
+        """Latest stored chain of an underlying, from memory when no other writer has stored since."""
+        latest = db.query(OptionsSnapshot).filter(
+            OptionsSnapshot.symbol_id == symbol_id
+        ).order_by(OptionsSnapshot.timestamp.desc()).first()
+        if latest is None:
+            return None
+        
+        key = (str(db.get_bind().url), symbol_id)
+        with OptionsDeltaStore._lock:
+            state = OptionsDeltaStore._state.get(key)
+        if state is not None and state["snapshot_id"] == latest.id:
+            return state
+        
+        keyframe_id = latest.keyframe_id or latest.id
+        group_size = db.query(func.count(OptionsSnapshot.id)).filter(OptionsSnapshot.keyframe_id == keyframe_id).scalar()
+        return {
+            "snapshot_id": latest.id,
+            "timestamp": latest.timestamp,
+            "keyframe_id": keyframe_id,
+            "keyframe_time": db.get(OptionsSnapshot, keyframe_id).timestamp,
+            "group_size": group_size + 1,
+            "chain": OptionsDeltaStore._normalize(OptionsDeltaStore._materialize(db, latest)),
+        }
+    
+    @staticmethod
+    def _materialize(db: Session, snapshot: OptionsSnapshot, expiration_date: Optional[date] = None) -> pd.DataFrame:
+        """Contracts of a snapshot: the latest row of each since its keyframe, without removed ones."""
+        keyframe_id = snapshot.keyframe_id or snapshot.id
+        stmt = select(
+            *(getattr(OptionsSnapshotQuote, column) for column in KEY_COLUMNS + QUOTE_COLUMNS),
+            OptionsSnapshotQuote.removed,
+        ).join(OptionsSnapshot, OptionsSnapshot.id == OptionsSnapshotQuote.snapshot_id).where(
+            or_(
+                OptionsSnapshot.id == keyframe_id,
+                and_(OptionsSnapshot.keyframe_id == keyframe_id, OptionsSnapshot.timestamp <= snapshot.timestamp)
+            )
+        ).order_by(OptionsSnapshot.timestamp)
+        if expiration_date:
+            stmt = stmt.where(OptionsSnapshotQuote.expiration_date == expiration_date)
+        
+        frame = pd.DataFrame(db.execute(stmt).all(), columns=[*KEY_COLUMNS, *QUOTE_COLUMNS, "removed"])
+        frame = frame.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        frame = frame[~frame["removed"].astype(bool)].drop(columns=["removed"])
+        for column in ("volume", "open_interest"):
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").round().astype("Int64")
+        return frame.sort_values(["expiration_date", "option_type", "strike"], ignore_index=True)
+    
+    @staticmethod
+    def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+        """Quote columns as floats rounded to their stored precision, indexed by contract."""
+        frame = frame.reindex(columns=KEY_COLUMNS + QUOTE_COLUMNS)
+        index = pd.MultiIndex.from_arrays(
+            [
+                pd.to_datetime(frame["expiration_date"]).dt.date.to_numpy(),
+                pd.to_numeric(frame["strike"], errors="coerce").round(PRICE_DECIMALS).to_numpy(dtype=float),
+                frame["option_type"].astype(str).to_numpy(),
+            ],
+            names=KEY_COLUMNS,
+        )
+        values = {}
+        for column in QUOTE_COLUMNS:
+            values[column] = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        for column in ("bid", "ask", "last"):
+            values[column] = np.round(values[column], PRICE_DECIMALS)
+        values["volume"] = np.round(values["volume"])
+        values["open_interest"] = np.round(values["open_interest"])
+        values["implied_volatility"] = np.round(values["implied_volatility"], IV_DECIMALS)
+        chain = pd.DataFrame(values, index=index)
+        return chain[~chain.index.duplicated(keep="last")]
+    
+    @staticmethod
+    def _diff(previous: pd.DataFrame, chain: pd.DataFrame) -> pd.DataFrame:
+        """Changed and new contracts of a chain, plus removed markers for those that left it."""
+        current = chain.to_numpy(dtype=float)
+        aligned = previous.reindex(chain.index).to_numpy(dtype=float)
+        same = ((current == aligned) | (np.isnan(current) & np.isnan(aligned))).all(axis=1)
+        same &= chain.index.isin(previous.index)
+        
+        changed = chain[~same].assign(removed=False)
+        gone = previous.index.difference(chain.index)
+        if gone.empty:
+            return changed
+        removed = pd.DataFrame(np.nan, index=gone, columns=QUOTE_COLUMNS).assign(removed=True)
+        return pd.concat([changed, removed])
+    
+    @staticmethod
+    def _records(rows: pd.DataFrame, snapshot_id: int) -> list:
+        """Quote rows of a snapshot as plain dicts for a bulk insert."""
+        rows = rows.reset_index(names=KEY_COLUMNS)
+        for column in ("volume", "open_interest"):
+            rows[column] = rows[column].astype("Int64")
+        rows["removed"] = rows["removed"].astype(bool)
+        records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+        for record in records:
+            record["snapshot_id"] = snapshot_id
+        return records
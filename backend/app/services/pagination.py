@@ -0,0 +1,54 @@
+"""Opaque keyset cursor tokens."""
+import base64
+from datetime import datetime
+from typing import Tuple
+import orjson
+
+# Directions a cursor can page in, relative to the default newest-first order
+CURSOR_DIRECTIONS = ("older", "newer")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token is malformed or belongs to another query."""
+
+
+def encode_cursor(symbol: str, timestamp: datetime, direction: str) -> str:
+    """
+    Encode a keyset position as an opaque URL-safe token.
+    
+    Args:
+        symbol: Symbol the page belongs to
+        timestamp: Boundary row timestamp (exclusive)
+        direction: 'older' or 'newer'
+    
+    Returns:
+        Cursor token
+    """
+    payload = orjson.dumps({"s": symbol, "t": timestamp.isoformat(), "d": direction})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(token: str, symbol: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor token produced by encode_cursor.
+    
+    Args:
+        token: Cursor token
+        symbol: Symbol of the current request; must match the token's
+    
+    Returns:
+        Tuple of (boundary timestamp, direction)
+    """
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        timestamp = datetime.fromisoformat(payload["t"])
+        direction = payload["d"]
+        token_symbol = payload["s"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    
+    if direction not in CURSOR_DIRECTIONS:
+        raise InvalidCursor(f"Unknown cursor direction: {direction}")
+    if token_symbol != symbol:
+        raise InvalidCursor(f"Cursor belongs to {token_symbol}, not {symbol}")
+    return timestamp, direction
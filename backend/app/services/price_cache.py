@@ -0,0 +1,229 @@
+"""In-process columnar cache of stored price series for hot symbols."""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.services.price_export import EXPORT_COLUMNS, PriceExportService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Series:
+    """One cached series: read-only columns, oldest first."""
+    
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        columns = {column: np.ascontiguousarray(array) for column, array in columns.items()}
+        for array in columns.values():
+            array.flags.writeable = False
+        self.columns = columns
+        self.nbytes = sum(array.nbytes for array in columns.values())
+        self.loaded_at = time.monotonic()
+
+
+class PriceSeriesCache:
+    """
+    Whole stored price series per symbol as contiguous NumPy columns.
+    
+    A miss loads the symbol's full history once through
+    PriceExportService.read_columns. Later range reads are two binary
+    searches on the timestamp column and return views, so a hit never
+    touches the database. Entries are evicted least recently used once
+    PRICE_CACHE_MAX_MB is exceeded and reloaded after PRICE_CACHE_TTL
+    seconds, which bounds staleness from writes in other processes.
+    
+    Writes in this process go through record_write. When the written bars
+    start near the end of a cached series, only that tail is re-read and
+    spliced on. Writes further back drop the entry. Either way the cached
+    values are exactly what the database stored, whatever PRICE_STORAGE is.
+    
+    stock_prices has no interval column (bars of every interval share one
+    series per symbol), so entries are keyed by database URL and symbol.
+    """
+    
+    _cache: "OrderedDict[Tuple[str, str], _Series]" = OrderedDict()
+    _generations: Dict[Tuple[str, str], int] = {}
+    _lock = threading.Lock()
+    _stats = {"hits": 0, "misses": 0, "appends": 0, "invalidations": 0}
+    
+    @staticmethod
+    def enabled() -> bool:
+        """Whether the cache has a memory budget."""
+        return settings.PRICE_CACHE_MAX_MB > 0
+    
+    @staticmethod
+    def get_range(
+        db: Session,
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Stored prices of a symbol within a date range, oldest first.
+        
+        Args:
+            db: Database session (used only on a miss)
+            symbol: Stock symbol
+            start_date: Start date filter
+            end_date: End date filter (inclusive)
+        
+        Returns:
+            Dict of EXPORT_COLUMNS arrays (read-only views on a hit)
+        """
+        if not PriceSeriesCache.enabled():
+            return PriceExportService.read_columns(db, symbol, start_date, end_date)
+        
+        key = (str(db.get_bind().url), symbol)
+        series = PriceSeriesCache._lookup(key)
+        if series is None:
+            series = PriceSeriesCache._load(db, key)
+            if series is None:
+                # Larger than the whole budget: serve the range straight from the database
+                return PriceExportService.read_columns(db, symbol, start_date, end_date)
+        
+        timestamps = series.columns["timestamp"]
+        first = np.searchsorted(timestamps, np.datetime64(start_date, "ms"), side="left") if start_date else 0
+        last = (
+            np.searchsorted(timestamps, np.datetime64(end_date + timedelta(days=1), "ms"), side="left")
+            if end_date else len(timestamps)
+        )
+        return {column: series.columns[column][first:last] for column in EXPORT_COLUMNS}
+    
+    @staticmethod
+    def record_write(db: Session, symbol: str, first_timestamp) -> None:
+        """
+        Bring a cached series up to date after bars were committed.
+        
+        Args:
+            db: Session the bars were committed with
+            symbol: Stock symbol
+            first_timestamp: Earliest timestamp among the written bars
+        """
+        key = (str(db.get_bind().url), symbol)
+        with PriceSeriesCache._lock:
+            PriceSeriesCache._bump(key)
+            series = PriceSeriesCache._cache.get(key)
+            if series is None:
+                return
+            generation = PriceSeriesCache._generations[key]
+        
+        since = PriceSeriesCache._as_datetime64(first_timestamp)
+        keep = int(np.searchsorted(series.columns["timestamp"], since, side="left"))
+        if len(series.columns["timestamp"]) - keep > keep:
+            # A backfill reaching far back: reloading later is cheaper than splicing
+            PriceSeriesCache.invalidate(symbol, key[0])
+            return
+        
+        try:
+            tail = PriceExportService.read_columns(
+                db, symbol, since=since.astype(datetime).replace(tzinfo=timezone.utc)
+            )
+        except Exception as e:
+            logger.warning(f"Dropping cached prices for {symbol}: tail reload failed: {str(e)}")
+            PriceSeriesCache.invalidate(symbol, key[0])
+            return
+        columns = {
+            column: np.concatenate([series.columns[column][:keep], tail[column]])
+            for column in EXPORT_COLUMNS
+        }
+        with PriceSeriesCache._lock:
+            if PriceSeriesCache._generations.get(key) != generation or key not in PriceSeriesCache._cache:
+                # Another write or eviction raced this splice; drop rather than guess
+                PriceSeriesCache._cache.pop(key, None)
+                PriceSeriesCache._bump(key)
+                return
+            spliced = _Series(columns)
+            # The untouched prefix is as old as the original load
+            spliced.loaded_at = series.loaded_at
+            PriceSeriesCache._cache[key] = spliced
+            PriceSeriesCache._stats["appends"] += 1
+            PriceSeriesCache._evict()
+    
+    @staticmethod
+    def invalidate(symbol: Optional[str] = None, url: Optional[str] = None) -> None:
+        """
+        Drop cached series.
+        
+        Args:
+            symbol: Only drop this symbol (all when None)
+            url: Only drop entries of this database URL
+        """
+        with PriceSeriesCache._lock:
+            for key in list(PriceSeriesCache._cache):
+                if (symbol is None or key[1] == symbol) and (url is None or key[0] == url):
+                    del PriceSeriesCache._cache[key]
+                    PriceSeriesCache._bump(key)
+                    PriceSeriesCache._stats["invalidations"] += 1
+    
+    @staticmethod
+    def cache_info() -> Dict[str, int]:
+        """Current occupancy and hit/miss counters."""
+        with PriceSeriesCache._lock:
+            return {
+                "size": len(PriceSeriesCache._cache),
+                "bytes": sum(series.nbytes for series in PriceSeriesCache._cache.values()),
+                "max_bytes": settings.PRICE_CACHE_MAX_MB * 1024 * 1024,
+                **PriceSeriesCache._stats,
+            }
+    
+    @staticmethod
+    def _lookup(key: Tuple[str, str]) -> Optional[_Series]:
+        with PriceSeriesCache._lock:
+            series = PriceSeriesCache._cache.get(key)
+            if series is not None and time.monotonic() - series.loaded_at > settings.PRICE_CACHE_TTL:
+                del PriceSeriesCache._cache[key]
+                series = None
+            if series is None:
+                PriceSeriesCache._stats["misses"] += 1
+                return None
+            PriceSeriesCache._cache.move_to_end(key)
+            PriceSeriesCache._stats["hits"] += 1
+            return series
+    
+    @staticmethod
+    def _load(db: Session, key: Tuple[str, str]) -> Optional[_Series]:
+        with PriceSeriesCache._lock:
+            generation = PriceSeriesCache._generations.get(key, 0)
+        
+        series = _Series(PriceExportService.read_columns(db, key[1]))
+        if series.nbytes > settings.PRICE_CACHE_MAX_MB * 1024 * 1024:
+            logger.info(f"Price series for {key[1]} ({series.nbytes} bytes) exceeds the cache budget")
+            return None
+        
+        if not len(series.columns["timestamp"]):
+            # Unknown symbols weigh nothing against the budget; don't let them pile up
+            return series
+        
+        with PriceSeriesCache._lock:
+            # A write committed while loading may be missing from what was read
+            if PriceSeriesCache._generations.get(key, 0) == generation:
+                PriceSeriesCache._cache[key] = series
+                PriceSeriesCache._cache.move_to_end(key)
+                PriceSeriesCache._evict()
+        return series
+    
+    @staticmethod
+    def _bump(key: Tuple[str, str]) -> None:
+        """Mark a key as written; callers hold the lock."""
+        PriceSeriesCache._generations[key] = PriceSeriesCache._generations.get(key, 0) + 1
+    
+    @staticmethod
+    def _evict() -> None:
+        """Drop least recently used series until the budget holds; callers hold the lock."""
+        budget = settings.PRICE_CACHE_MAX_MB * 1024 * 1024
+        total = sum(series.nbytes for series in PriceSeriesCache._cache.values())
+        while total > budget and PriceSeriesCache._cache:
+            _, series = PriceSeriesCache._cache.popitem(last=False)
+            total -= series.nbytes
+    
+    @staticmethod
+    def _as_datetime64(value) -> np.datetime64:
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+        return timestamp.to_datetime64().astype("datetime64[ms]")
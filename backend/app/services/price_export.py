@@ -0,0 +1,251 @@
+"""Columnar and streaming encoders for stored stock prices."""
+import io
+from datetime import date, datetime
+from typing import Dict, Iterator, Optional
+import numpy as np
+import orjson
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.stock_prices import StockPrice
+from app.models.types import price_sql
+from app.services.symbol_service import SymbolService
+import logging
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow IPC output is optional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = 5000
+
+# Output columns, in order
+EXPORT_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+# Media types served by the /stocks endpoint
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.hawkiz.columnar+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv",
+}
+
+
+class PriceExportService:
+    """
+    Reads stock_prices straight into NumPy columns and encodes them.
+    
+    Rows come from a server-side cursor in EXPORT_CHUNK_SIZE batches as plain
+    tuples (prices cast to float in SQL), so no ORM objects, Decimals or
+    per-row Pydantic models are built.
+    """
+    
+    @staticmethod
+    def arrow_available() -> bool:
+        """Whether pyarrow is installed for Arrow IPC output."""
+        return pa is not None
+    
+    @staticmethod
+    def iter_chunks(
+        db: Session,
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+        since: Optional[datetime] = None
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Stream stored prices as column chunks, newest first.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            start_date: Start date filter
+            end_date: End date filter
+            limit: Maximum number of records
+            chunk_size: Rows per chunk
+            since: Only rows at or after this timestamp
+        
+        Yields:
+            Dicts of EXPORT_COLUMNS arrays; timestamps are UTC datetime64[ms]
+        """
+        stmt = select(
+            StockPrice.timestamp,
+            price_sql(StockPrice.open),
+            price_sql(StockPrice.high),
+            price_sql(StockPrice.low),
+            price_sql(StockPrice.close),
+            StockPrice.volume,
+        ).where(StockPrice.symbol_id == SymbolService.get_id(db, symbol))
+        
+        if start_date:
+            stmt = stmt.where(StockPrice.timestamp >= datetime.combine(start_date, datetime.min.time()))
+        
+        if end_date:
+            stmt = stmt.where(StockPrice.timestamp <= datetime.combine(end_date, datetime.max.time()))
+        
+        if since:
+            stmt = stmt.where(StockPrice.timestamp >= since)
+        
+        stmt = stmt.order_by(StockPrice.timestamp.desc())
+        
+        if limit:
+            stmt = stmt.limit(limit)
+        
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+        for rows in result.partitions(chunk_size):
+            timestamps, opens, highs, lows, closes, volumes = zip(*rows)
+            yield {
+                "timestamp": pd.to_datetime(timestamps, utc=True).tz_localize(None).to_numpy(dtype="datetime64[ms]"),
+                "open": np.asarray(opens, dtype=np.float64),
+                "high": np.asarray(highs, dtype=np.float64),
+                "low": np.asarray(lows, dtype=np.float64),
+                "close": np.asarray(closes, dtype=np.float64),
+                "volume": np.asarray(volumes, dtype=np.int64),
+            }
+    
+    @staticmethod
+    def read_columns(
+        db: Session,
+        symbol: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        since: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Load stored prices as whole NumPy columns, oldest first.
+        
+        This is the read path for analytics and backtests: float64 prices,
+        int64 volume and datetime64[ms] timestamps, whatever PRICE_STORAGE is.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            start_date: Start date filter
+            end_date: End date filter
+            since: Only rows at or after this timestamp
+        
+        Returns:
+            Dict of EXPORT_COLUMNS arrays
+        """
+        chunks = list(PriceExportService.iter_chunks(db, symbol, start_date, end_date, since=since))
+        if not chunks:
+            return PriceExportService.empty_columns()
+        # iter_chunks is newest first
+        return {column: np.concatenate([chunk[column] for chunk in chunks])[::-1] for column in EXPORT_COLUMNS}
+    
+    @staticmethod
+    def empty_columns() -> Dict[str, np.ndarray]:
+        """Column dict with no rows."""
+        return {
+            "timestamp": np.empty(0, dtype="datetime64[ms]"),
+            "open": np.empty(0, dtype=np.float64),
+            "high": np.empty(0, dtype=np.float64),
+            "low": np.empty(0, dtype=np.float64),
+            "close": np.empty(0, dtype=np.float64),
+            "volume": np.empty(0, dtype=np.int64),
+        }
+    
+    @staticmethod
+    def encode_columnar_json(
+        symbol: str,
+        chunks: Iterator[Dict[str, np.ndarray]],
+        meta: Optional[Dict] = None
+    ) -> bytes:
+        """
+        Encode chunks as one JSON object of parallel arrays.
+        
+        Parallel arrays need every row before the second column starts, so
+        chunks are concatenated as NumPy arrays (a few bytes per value) and
+        serialized in one orjson call.
+        
+        Args:
+            symbol: Stock symbol
+            chunks: Output of iter_chunks
+            meta: Extra top-level fields (e.g. resampling parameters)
+        
+        Returns:
+            JSON bytes with symbol, count, columns and one array per column;
+            timestamps are epoch milliseconds (UTC)
+        """
+        parts = {column: [] for column in EXPORT_COLUMNS}
+        for chunk in chunks:
+            for column in EXPORT_COLUMNS:
+                parts[column].append(chunk[column])
+        
+        data = {
+            column: np.concatenate(arrays) if arrays else np.empty(0, dtype=np.float64)
+            for column, arrays in parts.items()
+        }
+        data["timestamp"] = data["timestamp"].astype("datetime64[ms]").astype(np.int64)
+        
+        return orjson.dumps(
+            {
+                "symbol": symbol,
+                **(meta or {}),
+                "count": int(len(data["timestamp"])),
+                "columns": EXPORT_COLUMNS,
+                "data": data,
+            },
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+    
+    @staticmethod
+    def iter_csv(chunks: Iterator[Dict[str, np.ndarray]]) -> Iterator[bytes]:
+        """
+        Encode chunks as CSV, one piece per chunk.
+        
+        Args:
+            chunks: Output of iter_chunks
+        
+        Yields:
+            CSV bytes; the first piece carries the header
+        """
+        yield (",".join(EXPORT_COLUMNS) + "\n").encode()
+        for chunk in chunks:
+            frame = pd.DataFrame(chunk, columns=EXPORT_COLUMNS)
+            yield frame.to_csv(header=False, index=False, date_format="%Y-%m-%dT%H:%M:%SZ").encode()
+    
+    @staticmethod
+    def iter_arrow(chunks: Iterator[Dict[str, np.ndarray]]) -> Iterator[bytes]:
+        """
+        Encode chunks as an Arrow IPC stream, one record batch per chunk.
+        
+        Args:
+            chunks: Output of iter_chunks
+        
+        Yields:
+            IPC stream bytes (schema first, end-of-stream marker last)
+        """
+        if pa is None:
+            raise RuntimeError("Arrow IPC output requires pyarrow")
+        
+        schema = pa.schema([
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("volume", pa.int64()),
+        ])
+        sink = io.BytesIO()
+        
+        def drain() -> bytes:
+            payload = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return payload
+        
+        with pa.ipc.new_stream(sink, schema) as writer:
+            yield drain()
+            for chunk in chunks:
+                writer.write_batch(pa.record_batch(
+                    [pa.array(chunk[field.name], type=field.type) for field in schema],
+                    schema=schema,
+                ))
+                yield drain()
+        yield drain()
@@ -0,0 +1,327 @@
+"""Read-through cache for market data provider calls."""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, time as dt_time, timezone
+from typing import Any, Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+# Prefix for keys written to Redis
+REDIS_KEY_PREFIX = "hawkiz:provider:"
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """
+    Whether US equity regular trading hours are in session.
+    
+    Args:
+        now: Time to check (defaults to the current time)
+    
+    Returns:
+        True between 09:30 and 16:00 New York time on weekdays
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    local = now.astimezone(MARKET_TIMEZONE)
+    return local.weekday() < 5 and MARKET_OPEN <= local.time() < MARKET_CLOSE
+
+
+def ttl_for(kind: str, now: Optional[datetime] = None) -> int:
+    """
+    TTL in seconds for a kind of provider data.
+    
+    Quotes and chains move during the session, so they expire quickly while
+    the market is open and are kept much longer outside trading hours.
+    
+    Args:
+        kind: Data kind ('quote', 'chain', 'expirations', 'history')
+        now: Time to evaluate (defaults to the current time)
+    
+    Returns:
+        TTL in seconds
+    """
+    ttls = settings.CACHE_TTL_MARKET_HOURS if is_market_open(now) else settings.CACHE_TTL_OFF_HOURS
+    return ttls.get(kind, settings.CACHE_DEFAULT_TTL)
+
+
+def _is_cacheable(value: Any) -> bool:
+    """Whether a loaded value should be stored (None and empty frames are not)."""
+    if value is None:
+        return False
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return not empty
+    try:
+        return len(value) > 0
+    except TypeError:
+        return True
+
+
+class LocalCacheTier:
+    """In-process LRU tier with per-entry expiry."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str):
+        """Return (True, value) on a live hit, (False, None) otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a value for ttl seconds, evicting least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: str) -> None:
+        """Drop one key."""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheTier:
+    """
+    Shared Redis tier.
+    
+    Values are pickled, so the Redis instance must be trusted and private to
+    the application. Any client with get/setex/delete works, including
+    fakeredis in tests.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+    
+    def get(self, key: str):
+        """Return (True, value) on a hit, (False, None) on a miss or Redis error."""
+        try:
+            payload = self.client.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Redis cache get failed for {key}: {str(e)}")
+            return False, None
+        if payload is None:
+            return False, None
+        return True, pickle.loads(payload)
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a value with a TTL; errors are logged and ignored."""
+        try:
+            self.client.setex(REDIS_KEY_PREFIX + key, ttl, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.warning(f"Redis cache set failed for {key}: {str(e)}")
+    
+    def delete(self, key: str) -> None:
+        """Drop one key; errors are logged and ignored."""
+        try:
+            self.client.delete(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Redis cache delete failed for {key}: {str(e)}")
+
+
+class _Flight:
+    """One in-progress upstream load that concurrent callers wait on."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ProviderCache:
+    """
+    Two-tier read-through cache with single-flight loading.
+    
+    Lookups check the in-process tier, then Redis (if configured). On a miss
+    exactly one caller per key runs the loader; concurrent callers for the
+    same key wait for that result instead of hitting the provider again.
+    Cached values are shared and must be treated as read-only.
+    """
+    
+    def __init__(self, max_entries: int = 512, redis_client=None, enabled: bool = True):
+        self.enabled = enabled
+        self.local = LocalCacheTier(max_entries)
+        self.redis = RedisCacheTier(redis_client) if redis_client is not None else None
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0, "load_errors": 0}
+    
+    @classmethod
+    def from_settings(cls) -> "ProviderCache":
+        """Build the cache from CACHE_* settings and REDIS_URL."""
+        redis_client = None
+        if settings.REDIS_URL:
+            try:
+                import redis
+                redis_client = redis.Redis.from_url(settings.REDIS_URL)
+            except Exception as e:
+                logger.warning(f"Redis cache tier disabled: {str(e)}")
+        return cls(max_entries=settings.CACHE_MAX_ENTRIES, redis_client=redis_client, enabled=settings.CACHE_ENABLED)
+    
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+    
+    def get_or_load(self, key: str, loader: Callable[[], Any], kind: str, ttl: Optional[int] = None) -> Any:
+        """
+        Return the cached value for a key, loading it once on a miss.
+        
+        Args:
+            key: Cache key
+            loader: Zero-argument callable that fetches from the provider
+            kind: Data kind used to pick the TTL
+            ttl: Explicit TTL in seconds (overrides the kind's TTL)
+        
+        Returns:
+            Cached or freshly loaded value
+        """
+        if not self.enabled:
+            return loader()
+        
+        hit, value = self.local.get(key)
+        if hit:
+            self._count("local_hits")
+            return value
+        
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            ttl = ttl if ttl is not None else ttl_for(kind)
+            if self.redis is not None:
+                hit, value = self.redis.get(key)
+                if hit:
+                    self._count("redis_hits")
+                    self.local.set(key, value, ttl)
+                    flight.value = value
+                    return value
+            
+            self._count("misses")
+            try:
+                value = loader()
+            except BaseException as e:
+                self._count("load_errors")
+                flight.error = e
+                raise
+            
+            # Empty results usually mean a transient provider failure; don't pin them
+            if _is_cacheable(value):
+                self.local.set(key, value, ttl)
+                if self.redis is not None:
+                    self.redis.set(key, value, ttl)
+            flight.value = value
+            return value
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+    
+    def peek(self, key: str, kind: str):
+        """
+        Look a key up in every tier without loading on a miss.
+        
+        Args:
+            key: Cache key
+            kind: Data kind used to pick the TTL of a Redis hit copied locally
+        
+        Returns:
+            Tuple of (hit, value)
+        """
+        if not self.enabled:
+            return False, None
+        
+        hit, value = self.local.get(key)
+        if hit:
+            self._count("local_hits")
+            return True, value
+        
+        if self.redis is not None:
+            hit, value = self.redis.get(key)
+            if hit:
+                self._count("redis_hits")
+                self.local.set(key, value, ttl_for(kind))
+                return True, value
+        
+        return False, None
+    
+    def put(self, key: str, value: Any, kind: str, ttl: Optional[int] = None) -> None:
+        """
+        Store a value loaded outside get_or_load, e.g. one item of a batch.
+        
+        Args:
+            key: Cache key
+            value: Value to store (skipped when empty)
+            kind: Data kind used to pick the TTL
+            ttl: Explicit TTL in seconds (overrides the kind's TTL)
+        """
+        if not self.enabled or not _is_cacheable(value):
+            return
+        ttl = ttl if ttl is not None else ttl_for(kind)
+        self.local.set(key, value, ttl)
+        if self.redis is not None:
+            self.redis.set(key, value, ttl)
+    
+    def invalidate(self, key: str) -> None:
+        """Drop a key from every tier."""
+        self.local.delete(key)
+        if self.redis is not None:
+            self.redis.delete(key)
+    
+    def clear(self) -> None:
+        """Drop every in-process entry (Redis entries expire on their own)."""
+        self.local.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier occupancy."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["local_entries"] = len(self.local)
+        stats["redis_enabled"] = self.redis is not None
+        stats["market_open"] = is_market_open()
+        return stats
+
+
+# Process-wide cache used by MarketDataService
+provider_cache = ProviderCache.from_settings()
@@ -0,0 +1,280 @@
+"""Database-side OHLCV resampling and LTTB downsampling."""
+from datetime import date, datetime
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy import Integer, and_, cast, column, func, literal_column, select, table, text
+from sqlalchemy.orm import Session, aliased
+from app.models.stock_prices import StockPrice
+from app.models.types import price_sql
+from app.providers.base import parse_interval
+from app.services.price_export import PriceExportService
+from app.services.symbol_service import SymbolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fixed-width bucket units in seconds; weeks and months use calendar truncation
+BUCKET_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+
+# TimescaleDB continuous aggregates (alembic revision 0003), by bucket
+CONTINUOUS_AGGREGATES = {"1d": "stock_prices_daily", "1wk": "stock_prices_weekly"}
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection.
+    
+    Keeps the first and last points and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. The result
+    keeps the visual shape of a line with at most threshold points.
+    
+    Args:
+        x: Ascending x values (e.g. epoch milliseconds)
+        y: Values to preserve the shape of
+        threshold: Maximum number of points to keep (>= 3)
+    
+    Returns:
+        Sorted indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    # Bucket edges over the interior points 1 .. n-2
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    
+    return selected
+
+
+class ResampleService:
+    """Aggregates stock_prices into coarser bars inside the database."""
+    
+    @staticmethod
+    def bucket_expression(db: Session, bucket: str):
+        """
+        SQL expression for the bucket start of each row, in epoch seconds (UTC).
+        
+        Minute, hour and day buckets are aligned to the Unix epoch, weeks
+        start on Monday and months on the 1st.
+        
+        Args:
+            db: Database session (selects the dialect)
+            bucket: Bucket size such as '15m', '4h', '1d', '1wk' or '1mo'
+        
+        Returns:
+            SQLAlchemy column expression
+        """
+        multiplier, unit = parse_interval(bucket)
+        if multiplier < 1:
+            raise ValueError(f"Unsupported bucket: {bucket}")
+        if unit in ("week", "month") and multiplier != 1:
+            raise ValueError(f"Only single-{unit} buckets are supported: {bucket}")
+        
+        dialect = db.get_bind().dialect.name
+        ts = StockPrice.timestamp
+        
+        if dialect == "postgresql":
+            if unit in BUCKET_SECONDS:
+                seconds = multiplier * BUCKET_SECONDS[unit]
+                return func.floor(func.extract("epoch", ts) / seconds) * seconds
+            return func.extract("epoch", func.date_trunc(unit, ts, "UTC"))
+        
+        if dialect == "sqlite":
+            if unit in BUCKET_SECONDS:
+                seconds = multiplier * BUCKET_SECONDS[unit]
+                return (cast(func.strftime("%s", ts), Integer) // seconds) * seconds
+            if unit == "week":
+                # Monday on or before the row's date
+                return cast(func.strftime("%s", func.date(ts, "-6 days", "weekday 1")), Integer)
+            return cast(func.strftime("%s", func.date(ts, "start of month")), Integer)
+        
+        raise NotImplementedError(f"Resampling is not supported on {dialect}")
+    
+    @staticmethod
+    def aggregate_view(
+        db: Session,
+        bucket: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Optional[str]:
+        """
+        Name of a continuous aggregate that can answer the query, if any.
+        
+        The aggregates hold whole buckets, so a weekly one is only used when
+        the date filters fall on week boundaries (Monday start, Sunday end).
+        
+        Args:
+            db: Database session
+            bucket: Bucket size
+            start_date: Start date filter
+            end_date: End date filter
+        
+        Returns:
+            View name, or None to aggregate stock_prices directly
+        """
+        view = CONTINUOUS_AGGREGATES.get(bucket)
+        if view is None or db.get_bind().dialect.name != "postgresql":
+            return None
+        if bucket == "1wk" and (
+            (start_date and start_date.weekday() != 0) or (end_date and end_date.weekday() != 6)
+        ):
+            return None
+        if db.execute(text("SELECT to_regclass(:name)"), {"name": view}).scalar() is None:
+            return None
+        return view
+    
+    @staticmethod
+    def resample(
+        db: Session,
+        symbol: str,
+        bucket: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Aggregate bars into buckets with first/max/min/last/sum semantics.
+        
+        The GROUP BY finds each bucket's high, low, volume and its first and
+        last timestamps; open and close are then joined back on the unique
+        (symbol, timestamp) index, two lookups per bucket instead of a
+        second scan.
+        
+        Daily and weekly buckets are read from the TimescaleDB continuous
+        aggregates instead when they exist.
+        
+        Args:
+            db: Database session
+            symbol: Stock symbol
+            bucket: Bucket size such as '15m', '1h', '1d', '1wk' or '1mo'
+            start_date: Start date filter
+            end_date: End date filter
+        
+        Returns:
+            Dict of EXPORT_COLUMNS arrays, oldest bucket first; timestamps are
+            bucket starts as datetime64[ms]
+        """
+        bucket_start = ResampleService.bucket_expression(db, bucket).label("bucket_start")
+        
+        view = ResampleService.aggregate_view(db, bucket, start_date, end_date)
+        if view:
+            return ResampleService._read_aggregate(db, view, symbol, start_date, end_date)
+        
+        symbol_id = SymbolService.get_id(db, symbol)
+        filters = [StockPrice.symbol_id == symbol_id]
+        if start_date:
+            filters.append(StockPrice.timestamp >= datetime.combine(start_date, datetime.min.time()))
+        if end_date:
+            filters.append(StockPrice.timestamp <= datetime.combine(end_date, datetime.max.time()))
+        
+        buckets = select(
+            bucket_start,
+            func.min(StockPrice.timestamp).label("first_ts"),
+            func.max(StockPrice.timestamp).label("last_ts"),
+            price_sql(func.max(StockPrice.high)).label("high"),
+            price_sql(func.min(StockPrice.low)).label("low"),
+            func.sum(StockPrice.volume).label("volume"),
+        ).where(and_(*filters)).group_by(literal_column("bucket_start")).subquery()
+        
+        first_bar = aliased(StockPrice)
+        last_bar = aliased(StockPrice)
+        stmt = select(
+            buckets.c.bucket_start,
+            price_sql(first_bar.open),
+            buckets.c.high,
+            buckets.c.low,
+            price_sql(last_bar.close),
+            buckets.c.volume,
+        ).join(
+            first_bar,
+            and_(first_bar.symbol_id == symbol_id, first_bar.timestamp == buckets.c.first_ts),
+        ).join(
+            last_bar,
+            and_(last_bar.symbol_id == symbol_id, last_bar.timestamp == buckets.c.last_ts),
+        ).order_by(buckets.c.bucket_start)
+        
+        return ResampleService._to_columns(db.execute(stmt).all())
+    
+    @staticmethod
+    def _read_aggregate(
+        db: Session,
+        view: str,
+        symbol: str,
+        start_date: Optional[date],
+        end_date: Optional[date]
+    ) -> Dict[str, np.ndarray]:
+        """Read pre-aggregated bars from a continuous aggregate."""
+        bars = table(
+            view,
+            column("symbol_id"), column("bucket"), column("open"), column("high"),
+            column("low"), column("close"), column("volume"),
+        )
+        stmt = select(
+            func.extract("epoch", bars.c.bucket),
+            price_sql(bars.c.open),
+            price_sql(bars.c.high),
+            price_sql(bars.c.low),
+            price_sql(bars.c.close),
+            bars.c.volume,
+        ).where(bars.c.symbol_id == SymbolService.get_id(db, symbol))
+        if start_date:
+            stmt = stmt.where(bars.c.bucket >= datetime.combine(start_date, datetime.min.time()))
+        if end_date:
+            stmt = stmt.where(bars.c.bucket <= datetime.combine(end_date, datetime.max.time()))
+        return ResampleService._to_columns(db.execute(stmt.order_by(bars.c.bucket)).all())
+    
+    @staticmethod
+    def _to_columns(rows) -> Dict[str, np.ndarray]:
+        """Convert (bucket epoch seconds, open, high, low, close, volume) rows to columns."""
+        if not rows:
+            return PriceExportService.empty_columns()
+        
+        starts, opens, highs, lows, closes, volumes = zip(*rows)
+        return {
+            "timestamp": (np.asarray(starts, dtype=np.float64) * 1000).astype("datetime64[ms]"),
+            "open": np.asarray(opens, dtype=np.float64),
+            "high": np.asarray(highs, dtype=np.float64),
+            "low": np.asarray(lows, dtype=np.float64),
+            "close": np.asarray(closes, dtype=np.float64),
+            "volume": np.asarray(volumes, dtype=np.int64),
+        }
+    
+    @staticmethod
+    def downsample(columns: Dict[str, np.ndarray], max_points: int, value_column: str = "close") -> Dict[str, np.ndarray]:
+        """
+        Keep at most max_points rows chosen by LTTB on one column.
+        
+        Args:
+            columns: Dict of EXPORT_COLUMNS arrays, oldest first
+            max_points: Maximum number of rows to keep
+            value_column: Column whose shape is preserved
+        
+        Returns:
+            Dict of EXPORT_COLUMNS arrays restricted to the kept rows
+        """
+        x = columns["timestamp"].astype("datetime64[ms]").astype(np.int64)
+        keep = lttb_indices(x, columns[value_column], max_points)
+        return {column: values[keep] for column, values in columns.items()}
@@ -0,0 +1,119 @@
+"""Symbol dictionary lookups with an in-process cache."""
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models.symbols import Symbol
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding symbol ids inserted by the session's open transaction
+PENDING_KEY = "pending_symbol_ids"
+
+
+class SymbolService:
+    """
+    Translates ticker strings to symbols.id at the service boundary.
+    
+    Ids never change once assigned, so resolved ids are cached for the life
+    of the process, keyed by database URL. Ids a session creates stay in that
+    session until it commits; a rollback discards them so the shared cache
+    never holds an id that was not persisted.
+    
+    Unknown symbols resolve to None. Filtering on ``symbol_id == None``
+    renders ``IS NULL``, which matches no rows because symbol_id is NOT NULL,
+    so read paths need no special case.
+    """
+    
+    _ids: Dict[Tuple[str, str], int] = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get_id(db: Session, symbol: str, create: bool = False) -> Optional[int]:
+        """
+        Resolve one symbol to its id.
+        
+        Args:
+            db: Database session
+            symbol: Ticker symbol (upper case)
+            create: Insert the symbol when it is not registered yet
+        
+        Returns:
+            symbols.id, or None if unknown and create is False
+        """
+        return SymbolService.get_ids(db, [symbol], create=create).get(symbol)
+    
+    @staticmethod
+    def get_ids(db: Session, symbols: Iterable[str], create: bool = False) -> Dict[str, int]:
+        """
+        Resolve several symbols with at most one SELECT (and one INSERT).
+        
+        Args:
+            db: Database session
+            symbols: Ticker symbols (upper case)
+            create: Insert symbols that are not registered yet
+        
+        Returns:
+            Dict of symbol to id; unknown symbols are omitted unless created
+        """
+        url = str(db.get_bind().url)
+        pending = db.info.get(PENDING_KEY, {})
+        resolved = {}
+        missing = []
+        for symbol in set(symbols):
+            symbol_id = SymbolService._ids.get((url, symbol), pending.get(symbol))
+            if symbol_id is None:
+                missing.append(symbol)
+            else:
+                resolved[symbol] = symbol_id
+        
+        if not missing:
+            return resolved
+        
+        found = SymbolService._select(db, missing)
+        with SymbolService._lock:
+            for symbol, symbol_id in found.items():
+                SymbolService._ids[(url, symbol)] = symbol_id
+        resolved.update(found)
+        
+        new = [symbol for symbol in missing if symbol not in found]
+        if new and create:
+            insert = dialect_insert(db)
+            db.execute(
+                insert(Symbol).values([{"symbol": symbol} for symbol in new])
+                .on_conflict_do_nothing(index_elements=["symbol"])
+            )
+            created = SymbolService._select(db, new)
+            db.info.setdefault(PENDING_KEY, {}).update(created)
+            resolved.update(created)
+            logger.info(f"Registered symbols: {', '.join(sorted(created))}")
+        
+        return resolved
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget all cached ids (e.g. after recreating the schema)."""
+        with SymbolService._lock:
+            SymbolService._ids.clear()
+    
+    @staticmethod
+    def _select(db: Session, symbols) -> Dict[str, int]:
+        rows = db.execute(select(Symbol.symbol, Symbol.id).where(Symbol.symbol.in_(symbols))).all()
+        return {symbol: symbol_id for symbol, symbol_id in rows}
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_symbols(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        url = str(session.get_bind().url)
+        with SymbolService._lock:
+            for symbol, symbol_id in pending.items():
+                SymbolService._ids[(url, symbol)] = symbol_id
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_symbols(session: Session, previous_transaction) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,52 @@
+"""
+Celery worker for backtest jobs (BACKTEST_JOB_BACKEND=celery).
+
+Usage:
+    celery -A app.worker worker --loglevel info
+
+Sweeps start their own process pool, which Celery's default prefork
+children are not allowed to do; there they run in the worker process
+itself. Start the worker with --pool threads (or solo) to keep sweeps
+parallel.
+"""
+from datetime import datetime, timezone
+from celery import Celery
+from app.config import settings
+from app.schemas.backtest import BacktestJobRequest
+from app.services.backtest_jobs import JOB_REQUESTS, BacktestJobService
+import logging
+
+logger = logging.getLogger(__name__)
+
+broker_url = settings.CELERY_BROKER_URL or settings.REDIS_URL
+
+celery_app = Celery("hawkiz", broker=broker_url, backend=broker_url)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    broker_connection_retry_on_startup=True,
+    result_expires=settings.BACKTEST_RESULT_CACHE_TTL or None,
+)
+
+
+@celery_app.task(bind=True, name="backtests.run")
+def run_backtest_job(self, kind: str, payload: dict, created_at: str) -> dict:
+    """Run one backtest or sweep, publishing progress as PROGRESS task state."""
+    request: BacktestJobRequest = JOB_REQUESTS[kind].model_validate(payload)
+    job = {
+        "kind": kind,
+        "strategy": request.strategy.name,
+        "symbol": request.strategy.underlying_symbol.upper(),
+        "created_at": created_at,
+    }
+    
+    def report(**fields) -> None:
+        job.update(fields)
+        self.update_state(state="PROGRESS", meta=job)
+    
+    result = BacktestJobService.execute(kind, payload, report)
+    job["finished_at"] = datetime.now(timezone.utc).isoformat()
+    logger.info(f"Backtest job {self.request.id} ({request.strategy.name}) finished")
+    return {"job": job, "result": result}
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Time backtests of single-leg and spread strategies over synthetic daily data.
+
+Usage:
+    python benchmarks/bench_backtest.py [years] [repeats]
+
+Builds a random-walk underlying and a daily chain snapshot (8 weekly
+expiries x 41 strikes x calls/puts, Black-Scholes quotes) in memory, then
+runs each strategy with model and stored-chain pricing. The first run of a
+case also computes its indicators; later runs reuse them from BacktestData.
+Ten years should stay well under a second per run.
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from app.schemas.backtest import StrategyDefinition
+from app.services.backtest_engine import BacktestData, BacktestEngine
+from app.services.greeks_service import GreeksService
+
+ENTRY_RSI = {"logic": "OR", "conditions": [
+    {"type": "technical_indicator", "indicator": "RSI", "period": 14, "operator": "<", "value": 35},
+    {"type": "price_action", "condition": "price_crosses_above_ma", "ma_type": "EMA", "ma_period": 50},
+]}
+EXIT_SHORT_TERM = {"conditions": [
+    {"type": "profit_target", "value": 0.5},
+    {"type": "stop_loss", "value": -0.3},
+    {"type": "time_based", "max_holding_days": 7},
+]}
+EXIT_PREMIUM = {"conditions": [
+    {"type": "profit_target", "value": 0.5},
+    {"type": "stop_loss", "stop_type": "dollar", "value": 2000},
+    {"type": "time_based", "days_before_expiration": 5},
+]}
+
+STRATEGIES = {
+    "long call": {
+        "entry_conditions": ENTRY_RSI,
+        "exit_conditions": EXIT_SHORT_TERM,
+        "position_sizing": {"method": "fixed_dollar", "value": 1000, "max_positions": 5},
+        "options_selection": {"expiration": "nearest_weekly", "option_type": "CALL", "min_dte": 7, "max_dte": 45},
+    },
+    "bull put spread": {
+        "entry_conditions": {"logic": "OR", "conditions": [
+            {"type": "options_metric", "metric": "iv_rank", "operator": ">", "value": 30},
+        ]},
+        "exit_conditions": EXIT_PREMIUM,
+        "position_sizing": {"method": "percent_of_capital", "value": 0.05, "max_positions": 3},
+        "options_selection": {"expiration": "nearest_monthly", "min_dte": 20, "max_dte": 60, "legs": [
+            {"option_type": "PUT", "action": "sell", "strike_selection": "out_of_the_money", "strike_offset": 0.03},
+            {"option_type": "PUT", "action": "buy", "strike_selection": "out_of_the_money", "strike_offset": 0.08},
+        ]},
+    },
+    "iron condor": {
+        "entry_conditions": {"conditions": [
+            {"type": "technical_indicator", "indicator": "BOLLINGER", "period": 20, "operator": ">", "value": 0.2},
+            {"type": "technical_indicator", "indicator": "BOLLINGER", "period": 20, "operator": "<", "value": 0.8},
+        ]},
+        "exit_conditions": EXIT_PREMIUM,
+        "position_sizing": {"method": "risk_based", "risk_per_trade": 0.02, "max_positions": 5},
+        "options_selection": {"expiration": "target_dte", "target_dte": 35, "min_dte": 20, "max_dte": 60, "legs": [
+            {"option_type": "CALL", "action": "sell", "strike_selection": "delta", "target_delta": 0.3},
+            {"option_type": "CALL", "action": "buy", "strike_selection": "delta", "target_delta": 0.15},
+            {"option_type": "PUT", "action": "sell", "strike_selection": "delta", "target_delta": 0.3},
+            {"option_type": "PUT", "action": "buy", "strike_selection": "delta", "target_delta": 0.15},
+        ]},
+    },
+}
+
+
+def make_data(years, seed=11):
+    """Daily bars plus one chain snapshot per bar at 20:00 UTC."""
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2015-01-02", periods=years * 252)
+    # Volatility cycles between 12% and 28% so IV rank moves
+    volatility = 0.2 + 0.08 * np.sin(np.arange(len(sessions)) * 2 * np.pi / 180)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, volatility / np.sqrt(252))))
+    bars = {
+        "timestamp": sessions.to_numpy(dtype="datetime64[ms]"),
+        "open": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(1_000_000, 2_000_000, len(sessions)),
+    }
+
+    days = sessions.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    fridays = days + (4 - (days + 3) % 7) % 7
+    expiries = fridays[:, None] + 7 * np.arange(1, 9)[None, :]
+    strikes = np.round(close[:, None] * np.linspace(0.8, 1.2, 41)[None, :])
+    session, expiry, strike, is_call = (
+        array.ravel() for array in np.broadcast_arrays(
+            np.arange(len(sessions))[:, None, None, None], expiries[:, :, None, None],
+            strikes[:, None, :, None], np.array([True, False])[None, None, None, :],
+        )
+    )
+    spot = close[session]
+    t = (expiry - days[session]) / 365.0
+    sigma = volatility[session]
+    price = GreeksService.price(spot, strike, t, sigma, is_call, 0.045)
+    delta = GreeksService.greeks(spot, strike, t, sigma, is_call, 0.045)["delta"]
+    frame = pd.DataFrame({
+        "timestamp": pd.to_datetime(days[session], unit="D", utc=True) + pd.Timedelta(hours=20),
+        "expiration_date": expiry.astype("datetime64[D]"),
+        "strike": strike,
+        "option_type": np.where(is_call, "C", "P"),
+        "bid": np.maximum(price * 0.98 - 0.01, 0.0),
+        "ask": price * 1.02 + 0.01,
+        "last": price,
+        "volume": 1000,
+        "open_interest": 5000,
+        "implied_volatility": sigma,
+        "delta": delta,
+        "underlying_price": spot,
+    })
+    return bars, frame
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    bars, frame = make_data(years)
+    started = time.perf_counter()
+    chain = BacktestData.chain_from_frame(frame)
+    with_chain = BacktestData("BENCH", bars, chain)
+    build_seconds = time.perf_counter() - started
+    model_only = BacktestData("BENCH", bars)
+
+    print(f"{years} years of daily bars ({len(bars['close'])}), {len(frame):,} stored quotes")
+    print(f"chain arrays built in {build_seconds * 1000:.1f} ms")
+    print("-" * 68)
+    print(f"{'strategy':<18} {'pricing':<8} {'trades':>7} {'first ms':>10} {'median ms':>10} {'pnl':>10}")
+    for name, spec in STRATEGIES.items():
+        for pricing, data in (("model", model_only), ("chain", with_chain)):
+            strategy = StrategyDefinition.model_validate({
+                "name": name, "underlying_symbol": "BENCH", "execution": {"pricing": pricing}, **spec,
+            })
+            data.cache.clear()
+            started = time.perf_counter()
+            result = BacktestEngine.run(strategy, data)
+            first = time.perf_counter() - started
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                BacktestEngine.run(strategy, data)
+                timings.append(time.perf_counter() - started)
+            print(
+                f"{name:<18} {pricing:<8} {result.metrics['total_trades']:>7} {first * 1000:>10.1f} "
+                f"{statistics.median(timings) * 1000:>10.1f} {result.metrics['total_pnl']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
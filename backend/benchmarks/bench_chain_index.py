@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Compare as-of option chain lookups in SQL against the in-memory chain index.
+
+Usage:
+    python benchmarks/bench_chain_index.py [snapshots] [contracts] [lookups]
+
+Stores a synthetic chain snapshot per trading day in options_chains, then
+looks up the chain in effect at random times: once per lookup through
+MarketDataService.get_options_snapshot and through OptionsChainIndex on an
+index built by ChainIndexCache. Reports the index build (cache miss), a
+cached range fetch (hit) and per-lookup medians for the whole chain and
+for one expiration and strike band. Set BENCH_DATABASE_URL to run against
+PostgreSQL; defaults to a temporary SQLite file.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = "BENCHCI"
+
+
+def timed(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    contracts = int(sys.argv[2]) if len(sys.argv) > 2 else 800
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+
+    import numpy as np
+    import pandas as pd
+    from app.database import Base, SessionLocal, engine
+    from app.models import OptionsChain, Symbol
+    from app.services.chain_index import ChainIndexCache
+    from app.services.market_data_service import MarketDataService
+
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, OptionsChain.__table__])
+
+    rng = np.random.default_rng(7)
+    start = datetime(2025, 10, 20, 20, 0, tzinfo=timezone.utc)
+    times = [start + timedelta(days=day) for day in range(snapshots)]
+    strikes_per_expiry = contracts // 16
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for timestamp in times:
+            spot = 100 + rng.normal(0, 5)
+            expirations = [timestamp.date() + timedelta(weeks=week) for week in range(1, 9)]
+            strikes = np.round(spot * np.linspace(0.8, 1.2, strikes_per_expiry), 1)
+            frame = pd.DataFrame(
+                [(expiration, strike, option_type) for expiration in expirations for strike in strikes for option_type in "CP"],
+                columns=["expiration_date", "strike", "option_type"],
+            )
+            frame["bid"] = np.round(rng.uniform(0.05, 20, len(frame)), 2)
+            frame["ask"] = frame["bid"] + 0.05
+            frame["implied_volatility"] = 0.25
+            frame["delta"] = rng.uniform(-1, 1, len(frame))
+            MarketDataService.store_options_snapshot(db, SYMBOL, frame, spot, timestamp)
+        load_seconds = time.perf_counter() - started
+
+        points = [start + timedelta(seconds=float(offset)) for offset in rng.uniform(0, snapshots * 86400, lookups)]
+        points_ms = np.array([int(point.timestamp() * 1000) for point in points])
+
+        def miss():
+            ChainIndexCache.invalidate(SYMBOL)
+            return len(ChainIndexCache.get(db, SYMBOL).chain["timestamp"])
+
+        def sql_lookups(band):
+            total = 0
+            for point in points:
+                rows = MarketDataService.get_options_snapshot(db, SYMBOL, point, point.date() + timedelta(weeks=2) if band else None)
+                total += sum(1 for row in rows if 95 <= float(row.strike) <= 105) if band else len(rows)
+            return total
+
+        def index_lookups(band):
+            index = ChainIndexCache.get(db, SYMBOL)
+            total = 0
+            for point in points:
+                if band:
+                    snapshot = index.snapshot_at(point)
+                    total += len(index.rows(snapshot, point.date() + timedelta(weeks=2), 95, 105))
+                else:
+                    total += len(index.chain_at(point)[2])
+            return total
+
+        cases = [
+            ("index build (miss)", 3, miss),
+            ("cached range (hit)", 5, lambda: len(ChainIndexCache.get(db, SYMBOL, times[10], times[-10]))),
+            ("sql, whole chain", 1, lambda: sql_lookups(False)),
+            ("index, whole chain", 5, lambda: index_lookups(False)),
+            ("sql, expiry + band", 1, lambda: sql_lookups(True)),
+            ("index, expiry + band", 5, lambda: index_lookups(True)),
+            ("index, batched", 5, lambda: int((ChainIndexCache.get(db, SYMBOL).snapshots_at(points_ms) >= 0).sum())),
+        ]
+
+        print(f"{snapshots} snapshots of {contracts} contracts on {engine.dialect.name} (stored in {load_seconds:.1f} s), {lookups} lookups")
+        print(f"{'case':<22} {'result':>10} {'median ms':>11} {'per lookup us':>14}")
+        for name, repeats, case in cases:
+            result, seconds = timed(repeats, case)
+            per_lookup = f"{seconds / lookups * 1e6:>14.1f}" if name.startswith(("sql", "index,")) else f"{'':>14}"
+            print(f"{name:<22} {result:>10,} {seconds * 1000:>11.1f} {per_lookup}")
+    finally:
+        db.close()
+
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare contract selection by scanning OptionsChainItem lists against ContractSelector.
+
+Usage:
+    python benchmarks/bench_contract_selector.py [snapshots] [contracts] [queries]
+
+Builds a synthetic chain per trading day in memory and selects "the 30-DTE
+0.30-delta put" and "the nearest ATM call" at random times: by a Python
+scan over each snapshot's OptionsChainItem list, by one
+ContractSelector.select_rows call per time and by one batched select call
+(returning a frame) for all times. Reports the selector build and per-query medians.
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    contracts = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    import numpy as np
+    import pandas as pd
+    from app.schemas.market_data import OptionsChainItem
+    from app.services.contract_selector import ContractSelector
+    from app.services.greeks_service import GreeksService
+
+    rng = np.random.default_rng(7)
+    start = datetime(2025, 10, 20, 20, 0, tzinfo=timezone.utc)
+    strikes_per_expiry = contracts // 24
+    frames, items, spots = [], {}, {}
+    for day in range(snapshots):
+        timestamp = start + timedelta(days=day)
+        spot = 100 * np.exp(rng.normal(0, 0.01) * day ** 0.5)
+        expirations = [timestamp.date() + timedelta(days=7 * week + 3) for week in range(12)]
+        strikes = np.round(spot * np.linspace(0.7, 1.3, strikes_per_expiry), 1)
+        frame = pd.DataFrame(
+            [(expiration, strike, option_type) for expiration in expirations for strike in strikes for option_type in "CP"],
+            columns=["expiration_date", "strike", "option_type"],
+        )
+        frame["bid"] = 1.0
+        frame["ask"] = 1.1
+        frame["last"] = 1.05
+        frame["implied_volatility"] = rng.uniform(0.15, 0.4, len(frame))
+        frame = GreeksService.apply_to_chain(frame, underlying_price=spot, timestamp=timestamp)
+        items[timestamp] = [OptionsChainItem(**record) for record in frame.to_dict("records")]
+        spots[timestamp] = spot
+        frames.append(frame.assign(timestamp=timestamp, underlying_price=spot))
+    chain = pd.concat(frames, ignore_index=True)
+    times = sorted(items)
+    points = [start + timedelta(seconds=float(offset)) for offset in rng.uniform(0, snapshots * 86400, queries)]
+
+    def scan(point, option_type, target_dte, delta):
+        snapshot_time = times[max(i for i, t in enumerate(times) if t <= point)] if point >= times[0] else None
+        if snapshot_time is None:
+            return None
+        chain_items = items[snapshot_time]
+        today = snapshot_time.date()
+        expirations = sorted({item.expiration_date for item in chain_items})
+        expiration = min(expirations, key=lambda expiration: abs((expiration - today).days - target_dte))
+        candidates = [item for item in chain_items if item.expiration_date == expiration and item.option_type == option_type]
+        if delta is None:
+            return min(candidates, key=lambda item: abs(item.strike - spots[snapshot_time]))
+        return min(candidates, key=lambda item: abs(abs(item.delta) - delta) if item.delta is not None else float("inf"))
+
+    selector, build_seconds = timed(3, lambda: ContractSelector.from_frame("BENCH", chain))
+    cases = [
+        ("scan, 30-DTE 0.30 put", 1, lambda: sum(scan(point, "P", 30, 0.3) is not None for point in points)),
+        ("select, 30-DTE 0.30 put", 3, lambda: sum(int(selector.select_rows(point, "P", target_dte=30, delta=0.3)[0] >= 0) for point in points)),
+        ("batched, 30-DTE 0.30 put", 5, lambda: len(selector.select(points, "P", target_dte=30, delta=0.3))),
+        ("scan, ATM call", 1, lambda: sum(scan(point, "C", 0, None) is not None for point in points)),
+        ("select, ATM call", 3, lambda: sum(int(selector.select_rows(point, "C")[0] >= 0) for point in points)),
+        ("batched, ATM call", 5, lambda: len(selector.select(points, "C"))),
+    ]
+
+    print(f"{snapshots} snapshots of {len(chain) // snapshots} contracts, {queries} queries; selector built in {build_seconds * 1000:.1f} ms")
+    print(f"{'case':<26} {'found':>7} {'median ms':>11} {'per query us':>13}")
+    for name, repeats, case in cases:
+        found, seconds = timed(repeats, case)
+        print(f"{name:<26} {found:>7,} {seconds * 1000:>11.1f} {seconds / queries * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
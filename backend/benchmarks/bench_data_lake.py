@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Compare reading a symbol's bars from the database against the Parquet data lake.
+
+Usage:
+    python benchmarks/bench_data_lake.py [rows] [repeats]
+
+Seeds one-minute bars, exports them, then times full and one-month reads
+through PriceExportService.read_columns and DataLakeService.read_prices.
+Set BENCH_DATABASE_URL to run against PostgreSQL; defaults to a temporary
+SQLite file.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = "BENCHLK"
+
+
+def timed(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    lake = os.path.join(tmpdir.name, "lake")
+
+    from sqlalchemy import select
+    from app.database import Base, SessionLocal, engine
+    from app.models import StockPrice, Symbol
+    from app.services.data_lake import DataLakeService
+    from app.services.market_data_service import MarketDataService
+    from app.services.price_export import PriceExportService
+
+    if not DataLakeService.available():
+        print("pyarrow is not installed")
+        return
+
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__])
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    records = [
+        {
+            "timestamp": start + timedelta(minutes=i),
+            "open": 100 + (i % 390) / 100,
+            "high": 101.25,
+            "low": 99.5,
+            "close": 100 + ((i * 7) % 390) / 100,
+            "volume": 1000 + i % 50,
+        }
+        for i in range(rows)
+    ]
+    db = SessionLocal()
+    try:
+        MarketDataService.upsert_price_records(db=db, symbol=SYMBOL, records=records)
+
+        started = time.perf_counter()
+        DataLakeService.export_prices(db=db, symbols=[SYMBOL], root=lake)
+        export_seconds = time.perf_counter() - started
+        _, append_seconds = timed(1, lambda: DataLakeService.export_prices(db=db, symbols=[SYMBOL], root=lake))
+
+        month_start = (start + timedelta(minutes=rows // 2)).date()
+        month_end = month_start + timedelta(days=30)
+        cases = [
+            ("database, all rows", lambda: PriceExportService.read_columns(db, SYMBOL)),
+            ("lake, all rows", lambda: DataLakeService.read_prices(SYMBOL, root=lake)),
+            ("database, 30 days", lambda: PriceExportService.read_columns(db, SYMBOL, month_start, month_end)),
+            ("lake, 30 days", lambda: DataLakeService.read_prices(SYMBOL, month_start, month_end, root=lake)),
+        ]
+
+        print(f"{rows} one-minute bars on {engine.dialect.name}, {repeats} reads per case")
+        print(f"export: {export_seconds * 1000:.1f} ms, no-op append: {append_seconds * 1000:.1f} ms")
+        print("-" * 50)
+        print(f"{'case':<22} {'rows':>10} {'median ms':>11}")
+        for name, read in cases:
+            columns, seconds = timed(repeats, read)
+            print(f"{name:<22} {len(columns['close']):>10,} {seconds * 1000:>11.1f}")
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        conn.execute(StockPrice.__table__.delete().where(StockPrice.symbol_id.in_(
+            select(Symbol.id).where(Symbol.symbol == SYMBOL)
+        )))
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized chain Greeks against per-contract py_vollib calls.
+
+Usage:
+    python benchmarks/bench_greeks.py [contracts ...]
+"""
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from app.services.greeks_service import GreeksService
+
+# Scalar baseline is timed on this many contracts and extrapolated
+SCALAR_SAMPLE = 2000
+
+
+def make_chain(contracts, spot, seed=7):
+    """Synthetic chain with provider IVs, a share of them missing."""
+    rng = np.random.default_rng(seed)
+    expiries = [date(2030, 1, 1) + timedelta(days=int(d)) for d in rng.integers(1, 720, contracts)]
+    strike = np.round(spot * rng.uniform(0.5, 1.5, contracts), 0)
+    iv = rng.uniform(0.1, 0.8, contracts)
+    iv[rng.random(contracts) < 0.2] = np.nan
+    mid = np.maximum(spot * 0.02 * rng.random(contracts), 0.05)
+    return pd.DataFrame({
+        "expiration_date": expiries,
+        "strike": strike,
+        "option_type": np.where(rng.random(contracts) < 0.5, "C", "P"),
+        "bid": mid * 0.95,
+        "ask": mid * 1.05,
+        "last": mid,
+        "implied_volatility": iv,
+    })
+
+
+def scalar_greeks(frame, spot, timestamp, rate):
+    """Per-contract py_vollib calls, as a scalar implementation would make them."""
+    from py_vollib.black_scholes_merton.greeks.analytical import delta, gamma, theta, vega
+
+    t = np.maximum(GreeksService.time_to_expiry(frame["expiration_date"], timestamp), 1e-4)
+    for strike, flag, years, sigma in zip(frame["strike"], frame["option_type"], t, frame["implied_volatility"]):
+        if np.isnan(sigma):
+            continue
+        flag = flag.lower()
+        delta(flag, spot, strike, years, rate, sigma, 0.0)
+        gamma(flag, spot, strike, years, rate, sigma, 0.0)
+        theta(flag, spot, strike, years, rate, sigma, 0.0)
+        vega(flag, spot, strike, years, rate, sigma, 0.0)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    spot = 450.0
+    rate = 0.045
+    timestamp = datetime(2029, 12, 1, 15, tzinfo=timezone.utc)
+
+    # Warm up imports and any lazy initialization before timing
+    GreeksService.apply_to_chain(make_chain(100, spot), underlying_price=spot, timestamp=timestamp, rate=rate)
+    try:
+        scalar_greeks(make_chain(100, spot), spot, timestamp, rate)
+    except ImportError:
+        pass
+
+    print(f"{'contracts':>10} {'vectorized s':>14} {'contracts/s':>14} {'py_vollib s (est)':>18}")
+    print("-" * 60)
+    for size in sizes:
+        frame = make_chain(size, spot)
+
+        started = time.perf_counter()
+        GreeksService.apply_to_chain(frame, underlying_price=spot, timestamp=timestamp, rate=rate)
+        vectorized = time.perf_counter() - started
+
+        sample = frame.head(min(size, SCALAR_SAMPLE))
+        try:
+            started = time.perf_counter()
+            scalar_greeks(sample, spot, timestamp, rate)
+            scalar = (time.perf_counter() - started) * size / len(sample)
+            scalar_text = f"{scalar:18.3f}"
+        except ImportError:
+            scalar_text = f"{'n/a':>18}"
+
+        print(f"{size:>10} {vectorized:14.3f} {size / vectorized:14.0f} {scalar_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the batch ingest pipeline offline with the local file provider.
+
+Writes seeded synthetic daily bars as CSV fixtures, then runs an ingestion
+job over them, so timings are repeatable and involve no network access.
+
+Usage:
+    python benchmarks/bench_ingest_pipeline.py [symbols] [days]
+
+Set BENCH_DATABASE_URL to run against PostgreSQL; defaults to a temporary
+SQLite file.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import PriceCoverage, StockPrice, Symbol
+from app.providers import LocalFileProvider
+from app.services.ingestion_service import IngestionService
+from app.services.market_calendar import TRADING_DAY
+
+START_DATE = date(2010, 1, 1)
+
+
+def write_fixtures(root, symbols, days, seed=7):
+    """Write one CSV of random-walk daily bars per symbol."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(START_DATE, periods=days, freq=TRADING_DAY, tz="UTC", name="Date")
+    os.makedirs(os.path.join(root, "stocks"), exist_ok=True)
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+        frame = pd.DataFrame(
+            {
+                "Open": close * (1 + rng.normal(0, 0.002, days)),
+                "High": close * 1.01,
+                "Low": close * 0.99,
+                "Close": close,
+                "Volume": rng.integers(1_000, 1_000_000, days),
+            },
+            index=index,
+        )
+        frame.to_csv(os.path.join(root, "stocks", f"{symbol}.csv"))
+    # end_date is exclusive
+    return index[-1].date() + timedelta(days=1)
+
+
+def run_job(label, provider, session_factory, symbols, end_date, workers, refresh=False):
+    """Time one ingestion job."""
+    job = IngestionService.create_job(symbols, START_DATE, end_date, "1d", provider, refresh)
+    started = time.perf_counter()
+    IngestionService.run(job, provider=provider, max_workers=workers, session_factory=session_factory)
+    elapsed = time.perf_counter() - started
+    progress = job.to_dict()["progress"]
+    rows = sum(entry["total_fetched"] for entry in progress)
+    failed = sum(1 for entry in progress if entry["status"] == "failed")
+    print(f"{label:<24} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/s  rows={rows} failed={failed}")
+
+
+def main():
+    symbol_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 2500
+    symbols = [f"BENCH{i:03d}" for i in range(symbol_count)]
+
+    workdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(workdir.name, 'bench.db')}"
+    end_date = write_fixtures(os.path.join(workdir.name, "fixtures"), symbols, days)
+    provider = LocalFileProvider(os.path.join(workdir.name, "fixtures"))
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__, PriceCoverage.__table__])
+    session_factory = sessionmaker(bind=engine)
+    # SQLite serializes writers, so more workers only add lock contention there
+    workers = 1 if engine.dialect.name == "sqlite" else 8
+
+    print(f"Ingesting {symbol_count} symbols x {days} days on {engine.dialect.name} ({workers} workers)")
+    print("-" * 72)
+    run_job("ingest (insert)", provider, session_factory, symbols, end_date, workers)
+    run_job("top-up (all covered)", provider, session_factory, symbols, end_date, workers)
+    run_job("refresh (full update)", provider, session_factory, symbols, end_date, workers, refresh=True)
+
+    symbol_ids = select(Symbol.id).where(Symbol.symbol.in_(symbols))
+    with engine.begin() as conn:
+        stored = conn.execute(
+            func.count(StockPrice.id).select().where(StockPrice.symbol_id.in_(symbol_ids))
+        ).scalar()
+        conn.execute(StockPrice.__table__.delete().where(StockPrice.symbol_id.in_(symbol_ids)))
+        conn.execute(PriceCoverage.__table__.delete().where(PriceCoverage.symbol.in_(symbols)))
+    print(f"rows stored: {stored}")
+    engine.dispose()
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare storing intraday options chain captures as full rows against the delta store.
+
+Usage:
+    python benchmarks/bench_options_delta.py [snapshots] [contracts] [changed_share]
+
+Captures a synthetic chain every five minutes, re-quoting changed_share of
+its contracts each time, and writes every capture through
+MarketDataService.store_options_snapshot (options_chains) and
+OptionsDeltaStore.store. Reports rows written and write time, point-in-time
+reads of the last snapshot and a read of the whole range. Set
+BENCH_DATABASE_URL to run against PostgreSQL; defaults to a temporary
+SQLite file.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = "BENCHOD"
+
+
+def timed(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def main():
+    snapshots = int(sys.argv[1]) if len(sys.argv) > 1 else 78
+    contracts = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    changed_share = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+
+    import numpy as np
+    import pandas as pd
+    from sqlalchemy import func, select
+    from app.database import Base, SessionLocal, engine
+    from app.models import OptionsChain, OptionsSnapshot, OptionsSnapshotQuote, Symbol
+    from app.services.greeks_service import GreeksService
+    from app.services.market_data_service import MarketDataService
+    from app.services.options_delta_store import OptionsDeltaStore
+
+    tables = [Symbol.__table__, OptionsChain.__table__, OptionsSnapshot.__table__, OptionsSnapshotQuote.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+
+    rng = np.random.default_rng(7)
+    expirations = [date(2026, 11, 20) + timedelta(weeks=week) for week in range(10)]
+    strikes = np.round(np.linspace(50, 150, contracts // (2 * len(expirations))), 1)
+    chain = pd.DataFrame(
+        [(expiration, strike, option_type) for expiration in expirations for strike in strikes for option_type in "CP"],
+        columns=["expiration_date", "strike", "option_type"],
+    )
+    chain["bid"] = np.round(rng.uniform(0.05, 20, len(chain)), 2)
+    chain["ask"] = chain["bid"] + 0.05
+    chain["last"] = chain["bid"]
+    chain["volume"] = pd.array(rng.integers(0, 5000, len(chain)), dtype="Int64")
+    chain["open_interest"] = pd.array(rng.integers(0, 50000, len(chain)), dtype="Int64")
+    chain["implied_volatility"] = np.round(rng.uniform(0.15, 0.6, len(chain)), 4)
+
+    start = datetime(2026, 10, 19, 13, 30, tzinfo=timezone.utc)
+    captures = []
+    for i in range(snapshots):
+        changed = rng.choice(len(chain), int(len(chain) * changed_share), replace=False)
+        chain.loc[changed, "bid"] = np.round(chain.loc[changed, "bid"] * rng.uniform(0.95, 1.05, len(changed)), 2)
+        chain.loc[changed, "ask"] = chain.loc[changed, "bid"] + 0.05
+        captures.append((start + timedelta(minutes=5 * i), 100 + rng.normal(0, 0.2) * i ** 0.5, chain.copy()))
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for timestamp, spot, frame in captures:
+            frame = GreeksService.apply_to_chain(frame, underlying_price=spot, timestamp=timestamp)
+            MarketDataService.store_options_snapshot(db, SYMBOL, frame, spot, timestamp)
+        rows_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for timestamp, spot, frame in captures:
+            OptionsDeltaStore.store(db, SYMBOL, frame, spot, timestamp)
+        delta_seconds = time.perf_counter() - started
+
+        rows_written = db.execute(select(func.count()).select_from(OptionsChain)).scalar()
+        delta_written = db.execute(select(func.count()).select_from(OptionsSnapshotQuote)).scalar()
+
+        end = captures[-1][0] + timedelta(minutes=1)
+        cases = [
+            ("rows, as-of read", lambda: len(MarketDataService.get_options_snapshot(db, SYMBOL, end))),
+            ("delta, as-of read", lambda: len(OptionsDeltaStore.reconstruct(db, SYMBOL, end)[2])),
+            ("delta, as-of quotes", lambda: len(OptionsDeltaStore.raw_chain(db, SYMBOL, end)[2])),
+            ("rows, range read", lambda: len(db.execute(select(OptionsChain.__table__)).all())),
+            ("delta, range read", lambda: len(OptionsDeltaStore.read_range(db, SYMBOL, start, end))),
+        ]
+
+        print(f"{snapshots} captures of {len(chain)} contracts, {changed_share:.0%} re-quoted each, on {engine.dialect.name}")
+        print(f"{'store':<8} {'rows written':>14} {'write s':>9}")
+        print(f"{'rows':<8} {rows_written:>14,} {rows_seconds:>9.2f}")
+        print(f"{'delta':<8} {delta_written:>14,} {delta_seconds:>9.2f}")
+        print("-" * 50)
+        print(f"{'case':<22} {'rows':>10} {'median ms':>11}")
+        for name, read in cases:
+            count, seconds = timed(5, read)
+            print(f"{name:<22} {count:>10,} {seconds * 1000:>11.1f}")
+    finally:
+        db.close()
+
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare get_stock_prices and range reads with and without the price series cache.
+
+Usage:
+    python benchmarks/bench_price_cache.py [rows] [repeats]
+
+Seeds one-minute bars. Set BENCH_DATABASE_URL to run against PostgreSQL;
+defaults to a temporary SQLite file.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = "BENCHPC"
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+
+    from sqlalchemy import select
+    from app.config import settings
+    from app.database import Base, SessionLocal, engine
+    from app.models import StockPrice, Symbol
+    from app.services.market_data_service import MarketDataService
+    from app.services.price_cache import PriceSeriesCache
+
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__])
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    records = [
+        {
+            "timestamp": start + timedelta(minutes=i),
+            "open": 100 + (i % 390) / 100,
+            "high": 101.25,
+            "low": 99.5,
+            "close": 100 + ((i * 7) % 390) / 100,
+            "volume": 1000 + i % 50,
+        }
+        for i in range(rows)
+    ]
+    day = (start + timedelta(minutes=rows // 2)).date()
+    cases = [
+        ("get_stock_prices, all", lambda db: MarketDataService.get_stock_prices(db, SYMBOL)),
+        ("get_stock_prices, 1 day", lambda db: MarketDataService.get_stock_prices(db, SYMBOL, day, day)),
+        ("get_range, all", lambda db: PriceSeriesCache.get_range(db, SYMBOL)),
+        ("get_range, 1 day", lambda db: PriceSeriesCache.get_range(db, SYMBOL, day, day)),
+    ]
+
+    db = SessionLocal()
+    try:
+        MarketDataService.upsert_price_records(db=db, symbol=SYMBOL, records=records)
+
+        print(f"{rows} one-minute bars on {engine.dialect.name}, {repeats} reads per case")
+        print("-" * 58)
+        print(f"{'case':<26} {'uncached ms':>14} {'cached ms':>14}")
+        for name, read in cases:
+            medians = []
+            for budget in (0, 256):
+                settings.PRICE_CACHE_MAX_MB = budget
+                PriceSeriesCache.invalidate()
+                read(db)
+                timings = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    read(db)
+                    timings.append(time.perf_counter() - started)
+                medians.append(statistics.median(timings) * 1000)
+            print(f"{name:<26} {medians[0]:>14.2f} {medians[1]:>14.2f}")
+        print(PriceSeriesCache.cache_info())
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        conn.execute(StockPrice.__table__.delete().where(StockPrice.symbol_id.in_(
+            select(Symbol.id).where(Symbol.symbol == SYMBOL)
+        )))
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
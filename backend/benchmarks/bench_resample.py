@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare raw /stocks output against /stocks/{symbol}/resample: bytes and latency.
+
+Usage:
+    python benchmarks/bench_resample.py [rows] [repeats]
+
+Seeds one-minute bars. Set BENCH_DATABASE_URL to run against PostgreSQL;
+defaults to a temporary SQLite file.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = "BENCHRS"
+CASES = [
+    ("raw columnar", "", {"format": "columnar"}),
+    ("bucket=15m", "/resample", {"bucket": "15m"}),
+    ("bucket=1h", "/resample", {"bucket": "1h"}),
+    ("bucket=1d", "/resample", {"bucket": "1d"}),
+    ("bucket=1wk", "/resample", {"bucket": "1wk"}),
+    ("max_points=1000", "/resample", {"max_points": 1000}),
+    ("1h + max_points=500", "/resample", {"bucket": "1h", "max_points": 500}),
+]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    os.environ["CACHE_ENABLED"] = "false"
+
+    from fastapi.testclient import TestClient
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from sqlalchemy import select
+    from app.models import StockPrice, Symbol
+    from app.services.market_data_service import MarketDataService
+
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__])
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    records = [
+        {
+            "timestamp": start + timedelta(minutes=i),
+            "open": 100 + (i % 390) / 100,
+            "high": 101.25,
+            "low": 99.5,
+            "close": 100 + ((i * 7) % 390) / 100,
+            "volume": 1000 + i % 50,
+        }
+        for i in range(rows)
+    ]
+    db = SessionLocal()
+    try:
+        MarketDataService.upsert_price_records(db=db, symbol=SYMBOL, records=records)
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    base = f"/api/v1/market-data/stocks/{SYMBOL}"
+    print(f"{rows} one-minute bars on {engine.dialect.name}, {repeats} requests per case")
+    print("-" * 66)
+    print(f"{'case':<22} {'points':>8} {'bytes':>12} {'median ms':>11} {'p95 ms':>9}")
+    for name, path, params in CASES:
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            response = client.get(base + path, params=params)
+            body = response.content
+            timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+        print(
+            f"{name:<22} {response.json()['count']:>8,} {len(body):>12,} "
+            f"{statistics.median(timings) * 1000:>11.1f} "
+            f"{sorted(timings)[max(0, int(len(timings) * 0.95) - 1)] * 1000:>9.1f}"
+        )
+
+    with engine.begin() as conn:
+        conn.execute(StockPrice.__table__.delete().where(StockPrice.symbol_id.in_(
+            select(Symbol.id).where(Symbol.symbol == SYMBOL)
+        )))
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
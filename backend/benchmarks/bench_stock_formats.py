@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compare /stocks/{symbol} response formats: bytes, latency and peak RSS.
+
+Each format is measured in a fresh subprocess so peak RSS is not shared
+between runs.
+
+Usage:
+    python benchmarks/bench_stock_formats.py [rows] [repeats]
+
+Set BENCH_DATABASE_URL to run against PostgreSQL; defaults to a temporary
+SQLite file.
+"""
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYMBOL = "BENCHFMT"
+FORMATS = ["json", "columnar", "csv", "arrow"]
+
+
+def current_rss_kb():
+    """Resident set size of this process in KiB."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def seed(url, rows):
+    """Insert synthetic hourly bars for SYMBOL."""
+    from sqlalchemy import create_engine
+    from app.database import Base
+    from app.models import StockPrice, Symbol
+    from app.services.market_data_service import MarketDataService
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__])
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    records = [
+        {
+            "timestamp": start + timedelta(hours=i),
+            "open": 100 + (i % 100) / 100,
+            "high": 101.25,
+            "low": 99.5,
+            "close": 100.75,
+            "volume": 1000 + i,
+        }
+        for i in range(rows)
+    ]
+    db = sessionmaker(bind=engine)()
+    try:
+        MarketDataService.upsert_price_records(db=db, symbol=SYMBOL, records=records)
+    finally:
+        db.close()
+    return engine
+
+
+def measure(fmt, repeats):
+    """Child process: time repeated requests for one format and print a JSON result."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    url = f"/api/v1/market-data/stocks/{SYMBOL}"
+    params = {} if fmt == "json" else {"format": fmt}
+
+    response = client.get(url, params=params)
+    if response.status_code != 200:
+        print(json.dumps({"format": fmt, "error": response.json().get("detail")}))
+        return
+
+    baseline_kb = current_rss_kb()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get(url, params=params)
+        body = response.content
+        timings.append(time.perf_counter() - started)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        "format": fmt,
+        "bytes": len(body),
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)] * 1000,
+        "peak_rss_delta_mb": max(0, peak_kb - baseline_kb) / 1024,
+    }))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    engine = seed(url, rows)
+
+    print(f"GET /stocks/{SYMBOL} with {rows} rows on {engine.dialect.name}, {repeats} requests per format")
+    print("-" * 78)
+    print(f"{'format':<10} {'bytes':>12} {'median ms':>11} {'p95 ms':>9} {'peak RSS +MB':>14}")
+    env = dict(os.environ, DATABASE_URL=url, CACHE_ENABLED="false")
+    for fmt in FORMATS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", fmt, str(repeats)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        if "error" in result:
+            print(f"{fmt:<10} skipped: {result['error']}")
+            continue
+        print(
+            f"{fmt:<10} {result['bytes']:>12,} {result['median_ms']:>11.1f} "
+            f"{result['p95_ms']:>9.1f} {result['peak_rss_delta_mb']:>14.1f}"
+        )
+
+    from sqlalchemy import select
+    from app.models import StockPrice, Symbol
+    with engine.begin() as conn:
+        conn.execute(StockPrice.__table__.delete().where(StockPrice.symbol_id.in_(
+            select(Symbol.id).where(Symbol.symbol == SYMBOL)
+        )))
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
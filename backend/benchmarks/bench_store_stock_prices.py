@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk upsert vs. the per-row store loop for stock prices.
+
+Usage:
+    python benchmarks/bench_store_stock_prices.py [rows]
+
+Set BENCH_DATABASE_URL to run against PostgreSQL; defaults to a temporary
+SQLite file.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import StockPrice, Symbol
+from app.schemas.market_data import StockPriceResponse
+from app.services.market_data_service import MarketDataService
+from app.services.symbol_service import SymbolService
+
+
+def make_prices(count):
+    """Build synthetic hourly bars."""
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    return [
+        StockPriceResponse(
+            timestamp=start + timedelta(hours=i),
+            open=Decimal("100.00"),
+            high=Decimal("101.00"),
+            low=Decimal("99.00"),
+            close=Decimal("100.50"),
+            volume=1000 + i,
+        )
+        for i in range(count)
+    ]
+
+
+def per_row_store(db, symbol, prices):
+    """The original SELECT-then-add loop, kept here as the baseline."""
+    stored_count = 0
+    symbol_id = SymbolService.get_id(db, symbol, create=True)
+    for price_data in prices:
+        existing = db.query(StockPrice).filter(
+            and_(
+                StockPrice.symbol_id == symbol_id,
+                StockPrice.timestamp == price_data.timestamp
+            )
+        ).first()
+
+        if existing:
+            existing.open = price_data.open
+            existing.high = price_data.high
+            existing.low = price_data.low
+            existing.close = price_data.close
+            existing.volume = price_data.volume
+        else:
+            db.add(StockPrice(
+                symbol_id=symbol_id,
+                timestamp=price_data.timestamp,
+                open=price_data.open,
+                high=price_data.high,
+                low=price_data.low,
+                close=price_data.close,
+                volume=price_data.volume,
+            ))
+            stored_count += 1
+    db.commit()
+    return stored_count
+
+
+def run(label, func, session_factory, symbol, prices):
+    """Time one store call on a fresh session."""
+    db = session_factory()
+    try:
+        started = time.perf_counter()
+        result = func(db, symbol, prices)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"{label:<28} {elapsed:8.3f}s  {len(prices) / elapsed:10.0f} rows/s  {result}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    url = os.environ.get("BENCH_DATABASE_URL")
+    tmpdir = None
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__])
+    session_factory = sessionmaker(bind=engine)
+    prices = make_prices(rows)
+    bulk = lambda db, symbol, data: MarketDataService.upsert_stock_prices(db=db, symbol=symbol, prices=data)
+
+    print(f"Benchmarking {rows} rows on {engine.dialect.name}")
+    print("-" * 70)
+    run("per-row loop (insert)", per_row_store, session_factory, "BENCH_A", prices)
+    run("per-row loop (update)", per_row_store, session_factory, "BENCH_A", prices)
+    run("bulk upsert (insert)", bulk, session_factory, "BENCH_B", prices)
+    run("bulk upsert (update)", bulk, session_factory, "BENCH_B", prices)
+
+    with engine.begin() as conn:
+        conn.execute(StockPrice.__table__.delete().where(StockPrice.symbol_id.in_(
+            select(Symbol.id).where(Symbol.symbol.in_(["BENCH_A", "BENCH_B"]))
+        )))
+    engine.dispose()
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Time a parameter sweep of a bull put spread with one worker and with a pool.
+
+Usage:
+    python benchmarks/bench_sweep.py [years] [workers]
+
+Uses the synthetic data of bench_backtest.py with stored-chain pricing and a
+48-run grid over strike offsets, the DTE window and the profit target. With
+the data memory-mapped once per worker, runs per second should grow close
+to linearly with workers up to the number of cores.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_backtest import STRATEGIES, make_data
+from app.schemas.backtest import StrategyDefinition, SweepDefinition
+from app.services.backtest_engine import BacktestData
+from app.services.backtest_sweep import BacktestSweep
+
+SWEEP = {"mode": "grid", "parameters": {
+    "options_selection.legs.0.strike_offset": [0.02, 0.03, 0.04, 0.05],
+    "options_selection.legs.1.strike_offset": [0.07, 0.1],
+    "options_selection.min_dte": [20, 30, 40],
+    "exit_conditions.conditions.0.value": [0.5, 0.75],
+}}
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    bars, frame = make_data(years)
+    data = BacktestData("BENCH", bars, BacktestData.chain_from_frame(frame))
+    strategy = StrategyDefinition.model_validate({
+        "name": "bull put spread", "underlying_symbol": "BENCH", "execution": {"pricing": "chain"},
+        **STRATEGIES["bull put spread"],
+    })
+    sweep = SweepDefinition.model_validate(SWEEP)
+    runs = len(BacktestSweep.combinations(sweep))
+
+    print(f"{years} years of daily bars, {len(frame):,} stored quotes, {runs} runs")
+    print("-" * 48)
+    print(f"{'workers':>8} {'seconds':>10} {'runs/s':>10} {'speedup':>10}")
+    baseline = None
+    for count in sorted({1, workers}):
+        data.cache.clear()
+        started = time.perf_counter()
+        finished = sum(1 for _ in BacktestSweep.run(strategy, data, sweep, workers=count))
+        seconds = time.perf_counter() - started
+        baseline = baseline or seconds
+        print(f"{count:>8} {seconds:>10.2f} {finished / seconds:>10.1f} {baseline / seconds:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
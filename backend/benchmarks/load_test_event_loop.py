@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Load test: /stocks/{symbol} latency while slow /options/{underlying} calls are in flight.
+
+The options provider is replaced with a fake that blocks its thread for
+OPTIONS_DELAY seconds, like a slow yfinance call. If handlers block the event
+loop, /stocks p99 jumps to roughly that delay; with the threadpool offload it
+stays flat.
+
+Usage:
+    python benchmarks/load_test_event_loop.py [stock_requests] [concurrent_options_calls]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, get_db
+from app.main import app
+from app.models import OptionsChain, StockPrice, Symbol
+from app.services.bulk_loader import BulkLoader
+from app.services.market_data_service import MarketDataService
+
+OPTIONS_DELAY = 1.0
+
+
+def slow_options_frame(symbol, expiration_date=None):
+    """Stand-in for a slow blocking option_chain call."""
+    time.sleep(OPTIONS_DELAY)
+    return pd.DataFrame({
+        "expiration_date": [pd.Timestamp("2030-01-18").date()],
+        "strike": [100.0],
+        "option_type": ["C"],
+        "bid": [1.0],
+        "ask": [1.1],
+        "last": [1.05],
+        "volume": [10],
+        "open_interest": [100],
+        "implied_volatility": [0.2],
+    })
+
+
+def slow_underlying_price(symbol):
+    """Stand-in for a slow blocking ticker.info call."""
+    time.sleep(OPTIONS_DELAY / 4)
+    return 100.0
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def time_stock_requests(client, count):
+    """Sequential /stocks requests; returns latencies in ms."""
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.get("/api/v1/market-data/stocks/SPY", params={"limit": 100})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def run(stock_requests, options_calls):
+    """Measure /stocks latency alone and with options calls in flight."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        baseline = await time_stock_requests(client, stock_requests)
+
+        async def options_loop():
+            deadline = time.perf_counter() + OPTIONS_DELAY * 3
+            while time.perf_counter() < deadline:
+                response = await client.get("/api/v1/market-data/options/SPY")
+                response.raise_for_status()
+
+        background = [asyncio.create_task(options_loop()) for _ in range(options_calls)]
+        await asyncio.sleep(0.05)
+        loaded = await time_stock_requests(client, stock_requests)
+        await asyncio.gather(*background)
+
+    print(f"{'scenario':<28} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    print("-" * 62)
+    for label, values in (("stocks alone", baseline), (f"stocks + {options_calls} options calls", loaded)):
+        print(f"{label:<28} {percentile(values, 50):10.2f} {percentile(values, 99):10.2f} {max(values):10.2f}")
+
+
+def main():
+    stock_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    options_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    tmpdir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(tmpdir.name, 'load.db')}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Symbol.__table__, StockPrice.__table__, OptionsChain.__table__])
+    session_factory = sessionmaker(bind=engine)
+
+    index = pd.date_range("2024-01-01", periods=2000, freq="h", tz="UTC", name="Datetime")
+    data = pd.DataFrame({"Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.5, "Volume": 1000}, index=index)
+    db = session_factory()
+    BulkLoader.load_prices(db=db, frame=BulkLoader.normalize_price_frame(data, symbol="SPY"))
+    db.close()
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    MarketDataService.fetch_options_frame = staticmethod(slow_options_frame)
+    MarketDataService.fetch_underlying_price = staticmethod(slow_underlying_price)
+
+    asyncio.run(run(stock_requests, options_calls))
+
+    app.dependency_overrides.clear()
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
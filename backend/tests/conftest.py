@@ -0,0 +1,45 @@
+"""
+Shared fixtures.
+
+Tests run against a throwaway SQLite database and in-process backends only:
+no PostgreSQL, Redis or Celery broker is needed. The environment is set
+before anything imports app.config.
+"""
+import os
+import tempfile
+
+_TMPDIR = tempfile.mkdtemp(prefix="hawkiz-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'test.db')}"
+os.environ["CACHE_ENABLED"] = "false"
+os.environ["BACKTEST_JOB_BACKEND"] = "inprocess"
+os.environ["DATA_LAKE_DIR"] = os.path.join(_TMPDIR, "lake")
+os.environ.pop("REDIS_URL", None)
+
+import pytest
+from app.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.services.chain_index import ChainIndexCache
+from app.services.iv_surface import IVSurfaceService
+from app.services.price_cache import PriceSeriesCache
+from app.services.symbol_service import SymbolService
+
+
+def reset_database() -> None:
+    """Recreate every table and drop process caches that refer to old rows."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SymbolService.clear_cache()
+    PriceSeriesCache.invalidate()
+    ChainIndexCache.invalidate()
+    IVSurfaceService.invalidate()
+
+
+@pytest.fixture
+def db():
+    """Session on an empty schema."""
+    reset_database()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
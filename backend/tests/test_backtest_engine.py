@@ -0,0 +1,258 @@
+"""Backtest engine results checked against hand-computed trades and metrics."""
+import math
+from datetime import date, datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import settings
+from app.schemas.backtest import StrategyDefinition
+from app.services.backtest_engine import BacktestData, BacktestEngine
+from app.services.greeks_service import EXPIRY_HOUR_UTC, SECONDS_PER_YEAR
+
+# Ten daily bars, Mon 2024-01-08 to Fri 2024-01-19
+DAYS = pd.bdate_range("2024-01-08", periods=10)
+MS_PER_DAY = 86_400_000
+
+
+def bars(close) -> dict:
+    close = np.asarray(close, dtype=np.float64)
+    return {
+        "timestamp": DAYS[:len(close)].to_numpy(dtype="datetime64[ms]"),
+        "open": close, "high": close, "low": close, "close": close,
+        "volume": np.full(len(close), 1_000_000),
+    }
+
+
+def chain(mids, expiration: date, strike: float = 100.0, spot: float = 100.0) -> dict:
+    """One call quoted at 20:00 UTC on each bar at the given mid prices (±0.05)."""
+    mids = np.asarray(mids, dtype=np.float64)
+    frame = pd.DataFrame({
+        "timestamp": DAYS[:len(mids)].tz_localize("UTC") + pd.Timedelta(hours=20),
+        "expiration_date": expiration,
+        "strike": strike,
+        "option_type": "C",
+        "bid": mids - 0.05,
+        "ask": mids + 0.05,
+        "last": mids,
+        "volume": 100,
+        "open_interest": 1000,
+        "implied_volatility": 0.2,
+        "delta": 0.5,
+        "underlying_price": spot,
+    })
+    return BacktestData.chain_from_frame(frame)
+
+
+def strategy(entry_above: float, exits=(), pricing="chain", sizing=None, selection=None, **execution) -> StrategyDefinition:
+    """Single long ATM call entered while the close is above a level."""
+    return StrategyDefinition.model_validate({
+        "name": "test",
+        "underlying_symbol": "TEST",
+        "entry_conditions": {"conditions": [{"type": "price_action", "condition": "price_above", "value": entry_above}]},
+        "exit_conditions": {"conditions": list(exits)},
+        "position_sizing": sizing or {"method": "fixed_contracts", "value": 1},
+        "options_selection": selection or {"expiration": "nearest", "min_dte": 1, "max_dte": 30},
+        "execution": {"pricing": pricing, **execution},
+    })
+
+
+def black_scholes_call(spot, strike, t, sigma, rate, dividend_yield):
+    """Textbook Black-Scholes call value."""
+    d1 = (math.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma * sigma) * t) / (sigma * math.sqrt(t))
+    d2 = d1 - sigma * math.sqrt(t)
+    n = lambda x: 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+    return spot * math.exp(-dividend_yield * t) * n(d1) - strike * math.exp(-rate * t) * n(d2)
+
+
+def utc(day: pd.Timestamp) -> datetime:
+    return day.to_pydatetime().replace(tzinfo=timezone.utc)
+
+
+def test_model_priced_long_call(monkeypatch):
+    monkeypatch.setattr(settings, "RISK_FREE_RATE", 0.05)
+    monkeypatch.setattr(settings, "DIVIDEND_YIELD", 0.0)
+    close = [100.0, 101.0, 100.0, 103.0, 102.0, 101.0, 102.0, 101.0, 100.0, 101.0]
+    data = BacktestData("TEST", bars(close))
+    plan = strategy(
+        102.5,  # Only Thu 2024-01-11 (bar 3) closes above
+        exits=[{"type": "time_based", "max_holding_days": 2}],
+        pricing="model",
+        sizing={"method": "fixed_contracts", "value": 2},
+        selection={"expiration": "nearest", "min_dte": 7, "max_dte": 45},
+        volatility_lookback=2,
+    )
+    
+    result = BacktestEngine.run(plan, data, initial_capital=10_000)
+    
+    # Nearest Friday at least 7 days after Thu 01-11 is 01-19; the ATM strike rounds 103
+    # The first bar at least two calendar days later is Mon 01-15 (bar 5)
+    assert len(result.trades) == 1
+    trade = result.trades[0]
+    assert trade["legs"][0]["strike"] == 103.0
+    assert trade["legs"][0]["expiration_date"] == date(2024, 1, 19)
+    assert trade["entry_time"] == utc(DAYS[3])
+    assert trade["exit_time"] == utc(DAYS[5])
+    assert trade["bars_held"] == 2
+    assert trade["exit_reason"] == "time_based"
+    assert trade["quantity"] == 2
+    
+    periods_per_year = 9 / ((DAYS[9] - DAYS[0]).total_seconds() / (365.25 * 24 * 3600))
+    expiry = datetime(2024, 1, 19, EXPIRY_HOUR_UTC)
+    
+    def value(bar: int) -> float:
+        returns = np.diff(np.log(close))[bar - 2:bar]
+        sigma = float(np.std(returns, ddof=1)) * math.sqrt(periods_per_year)
+        bar_end = DAYS[bar].to_pydatetime() + pd.Timedelta(days=1) - pd.Timedelta(milliseconds=1)
+        t = (expiry - bar_end).total_seconds() / SECONDS_PER_YEAR
+        return black_scholes_call(close[bar], 103.0, t, sigma, 0.05, 0.0)
+    
+    entry, exit = value(3), value(5)
+    assert trade["entry_value"] == pytest.approx(entry, abs=1e-4)
+    assert trade["exit_value"] == pytest.approx(exit, abs=1e-4)
+    assert trade["pnl"] == pytest.approx((exit - entry) * 100 * 2, abs=0.01)
+    assert result.equity[-1] == pytest.approx(10_000 + (exit - entry) * 200)
+    assert result.equity[2] == 10_000
+
+
+@pytest.mark.parametrize("mids,exits,offset,reason", [
+    ([2.0, 2.4, 3.1, 3.5, 3.5], [{"type": "profit_target", "value": 0.5}], 2, "profit_target"),
+    ([2.0, 1.7, 1.5, 1.3, 1.0], [{"type": "stop_loss", "value": -0.3}], 3, "stop_loss"),
+    ([2.0, 1.7, 1.3, 3.1, 3.5], [{"type": "profit_target", "value": 0.5}, {"type": "stop_loss", "value": 0.3}], 2, "stop_loss"),
+    ([2.0, 2.0, 2.0, 2.0, 2.0], [{"type": "profit_target", "target_type": "dollar", "value": 50}], 4, "end_of_data"),
+    ([2.0, 2.2, 2.6, 2.6, 2.6], [{"type": "profit_target", "target_type": "dollar", "value": 50}], 2, "profit_target"),
+])
+def test_exit_offsets(mids, exits, offset, reason):
+    close = [101.0, 100.0, 100.0, 100.0, 100.0]
+    data = BacktestData("TEST", bars(close), chain(mids, date(2024, 1, 26)))
+    
+    result = BacktestEngine.run(strategy(100.5, exits), data)
+    
+    trade, = result.trades
+    assert trade["bars_held"] == offset
+    assert trade["exit_reason"] == reason
+    assert trade["entry_value"] == 2.0
+    assert trade["exit_value"] == mids[offset]
+    assert trade["pnl"] == pytest.approx((mids[offset] - 2.0) * 100)
+    # Open positions are marked to market bar by bar
+    np.testing.assert_allclose(result.equity[:offset], 100_000 + (np.array(mids[:offset]) - 2.0) * 100)
+
+
+def test_natural_fills_and_commission():
+    data = BacktestData("TEST", bars([101.0, 100.0, 100.0]), chain([2.0, 2.5, 3.0], date(2024, 1, 26)))
+    plan = strategy(100.5, [{"type": "time_based", "max_holding_days": 2}], fill="natural", commission_per_contract=0.65)
+    
+    trade, = BacktestEngine.run(plan, data).trades
+    
+    # Buy at the ask, sell at the bid, commission on both sides
+    assert (trade["entry_value"], trade["exit_value"]) == (2.05, 2.95)
+    assert trade["pnl"] == pytest.approx(0.9 * 100 - 2 * 0.65)
+
+
+def test_max_positions_limits_open_trades():
+    close = [100.0] * 10
+    data = BacktestData("TEST", bars(close), chain([2.0] * 10, date(2024, 1, 26)))
+    plan = strategy(
+        99.0, [{"type": "time_based", "max_holding_days": 3}],
+        sizing={"method": "fixed_contracts", "value": 1, "max_positions": 2},
+    )
+    
+    trades = BacktestEngine.run(plan, data).trades
+    
+    # Bar 2 and 7 find two positions open; bars 3 to 5 open as earlier ones close
+    entries = [DAYS.get_loc(pd.Timestamp(trade["entry_time"]).tz_localize(None)) for trade in trades]
+    exits = [DAYS.get_loc(pd.Timestamp(trade["exit_time"]).tz_localize(None)) for trade in trades]
+    assert entries == [0, 1, 3, 4, 5, 6, 8]
+    assert exits == [3, 4, 5, 5, 8, 9, 9]
+    assert [trade["exit_reason"] for trade in trades][-1] == "end_of_data"
+    for bar in range(10):
+        assert sum(entry <= bar < exit for entry, exit in zip(entries, exits)) <= 2
+
+
+def test_available_capital_caps_quantity():
+    data = BacktestData("TEST", bars([100.0] * 6), chain([2.0] * 6, date(2024, 1, 26)))
+    plan = strategy(
+        99.0, [{"type": "time_based", "max_holding_days": 3}],
+        sizing={"method": "fixed_contracts", "value": 10, "max_positions": 2},
+    )
+    
+    trades = BacktestEngine.run(plan, data, initial_capital=500).trades
+    
+    # $200 per contract: $500 buys two, leaving $100, too little for a second position
+    assert [trade["quantity"] for trade in trades] == [2, 2]
+    assert [trade["entry_time"] for trade in trades] == [utc(DAYS[0]), utc(DAYS[3])]
+
+
+def test_settles_at_intrinsic_value_on_expiry():
+    close = [101.0, 102.0, 103.0, 103.0, 104.0, 105.0]
+    # The last quote before expiry is 3.00, but the position settles at 104 - 100
+    data = BacktestData("TEST", bars(close), chain([2.0, 2.5, 3.0, 3.0, 3.0, 3.0], date(2024, 1, 12)))
+    
+    result = BacktestEngine.run(strategy(100.5, []), data)
+    
+    trade = result.trades[0]
+    assert trade["exit_time"] == utc(DAYS[4])
+    assert trade["exit_reason"] == "expiration"
+    assert trade["exit_value"] == 4.0
+    assert trade["pnl"] == pytest.approx(200.0)
+    assert trade["legs"][0]["expiration_date"] == date(2024, 1, 12)
+
+
+def test_compute_metrics():
+    timestamps = DAYS[:4].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    equity = np.array([100.0, 110.0, 99.0, 121.0])
+    pnls = np.array([10.0, -11.0, 22.0])
+    
+    metrics = BacktestEngine.compute_metrics(timestamps, equity, pnls, periods_per_year=252)
+    
+    returns = [0.1, -0.1, 22 / 99]
+    mean = (22 / 99) / 3
+    deviation = math.sqrt(sum((r - mean) ** 2 for r in returns) / 3)
+    downside = math.sqrt(0.01 / 3)
+    cagr = 1.21 ** (365.25 / 3) - 1
+    expected = {
+        "total_pnl": 21.0,
+        "total_return": 0.21,
+        "annualized_return": mean * 252,
+        "cagr": cagr,
+        "volatility": deviation * math.sqrt(252),
+        "sharpe_ratio": mean / deviation * math.sqrt(252),
+        "sortino_ratio": mean / downside * math.sqrt(252),
+        "calmar_ratio": cagr / 0.1,
+        "max_drawdown": 11.0,
+        "max_drawdown_pct": 0.1,
+        "max_drawdown_days": 1.0,
+        # 5th percentile interpolates a tenth of the way from -0.1 to 0.1
+        "var_95": 0.08,
+        "total_trades": 3,
+        "winning_trades": 2,
+        "losing_trades": 1,
+        "win_rate": 2 / 3,
+        "average_win": 16.0,
+        "average_loss": -11.0,
+        "largest_win": 22.0,
+        "largest_loss": -11.0,
+        "profit_factor": 32 / 11,
+    }
+    assert metrics.keys() == expected.keys()
+    for name, value in expected.items():
+        assert metrics[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_compute_metrics_without_trades():
+    metrics = BacktestEngine.compute_metrics(np.array([0, MS_PER_DAY]), np.array([100.0, 100.0]), np.empty(0), 252)
+    assert metrics["total_trades"] == 0
+    assert metrics["profit_factor"] == 0.0
+    assert metrics["max_drawdown"] == 0.0
+    assert metrics["sharpe_ratio"] == 0.0
+
+
+def test_run_needs_two_bars():
+    with pytest.raises(ValueError, match="Need at least 2 price bars for TEST, got 1"):
+        BacktestEngine.run(strategy(0.0, pricing="model"), BacktestData("TEST", bars([100.0])))
+
+
+def test_loaders_reject_empty_ranges(db, tmp_path):
+    with pytest.raises(ValueError, match="No price bars for NONE in range"):
+        BacktestEngine.load_data(db, "NONE", date(2024, 1, 1), date(2024, 2, 1))
+    with pytest.raises(ValueError, match="No price bars for NONE in range"):
+        BacktestEngine.load_lake_data("NONE", date(2024, 1, 1), date(2024, 2, 1), root=tmp_path)
@@ -0,0 +1,197 @@
+"""Backtest job API against the in-process backend."""
+import threading
+import time
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.config import settings
+from app.main import app
+from app.services.backtest_jobs import BacktestJobService, result_cache
+from app.services.market_data_service import MarketDataService
+
+API = "/api/v1/backtest"
+
+STRATEGY = {
+    "name": "rsi calls",
+    "underlying_symbol": "TEST",
+    "entry_conditions": {"conditions": [{"type": "technical_indicator", "indicator": "RSI", "period": 5, "operator": "<", "value": 45}]},
+    "exit_conditions": {"conditions": [{"type": "profit_target", "value": 0.5}, {"type": "time_based", "max_holding_days": 10}]},
+    "position_sizing": {"method": "fixed_contracts", "value": 1, "max_positions": 1},
+    "options_selection": {"expiration": "nearest", "min_dte": 7, "max_dte": 45},
+    "execution": {"pricing": "model"},
+}
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """Client over a database holding 120 daily bars of TEST."""
+    monkeypatch.setattr(settings, "BACKTEST_JOB_POLL_INTERVAL", 0.02)
+    result_cache.clear()
+    days = pd.bdate_range("2024-01-01", periods=120, tz="UTC")
+    close = 100 + 10 * np.sin(np.arange(len(days)) / 6)
+    MarketDataService.upsert_price_records(db, "TEST", [
+        {"timestamp": day.to_pydatetime(), "open": price, "high": price + 1, "low": price - 1, "close": price, "volume": 1000}
+        for day, price in zip(days, close.round(2))
+    ])
+    yield TestClient(app)
+    result_cache.clear()
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Hold jobs after they start running until the event is set."""
+    gate = threading.Event()
+    compute = BacktestJobService._compute
+    
+    def gated(kind, request, report):
+        assert gate.wait(10), "gate never opened"
+        return compute(kind, request, report)
+    
+    monkeypatch.setattr(BacktestJobService, "_compute", staticmethod(gated))
+    yield gate
+    gate.set()
+
+
+def wait_for(client: TestClient, job_id: str) -> dict:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = client.get(f"{API}/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_submit_poll_and_fetch_result(client):
+    response = client.post(f"{API}/run", json={"strategy": STRATEGY})
+    assert response.status_code == 202
+    submitted = response.json()
+    assert submitted["status"] in ("pending", "running")
+    assert (submitted["kind"], submitted["symbol"]) == ("backtest", "TEST")
+    
+    job = wait_for(client, submitted["job_id"])
+    assert job["status"] == "completed"
+    assert (job["phase"], job["completed"], job["total"], job["cached"]) == ("done", 1, 1, False)
+    
+    body = client.get(f"{API}/results/{submitted['job_id']}").json()
+    assert body["job"]["job_id"] == submitted["job_id"]
+    result = body["result"]
+    assert (result["symbol"], result["pricing"]) == ("TEST", "model")
+    assert len(result["equity_curve"]["equity"]) == 120
+    assert result["metrics"]["total_trades"] == len(result["trades"]) > 0
+
+
+def test_identical_resubmit_is_served_from_cache(client):
+    first = client.post(f"{API}/run", json={"strategy": STRATEGY}).json()
+    wait_for(client, first["job_id"])
+    first_result = client.get(f"{API}/results/{first['job_id']}").json()["result"]
+    
+    second = client.post(f"{API}/run", json={"strategy": STRATEGY}).json()
+    job = wait_for(client, second["job_id"])
+    
+    assert job["cached"] is True
+    assert client.get(f"{API}/results/{second['job_id']}").json()["result"] == first_result
+    
+    # Opting out recomputes
+    third = client.post(f"{API}/run", json={"strategy": STRATEGY, "use_cache": False}).json()
+    assert wait_for(client, third["job_id"])["cached"] is False
+
+
+def test_results_conflict_while_running(client, gate):
+    job_id = client.post(f"{API}/run", json={"strategy": STRATEGY}).json()["job_id"]
+    
+    response = client.get(f"{API}/results/{job_id}")
+    assert response.status_code == 409
+    assert client.get(f"{API}/jobs/{job_id}").json()["status"] in ("pending", "running")
+    
+    gate.set()
+    assert wait_for(client, job_id)["status"] == "completed"
+    assert client.get(f"{API}/results/{job_id}").status_code == 200
+
+
+def test_unknown_job_is_not_found(client):
+    assert client.get(f"{API}/jobs/missing").status_code == 404
+    assert client.get(f"{API}/results/missing").status_code == 404
+    assert client.get(f"{API}/jobs/missing/events").status_code == 404
+    with client.websocket_connect(f"{API}/jobs/missing/ws") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 4404
+
+
+def test_job_without_bars_fails(client):
+    strategy = {**STRATEGY, "underlying_symbol": "NONE"}
+    job_id = client.post(f"{API}/run", json={"strategy": strategy}).json()["job_id"]
+    
+    job = wait_for(client, job_id)
+    
+    assert job["status"] == "failed"
+    assert job["error"] == "No price bars for NONE in range"
+    assert client.get(f"{API}/results/{job_id}").status_code == 500
+
+
+def parse_sse(text: str) -> list:
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], fields["data"]))
+    return events
+
+
+def test_sse_streams_progress_then_one_result(client, gate):
+    job_id = client.post(f"{API}/run", json={"strategy": STRATEGY}).json()["job_id"]
+    threading.Timer(0.2, gate.set).start()
+    
+    response = client.get(f"{API}/jobs/{job_id}/events")
+    
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [(event, orjson.loads(data)) for event, data in parse_sse(response.text)]
+    names = [event for event, _ in events]
+    assert names[-1] == "result" and names.count("result") == 1
+    assert set(names[:-1]) == {"progress"} and len(names) >= 3
+    assert events[0][1]["status"] in ("pending", "running")
+    assert events[-2][1]["status"] == "completed"
+    assert events[-1][1]["metrics"]["total_trades"] > 0
+
+
+def test_websocket_streams_progress_then_one_result(client, gate):
+    job_id = client.post(f"{API}/run", json={"strategy": STRATEGY}).json()["job_id"]
+    threading.Timer(0.2, gate.set).start()
+    
+    messages = []
+    with client.websocket_connect(f"{API}/jobs/{job_id}/ws") as websocket:
+        while not messages or messages[-1]["event"] != "result":
+            messages.append(websocket.receive_json())
+    
+    names = [message["event"] for message in messages]
+    assert names.count("result") == 1
+    assert set(names[:-1]) == {"progress"} and len(names) >= 3
+    assert messages[0]["data"]["status"] in ("pending", "running")
+    assert messages[-2]["data"]["status"] == "completed"
+    assert messages[-1]["data"]["symbol"] == "TEST"
+
+
+def test_sweep_runs_come_back_in_index_order(client):
+    request = {
+        "strategy": STRATEGY,
+        "workers": 2,
+        "sweep": {"parameters": {
+            "exit_conditions.conditions.0.value": [0.2, 0.5, 1.0],
+            "position_sizing.max_positions": [1, 3],
+        }},
+    }
+    job_id = client.post(f"{API}/sweep", json=request).json()["job_id"]
+    
+    job = wait_for(client, job_id)
+    
+    assert job["status"] == "completed"
+    assert (job["completed"], job["total"]) == (6, 6)
+    runs = client.get(f"{API}/results/{job_id}").json()["result"]["runs"]
+    assert [run["index"] for run in runs] == list(range(6))
+    assert all("metrics" in run for run in runs)
+    assert {(run["parameters"]["exit_conditions.conditions.0.value"], run["parameters"]["position_sizing.max_positions"]) for run in runs} == {
+        (value, positions) for value in (0.2, 0.5, 1.0) for positions in (1, 3)
+    }
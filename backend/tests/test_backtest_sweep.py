@@ -0,0 +1,142 @@
+"""Sweep combinations, parameter paths and pooled runs."""
+import json
+import math
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from app.schemas.backtest import StrategyDefinition, SweepDefinition
+from app.services.backtest_engine import BacktestData, BacktestEngine
+from app.services.backtest_sweep import BacktestSweep
+
+DAYS = pd.bdate_range("2024-01-02", periods=40)
+
+
+def data() -> BacktestData:
+    """Forty daily bars swinging around 100 and calls quoted at 20:00 UTC until they expire."""
+    close = 100.0 + 6.0 * np.sin(np.arange(len(DAYS)) / 3.0)
+    bars = {
+        "timestamp": DAYS.to_numpy(dtype="datetime64[ms]"),
+        "open": close, "high": close + 0.5, "low": close - 0.5, "close": close,
+        "volume": np.full(len(DAYS), 1_000_000),
+    }
+    rows = []
+    for day, spot in zip(DAYS, close):
+        for expiration in (date(2024, 2, 16), date(2024, 3, 15)):
+            days = (expiration - day.date()).days
+            if days < 0:
+                continue
+            for strike in np.arange(90.0, 115.0, 5.0):
+                mid = round(max(spot - strike, 0.0) + 0.04 * spot * math.sqrt(days / 30.0), 2)
+                rows.append({
+                    "timestamp": day.tz_localize("UTC") + pd.Timedelta(hours=20),
+                    "expiration_date": expiration, "strike": strike, "option_type": "C",
+                    "bid": mid - 0.05, "ask": mid + 0.05, "last": mid, "volume": 100, "open_interest": 1000,
+                    "implied_volatility": 0.25, "delta": 0.5, "underlying_price": spot,
+                })
+    return BacktestData("TEST", bars, BacktestData.chain_from_frame(pd.DataFrame(rows)))
+
+
+STRATEGY = StrategyDefinition.model_validate({
+    "name": "sweep",
+    "underlying_symbol": "TEST",
+    "entry_conditions": {"conditions": [{"type": "price_action", "condition": "price_below", "value": 99.0}]},
+    "exit_conditions": {"conditions": [
+        {"type": "profit_target", "value": 0.5},
+        {"type": "time_based", "max_holding_days": 5},
+    ]},
+    "position_sizing": {"method": "fixed_contracts", "value": 1, "max_positions": 2},
+    "options_selection": {"expiration": "nearest", "min_dte": 7, "max_dte": 60},
+})
+
+
+def test_grid_combinations_cover_the_product_in_order():
+    sweep = SweepDefinition.model_validate({"parameters": {"a.b": [1, 2, 3], "c": ["x", "y"]}})
+    
+    runs = BacktestSweep.combinations(sweep)
+    
+    assert runs == [{"a.b": a, "c": c} for a in (1, 2, 3) for c in ("x", "y")]
+
+
+def test_random_combinations_are_seeded_and_stay_in_range():
+    sweep = SweepDefinition.model_validate({
+        "mode": "random", "samples": 200, "seed": 7,
+        "parameters": {"days": {"low": 1, "high": 4}, "target": {"low": 0.1, "high": 0.9}, "kind": ["a", "b"]},
+    })
+    
+    runs = BacktestSweep.combinations(sweep)
+    
+    assert runs == BacktestSweep.combinations(sweep)
+    assert runs != BacktestSweep.combinations(sweep.model_copy(update={"seed": 8}))
+    assert {run["days"] for run in runs} == {1, 2, 3, 4}
+    assert all(isinstance(run["days"], int) for run in runs)
+    assert all(0.1 <= run["target"] <= 0.9 and isinstance(run["target"], float) for run in runs)
+    assert {run["kind"] for run in runs} == {"a", "b"}
+
+
+def test_apply_sets_values_at_dotted_paths():
+    base = STRATEGY.model_dump(mode="json")
+    
+    strategy = BacktestSweep.apply(base, {
+        "exit_conditions.conditions.1.max_holding_days": 9, "position_sizing.max_positions": 4,
+    })
+    
+    assert strategy.exit_conditions.conditions[1].max_holding_days == 9
+    assert strategy.position_sizing.max_positions == 4
+    assert base["position_sizing"]["max_positions"] == 2
+
+
+@pytest.mark.parametrize("path", [
+    "exit_conditions.conditions.2.value",          # list position past the end
+    "exit_conditions.conditions.first.value",      # list position that is not a number
+    "position_sizing.maximum",                     # missing key
+    "name.length",                                 # path through a string
+    "options_selection.legs.0.strike_offset",      # through None
+])
+def test_paths_missing_from_the_strategy_fail_before_any_run(path, monkeypatch):
+    monkeypatch.setattr(BacktestEngine, "run", staticmethod(lambda *args, **kwargs: pytest.fail("ran")))
+    sweep = SweepDefinition.model_validate({"parameters": {path: [1]}})
+    
+    with pytest.raises(ValueError, match=f"Sweep parameter {path} does not exist"):
+        next(BacktestSweep.run(STRATEGY, data(), sweep, workers=1))
+
+
+def test_each_run_reports_its_own_error(monkeypatch):
+    original = BacktestEngine.run
+    
+    def run(strategy, data, initial_capital):
+        if strategy.position_sizing.max_positions == 3:
+            raise ZeroDivisionError("division by zero")
+        return original(strategy, data, initial_capital)
+    
+    monkeypatch.setattr(BacktestEngine, "run", staticmethod(run))
+    sweep = SweepDefinition.model_validate({"parameters": {
+        "position_sizing.max_positions": [1, 3, 2], "exit_conditions.conditions.0.value": [0.5, -1.0],
+    }})
+    
+    runs = list(BacktestSweep.run(STRATEGY, data(), sweep, workers=1))
+    
+    assert [run["index"] for run in runs] == list(range(6))
+    errors = {run["index"]: run["error"] for run in runs if "error" in run}
+    # A negative profit target fails validation; max_positions 3 then fails in the engine
+    assert set(errors) == {1, 2, 3, 5}
+    assert errors[2] == "ZeroDivisionError: division by zero"
+    assert all("validation error" in errors[index] for index in (1, 3, 5))
+    assert all("metrics" in run for run in runs if run["index"] in (0, 4))
+
+
+def test_pooled_runs_match_runs_in_this_process():
+    sweep = SweepDefinition.model_validate({"parameters": {
+        "exit_conditions.conditions.0.value": [0.2, 0.5, 1.0],
+        "exit_conditions.conditions.1.max_holding_days": [2, 8],
+        "position_sizing.max_positions": [1, 3],
+    }})
+    backtest_data = data()
+    
+    serial = list(BacktestSweep.run(STRATEGY, backtest_data, sweep, workers=1))
+    pooled = sorted(BacktestSweep.run(STRATEGY, backtest_data, sweep, workers=2, chunk_size=3), key=lambda run: run["index"])
+    
+    assert [run["index"] for run in serial] == list(range(12))
+    assert len({run["metrics"]["total_trades"] for run in serial}) > 1
+    # NaN metrics compare equal once serialized
+    assert json.dumps(pooled) == json.dumps(serial)
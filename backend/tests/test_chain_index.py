@@ -0,0 +1,203 @@
+"""As-of chain lookups and the per-underlying index cache."""
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import settings
+from app.services.chain_index import CHAIN_FRAME_COLUMNS, ChainIndexCache, OptionsChainIndex
+from app.services.market_data_service import MarketDataService
+from app.services.options_delta_store import OptionsDeltaStore
+
+T1, T2, T3 = datetime(2024, 3, 4, 14, 30), datetime(2024, 3, 4, 15, 0), datetime(2024, 3, 5, 14, 30)
+NEAR, FAR = date(2024, 3, 15), date(2024, 4, 19)
+
+
+def chain_frame(expirations=(NEAR, FAR), strikes=(95.0, 100.0, 105.0), bid: float = 2.0) -> pd.DataFrame:
+    """Calls and puts for every expiration and strike, in no particular order."""
+    frame = pd.DataFrame([
+        {
+            "expiration_date": expiration, "strike": strike, "option_type": option_type,
+            "bid": bid, "ask": bid + 0.2, "last": bid + 0.1, "volume": 10, "open_interest": 100,
+            "implied_volatility": 0.25, "delta": 0.5 if option_type == "C" else -0.5,
+        }
+        for expiration in expirations for strike in strikes for option_type in ("P", "C")
+    ])
+    return frame.iloc[::-1].reset_index(drop=True)
+
+
+def history() -> pd.DataFrame:
+    """Three snapshots; the second drops the far expiration, the third adds a strike."""
+    snapshots = [
+        (T1, 100.0, chain_frame()),
+        (T2, 101.0, chain_frame([NEAR], bid=2.5)),
+        (T3, 99.0, chain_frame(strikes=(90.0, 95.0, 100.0, 105.0), bid=3.0)),
+    ]
+    frames = [frame.assign(timestamp=timestamp, underlying_price=spot) for timestamp, spot, frame in snapshots]
+    return pd.concat(frames[::-1], ignore_index=True)[CHAIN_FRAME_COLUMNS]
+
+
+def store_history(db, symbol: str = "TEST") -> None:
+    for timestamp, frame in history().groupby("timestamp"):
+        MarketDataService.store_options_snapshot(
+            db, symbol, frame.drop(columns=["timestamp", "underlying_price"]),
+            underlying_price=float(frame["underlying_price"].iloc[0]), timestamp=timestamp.to_pydatetime(),
+        )
+
+
+@pytest.fixture(autouse=True)
+def cache_stats(monkeypatch):
+    """Hit and miss counters starting at zero for each test."""
+    monkeypatch.setattr(ChainIndexCache, "_stats", {"hits": 0, "misses": 0, "invalidations": 0})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for cache entry ages."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr("app.services.chain_index.time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def same_index(left: OptionsChainIndex, right: OptionsChainIndex) -> bool:
+    """Whether two lookups are views of one cached index."""
+    return np.shares_memory(left.chain["timestamp"], right.chain["timestamp"])
+
+
+def test_snapshot_at_takes_the_latest_snapshot_at_or_before_a_time():
+    index = OptionsChainIndex.from_frame("TEST", history())
+    times = [
+        T1 - timedelta(seconds=1), T1, T1 + timedelta(minutes=10), T2, T3 - timedelta(milliseconds=1), T3,
+        T3 + timedelta(days=30),
+    ]
+    
+    positions = [index.snapshot_at(time) for time in times]
+    
+    assert positions == [-1, 0, 0, 1, 1, 2, 2]
+    assert index.snapshot_at(T2.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=-5)))) == 1
+    epoch = np.array([int(time.replace(tzinfo=timezone.utc).timestamp() * 1000) for time in times])
+    assert list(index.snapshots_at(epoch)) == positions
+    assert [index.snapshot_at(int(value)) for value in epoch] == positions
+    assert [index.snapshot_time(position) for position in range(3)] == [
+        time.replace(tzinfo=timezone.utc) for time in (T1, T2, T3)
+    ]
+
+
+def test_chain_at_returns_the_snapshot_in_effect_with_filters():
+    index = OptionsChainIndex.from_frame("TEST", history())
+    
+    snapshot_time, spot, frame = index.chain_at(T2 + timedelta(minutes=5))
+    
+    assert (snapshot_time, spot) == (T2.replace(tzinfo=timezone.utc), 101.0)
+    assert list(frame["expiration_date"]) == [NEAR] * 6
+    assert list(zip(frame["strike"], frame["option_type"])) == [
+        (95.0, "P"), (95.0, "C"), (100.0, "P"), (100.0, "C"), (105.0, "P"), (105.0, "C")
+    ]
+    assert (frame["bid"] == 2.5).all()
+    assert index.chain_at(T1 - timedelta(minutes=1)) is None
+    
+    _, _, filtered = index.chain_at(T3, expiration_date=FAR, min_strike=92.5, max_strike=100.0, option_type="C")
+    assert list(zip(filtered["expiration_date"], filtered["strike"])) == [(FAR, 95.0), (FAR, 100.0)]
+    assert (filtered["option_type"] == "C").all() and (filtered["bid"] == 3.0).all()
+    # An expiration the snapshot does not hold
+    assert index.chain_at(T2, expiration_date=FAR)[2].empty
+    
+    later = index.between(T2, T3)
+    assert len(later) == 2 and later.chain_at(T1) is None
+    assert later.chain_at(T3)[2].equals(index.chain_at(T3)[2])
+
+
+@pytest.mark.parametrize("store", ["rows", "delta"])
+def test_cache_serves_stored_snapshots_and_drops_them_on_store(db, monkeypatch, store):
+    monkeypatch.setattr(settings, "OPTIONS_SNAPSHOT_STORE", store)
+    OptionsDeltaStore._state.clear()
+    if store == "rows":
+        store_history(db)
+    else:
+        for timestamp, frame in history().groupby("timestamp"):
+            OptionsDeltaStore.store(
+                db, "TEST", frame.drop(columns=["timestamp", "underlying_price"]),
+                float(frame["underlying_price"].iloc[0]), timestamp.to_pydatetime(),
+            )
+    
+    first = ChainIndexCache.get(db, "TEST")
+    ranged = ChainIndexCache.get(db, "TEST", start=T2, end=T2)
+    
+    info = ChainIndexCache.cache_info()
+    assert (info["size"], info["misses"], info["hits"]) == (1, 1, 1)
+    assert len(first) == 3 and len(ranged) == 1
+    assert np.shares_memory(ranged.chain["bid"], first.chain["bid"])
+    assert not first.chain["bid"].flags.writeable
+    assert ranged.chain_at(T3)[2].equals(first.chain_at(T2)[2])
+    
+    # A new snapshot written through the service is visible on the next lookup
+    later = T3 + timedelta(hours=1)
+    if store == "rows":
+        MarketDataService.store_options_snapshot(db, "TEST", chain_frame(bid=4.0), underlying_price=98.0, timestamp=later)
+    else:
+        monkeypatch.setattr(MarketDataService, "fetch_options_frame", staticmethod(lambda symbol, expiration_date=None: chain_frame(bid=4.0)))
+        monkeypatch.setattr(MarketDataService, "fetch_underlying_price", staticmethod(lambda symbol: 98.0))
+        later = MarketDataService.capture_options_snapshot(db, "TEST")[0].replace(tzinfo=None)
+    assert ChainIndexCache.cache_info()["size"] == 0
+    refreshed = ChainIndexCache.get(db, "TEST")
+    assert len(refreshed) == 4
+    assert refreshed.chain_at(later)[1] == 98.0
+    assert ChainIndexCache.cache_info()["misses"] == 2
+
+
+def test_cache_entries_expire_after_the_ttl(db, monkeypatch, clock):
+    monkeypatch.setattr(settings, "CHAIN_INDEX_TTL", 60)
+    store_history(db)
+    first = ChainIndexCache.get(db, "TEST")
+    
+    clock.value += 60
+    assert same_index(ChainIndexCache.get(db, "TEST"), first)
+    clock.value += 1
+    reloaded = ChainIndexCache.get(db, "TEST")
+    
+    assert not same_index(reloaded, first)
+    assert ChainIndexCache.cache_info()["misses"] == 2
+    assert same_index(ChainIndexCache.get(db, "TEST"), reloaded)
+
+
+def test_cache_evicts_least_recently_used_indexes_over_the_byte_budget(db, monkeypatch):
+    for symbol in ("AAA", "BBB", "CCC"):
+        store_history(db, symbol)
+    size = OptionsChainIndex.from_frame("AAA", history()).nbytes
+    monkeypatch.setattr(settings, "CHAIN_INDEX_CACHE_MAX_MB", (2 * size + size // 2) / (1024 * 1024))
+    
+    aaa = ChainIndexCache.get(db, "AAA")
+    ChainIndexCache.get(db, "BBB")
+    assert same_index(ChainIndexCache.get(db, "AAA"), aaa)
+    ChainIndexCache.get(db, "CCC")
+    
+    info = ChainIndexCache.cache_info()
+    assert (info["size"], info["bytes"]) == (2, 2 * size)
+    assert same_index(ChainIndexCache.get(db, "AAA"), aaa)
+    assert ChainIndexCache.cache_info()["misses"] == 3
+    ChainIndexCache.get(db, "BBB")
+    assert ChainIndexCache.cache_info()["misses"] == 4
+    
+    # An index larger than the whole budget is served but not kept
+    monkeypatch.setattr(settings, "CHAIN_INDEX_CACHE_MAX_MB", (size // 2) / (1024 * 1024))
+    ChainIndexCache.invalidate()
+    assert len(ChainIndexCache.get(db, "AAA")) == 3
+    assert ChainIndexCache.cache_info()["size"] == 0
+    
+    # No budget: no cache at all
+    monkeypatch.setattr(settings, "CHAIN_INDEX_CACHE_MAX_MB", 0)
+    assert ChainIndexCache.get(db, "AAA", start=T3).chain_at(T3)[1] == 99.0
+    assert ChainIndexCache.cache_info()["size"] == 0
+
+
+def test_invalidate_drops_one_underlying_or_all(db):
+    for symbol in ("AAA", "BBB"):
+        store_history(db, symbol)
+    ChainIndexCache.get(db, "AAA")
+    ChainIndexCache.get(db, "BBB")
+    
+    ChainIndexCache.invalidate("AAA")
+    
+    assert ChainIndexCache.cache_info()["size"] == 1
+    ChainIndexCache.invalidate()
+    assert ChainIndexCache.cache_info()["size"] == 0
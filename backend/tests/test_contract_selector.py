@@ -0,0 +1,177 @@
+"""Contract selection against a brute-force scan of the chain."""
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.chain_index import OptionsChainIndex, epoch_ms
+from app.services.contract_selector import MS_PER_DAY, ContractSelector
+
+START = datetime(2024, 3, 4, 14, 30, tzinfo=timezone.utc)
+
+
+def random_chain(rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Eight snapshots over four days with uneven expirations, strikes and deltas.
+    
+    Underlying prices sit on or halfway between strikes so ATM lookups hit
+    exact matches and ties; a fifth of the deltas are missing.
+    """
+    rows = []
+    for snapshot in range(8):
+        timestamp = START + timedelta(hours=9 * snapshot)
+        spot = 100.0 + 1.25 * rng.integers(-4, 5)
+        expirations = sorted(rng.choice(60, size=rng.integers(2, 6), replace=False))
+        for days in expirations:
+            expiration = timestamp.date() + timedelta(days=int(days))
+            for option_type in ("C", "P"):
+                strikes = np.sort(rng.choice(np.arange(80.0, 122.5, 2.5), size=rng.integers(1, 12), replace=False))
+                for strike in strikes:
+                    delta = rng.uniform(0.02, 0.98) * (1 if option_type == "C" else -1)
+                    rows.append({
+                        "timestamp": timestamp, "expiration_date": expiration, "strike": strike,
+                        "option_type": option_type, "bid": 1.0, "ask": 1.1, "last": 1.05, "volume": 10.0,
+                        "open_interest": 100.0, "implied_volatility": 0.25,
+                        "delta": np.nan if rng.random() < 0.2 else round(delta, 2), "underlying_price": spot,
+                    })
+    return pd.DataFrame(rows)
+
+
+def brute_snapshot(index: OptionsChainIndex, time: int) -> int:
+    earlier = [position for position, snapshot_time in enumerate(index.snapshot_times) if snapshot_time <= time]
+    return earlier[-1] if earlier else -1
+
+
+def brute_select(index, mask, time, option_type, target_dte, min_dte, max_dte, strike, delta) -> int:
+    """select_rows for one query by scanning every row of the chain."""
+    chain = index.chain
+    snapshot = brute_snapshot(index, time)
+    if snapshot < 0:
+        return -1
+    rows = [
+        row for row in range(index.snapshot_starts[snapshot], index.snapshot_starts[snapshot + 1]) if mask[row]
+    ]
+    day = index.snapshot_times[snapshot] // MS_PER_DAY
+    target = day + (min_dte if target_dte is None else target_dte)
+    expirations = sorted({
+        chain["expiration"][row] for row in rows
+        if chain["expiration"][row] >= day + min_dte and (max_dte is None or chain["expiration"][row] <= day + max_dte)
+    })
+    if not expirations:
+        return -1
+    expiration = min(expirations, key=lambda candidate: abs(candidate - target))
+    # Rows are in strike order; min keeps the first of equal distances
+    group = [
+        row for row in rows
+        if chain["expiration"][row] == expiration and chain["is_call"][row] == (option_type == "C")
+    ]
+    if delta is not None:
+        with_delta = sorted((row for row in group if not np.isnan(chain["delta"][row])), key=lambda row: abs(chain["delta"][row]))
+        if not with_delta:
+            return -1
+        return min(with_delta, key=lambda row: abs(abs(chain["delta"][row]) - abs(delta)))
+    if strike is None:
+        strike = chain["underlying_price"][index.snapshot_starts[snapshot]]
+    return min(group, key=lambda row: abs(chain["strike"][row] - strike)) if group else -1
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_select_rows_matches_a_scan_of_the_chain(seed):
+    rng = np.random.default_rng(seed)
+    index = OptionsChainIndex.from_frame("TEST", random_chain(rng))
+    mask = rng.random(len(index.chain["strike"])) < 0.85
+    selector = ContractSelector(index, mask)
+    first, last = int(index.snapshot_times[0]), int(index.snapshot_times[-1])
+    
+    checked = {"found": 0, "missing": 0}
+    for kind in ("dte", "strike", "delta", "atm"):
+        queries = []
+        for _ in range(20):
+            target_dte = None if rng.random() < 0.25 else int(rng.integers(0, 60))
+            min_dte = int(rng.integers(0, 15))
+            max_dte = None if rng.random() < 0.5 else min_dte + int(rng.integers(0, 40))
+            queries.append({
+                "time": int(rng.integers(first - 3_600_000, last + 3_600_000)),
+                "option_type": "C" if rng.random() < 0.5 else "P",
+                "target_dte": target_dte, "min_dte": min_dte, "max_dte": max_dte,
+                "strike": float(rng.uniform(75.0, 125.0)) if kind == "strike" else None,
+                "delta": float(rng.uniform(-0.9, 0.9)) if kind == "delta" else None,
+            })
+        
+        for query in queries:
+            expected = brute_select(index, mask, **query)
+            targets = {key: value for key, value in query.items() if key not in ("time", "option_type")}
+            if kind == "dte":
+                # One batched call per target set: every snapshot at once
+                times = index.snapshot_times
+                rows = selector.select_rows(times, query["option_type"], **targets)
+                assert list(rows) == [brute_select(index, mask, time, query["option_type"], **targets) for time in times]
+            rows = selector.select_rows(np.array([query["time"]]), query["option_type"], **targets)
+            assert rows[0] == expected, query
+            checked["found" if expected >= 0 else "missing"] += 1
+    
+    assert checked["found"] > 40 and checked["missing"] > 0
+
+
+def test_nearest_lookups_match_a_scan_of_each_group():
+    rng = np.random.default_rng(7)
+    index = OptionsChainIndex.from_frame("TEST", random_chain(rng))
+    selector = ContractSelector(index)
+    chain = index.chain
+    groups = sorted({
+        (snapshot, int(chain["expiration"][row]), bool(chain["is_call"][row]))
+        for snapshot in range(len(index))
+        for row in range(index.snapshot_starts[snapshot], index.snapshot_starts[snapshot + 1])
+    })
+    snapshots, expirations, is_call = (np.array(values) for values in zip(*groups))
+    strikes = rng.uniform(75.0, 125.0, len(groups))
+    deltas = rng.uniform(-1.0, 1.0, len(groups))
+    
+    by_strike = selector.nearest_strike(snapshots, expirations, is_call, strikes)
+    by_delta = selector.nearest_delta(snapshots, expirations, is_call, deltas)
+    
+    for position, (snapshot, expiration, call) in enumerate(groups):
+        group = [
+            row for row in range(index.snapshot_starts[snapshot], index.snapshot_starts[snapshot + 1])
+            if chain["expiration"][row] == expiration and chain["is_call"][row] == call
+        ]
+        assert by_strike[position] == min(group, key=lambda row: abs(chain["strike"][row] - strikes[position]))
+        with_delta = sorted((row for row in group if not np.isnan(chain["delta"][row])), key=lambda row: abs(chain["delta"][row]))
+        expected = min(with_delta, key=lambda row: abs(abs(chain["delta"][row]) - abs(deltas[position]))) if with_delta else -1
+        assert by_delta[position] == expected
+    assert (by_delta == -1).any()
+    # Groups that do not exist select nothing
+    assert list(selector.nearest_strike([0, -1], [0, expirations[0]], True, 100.0)) == [-1, -1]
+
+
+def test_single_and_batched_times_agree():
+    rng = np.random.default_rng(11)
+    frame = random_chain(rng)
+    selector = ContractSelector.from_frame("TEST", frame)
+    times = [START + timedelta(hours=4 * step) for step in range(20)]
+    
+    batched = selector.select(times, "P", target_dte=30, delta=0.3)
+    
+    for position, time in enumerate(times):
+        single = selector.select(time, "P", target_dte=30, delta=0.3)
+        if position in batched.index:
+            assert single.iloc[0].equals(batched.loc[position])
+        else:
+            assert single.empty
+    assert (batched["dte"] >= 0).all()
+    assert set(batched["snapshot_time"]) <= set(pd.to_datetime(frame["timestamp"], utc=True))
+
+
+def test_epoch_ms_reads_every_time_form_the_same_way():
+    aware = datetime(2024, 3, 4, 14, 30, 15, 250000, tzinfo=timezone.utc)
+    expected = int(aware.timestamp() * 1000)
+    
+    forms = [
+        aware, aware.replace(tzinfo=None), aware.astimezone(timezone(timedelta(hours=-5))),
+        pd.Timestamp(aware), np.datetime64("2024-03-04T14:30:15.250"), "2024-03-04 14:30:15.250", expected,
+    ]
+    
+    for form in forms:
+        assert list(epoch_ms(form)) == [expected], form
+    assert list(epoch_ms([aware, aware.replace(tzinfo=None)])) == [expected, expected]
+    assert list(epoch_ms(np.array([expected, expected + 1]))) == [expected, expected + 1]
+    assert list(epoch_ms(date(2024, 3, 4))) == [expected - (14 * 3600 + 30 * 60 + 15) * 1000 - 250]
@@ -0,0 +1,99 @@
+"""Stored-history coverage ranges and the gaps planned from them."""
+from datetime import date, datetime, timezone
+from app.models import PriceCoverage
+from app.services import coverage_service
+from app.services.coverage_service import GAP_MERGE_TRADING_DAYS, CoverageService
+from app.services.market_data_service import MarketDataService
+
+# March 2024: Good Friday on the 29th; April has no holidays
+MARCH, MAY = date(2024, 3, 1), date(2024, 5, 1)
+
+
+def cover(db, *ranges) -> None:
+    for first, last in ranges:
+        CoverageService.record_coverage(db, "TEST", "1d", first, last)
+
+
+def test_missing_ranges_without_coverage_span_the_window_sessions(db):
+    # Window ends are exclusive; a weekend-only window has no sessions
+    assert CoverageService.missing_ranges(db, "TEST", "1d", date(2024, 3, 2), date(2024, 3, 4)) == []
+    assert CoverageService.missing_ranges(db, "TEST", "1d", date(2024, 3, 2), date(2024, 3, 5)) == [
+        (date(2024, 3, 4), date(2024, 3, 4))
+    ]
+    assert CoverageService.missing_ranges(db, "TEST", "1d", MARCH, MAY) == [(date(2024, 3, 1), date(2024, 4, 30))]
+
+
+def test_weekends_and_holidays_are_not_gaps(db):
+    # Through Thursday before Good Friday, then from the Monday after Easter
+    cover(db, (date(2024, 3, 1), date(2024, 3, 28)), (date(2024, 4, 1), date(2024, 4, 30)))
+    
+    assert CoverageService.missing_ranges(db, "TEST", "1d", MARCH, MAY) == []
+    # The two touched across the holiday weekend and were merged into one
+    assert CoverageService.get_ranges(db, "TEST", "1d") == [(date(2024, 3, 1), date(2024, 4, 30))]
+
+
+def test_close_gaps_are_fetched_as_one_range_and_far_ones_apart(db):
+    cover(
+        db,
+        (date(2024, 3, 5), date(2024, 3, 8)),
+        # Missing 3-1, 3-4, 3-11, 3-12 and 3-15: each within GAP_MERGE_TRADING_DAYS sessions of the next
+        (date(2024, 3, 13), date(2024, 3, 14)),
+        # Then a month covered before the last two sessions
+        (date(2024, 3, 18), date(2024, 4, 26)),
+    )
+    assert GAP_MERGE_TRADING_DAYS == 5
+    
+    missing = CoverageService.missing_ranges(db, "TEST", "1d", MARCH, MAY)
+    
+    assert missing == [(date(2024, 3, 1), date(2024, 3, 15)), (date(2024, 4, 29), date(2024, 4, 30))]
+    assert CoverageService.missing_ranges(db, "TEST", "1d", date(2024, 3, 5), date(2024, 3, 9)) == []
+    # Other symbols and intervals are tracked apart
+    assert CoverageService.missing_ranges(db, "OTHER", "1d", MARCH, MAY) == [(date(2024, 3, 1), date(2024, 4, 30))]
+    assert len(CoverageService.missing_ranges(db, "TEST", "1h", MARCH, MAY)) == 1
+
+
+def test_record_coverage_merges_overlapping_and_touching_ranges(db):
+    cover(db, (date(2024, 3, 4), date(2024, 3, 8)), (date(2024, 3, 18), date(2024, 3, 22)))
+    assert len(CoverageService.get_ranges(db, "TEST", "1d")) == 2
+    
+    merged = CoverageService.record_coverage(db, "TEST", "1d", date(2024, 3, 11), date(2024, 3, 15))
+    
+    assert merged == (date(2024, 3, 4), date(2024, 3, 22))
+    assert CoverageService.get_ranges(db, "TEST", "1d") == [merged]
+    assert db.query(PriceCoverage).count() == 1
+    # Inside what is covered: nothing changes
+    assert CoverageService.record_coverage(db, "TEST", "1d", date(2024, 3, 12), date(2024, 3, 13)) == merged
+    # A session apart: kept separate
+    cover(db, (date(2024, 3, 26), date(2024, 3, 28)))
+    assert CoverageService.get_ranges(db, "TEST", "1d") == [merged, (date(2024, 3, 26), date(2024, 3, 28))]
+
+
+def test_sessions_that_are_not_final_are_left_uncovered(db, monkeypatch):
+    monkeypatch.setattr(coverage_service, "last_completed_session", lambda: date(2024, 3, 13))
+    
+    recorded = CoverageService.record_coverage(db, "TEST", "1d", date(2024, 3, 11), date(2024, 3, 15))
+    
+    assert recorded == (date(2024, 3, 11), date(2024, 3, 13))
+    assert CoverageService.record_coverage(db, "TEST", "1d", date(2024, 3, 14), date(2024, 3, 15)) is None
+    assert CoverageService.missing_ranges(db, "TEST", "1d", date(2024, 3, 11), date(2024, 3, 16)) == [
+        (date(2024, 3, 14), date(2024, 3, 15))
+    ]
+
+
+def test_rebuild_from_prices_finds_runs_of_stored_sessions(db):
+    sessions = [date(2024, 3, day) for day in (4, 5, 6, 7, 8, 11, 12, 14, 15, 28)] + [date(2024, 4, 1)]
+    MarketDataService.upsert_price_records(db, "TEST", [
+        {"timestamp": datetime(day.year, day.month, day.day, tzinfo=timezone.utc), "open": 1.0, "high": 1.0,
+         "low": 1.0, "close": 1.0, "volume": 1}
+        for day in sessions
+    ])
+    cover(db, (date(2023, 1, 3), date(2023, 1, 31)))
+    
+    ranges = CoverageService.rebuild_from_prices(db, "TEST")
+    
+    assert ranges == [
+        (date(2024, 3, 4), date(2024, 3, 12)),
+        (date(2024, 3, 14), date(2024, 3, 15)),
+        (date(2024, 3, 28), date(2024, 4, 1)),
+    ]
+    assert CoverageService.get_ranges(db, "TEST", "1d") == ranges
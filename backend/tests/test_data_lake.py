@@ -0,0 +1,83 @@
+"""Incremental Parquet exports against the database."""
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+import pytest
+from sqlalchemy import update
+from app.models import StockPrice
+from app.services.data_lake import PRICES_DATASET, DataLakeService
+from app.services.market_data_service import MarketDataService
+from app.services.price_export import PriceExportService
+
+pytestmark = pytest.mark.skipif(not DataLakeService.available(), reason="pyarrow is not installed")
+
+
+def bars(first: str, last: str, close: float = 100.0) -> list:
+    """One daily bar per calendar day in [first, last]."""
+    return [
+        {"timestamp": day.to_pydatetime(), "open": close, "high": close, "low": close, "close": close, "volume": 1000}
+        for day in pd.date_range(first, last, tz="UTC")
+    ]
+
+
+def age_rows(db, day: int = 1) -> None:
+    """Date every stored row in early 2020, as if written long ago."""
+    db.execute(update(StockPrice).values(created_at=datetime(2020, 1, day, tzinfo=timezone.utc)))
+    db.commit()
+
+
+def month_files(root, month: str) -> set:
+    return {path.name for path in (root / PRICES_DATASET / "symbol=TEST" / f"month={month}").glob("*.parquet")}
+
+
+def assert_lake_matches_database(db, root) -> None:
+    stored = PriceExportService.read_columns(db, "TEST")
+    lake = DataLakeService.read_prices("TEST", root=root)
+    assert list(lake["timestamp"]) == list(stored["timestamp"].astype("datetime64[ms]"))
+    assert list(lake["close"]) == list(stored["close"])
+
+
+def test_backfilled_rows_reach_the_lake(db, tmp_path):
+    MarketDataService.upsert_price_records(db, "TEST", bars("2024-01-10", "2024-01-19"))
+    assert DataLakeService.export_prices(db, ["TEST"], root=tmp_path) == {"TEST": 10}
+    
+    MarketDataService.upsert_price_records(db, "TEST", bars("2024-01-02", "2024-01-09"))
+    
+    # The whole month is rewritten, not appended to
+    assert DataLakeService.export_prices(db, ["TEST"], root=tmp_path) == {"TEST": 18}
+    assert len(DataLakeService.read_prices("TEST", root=tmp_path)["timestamp"]) == 18
+    assert_lake_matches_database(db, tmp_path)
+
+
+def test_only_months_with_changed_rows_are_rewritten(db, tmp_path):
+    MarketDataService.upsert_price_records(db, "TEST", bars("2024-01-25", "2024-03-05"))
+    age_rows(db, day=2)
+    DataLakeService.export_prices(db, ["TEST"], root=tmp_path)
+    january, march = month_files(tmp_path, "2024-01"), month_files(tmp_path, "2024-03")
+    # Older than what the export recorded
+    age_rows(db)
+    
+    # A corrected February bar and a new March bar
+    MarketDataService.upsert_price_records(db, "TEST", bars("2024-02-10", "2024-02-10", close=90.0))
+    MarketDataService.upsert_price_records(db, "TEST", bars("2024-03-06", "2024-03-06"))
+    
+    assert DataLakeService.export_prices(db, ["TEST"], root=tmp_path) == {"TEST": 29 + 6}
+    assert month_files(tmp_path, "2024-01") == january
+    assert month_files(tmp_path, "2024-03") != march
+    assert_lake_matches_database(db, tmp_path)
+    lake = DataLakeService.read_prices("TEST", root=tmp_path)
+    assert lake["close"][list(lake["timestamp"]).index(pd.Timestamp("2024-02-10").to_datetime64())] == 90.0
+    
+    # Nothing written since: nothing exported
+    age_rows(db)
+    assert DataLakeService.export_prices(db, ["TEST"], root=tmp_path) == {"TEST": 0}
+
+
+def test_lake_without_export_state_is_rewritten(db, tmp_path):
+    MarketDataService.upsert_price_records(db, "TEST", bars("2024-01-10", "2024-01-19"))
+    DataLakeService.export_prices(db, ["TEST"], root=tmp_path)
+    (tmp_path / PRICES_DATASET / "_exports.json").unlink()
+    age_rows(db)
+    
+    assert DataLakeService.export_prices(db, ["TEST"], root=tmp_path) == {"TEST": 10}
+    assert DataLakeService.export_prices(db, ["TEST"], root=tmp_path, full=True) == {"TEST": 10}
+    assert_lake_matches_database(db, tmp_path)
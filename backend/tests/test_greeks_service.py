@@ -0,0 +1,124 @@
+"""Black-Scholes-Merton prices, Greeks and implied volatility."""
+import math
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.greeks_service import GreeksService
+
+
+def norm_cdf(x: float) -> float:
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def reference(spot, strike, t, sigma, is_call, rate, dividend_yield) -> dict:
+    """Scalar textbook formulas (theta per day, vega per point)."""
+    d1 = (math.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma ** 2) * t) / (sigma * math.sqrt(t))
+    d2 = d1 - sigma * math.sqrt(t)
+    q, r = math.exp(-dividend_yield * t), math.exp(-rate * t)
+    pdf = math.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi)
+    sign = 1.0 if is_call else -1.0
+    price = sign * (spot * q * norm_cdf(sign * d1) - strike * r * norm_cdf(sign * d2))
+    theta = (
+        -spot * q * pdf * sigma / (2 * math.sqrt(t))
+        - sign * rate * strike * r * norm_cdf(sign * d2)
+        + sign * dividend_yield * spot * q * norm_cdf(sign * d1)
+    )
+    return {
+        "price": price,
+        "delta": sign * q * norm_cdf(sign * d1),
+        "gamma": q * pdf / (spot * sigma * math.sqrt(t)),
+        "theta": theta / 365.0,
+        "vega": spot * q * pdf * math.sqrt(t) / 100.0,
+    }
+
+
+def test_hull_example_matches_published_values():
+    # Hull's S=42, K=40, r=10%, sigma=20%, six months; py_vollib gives the same digits
+    call = GreeksService.greeks(42.0, 40.0, 0.5, 0.2, True, 0.1)
+    put = GreeksService.greeks(42.0, 40.0, 0.5, 0.2, False, 0.1)
+    
+    assert GreeksService.price(42.0, 40.0, 0.5, 0.2, True, 0.1) == pytest.approx(4.759422392871532, rel=1e-12)
+    assert GreeksService.price(42.0, 40.0, 0.5, 0.2, False, 0.1) == pytest.approx(0.8085993729000922, rel=1e-12)
+    assert call["delta"] == pytest.approx(0.7791312909426691, rel=1e-12)
+    assert put["delta"] == pytest.approx(-0.2208687090573310, rel=1e-12)
+    assert call["gamma"] == put["gamma"] == pytest.approx(0.04996267040591185, rel=1e-12)
+    assert call["theta"] == pytest.approx(-0.012490663546829116, rel=1e-12)
+    assert put["theta"] == pytest.approx(-0.002066231497506221, rel=1e-12)
+    assert call["vega"] == put["vega"] == pytest.approx(0.08813415059602853, rel=1e-12)
+
+
+@pytest.mark.parametrize("spot, strike, t, sigma, is_call, rate, dividend_yield", [
+    (100.0, 100.0, 1.0, 0.25, True, 0.05, 0.02),
+    (100.0, 80.0, 0.25, 0.4, False, 0.03, 0.01),
+    (250.0, 300.0, 2.0, 0.15, True, 0.045, 0.0),
+    (50.0, 55.0, 0.02, 0.6, False, 0.0, 0.03),
+])
+def test_vectorized_values_match_scalar_formulas(spot, strike, t, sigma, is_call, rate, dividend_yield):
+    expected = reference(spot, strike, t, sigma, is_call, rate, dividend_yield)
+    args = (np.array([spot]), np.array([strike]), np.array([t]), np.array([sigma]), np.array([is_call]))
+    
+    greeks = GreeksService.greeks(*args, rate, dividend_yield)
+    
+    assert GreeksService.price(*args, rate, dividend_yield)[0] == pytest.approx(expected["price"], rel=1e-10)
+    for name in ("delta", "gamma", "theta", "vega"):
+        assert greeks[name][0] == pytest.approx(expected[name], rel=1e-10), name
+
+
+def test_implied_volatility_round_trips_from_deep_itm_to_deep_otm():
+    strike, t, sigma, is_call = (
+        grid.ravel() for grid in np.meshgrid(
+            np.linspace(40.0, 200.0, 17), [0.05, 0.5, 2.0], [0.08, 0.3, 1.2], [True, False], indexing="ij",
+        )
+    )
+    spot = np.full(len(strike), 100.0)
+    prices = GreeksService.price(spot, strike, t, sigma, is_call, 0.04, 0.01)
+    
+    iv = GreeksService.implied_volatility(prices, spot, strike, t, is_call, 0.04, 0.01)
+    
+    # Every solvable price solves back to itself; where vega is not flat it is the input volatility
+    solvable = prices > 1e-10
+    assert np.isfinite(iv[solvable]).all()
+    np.testing.assert_allclose(
+        GreeksService.price(spot, strike, t, iv, is_call, 0.04, 0.01)[solvable], prices[solvable], atol=1e-7
+    )
+    sensitive = solvable & (GreeksService.greeks(spot, strike, t, sigma, is_call, 0.04, 0.01)["vega"] > 1e-3)
+    assert sensitive.sum() > len(strike) // 2
+    np.testing.assert_allclose(iv[sensitive], sigma[sensitive], rtol=1e-6)
+
+
+def test_prices_outside_no_arbitrage_bounds_have_no_implied_volatility():
+    spot, strike, t, rate = 100.0, 90.0, 0.5, 0.05
+    floor = spot - strike * math.exp(-rate * t)
+    prices = np.array([floor - 0.5, spot + 1.0, strike * math.exp(-rate * t) + 1.0, -0.1, 5.0])
+    is_call = np.array([True, True, False, False, False])
+    
+    iv = GreeksService.implied_volatility(prices, spot, strike, t, is_call, rate)
+    
+    assert np.isnan(iv[:4]).all()
+    assert 0 < iv[4] < 1
+
+
+def test_apply_to_chain_solves_missing_iv_and_skips_expired_contracts():
+    timestamp = datetime(2024, 3, 1, 15, 0)
+    expirations = [date(2024, 4, 19), date(2024, 4, 19), date(2024, 2, 16)]
+    t = GreeksService.time_to_expiry(expirations, timestamp)
+    mid = float(GreeksService.price(100.0, 100.0, t[1], 0.3, True, 0.05, 0.0))
+    frame = pd.DataFrame({
+        "expiration_date": expirations,
+        "strike": [100.0, 100.0, 100.0],
+        "option_type": ["C", "C", "C"],
+        "bid": [mid - 0.05, mid - 0.05, 1.0],
+        "ask": [mid + 0.05, mid + 0.05, 1.2],
+        "last": [mid, mid, 1.1],
+        "implied_volatility": [0.25, 0.0, 0.25],
+    })
+    
+    result = GreeksService.apply_to_chain(frame, 100.0, timestamp, rate=0.05, dividend_yield=0.0)
+    
+    assert t[2] < 0
+    assert result["implied_volatility"][0] == 0.25
+    assert result["implied_volatility"][1] == pytest.approx(0.3, rel=1e-6)
+    expected = reference(100.0, 100.0, t[0], 0.25, True, 0.05, 0.0)
+    assert result["delta"][0] == pytest.approx(expected["delta"], rel=1e-10)
+    assert result[["delta", "gamma", "theta", "vega"]].iloc[2].isna().all()
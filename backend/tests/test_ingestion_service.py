@@ -0,0 +1,259 @@
+"""Batch ingestion with a fake provider."""
+import threading
+import time
+from datetime import date, timedelta
+import pandas as pd
+import pytest
+from app.config import settings
+from app.database import SessionLocal
+from app.models import StockPrice, Symbol
+from app.providers import yfinance_provider
+from app.providers.alpha_vantage_provider import AlphaVantageProvider
+from app.providers.yfinance_provider import YFinanceProvider
+from app.services.coverage_service import CoverageService
+from app.services.ingestion_service import IngestionService
+
+# Mon 2024-03-04 to Fri 2024-03-15: ten sessions, no exchange holidays
+START, END = date(2024, 3, 4), date(2024, 3, 16)
+SESSIONS = 10
+
+
+def history(start_date, end_date) -> pd.DataFrame:
+    """One yfinance-style bar per weekday in [start_date, end_date)."""
+    index = pd.bdate_range(start_date, end_date - timedelta(days=1), tz="UTC", name="Date")
+    close = [100.0 + i for i in range(len(index))]
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000}, index=index)
+
+
+class FakeProvider:
+    """Serves one bar per weekday and records how many fetches overlap."""
+    
+    name = "fake"
+    
+    def __init__(self, failing=(), delay: float = 0.0):
+        self.failing = set(failing)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+    
+    def fetch_stock_frame(self, symbol, start_date, end_date=None, interval="1d"):
+        with self._lock:
+            self.calls.append((symbol, start_date, end_date))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if symbol in self.failing:
+                raise RuntimeError(f"upstream error for {symbol}")
+            return history(start_date, end_date)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class ListedProvider(FakeProvider):
+    """Fake provider with bars only from a listing day to a latest day."""
+    
+    def __init__(self, listed: date, latest: date):
+        super().__init__()
+        self.listed = listed
+        self.latest = latest
+    
+    def fetch_stock_frame(self, symbol, start_date, end_date=None, interval="1d"):
+        frame = super().fetch_stock_frame(symbol, start_date, end_date, interval)
+        return frame[(frame.index.date >= self.listed) & (frame.index.date <= self.latest)]
+
+
+class BatchProvider(FakeProvider):
+    """Fake provider that also serves many symbols per request."""
+    
+    batch_history = True
+    
+    def __init__(self, failing=(), delay: float = 0.0):
+        super().__init__(failing, delay)
+        self.batch_calls = []
+    
+    def fetch_stock_frames(self, symbols, start_date, end_date=None, interval="1d"):
+        self.batch_calls.append((sorted(symbols), start_date, end_date))
+        # Like yf.download, symbols that fail are left out of the result
+        return {symbol: history(start_date, end_date) for symbol in symbols if symbol not in self.failing}
+
+
+def exchange_history(start_date, end_date) -> pd.DataFrame:
+    """history() dated at midnight New York time, as Ticker.history returns daily bars."""
+    frame = history(start_date, end_date)
+    frame.index = frame.index.tz_localize(None).tz_localize("America/New_York")
+    return frame
+
+
+class FakeTicker:
+    """Stands in for yf.Ticker."""
+    
+    def __init__(self, symbol, session=None):
+        self.symbol = symbol
+    
+    def history(self, start, end, interval="1d"):
+        return exchange_history(start, end)
+
+
+def fake_download(tickers, start, end, interval="1d", ignore_tz=None, **kwargs):
+    """Stands in for yf.download: daily bars lose their zone unless ignore_tz=False."""
+    frames = {ticker: exchange_history(start, end) for ticker in tickers}
+    if ignore_tz is None or ignore_tz:
+        for frame in frames.values():
+            frame.index = frame.index.tz_localize(None)
+    return pd.concat(frames, axis=1) if len(tickers) > 1 else frames[tickers[0]]
+
+
+@pytest.fixture
+def limit(monkeypatch):
+    """Give a provider (the fake one by default) its own limiter with the given concurrency."""
+    def configure(concurrency: int, name: str = FakeProvider.name):
+        monkeypatch.setitem(settings.PROVIDER_CONCURRENCY, name, concurrency)
+        monkeypatch.setitem(settings.PROVIDER_RATE_LIMITS, name, 0)
+        monkeypatch.delitem(IngestionService._limiters, name, raising=False)
+    return configure
+
+
+def run_job(symbols, provider, max_workers=4):
+    job = IngestionService.create_job(symbols, START, END, provider=provider)
+    return IngestionService.run(job, provider=provider, max_workers=max_workers, session_factory=SessionLocal).to_dict()
+
+
+def test_progress_and_counts(db, limit):
+    limit(4)
+    provider = FakeProvider()
+    
+    result = run_job(["aapl", "MSFT", "AAPL"], provider)
+    
+    assert result["status"] == "completed"
+    assert result["provider"] == "fake"
+    assert result["total_symbols"] == 2
+    assert result["completed_symbols"] == 2
+    for entry in result["progress"]:
+        assert entry == {
+            "symbol": entry["symbol"], "status": "completed", "records_stored": SESSIONS, "records_updated": 0,
+            "total_fetched": SESSIONS, "ranges_fetched": 1, "error": None,
+        }
+    assert sorted(call[0] for call in provider.calls) == ["AAPL", "MSFT"]
+    assert {call[1:] for call in provider.calls} == {(START, date(2024, 3, 16))}
+    
+    # Covered windows are not fetched again
+    rerun = run_job(["AAPL", "MSFT"], provider)
+    assert len(provider.calls) == 2
+    assert [entry["ranges_fetched"] for entry in rerun["progress"]] == [0, 0]
+    assert [entry["status"] for entry in rerun["progress"]] == ["completed", "completed"]
+
+
+def test_failing_symbol_leaves_others_completed(db, limit):
+    limit(4)
+    provider = FakeProvider(failing={"BAD"})
+    
+    result = run_job(["AAPL", "BAD", "MSFT"], provider)
+    
+    progress = {entry["symbol"]: entry for entry in result["progress"]}
+    assert result["status"] == "completed"
+    assert result["completed_symbols"] == 3
+    assert progress["BAD"]["status"] == "failed"
+    assert "upstream error for BAD" in progress["BAD"]["error"]
+    assert progress["BAD"]["records_stored"] == 0
+    for symbol in ("AAPL", "MSFT"):
+        assert progress[symbol]["status"] == "completed"
+        assert progress[symbol]["records_stored"] == SESSIONS
+
+
+def test_every_symbol_failing_fails_the_job(db, limit):
+    limit(4)
+    result = run_job(["BAD"], FakeProvider(failing={"BAD"}))
+    assert result["status"] == "failed"
+
+
+def test_limiter_caps_concurrent_fetches(db, limit):
+    limit(2)
+    provider = FakeProvider(delay=0.05)
+    
+    result = run_job([f"SYM{i}" for i in range(6)], provider, max_workers=6)
+    
+    assert result["completed_symbols"] == 6
+    assert len(provider.calls) == 6
+    assert provider.peak == 2
+
+
+def test_symbols_missing_the_same_ranges_share_one_batch_call(db, limit):
+    limit(4)
+    provider = BatchProvider(failing={"BAD"})
+    # NVDA already has the first week, so its missing range differs
+    IngestionService.ingest_symbol(db, "NVDA", START, date(2024, 3, 9), provider=FakeProvider())
+    
+    result = run_job(["AAPL", "MSFT", "BAD", "NVDA", "SPY"], provider)
+    
+    assert provider.batch_calls == [(["AAPL", "BAD", "MSFT", "SPY"], START, date(2024, 3, 16))]
+    # Left out of the batch or alone in its group: fetched one by one
+    assert sorted(call[:2] for call in provider.calls) == [("BAD", START), ("NVDA", date(2024, 3, 11))]
+    
+    progress = {entry["symbol"]: entry for entry in result["progress"]}
+    assert progress["BAD"]["status"] == "failed"
+    assert "upstream error for BAD" in progress["BAD"]["error"]
+    for symbol in ("AAPL", "MSFT", "SPY"):
+        assert progress[symbol]["status"] == "completed"
+        assert progress[symbol]["records_stored"] == SESSIONS
+    assert progress["NVDA"]["records_stored"] == 5
+
+
+def test_batches_are_split_by_size(db, limit, monkeypatch):
+    limit(4)
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 2)
+    provider = BatchProvider()
+    
+    result = run_job(["A", "B", "C", "D", "E"], provider)
+    
+    assert sorted(len(call[0]) for call in provider.batch_calls) == [1, 2, 2]
+    assert provider.calls == []
+    assert [entry["records_stored"] for entry in result["progress"]] == [SESSIONS] * 5
+
+
+def test_coverage_spans_the_returned_bars_not_the_requested_range(db):
+    provider = ListedProvider(listed=date(2024, 3, 6), latest=date(2024, 3, 13))
+    
+    IngestionService.ingest_symbol(db, "TEST", START, END, provider=provider)
+    
+    assert CoverageService.get_ranges(db, "TEST", "1d") == [(date(2024, 3, 6), date(2024, 3, 13))]
+    assert IngestionService.plan_ranges(db, "TEST", START, END, "1d") == [
+        (START, date(2024, 3, 5)), (date(2024, 3, 14), date(2024, 3, 15))
+    ]
+    # An empty answer records nothing; bars that show up later fill the rest
+    IngestionService.ingest_symbol(db, "TEST", START, END, provider=provider)
+    assert CoverageService.get_ranges(db, "TEST", "1d") == [(date(2024, 3, 6), date(2024, 3, 13))]
+    result = IngestionService.ingest_symbol(db, "TEST", START, END, provider=FakeProvider())
+    assert result["inserted"] == 4
+    assert CoverageService.get_ranges(db, "TEST", "1d") == [(START, date(2024, 3, 15))]
+
+
+def test_batch_and_single_fetches_store_the_same_timestamps(db, limit, monkeypatch):
+    limit(4, YFinanceProvider.name)
+    monkeypatch.setattr(yfinance_provider.yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(yfinance_provider.yf, "download", fake_download)
+    provider = YFinanceProvider(session=object())
+    
+    run_job(["AAPL", "MSFT"], provider)
+    IngestionService.ingest_symbol(db, "SPY", START, END, provider=provider)
+    
+    rows = db.query(Symbol.symbol, StockPrice.timestamp).join(Symbol, Symbol.id == StockPrice.symbol_id).all()
+    stored = {symbol: sorted(timestamp for name, timestamp in rows if name == symbol) for symbol in ("AAPL", "MSFT", "SPY")}
+    assert stored["AAPL"] == stored["MSFT"] == stored["SPY"]
+    # Midnight in New York, on both sides of the March 10 DST change
+    expected = pd.bdate_range(START, END - timedelta(days=1)).tz_localize("America/New_York").tz_convert("UTC")
+    assert [pd.Timestamp(timestamp).tz_localize(None) for timestamp in stored["SPY"]] == list(expected.tz_localize(None))
+
+
+def test_alpha_vantage_daily_bars_are_dated_like_yfinance(monkeypatch):
+    bar = {"1. open": "100", "2. high": "101", "3. low": "99", "4. close": "100", "5. volume": "1000"}
+    series = {day.strftime("%Y-%m-%d"): bar for day in pd.bdate_range(START, END - timedelta(days=1))}
+    provider = AlphaVantageProvider(api_key="test", session=object())
+    monkeypatch.setattr(provider, "_query", lambda function, **params: {"Time Series (Daily)": series})
+    
+    frame = provider.fetch_stock_frame("SPY", START, END)
+    
+    assert list(frame.index) == list(exchange_history(START, END).index)
@@ -0,0 +1,95 @@
+"""IV surface interpolation and the iv-surface endpoint."""
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.greeks_service import GreeksService
+from app.services.iv_surface import IVSurface
+from app.services.market_data_service import MarketDataService
+
+TIMESTAMP = datetime(2024, 3, 1, 15, 0)
+SPOT = 100.0
+NEAR, FAR = date(2024, 3, 15), date(2024, 4, 19)
+# Out-of-the-money IVs: puts below spot, calls at or above it
+QUOTES = {
+    NEAR: {90.0: 0.32, 95.0: 0.27, 100.0: 0.22, 105.0: 0.24, 110.0: 0.29},
+    FAR: {90.0: 0.28, 95.0: 0.25, 100.0: 0.21, 105.0: 0.22, 110.0: 0.25},
+}
+
+
+def chain_frame() -> pd.DataFrame:
+    rows = []
+    for expiration, strikes in QUOTES.items():
+        for strike, iv in strikes.items():
+            otm = "P" if strike < SPOT else "C"
+            for option_type in ("C", "P"):
+                rows.append({
+                    "expiration_date": expiration,
+                    "strike": strike,
+                    "option_type": option_type,
+                    "bid": 1.0,
+                    "ask": 1.2,
+                    "last": 1.1,
+                    # In-the-money contracts carry a different IV the surface must skip
+                    "implied_volatility": iv if option_type == otm else 0.9,
+                    "volume": 10,
+                    "open_interest": 100,
+                })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def surface() -> IVSurface:
+    return IVSurface.from_frame("TEST", TIMESTAMP, SPOT, chain_frame())
+
+
+def test_iv_at_reproduces_grid_points(surface):
+    assert surface.expiration_dates == [NEAR, FAR]
+    for expiration, strikes in QUOTES.items():
+        values = surface.iv_at(list(strikes), [expiration] * len(strikes))
+        np.testing.assert_allclose(values, list(strikes.values()), rtol=1e-12)
+
+
+def test_iv_at_interpolates_between_strikes(surface):
+    values = surface.iv_at([92.5, 102.0], [NEAR, NEAR])
+    np.testing.assert_allclose(values, [(0.32 + 0.27) / 2, 0.22 + 0.4 * (0.24 - 0.22)], rtol=1e-12)
+    # Outside the quoted strikes the edge value is held
+    np.testing.assert_allclose(surface.iv_at([80.0, 120.0], [FAR, FAR]), [0.28, 0.25], rtol=1e-12)
+
+
+def test_iv_at_interpolates_total_variance_between_expiries(surface):
+    middle = date(2024, 4, 1)
+    t_near, t_mid, t_far = GreeksService.time_to_expiry([NEAR, middle, FAR], TIMESTAMP)
+    weight = (t_mid - t_near) / (t_far - t_near)
+    
+    iv = surface.iv_at([100.0, 97.5], [middle, middle])
+    
+    near_975, far_975 = (0.27 + 0.22) / 2, (0.25 + 0.21) / 2
+    expected = [
+        np.sqrt(((1 - weight) * 0.22 ** 2 * t_near + weight * 0.21 ** 2 * t_far) / t_mid),
+        np.sqrt(((1 - weight) * near_975 ** 2 * t_near + weight * far_975 ** 2 * t_far) / t_mid),
+    ]
+    np.testing.assert_allclose(iv, expected, rtol=1e-12)
+
+
+def test_iv_surface_endpoint(db):
+    MarketDataService.store_options_snapshot(db, "TEST", chain_frame(), underlying_price=SPOT, timestamp=TIMESTAMP)
+    client = TestClient(app)
+    url = "/api/v1/market-data/options/TEST/iv-surface"
+    
+    response = client.get(url, params={
+        "timestamp": "2024-03-01T16:00:00", "strike": [95.0, 102.0], "expiration_date": NEAR.isoformat(),
+    })
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["underlying_price"] == SPOT
+    assert [item["expiration_date"] for item in body["slices"]] == [NEAR.isoformat(), FAR.isoformat()]
+    assert body["slices"][0]["strikes"] == list(QUOTES[NEAR])
+    np.testing.assert_allclose(body["slices"][0]["implied_volatility"], list(QUOTES[NEAR].values()), rtol=1e-6)
+    np.testing.assert_allclose([point["implied_volatility"] for point in body["points"]], [0.27, 0.228], rtol=1e-6)
+    
+    assert client.get(url, params={"timestamp": "2024-02-01T00:00:00"}).status_code == 404
+    assert client.get(url, params={"timestamp": "2024-03-01T16:00:00", "strike": 100.0}).status_code == 400
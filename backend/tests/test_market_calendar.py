@@ -0,0 +1,68 @@
+"""NYSE trading sessions and holiday observance."""
+from datetime import date, datetime, timezone
+import pandas as pd
+import pytest
+from app.services.market_calendar import MARKET_TIMEZONE, last_completed_session, next_trading_day, trading_days
+
+
+def closed_weekdays(year: int) -> list:
+    sessions = set(trading_days(date(year, 1, 1), date(year, 12, 31)))
+    return [day for day in pd.bdate_range(f"{year}-01-01", f"{year}-12-31").date if day not in sessions]
+
+
+def test_2024_holidays_match_the_nyse_schedule():
+    assert closed_weekdays(2024) == [
+        date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+        date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+    ]
+
+
+@pytest.mark.parametrize("year, sessions", [(2021, 252), (2022, 251), (2023, 250), (2024, 252)])
+def test_sessions_per_year(year, sessions):
+    assert len(trading_days(date(year, 1, 1), date(year, 12, 31))) == sessions
+
+
+@pytest.mark.parametrize("day, is_session", [
+    (date(2021, 12, 31), True),   # New Year's Day on a Saturday is not observed the Friday before
+    (date(2023, 1, 2), False),    # but on a Sunday it moves to Monday
+    (date(2021, 7, 5), False),    # Independence Day on a Sunday
+    (date(2020, 7, 3), False),    # and on a Saturday
+    (date(2021, 6, 18), True),    # Juneteenth is a holiday from 2022
+    (date(2022, 6, 20), False),
+    (date(2021, 12, 24), False),  # Christmas on a Saturday
+    (date(2024, 11, 29), True),   # The day after Thanksgiving closes early but trades
+])
+def test_holiday_observance(day, is_session):
+    assert (trading_days(day, day) == [day]) is is_session
+
+
+def test_trading_days_are_inclusive_and_empty_for_reversed_bounds():
+    assert trading_days(date(2024, 3, 28), date(2024, 4, 2)) == [date(2024, 3, 28), date(2024, 4, 1), date(2024, 4, 2)]
+    assert trading_days(date(2024, 3, 30), date(2024, 3, 31)) == []
+    assert trading_days(date(2024, 4, 2), date(2024, 4, 1)) == []
+
+
+def test_next_trading_day_skips_weekends_and_holidays():
+    assert next_trading_day(date(2024, 3, 27)) == date(2024, 3, 28)
+    assert next_trading_day(date(2024, 3, 28)) == date(2024, 4, 1)
+    assert next_trading_day(date(2024, 3, 30)) == date(2024, 4, 1)
+    assert next_trading_day(date(2024, 12, 24)) == date(2024, 12, 26)
+
+
+@pytest.mark.parametrize("now, session", [
+    (datetime(2024, 3, 27, 15, 59), date(2024, 3, 26)),     # before the close
+    (datetime(2024, 3, 27, 16, 0), date(2024, 3, 27)),      # after it
+    (datetime(2024, 3, 29, 18, 0), date(2024, 3, 28)),      # Good Friday
+    (datetime(2024, 4, 1, 9, 0), date(2024, 3, 28)),        # Monday morning after the holiday weekend
+])
+def test_last_completed_session_follows_new_york_time(now, session):
+    assert last_completed_session(now) == session
+    assert last_completed_session(now.replace(tzinfo=MARKET_TIMEZONE)) == session
+    assert last_completed_session(now.replace(tzinfo=MARKET_TIMEZONE).astimezone(timezone.utc)) == session
+
+
+def test_last_completed_session_around_the_clock_change():
+    # Clocks went forward on 2024-03-10: 20:30 UTC was 15:30 in New York before and 16:30 after
+    assert last_completed_session(datetime(2024, 3, 8, 20, 30, tzinfo=timezone.utc)) == date(2024, 3, 7)
+    assert last_completed_session(datetime(2024, 3, 8, 21, 0, tzinfo=timezone.utc)) == date(2024, 3, 8)
+    assert last_completed_session(datetime(2024, 3, 11, 20, 30, tzinfo=timezone.utc)) == date(2024, 3, 11)
@@ -0,0 +1,143 @@
+"""Delta snapshot store round trips under every PRICE_STORAGE mode."""
+import os
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import settings
+from app.models.types import PRICE_STORAGE_MODES
+from app.services.options_delta_store import KEY_COLUMNS, QUOTE_COLUMNS, OptionsDeltaStore
+
+BACKEND = Path(__file__).resolve().parents[1]
+NEAR, FAR = date(2024, 3, 15), date(2024, 4, 19)
+
+
+def quote(index: int) -> dict:
+    """Quote with the precision every storage mode keeps (cents, 4-decimal IV)."""
+    bid = round(1.0 + 0.25 * index, 2)
+    return {
+        "bid": bid, "ask": round(bid + 0.1, 2), "last": round(bid + 0.05, 2),
+        "volume": 10 * index, "open_interest": 100 + index, "implied_volatility": round(0.2 + 0.0025 * index, 4),
+    }
+
+
+def requote(chain: dict, keys, step: float = 0.05) -> None:
+    for key in keys:
+        bid = round(chain[key]["bid"] + step, 2)
+        chain[key] = {**chain[key], "bid": bid, "ask": round(bid + 0.1, 2), "volume": chain[key]["volume"] + 1}
+
+
+def captures() -> list:
+    """
+    Fourteen captures over two UTC days with OPTIONS_KEYFRAME_INTERVAL=4.
+    
+    Returns:
+        List of (timestamp, underlying price, chain frame, expected keyframe)
+    """
+    chain = {
+        (expiration, strike, option_type): None
+        for expiration in (NEAR, FAR) for strike in (90.0, 95.0, 100.0, 105.0) for option_type in ("C", "P")
+    }
+    for index, key in enumerate(chain):
+        chain[key] = quote(index)
+    chain[(FAR, 90.0, "C")]["last"] = np.nan  # Never traded
+    keys = list(chain)
+    removed = keys[3]
+    
+    steps = [
+        (True, lambda: None),                                               # first capture
+        (False, lambda: requote(chain, keys[:2])),
+        (False, lambda: chain.pop(removed)),                                # contract leaves the chain
+        (False, lambda: (requote(chain, keys[5:6]), chain.__setitem__((NEAR, 110.0, "C"), quote(40)))),
+        (True, lambda: requote(chain, keys[6:7])),                          # interval rollover
+        (False, lambda: chain.__setitem__(removed, quote(41))),             # and comes back
+        (False, lambda: requote(chain, keys[7:8], step=-0.05)),
+        (True, lambda: requote(chain, keys[8:9])),                          # new UTC day
+        (False, lambda: (requote(chain, keys[9:10]), chain.pop(keys[10]), chain.pop(keys[11]))),
+        (True, lambda: requote(chain, [key for key in chain][:12])),        # most of the chain changed
+        (False, lambda: requote(chain, keys[12:13])),
+        (False, lambda: None),                                              # nothing changed
+        (False, lambda: (requote(chain, keys[13:14]), chain.pop(keys[14]))),
+        (True, lambda: requote(chain, keys[15:16])),                        # interval rollover
+    ]
+    start = datetime(2024, 3, 4, 14, 30)
+    result = []
+    for index, (keyframe, change) in enumerate(steps):
+        change()
+        timestamp = start + timedelta(minutes=30 * index) if index < 7 else start + timedelta(days=1, minutes=30 * index)
+        frame = pd.DataFrame(
+            [{"expiration_date": key[0], "strike": key[1], "option_type": key[2], **values} for key, values in chain.items()]
+        )
+        result.append((timestamp, 100.0 + 0.25 * index, frame, keyframe))
+    return result
+
+
+def normalized(frame: pd.DataFrame, timestamped: bool = False) -> pd.DataFrame:
+    """Chain (or range) columns with comparable dtypes in a fixed order."""
+    extra = ["timestamp", "underlying_price"] if timestamped else []
+    frame = frame[[*extra, *KEY_COLUMNS, *QUOTE_COLUMNS]].copy()
+    frame["expiration_date"] = pd.to_datetime(frame["expiration_date"]).dt.date
+    for column in ["strike", *QUOTE_COLUMNS, *extra[1:]]:
+        frame[column] = pd.to_numeric(frame[column]).astype(float)
+    if timestamped:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"]).astype("datetime64[ns]")
+    return frame.sort_values([*extra[:1], "expiration_date", "option_type", "strike"], ignore_index=True)
+
+
+def expected_range(stored: list, start: datetime, end: datetime) -> pd.DataFrame:
+    frames = [
+        frame.assign(timestamp=timestamp, underlying_price=spot)
+        for timestamp, spot, frame, _ in stored if start <= timestamp <= end
+    ]
+    return normalized(pd.concat(frames, ignore_index=True), timestamped=True)
+
+
+@pytest.mark.parametrize("mode", PRICE_STORAGE_MODES)
+def test_round_trip(mode, db, monkeypatch):
+    if mode != settings.PRICE_STORAGE:
+        # Column types are fixed when the models are imported; run this mode in a fresh interpreter
+        completed = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", f"{__file__}::test_round_trip[{mode}]"],
+            cwd=BACKEND, env={**os.environ, "PRICE_STORAGE": mode}, capture_output=True, text=True,
+        )
+        assert completed.returncode == 0, completed.stdout + completed.stderr
+        return
+    
+    monkeypatch.setattr(settings, "OPTIONS_KEYFRAME_INTERVAL", 4)
+    OptionsDeltaStore._state.clear()
+    stored = captures()
+    
+    keyframes = []
+    for timestamp, spot, frame, _ in stored:
+        result = OptionsDeltaStore.store(db, "TEST", frame, spot, timestamp)
+        keyframes.append(result["keyframe"])
+        assert result["contracts"] == len(frame)
+    assert keyframes == [keyframe for *_, keyframe in stored]
+    
+    for timestamp, spot, frame, _ in stored:
+        for at in (timestamp, timestamp + timedelta(minutes=10)):
+            snapshot_time, underlying_price, chain = OptionsDeltaStore.raw_chain(db, "TEST", at)
+            assert (snapshot_time, underlying_price) == (timestamp, spot)
+            pd.testing.assert_frame_equal(normalized(chain), normalized(frame))
+    assert OptionsDeltaStore.raw_chain(db, "TEST", stored[0][0] - timedelta(seconds=1)) is None
+    
+    # Starts inside a group, at a keyframe, and on the second day
+    for start_index, end_index in ((2, None), (4, None), (5, 10), (8, 12)):
+        start = stored[start_index][0]
+        end = stored[end_index][0] if end_index is not None else None
+        frame = OptionsDeltaStore.read_range(db, "TEST", start=start, end=end)
+        pd.testing.assert_frame_equal(
+            normalized(frame, timestamped=True), expected_range(stored, start, end or datetime.max)
+        )
+    
+    # Without the in-memory state the next capture is diffed against the stored chain
+    OptionsDeltaStore._state.clear()
+    timestamp, spot, frame, _ = stored[-1]
+    result = OptionsDeltaStore.store(db, "TEST", frame, spot, timestamp + timedelta(minutes=30))
+    assert (result["stored"], result["removed"], result["keyframe"]) == (0, 0, False)
+    
+    with pytest.raises(ValueError, match="is not after the latest one"):
+        OptionsDeltaStore.store(db, "TEST", frame, spot, timestamp)
@@ -0,0 +1,75 @@
+"""Captured options snapshots and stored-chain lookups."""
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.services.market_data_service import MarketDataService
+from app.services.options_delta_store import OptionsDeltaStore
+
+URL = "/api/v1/market-data/options/TEST"
+TODAY = datetime.now(timezone.utc).date()
+NEAR, FAR = TODAY + timedelta(days=30), TODAY + timedelta(days=60)
+
+
+def chain_frame(expirations=(NEAR, FAR)) -> pd.DataFrame:
+    """One call and one put at 100 per expiration."""
+    return pd.DataFrame([
+        {
+            "expiration_date": expiration, "strike": 100.0, "option_type": option_type,
+            "bid": 2.0, "ask": 2.2, "last": 2.1, "volume": 10, "open_interest": 100, "implied_volatility": 0.25,
+        }
+        for expiration in expirations for option_type in ("C", "P")
+    ])
+
+
+@pytest.fixture
+def live_chain(monkeypatch):
+    """Serve chain_frame() as the live chain."""
+    def fetch_options_frame(symbol: str, expiration_date: Optional[date] = None) -> pd.DataFrame:
+        return chain_frame([expiration_date] if expiration_date else (NEAR, FAR))
+    
+    monkeypatch.setattr(MarketDataService, "fetch_options_frame", staticmethod(fetch_options_frame))
+    monkeypatch.setattr(MarketDataService, "fetch_underlying_price", staticmethod(lambda symbol: 100.0))
+
+
+@pytest.mark.parametrize("store", ["rows", "delta"])
+def test_capture_limited_to_one_expiration_is_not_stored(db, live_chain, monkeypatch, store):
+    monkeypatch.setattr(settings, "OPTIONS_SNAPSHOT_STORE", store)
+    OptionsDeltaStore._state.clear()
+    client = TestClient(app)
+    
+    full = MarketDataService.capture_options_snapshot(db, "TEST")
+    filtered = client.get(URL, params={"expiration_date": FAR.isoformat()}).json()
+    
+    assert full[3] == 4
+    assert filtered["count"] == 2 and filtered["expirations"] == [FAR.isoformat()]
+    at = (datetime.now(timezone.utc) + timedelta(minutes=1)).replace(tzinfo=None).isoformat()
+    stored = client.get(URL, params={"timestamp": at}).json()
+    assert stored["count"] == 4
+    assert stored["timestamp"].startswith(full[0].replace(tzinfo=None).isoformat()[:19])
+    near = client.get(URL, params={"timestamp": at, "expiration_date": NEAR.isoformat()}).json()
+    assert near["count"] == 2
+    
+    # The next full capture diffs against the full chain: nothing changed, nothing removed
+    if store == "delta":
+        counts = OptionsDeltaStore.store(db, "TEST", chain_frame(), 100.0, datetime.now(timezone.utc))
+        assert (counts["stored"], counts["removed"]) == (0, 0)
+
+
+def test_expiration_lookup_takes_the_latest_snapshot_holding_it(db):
+    # A later snapshot without the NEAR expiration, e.g. one stored before filtered captures were skipped
+    t1, t2 = datetime(2024, 3, 1, 15, 0), datetime(2024, 3, 1, 15, 30)
+    MarketDataService.store_options_snapshot(db, "TEST", chain_frame(), underlying_price=100.0, timestamp=t1)
+    MarketDataService.store_options_snapshot(db, "TEST", chain_frame([FAR]), underlying_price=101.0, timestamp=t2)
+    
+    near = MarketDataService.get_options_snapshot(db, "TEST", datetime(2024, 3, 1, 16, 0), expiration_date=NEAR)
+    far = MarketDataService.get_options_snapshot(db, "TEST", datetime(2024, 3, 1, 16, 0), expiration_date=FAR)
+    
+    assert [(row.timestamp.replace(tzinfo=None), row.expiration_date) for row in near] == [(t1, NEAR)] * 2
+    assert [(row.timestamp.replace(tzinfo=None), row.underlying_price) for row in far] == [(t2, 101.0)] * 2
+    response = TestClient(app).get(URL, params={"timestamp": "2024-03-01T16:00:00", "expiration_date": NEAR.isoformat()})
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
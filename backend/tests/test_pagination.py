@@ -0,0 +1,120 @@
+"""Keyset pages of stored prices and their cursor tokens."""
+import base64
+from datetime import date, datetime, timezone
+import orjson
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.market_data_service import MarketDataService
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+URL = "/api/v1/market-data/stocks/TEST"
+# 2024-01-02 .. 2024-02-12: 30 weekdays
+DAYS = pd.bdate_range("2024-01-02", periods=30, tz="UTC")
+
+
+@pytest.fixture
+def prices(db):
+    """Thirty daily TEST bars; returns their timestamps newest first."""
+    MarketDataService.upsert_price_records(db, "TEST", [
+        {"timestamp": day.to_pydatetime(), "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i,
+         "close": 100.0 + i, "volume": 1000 + i}
+        for i, day in enumerate(DAYS)
+    ])
+    return [day.to_pydatetime().replace(tzinfo=None) for day in DAYS[::-1]]
+
+
+def stamps(rows) -> list:
+    return [row.timestamp.replace(tzinfo=None) for row in rows]
+
+
+def walk_older(db, limit: int, **filters) -> list:
+    """Every page from the newest, following next_cursor."""
+    pages, cursor = [], None
+    while True:
+        rows, cursor, prev_cursor = MarketDataService.get_stock_price_page(db, "TEST", limit=limit, cursor=cursor, **filters)
+        pages.append((stamps(rows), cursor, prev_cursor))
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 7, 10, 29, 30, 100])
+def test_older_pages_cover_every_row_once(prices, db, limit):
+    pages = walk_older(db, limit)
+    
+    assert [stamp for page, _, _ in pages for stamp in page] == prices
+    assert len(pages) == -(-len(prices) // limit)
+    assert all(len(page) == limit for page, _, _ in pages[:-1])
+    # No newer page before the first, none older after the last
+    assert pages[0][2] is None
+    assert all(prev_cursor is not None for _, _, prev_cursor in pages[1:])
+    assert pages[-1][1] is None
+
+
+def test_prev_cursor_returns_the_page_before(prices, db):
+    pages = walk_older(db, 7)
+    
+    for position in range(len(pages) - 1, 0, -1):
+        rows, next_cursor, prev_cursor = MarketDataService.get_stock_price_page(db, "TEST", limit=7, cursor=pages[position][2])
+        assert stamps(rows) == pages[position - 1][0]
+        # From a page reached backwards, both directions keep working
+        assert next_cursor is not None
+        assert stamps(MarketDataService.get_stock_price_page(db, "TEST", limit=7, cursor=next_cursor)[0]) == pages[position][0]
+        assert (prev_cursor is None) == (position == 1)
+
+
+def test_pages_respect_date_filters(prices, db):
+    filters = {"start_date": date(2024, 1, 10), "end_date": date(2024, 1, 25)}
+    
+    pages = walk_older(db, 5, **filters)
+    
+    expected = [stamp for stamp in prices if date(2024, 1, 10) <= stamp.date() <= date(2024, 1, 25)]
+    assert [stamp for page, _, _ in pages for stamp in page] == expected
+    assert len(expected) == 12
+    rows, next_cursor, prev_cursor = MarketDataService.get_stock_price_page(db, "TEST", limit=5, cursor=pages[1][2], **filters)
+    assert stamps(rows) == pages[0][0] and prev_cursor is None
+    assert MarketDataService.get_stock_price_page(db, "TEST", limit=5, start_date=date(2025, 1, 1)) == ([], None, None)
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2024, 3, 4, 14, 30, 15, 250000, tzinfo=timezone.utc)
+    
+    token = encode_cursor("TEST", timestamp, "newer")
+    
+    assert "=" not in token and "/" not in token and "+" not in token
+    assert decode_cursor(token, "TEST") == (timestamp, "newer")
+
+
+@pytest.mark.parametrize("payload, message", [
+    (b"not json", "Malformed cursor"),
+    (orjson.dumps({"s": "TEST", "t": "yesterday", "d": "older"}), "Malformed cursor"),
+    (orjson.dumps({"s": "TEST", "d": "older"}), "Malformed cursor"),
+    (orjson.dumps({"s": "TEST", "t": "2024-03-04T00:00:00", "d": "sideways"}), "Unknown cursor direction"),
+    (orjson.dumps({"s": "SPY", "t": "2024-03-04T00:00:00", "d": "older"}), "belongs to SPY"),
+])
+def test_invalid_cursors_are_rejected(payload, message):
+    token = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    
+    with pytest.raises(InvalidCursor, match=message):
+        decode_cursor(token, "TEST")
+
+
+def test_api_pages_and_rejects_bad_cursors(prices):
+    client = TestClient(app)
+    
+    first = client.get(URL, params={"limit": 12}).json()
+    second = client.get(URL, params={"limit": 12, "cursor": first["next_cursor"]}).json()
+    back = client.get(URL, params={"limit": 12, "cursor": second["prev_cursor"]}).json()
+    
+    assert [row["timestamp"] for row in back["data"]] == [row["timestamp"] for row in first["data"]]
+    assert first["prev_cursor"] is None and second["count"] == 12
+    older = [datetime.fromisoformat(row["timestamp"]).replace(tzinfo=None) for row in first["data"] + second["data"]]
+    assert older == prices[:24]
+    assert client.get(URL, params={"cursor": "%%%"}).status_code == 400
+    response = client.get(URL.replace("TEST", "SPY"), params={"cursor": first["next_cursor"]})
+    assert response.status_code == 400 and "belongs to TEST" in response.json()["detail"]
+    assert client.get(URL, params={"cursor": first["next_cursor"], "format": "csv"}).status_code == 400
+    # Without limit or cursor every row comes back unpaged
+    unpaged = client.get(URL).json()
+    assert unpaged["count"] == 30 and unpaged["next_cursor"] is None
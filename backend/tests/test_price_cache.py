@@ -0,0 +1,152 @@
+"""Cached price series kept equal to the database across writes."""
+from datetime import date
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from app.config import settings
+from app.services.market_data_service import MarketDataService
+from app.services.price_cache import PriceSeriesCache
+from app.services.price_export import EXPORT_COLUMNS, PriceExportService
+
+# 2023-01-02 to 2023-12-29
+DAYS = pd.bdate_range("2023-01-02", "2023-12-29", tz="UTC")
+
+
+def bars(days, offset: float = 0.0) -> list:
+    return [
+        {
+            "timestamp": day.to_pydatetime(), "open": 100.0 + offset + i, "high": 101.0 + offset + i,
+            "low": 99.0 + offset + i, "close": 100.5 + offset + i, "volume": 1000 + i,
+        }
+        for i, day in enumerate(days)
+    ]
+
+
+def assert_cache_matches_database(db, symbol: str = "TEST") -> None:
+    """Cached ranges equal what read_columns returns from the database."""
+    for start_date, end_date in ((None, None), (date(2023, 3, 1), date(2023, 3, 31)), (date(2023, 12, 1), None)):
+        cached = PriceSeriesCache.get_range(db, symbol, start_date, end_date)
+        stored = PriceExportService.read_columns(db, symbol, start_date, end_date)
+        for column in EXPORT_COLUMNS:
+            np.testing.assert_array_equal(cached[column], stored[column], err_msg=column)
+
+
+@pytest.fixture(autouse=True)
+def cache_stats(db, monkeypatch):
+    """Counters starting at zero once the database (and with it the cache) is reset."""
+    monkeypatch.setattr(PriceSeriesCache, "_stats", {"hits": 0, "misses": 0, "appends": 0, "invalidations": 0})
+
+
+@pytest.fixture
+def cached(db):
+    """A year of TEST bars, loaded into the cache."""
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[:-20]))
+    PriceSeriesCache.get_range(db, "TEST")
+    assert PriceSeriesCache.cache_info()["size"] == 1
+    return db
+
+
+def test_writes_near_the_end_are_spliced_on(cached):
+    db = cached
+    
+    # New bars, then a correction of the last few with one more new bar
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[-20:-10]))
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[-12:-9], offset=5.0))
+    
+    info = PriceSeriesCache.cache_info()
+    assert (info["size"], info["appends"], info["invalidations"], info["misses"]) == (1, 2, 0, 1)
+    assert_cache_matches_database(db)
+    assert PriceSeriesCache.cache_info()["misses"] == 1
+    cached_close = PriceSeriesCache.get_range(db, "TEST", date(2023, 12, 1))["close"]
+    assert not cached_close.flags.writeable
+
+
+def test_backfill_reaching_far_back_drops_the_series(cached):
+    db = cached
+    
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[10:200], offset=1.0))
+    
+    info = PriceSeriesCache.cache_info()
+    assert (info["size"], info["appends"], info["invalidations"]) == (0, 0, 1)
+    assert_cache_matches_database(db)
+    assert PriceSeriesCache.cache_info()["misses"] == 2
+
+
+def test_a_write_racing_a_splice_drops_the_series(cached, monkeypatch):
+    db = cached
+    read_columns = PriceExportService.read_columns
+    key = (str(db.get_bind().url), "TEST")
+    
+    def read_while_another_write_commits(*args, **kwargs):
+        columns = read_columns(*args, **kwargs)
+        with PriceSeriesCache._lock:
+            PriceSeriesCache._bump(key)
+        return columns
+    
+    monkeypatch.setattr(PriceExportService, "read_columns", staticmethod(read_while_another_write_commits))
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[-20:-15]))
+    monkeypatch.setattr(PriceExportService, "read_columns", staticmethod(read_columns))
+    
+    assert PriceSeriesCache.cache_info()["size"] == 0
+    assert PriceSeriesCache.cache_info()["appends"] == 0
+    assert_cache_matches_database(db)
+
+
+def test_a_write_during_a_load_keeps_the_series_out_of_the_cache(db, monkeypatch):
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[:50]))
+    read_columns = PriceExportService.read_columns
+    
+    def read_then_write(*args, **kwargs):
+        columns = read_columns(*args, **kwargs)
+        monkeypatch.setattr(PriceExportService, "read_columns", staticmethod(read_columns))
+        MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[50:55]))
+        return columns
+    
+    monkeypatch.setattr(PriceExportService, "read_columns", staticmethod(read_then_write))
+    first = PriceSeriesCache.get_range(db, "TEST")
+    
+    # The read served what it loaded, but the stale series is not kept
+    assert len(first["timestamp"]) == 50
+    assert PriceSeriesCache.cache_info()["size"] == 0
+    assert len(PriceSeriesCache.get_range(db, "TEST")["timestamp"]) == 55
+    assert_cache_matches_database(db)
+
+
+def test_least_recently_used_series_are_evicted_over_the_budget(db, monkeypatch):
+    for symbol in ("AAA", "BBB", "CCC"):
+        MarketDataService.upsert_price_records(db, symbol, bars(DAYS[:100]))
+    size = sum(array.nbytes for array in PriceExportService.read_columns(db, "AAA").values())
+    monkeypatch.setattr(settings, "PRICE_CACHE_MAX_MB", (2 * size + size // 2) / (1024 * 1024))
+    
+    for symbol in ("AAA", "BBB", "AAA", "CCC"):
+        PriceSeriesCache.get_range(db, symbol)
+    
+    info = PriceSeriesCache.cache_info()
+    assert (info["size"], info["bytes"], info["hits"], info["misses"]) == (2, 2 * size, 1, 3)
+    PriceSeriesCache.get_range(db, "AAA")
+    PriceSeriesCache.get_range(db, "BBB")
+    assert (PriceSeriesCache.cache_info()["hits"], PriceSeriesCache.cache_info()["misses"]) == (2, 4)
+    
+    # Larger than the budget: read from the database and not kept
+    monkeypatch.setattr(settings, "PRICE_CACHE_MAX_MB", (size // 2) / (1024 * 1024))
+    PriceSeriesCache.invalidate()
+    assert len(PriceSeriesCache.get_range(db, "AAA", date(2023, 2, 1), date(2023, 2, 28))["timestamp"]) == 20
+    assert PriceSeriesCache.cache_info()["size"] == 0
+
+
+def test_series_are_reloaded_after_the_ttl(cached, monkeypatch):
+    db = cached
+    now = SimpleNamespace(value=PriceSeriesCache._cache[(str(db.get_bind().url), "TEST")].loaded_at)
+    monkeypatch.setattr("app.services.price_cache.time", SimpleNamespace(monotonic=lambda: now.value))
+    monkeypatch.setattr(settings, "PRICE_CACHE_TTL", 60)
+    
+    now.value += 60
+    PriceSeriesCache.get_range(db, "TEST")
+    # A splice keeps the age of the original load
+    MarketDataService.upsert_price_records(db, "TEST", bars(DAYS[-20:-19]))
+    now.value += 1
+    PriceSeriesCache.get_range(db, "TEST")
+    
+    info = PriceSeriesCache.cache_info()
+    assert (info["hits"], info["misses"], info["appends"]) == (1, 2, 1)
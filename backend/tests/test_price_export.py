@@ -0,0 +1,130 @@
+"""Columnar JSON, Arrow IPC and CSV price encoders and /stocks content negotiation."""
+import io
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.market_data_service import MarketDataService
+from app.services.price_export import EXPORT_COLUMNS, MEDIA_TYPES, PriceExportService, pa
+
+URL = "/api/v1/market-data/stocks/TEST"
+requires_arrow = pytest.mark.skipif(pa is None, reason="pyarrow is not installed")
+
+
+@pytest.fixture
+def stored(db):
+    """Sixty intraday TEST bars with cent prices and large volumes; returns them newest first."""
+    index = pd.date_range("2024-03-04 14:30", periods=60, freq="15min", tz="UTC")
+    MarketDataService.upsert_price_records(db, "TEST", [
+        {"timestamp": timestamp.to_pydatetime(), "open": 100.01 + i, "high": 101.37 + i, "low": 99.99 + i,
+         "close": 100.49 + i / 100, "volume": 3_000_000_000 + i}
+        for i, timestamp in enumerate(index)
+    ])
+    return {column: values[::-1] for column, values in PriceExportService.read_columns(db, "TEST").items()}
+
+
+def assert_columns_equal(actual: dict, expected: dict) -> None:
+    for column in EXPORT_COLUMNS:
+        np.testing.assert_array_equal(np.asarray(actual[column]), expected[column], err_msg=column)
+
+
+def decode_columnar(body: bytes) -> dict:
+    payload = orjson.loads(body)
+    assert payload["columns"] == EXPORT_COLUMNS
+    data = payload["data"]
+    columns = {column: np.asarray(data[column]) for column in EXPORT_COLUMNS}
+    columns["timestamp"] = columns["timestamp"].astype("int64").astype("datetime64[ms]")
+    return {**payload, "columns": columns}
+
+
+def decode_csv(body: bytes) -> dict:
+    frame = pd.read_csv(io.BytesIO(body), float_precision="round_trip")
+    assert list(frame.columns) == EXPORT_COLUMNS
+    assert frame["timestamp"].str.endswith("Z").all()
+    timestamps = pd.to_datetime(frame["timestamp"], utc=True).dt.tz_localize(None)
+    return {"timestamp": timestamps.to_numpy(dtype="datetime64[ms]"), **{column: frame[column].to_numpy() for column in EXPORT_COLUMNS[1:]}}
+
+
+def decode_arrow(body: bytes):
+    table = pa.ipc.open_stream(body).read_all()
+    columns = {column: table.column(column).to_numpy() for column in EXPORT_COLUMNS}
+    columns["timestamp"] = columns["timestamp"].astype("datetime64[ms]")
+    return table, columns
+
+
+def test_columnar_json_round_trips(db, stored):
+    chunks = PriceExportService.iter_chunks(db, "TEST", chunk_size=7)
+    
+    payload = decode_columnar(PriceExportService.encode_columnar_json("TEST", chunks, meta={"bucket": "15m"}))
+    
+    assert (payload["symbol"], payload["bucket"], payload["count"]) == ("TEST", "15m", 60)
+    assert_columns_equal(payload["columns"], stored)
+    assert payload["columns"]["volume"].dtype == np.int64
+    empty = orjson.loads(PriceExportService.encode_columnar_json("NONE", iter(())))
+    assert empty["count"] == 0 and all(empty["data"][column] == [] for column in EXPORT_COLUMNS)
+
+
+def test_csv_round_trips_with_one_header(db, stored):
+    pieces = list(PriceExportService.iter_csv(PriceExportService.iter_chunks(db, "TEST", chunk_size=7)))
+    
+    assert len(pieces) == 1 + 9
+    assert b"".join(pieces).count(b"timestamp") == 1
+    assert_columns_equal(decode_csv(b"".join(pieces)), stored)
+    assert b"".join(PriceExportService.iter_csv(iter(()))) == b"timestamp,open,high,low,close,volume\n"
+
+
+@requires_arrow
+def test_arrow_stream_round_trips_one_batch_per_chunk(db, stored):
+    pieces = list(PriceExportService.iter_arrow(PriceExportService.iter_chunks(db, "TEST", chunk_size=7)))
+    
+    table, columns = decode_arrow(b"".join(pieces))
+    
+    assert table.schema.field("timestamp").type == pa.timestamp("ms", tz="UTC")
+    assert table.schema.field("volume").type == pa.int64()
+    assert len(pa.ipc.open_stream(b"".join(pieces)).read_all().to_batches()) == 9
+    assert_columns_equal(columns, stored)
+    # Every piece ends on a message boundary, so a client can read the batches received so far
+    end_of_stream = pieces[-1]
+    for received in range(2, len(pieces)):
+        assert pa.ipc.open_stream(b"".join(pieces[:received]) + end_of_stream).read_all().num_rows == min(7 * (received - 1), 60)
+    assert pa.ipc.open_stream(b"".join(PriceExportService.iter_arrow(iter(())))).read_all().num_rows == 0
+
+
+@pytest.mark.parametrize("output", ["json", "columnar", "arrow", "csv"])
+def test_stocks_negotiates_the_format_from_accept_or_format(stored, output):
+    if output == "arrow" and pa is None:
+        pytest.skip("pyarrow is not installed")
+    client = TestClient(app)
+    
+    by_accept = client.get(URL, params={"limit": 25}, headers={"Accept": f"{MEDIA_TYPES[output]}, */*;q=0.1"})
+    by_format = client.get(URL, params={"limit": 25, "format": output}, headers={"Accept": MEDIA_TYPES["csv"]})
+    
+    expected = {column: values[:25] for column, values in stored.items()}
+    for response in (by_accept, by_format):
+        assert response.status_code == 200
+        assert response.headers["content-type"].split(";")[0] == MEDIA_TYPES[output]
+        if output == "json":
+            rows = response.json()["data"]
+            columns = {
+                "timestamp": pd.to_datetime([row["timestamp"] for row in rows], utc=True).tz_localize(None).to_numpy(dtype="datetime64[ms]"),
+                **{column: np.array([row[column] for row in rows]) for column in EXPORT_COLUMNS[1:]},
+            }
+        elif output == "columnar":
+            columns = decode_columnar(response.content)["columns"]
+        elif output == "csv":
+            columns = decode_csv(response.content)
+        else:
+            columns = decode_arrow(response.content)[1]
+        assert_columns_equal(columns, expected)
+
+
+def test_stocks_defaults_to_json_and_refuses_arrow_without_pyarrow(stored, monkeypatch):
+    client = TestClient(app)
+    
+    assert client.get(URL, headers={"Accept": "text/html"}).headers["content-type"] == "application/json"
+    assert client.get(URL).json()["count"] == 60
+    assert client.get(URL, params={"format": "xml"}).status_code == 422
+    monkeypatch.setattr(PriceExportService, "arrow_available", staticmethod(lambda: False))
+    assert client.get(URL, params={"format": "arrow"}).status_code == 406
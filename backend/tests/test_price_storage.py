@@ -0,0 +1,56 @@
+"""Startup check of stored price column types against PRICE_STORAGE."""
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+import app.main
+from app.config import settings
+from app.models.types import verify_price_storage
+
+COLUMN_TYPES = {"numeric": sa.Numeric(10, 2), "double": sa.Double(), "scaled": sa.BigInteger()}
+
+
+def engine_with_close(column_type) -> sa.engine.Engine:
+    """In-memory database whose stock_prices.close has the given type."""
+    # One shared connection: the app's startup runs on another thread
+    engine = sa.create_engine(
+        "sqlite://", poolclass=sa.pool.StaticPool, connect_args={"check_same_thread": False}
+    )
+    metadata = sa.MetaData()
+    sa.Table(
+        "stock_prices", metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("close", column_type),
+    )
+    metadata.create_all(engine)
+    return engine
+
+
+@pytest.mark.parametrize("mode", sorted(COLUMN_TYPES))
+def test_matching_column_type_passes(monkeypatch, mode):
+    monkeypatch.setattr(settings, "PRICE_STORAGE", mode)
+    verify_price_storage(engine_with_close(COLUMN_TYPES[mode]))
+
+
+@pytest.mark.parametrize("mode,stored", [
+    (mode, stored) for mode in sorted(COLUMN_TYPES) for stored in sorted(COLUMN_TYPES) if mode != stored
+])
+def test_mismatched_column_type_raises(monkeypatch, mode, stored):
+    monkeypatch.setattr(settings, "PRICE_STORAGE", mode)
+    with pytest.raises(RuntimeError, match=f"PRICE_STORAGE={stored}"):
+        verify_price_storage(engine_with_close(COLUMN_TYPES[stored]))
+
+
+def test_missing_table_is_skipped():
+    verify_price_storage(sa.create_engine("sqlite://"))
+
+
+def test_app_refuses_to_start_on_mismatch(db, monkeypatch):
+    # The test schema is created from the models, so it matches
+    with TestClient(app.main.app) as client:
+        assert client.get("/health").status_code == 200
+    
+    other = next(mode for mode in COLUMN_TYPES if mode != settings.PRICE_STORAGE)
+    monkeypatch.setattr(app.main, "engine", engine_with_close(COLUMN_TYPES[other]))
+    with pytest.raises(RuntimeError, match="stock_prices.close"):
+        with TestClient(app.main.app):
+            pass
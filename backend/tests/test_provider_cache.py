@@ -0,0 +1,186 @@
+"""ProviderCache tiers, expiry and single-flight loading."""
+import threading
+import time
+import fakeredis
+import pandas as pd
+import pytest
+from app.services import provider_cache as provider_cache_module
+from app.services.provider_cache import REDIS_KEY_PREFIX, ProviderCache
+
+
+class Clock:
+    """Stands in for the time module so entries can be aged by hand."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(provider_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+class Loader:
+    """Counting loader returning a fixed value."""
+    
+    def __init__(self, value="payload"):
+        self.value = value
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_single_flight_loads_once_for_concurrent_callers():
+    cache = ProviderCache(max_entries=8)
+    callers = 8
+    calls = []
+    
+    def loader():
+        calls.append(1)
+        # Hold the load open until every other caller is waiting on it
+        deadline = time.monotonic() + 5
+        while cache.stats()["coalesced"] < callers - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return "payload"
+    
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)))
+        for _ in range(callers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert results == ["payload"] * callers
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == callers - 1
+
+
+def test_single_flight_shares_loader_errors():
+    cache = ProviderCache(max_entries=8)
+    
+    def loader():
+        raise RuntimeError("provider down")
+    
+    with pytest.raises(RuntimeError, match="provider down"):
+        cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    assert cache.stats()["load_errors"] == 1
+    # Failures are not cached
+    assert cache.get_or_load("quote:AAPL", Loader(), "quote", ttl=60) == "payload"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ProviderCache(max_entries=8)
+    loader = Loader()
+    
+    cache.get_or_load("chain:AAPL", loader, "chain", ttl=30)
+    clock.now += 29
+    cache.get_or_load("chain:AAPL", loader, "chain", ttl=30)
+    assert loader.calls == 1
+    
+    clock.now += 1
+    cache.get_or_load("chain:AAPL", loader, "chain", ttl=30)
+    assert loader.calls == 2
+    assert cache.stats()["local_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_empty_results_are_not_cached():
+    cache = ProviderCache(max_entries=8)
+    loader = Loader(pd.DataFrame())
+    
+    cache.get_or_load("history:AAPL", loader, "history", ttl=60)
+    cache.get_or_load("history:AAPL", loader, "history", ttl=60)
+    
+    assert loader.calls == 2
+    assert cache.stats()["local_entries"] == 0
+
+
+def test_redis_tier_serves_entries_evicted_locally(redis_client):
+    cache = ProviderCache(max_entries=2, redis_client=redis_client)
+    loader = Loader()
+    
+    cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    cache.get_or_load("quote:MSFT", Loader("msft"), "quote", ttl=60)
+    cache.get_or_load("quote:SPY", Loader("spy"), "quote", ttl=60)  # evicts AAPL locally
+    assert 0 < redis_client.ttl(REDIS_KEY_PREFIX + "quote:AAPL") <= 60
+    
+    assert cache.get_or_load("quote:AAPL", loader, "quote", ttl=60) == "payload"
+    assert loader.calls == 1
+    stats = cache.stats()
+    assert stats["redis_hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["redis_enabled"] is True
+    
+    # The Redis hit was copied back into the local tier
+    cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    assert cache.stats()["local_hits"] == 1
+
+
+def test_redis_tier_is_shared_between_processes(redis_client):
+    first = ProviderCache(max_entries=8, redis_client=redis_client)
+    second = ProviderCache(max_entries=8, redis_client=redis_client)
+    loader = Loader({"bid": 1.0})
+    
+    first.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    
+    assert second.get_or_load("quote:AAPL", loader, "quote", ttl=60) == {"bid": 1.0}
+    assert loader.calls == 1
+
+
+def test_peek_and_put(redis_client):
+    cache = ProviderCache(max_entries=1, redis_client=redis_client)
+    
+    assert cache.peek("history:AAPL", "history") == (False, None)
+    cache.put("history:AAPL", "aapl", "history", ttl=60)
+    cache.put("history:EMPTY", [], "history", ttl=60)
+    assert cache.peek("history:AAPL", "history") == (True, "aapl")
+    assert cache.peek("history:EMPTY", "history") == (False, None)
+    
+    cache.put("history:MSFT", "msft", "history", ttl=60)  # evicts AAPL locally
+    assert cache.peek("history:AAPL", "history") == (True, "aapl")
+    
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["redis_hits"], stats["misses"]) == (1, 1, 0)
+    
+    cache.invalidate("history:AAPL")
+    assert cache.peek("history:AAPL", "history") == (False, None)
+
+
+def test_disabled_cache_always_loads():
+    cache = ProviderCache(max_entries=8, enabled=False)
+    loader = Loader()
+    
+    cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    cache.put("quote:MSFT", "msft", "quote", ttl=60)
+    cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    
+    assert loader.calls == 2
+    assert cache.peek("quote:MSFT", "quote") == (False, None)
+
+
+def test_hit_ratio():
+    cache = ProviderCache(max_entries=8)
+    loader = Loader()
+    for _ in range(4):
+        cache.get_or_load("quote:AAPL", loader, "quote", ttl=60)
+    
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["misses"]) == (3, 1)
+    assert stats["hit_ratio"] == 0.75
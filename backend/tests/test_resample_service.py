@@ -0,0 +1,149 @@
+"""Database resampling against pandas and LTTB against a reference loop."""
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.market_data_service import MarketDataService
+from app.services.resample_service import ResampleService, lttb_indices
+
+# pandas rules with the same bucket starts as ResampleService.bucket_expression
+PANDAS_RULES = {
+    "15m": ("15min", "epoch"), "1h": ("1h", "epoch"), "4h": ("4h", "epoch"), "1d": ("1D", "epoch"),
+    "1wk": ("W-MON", None), "1mo": ("MS", None),
+}
+
+
+def reference_lttb(x, y, threshold: int) -> list:
+    """Steinarsson's LTTB written out point by point."""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected, previous = [0], 0
+    for bucket in range(threshold - 2):
+        start, end = int(bucket * every) + 1, int((bucket + 1) * every) + 1
+        next_start, next_end = end, min(int((bucket + 2) * every) + 1, n)
+        if bucket == threshold - 3:
+            next_start, next_end = n - 1, n
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        areas = [
+            abs((x[previous] - avg_x) * (y[i] - y[previous]) - (x[previous] - x[i]) * (avg_y - y[previous]))
+            for i in range(start, end)
+        ]
+        previous = start + areas.index(max(areas))
+        selected.append(previous)
+    return selected + [n - 1]
+
+
+def intraday_frame(seed: int = 3) -> pd.DataFrame:
+    """Five-minute bars over six weeks with random gaps, spanning week and month ends."""
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2024-02-19", "2024-03-29")
+    stamps = [
+        day + pd.Timedelta(hours=14, minutes=30) + pd.Timedelta(minutes=5 * step)
+        for day in sessions for step in range(78)
+    ]
+    index = pd.DatetimeIndex(stamps, tz="UTC")[rng.random(len(stamps)) < 0.8]
+    close = np.round(100.0 + np.cumsum(rng.normal(0, 0.2, len(index))), 2)
+    open_ = np.round(close + rng.normal(0, 0.05, len(index)), 2)
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.round(np.maximum(open_, close) + 0.1, 2),
+        "low": np.round(np.minimum(open_, close) - 0.1, 2),
+        "close": close,
+        "volume": rng.integers(100, 10_000, len(index)),
+    }, index=index)
+
+
+def store(db, frame: pd.DataFrame) -> None:
+    MarketDataService.upsert_price_records(db, "TEST", [
+        {"timestamp": timestamp.to_pydatetime(), **row} for timestamp, row in zip(frame.index, frame.to_dict("records"))
+    ])
+
+
+def pandas_resample(frame: pd.DataFrame, bucket: str) -> pd.DataFrame:
+    rule, origin = PANDAS_RULES[bucket]
+    options = {"origin": origin} if origin else {"label": "left", "closed": "left"}
+    resampled = frame.resample(rule, **options).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    return resampled[frame.resample(rule, **options)["close"].count() > 0]
+
+
+def test_lttb_keeps_everything_below_the_threshold():
+    x, y = np.arange(10), np.arange(10.0)
+    
+    assert list(lttb_indices(x, y, 10)) == list(range(10))
+    assert list(lttb_indices(x, y, 50)) == list(range(10))
+    assert list(lttb_indices(x, y, 2)) == list(range(10))
+    assert len(lttb_indices(x[:0], y[:0], 5)) == 0
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 7), (1000, 50), (1001, 999), (5000, 128)])
+def test_lttb_matches_the_reference_and_keeps_the_endpoints(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.integers(1, 60_000, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    
+    kept = lttb_indices(x, y, threshold)
+    
+    assert list(kept) == reference_lttb(x.astype(float).tolist(), y.tolist(), threshold)
+    assert len(kept) == threshold
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert (np.diff(kept) > 0).all()
+
+
+def test_lttb_keeps_spikes():
+    y = np.zeros(1000)
+    y[[137, 512, 880]] = [50.0, -40.0, 30.0]
+    
+    kept = lttb_indices(np.arange(1000), y, 20)
+    
+    assert {137, 512, 880} <= set(kept)
+
+
+@pytest.mark.parametrize("bucket", list(PANDAS_RULES))
+def test_resample_matches_pandas(db, bucket):
+    frame = intraday_frame()
+    store(db, frame)
+    
+    result = ResampleService.resample(db, "TEST", bucket)
+    
+    expected = pandas_resample(frame, bucket)
+    assert list(result["timestamp"]) == list(expected.index.tz_localize(None).to_numpy(dtype="datetime64[ms]"))
+    for column in ("open", "high", "low", "close"):
+        np.testing.assert_allclose(result[column], expected[column], err_msg=column)
+    assert list(result["volume"]) == list(expected["volume"])
+
+
+def test_resample_date_filters_are_inclusive_days(db):
+    frame = intraday_frame()
+    store(db, frame)
+    
+    result = ResampleService.resample(db, "TEST", "1d", date(2024, 3, 4), date(2024, 3, 8))
+    
+    expected = pandas_resample(frame["2024-03-04":"2024-03-08"], "1d")
+    assert len(result["timestamp"]) == 5
+    assert list(result["close"]) == list(expected["close"])
+    assert list(result["open"]) == list(expected["open"])
+    assert len(ResampleService.resample(db, "OTHER", "1d")["timestamp"]) == 0
+
+
+@pytest.mark.parametrize("bucket", ["2wk", "3mo", "0m", "5s"])
+def test_unsupported_buckets(db, bucket):
+    with pytest.raises(ValueError):
+        ResampleService.resample(db, "TEST", bucket)
+
+
+def test_downsample_keeps_whole_rows():
+    frame = intraday_frame()
+    columns = {
+        "timestamp": frame.index.tz_localize(None).to_numpy(dtype="datetime64[ms]"),
+        **{column: frame[column].to_numpy() for column in ("open", "high", "low", "close", "volume")},
+    }
+    
+    kept = ResampleService.downsample(columns, 300)
+    
+    positions = np.searchsorted(columns["timestamp"], kept["timestamp"])
+    assert len(positions) == 300
+    for column, values in columns.items():
+        assert list(kept[column]) == list(values[positions]), column